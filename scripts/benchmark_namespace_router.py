@@ -0,0 +1,133 @@
+import os
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ai.core.local_vector_store import LocalVectorStoreClient  # noqa: E402
+from ai.core.metadata_filter import matches_where  # noqa: E402
+from ai.core.namespace_router import NamespaceRouter  # noqa: E402
+from ai.core.retriever import Retriever  # noqa: E402
+from config.settings import settings  # noqa: E402
+
+
+def _no_embed(texts: List[str]) -> List[List[float]]:
+    raise RuntimeError("benchmark uses stored vectors as queries; embedding is not available")
+
+
+def load_corpus(snapshot_path: str, suffix: str) -> Dict[str, Dict[str, Any]]:
+    """Per-namespace normalized matrices + metadata, restricted to the retriever's where filter."""
+    store = LocalVectorStoreClient(snapshot_path=snapshot_path, embed_fn=_no_embed)
+    where = Retriever._pinecone_where_filter()
+    grouped: Dict[str, Dict[str, list]] = {}
+    for record in store.iter_records():
+        namespace = record["namespace"]
+        if suffix and not namespace.endswith(suffix):
+            continue
+        entry = grouped.setdefault(namespace, {"ids": [], "vectors": [], "metadata": [], "eligible": []})
+        entry["ids"].append(record["id"])
+        entry["vectors"].append(record["values"])
+        entry["metadata"].append(record["metadata"])
+        entry["eligible"].append(matches_where(record["metadata"], where))
+
+    corpus: Dict[str, Dict[str, Any]] = {}
+    for namespace, entry in grouped.items():
+        matrix = np.asarray(entry["vectors"], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        corpus[namespace] = {
+            "ids": entry["ids"],
+            "matrix": matrix / norms,
+            "metadata": entry["metadata"],
+            "eligible": np.asarray(entry["eligible"], dtype=bool),
+        }
+    return corpus
+
+
+def build_router(corpus: Dict[str, Dict[str, Any]]) -> NamespaceRouter:
+    router = NamespaceRouter()
+    for namespace, entry in corpus.items():
+        router.observe(namespace, entry["matrix"], entry["metadata"])
+    return router
+
+
+def top_k_ids(corpus, namespaces: List[str], query: np.ndarray, k: int, exclude: tuple) -> List[tuple]:
+    candidates: List[tuple] = []
+    for namespace in namespaces:
+        entry = corpus[namespace]
+        scores = np.where(entry["eligible"], entry["matrix"] @ query, -np.inf)
+        best = np.argsort(-scores)[: k + 1]
+        for row in best:
+            key = (namespace, entry["ids"][row])
+            if np.isfinite(scores[row]) and key != exclude:
+                candidates.append((float(scores[row]), key))
+    candidates.sort(reverse=True)
+    return [key for _, key in candidates[:k]]
+
+
+def run_benchmark(corpus, router: NamespaceRouter, *, queries: int, k: int, top_ns: List[int], margin: float, seed: int):
+    rng = np.random.default_rng(seed)
+    namespaces = sorted(corpus)
+    pool = [(ns, row) for ns in namespaces for row in range(len(corpus[ns]["ids"]))]
+    if not pool:
+        raise RuntimeError("Snapshot vazio para o sufixo informado.")
+    picks = rng.choice(len(pool), size=min(queries, len(pool)), replace=False)
+
+    results = {top_n: {"recall": [], "queried": []} for top_n in top_ns}
+    for pick in picks:
+        namespace, row = pool[int(pick)]
+        query = corpus[namespace]["matrix"][row]
+        exclude = (namespace, corpus[namespace]["ids"][row])
+        full = top_k_ids(corpus, namespaces, query, k, exclude)
+        if not full:
+            continue
+        for top_n in top_ns:
+            routed_namespaces = router.route(query, namespaces, top_n=top_n, margin=margin, keep=[namespace])
+            routed = top_k_ids(corpus, routed_namespaces, query, k, exclude)
+            results[top_n]["recall"].append(len(set(full) & set(routed)) / len(full))
+            results[top_n]["queried"].append(len(routed_namespaces))
+
+    print(f"namespaces={len(namespaces)} queries={len(picks)} k={k} margin={margin}")
+    print("top_n  recall@k  min_recall  avg_namespaces_queried")
+    for top_n in top_ns:
+        recall = results[top_n]["recall"] or [0.0]
+        queried = results[top_n]["queried"] or [0]
+        print(
+            f"{top_n:>5}  {np.mean(recall):8.4f}  {np.min(recall):10.4f}  "
+            f"{np.mean(queried):8.2f} / {len(namespaces)}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Recall@k of the centroid namespace router vs. full fan-out (offline, from a snapshot)."
+    )
+    parser.add_argument("--snapshot", required=True, help="Snapshot JSONL ou diretório mmap (export_snapshot.py)")
+    parser.add_argument("--suffix", default="_issues", help="Sufixo dos namespaces avaliados")
+    parser.add_argument("--queries", type=int, default=200, help="Quantidade de issues usadas como query")
+    parser.add_argument("--k", type=int, default=settings.RAG_FINAL_CONTEXT_SIZE, help="k do recall@k")
+    parser.add_argument("--top-n", type=int, action="append", default=None, help="TOP_N avaliado (repetível)")
+    parser.add_argument("--margin", type=float, default=settings.RAG_NAMESPACE_ROUTER_MARGIN)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save", default=None, help="Salva o roteador (centróides) neste caminho")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.snapshot, args.suffix)
+    router = build_router(corpus)
+    run_benchmark(
+        corpus,
+        router,
+        queries=args.queries,
+        k=args.k,
+        top_ns=args.top_n or [2, 4, settings.RAG_NAMESPACE_ROUTER_TOP_N, 16],
+        margin=args.margin,
+        seed=args.seed,
+    )
+    if args.save:
+        router.save(args.save)
+        print(f"router salvo em {args.save}")
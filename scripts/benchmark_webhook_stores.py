@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from web.idempotency import InMemoryIdempotencyStore  # noqa: E402
+from web.rate_limit import InMemoryDailyRateLimiter  # noqa: E402
+
+
+async def _idempotency_us(stored: int, requests: int) -> float:
+    store = InMemoryIdempotencyStore(ttl_seconds=600, inflight_ttl_seconds=300)
+    for idx in range(stored):
+        await store.mark_done(f"stored-{idx}", {"status": "processed"})
+
+    started = time.perf_counter()
+    for idx in range(requests):
+        # One webhook: reserve the delivery id, then cache its response.
+        key = f"delivery-{idx}"
+        await store.reserve(key)
+        await store.mark_done(key, {"status": "processed"})
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def _rate_limit_us(stored: int, requests: int) -> float:
+    limiter = InMemoryDailyRateLimiter(limit_default=10)
+    for idx in range(stored):
+        await limiter.check_and_increment(f"installation:{idx}")
+        await limiter.should_notify_once(f"notify:{idx}")
+
+    started = time.perf_counter()
+    for idx in range(requests):
+        await limiter.check_and_increment(f"installation:{idx % 64}")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def run_benchmark(sizes: List[int], requests: int) -> Dict[int, Dict[str, float]]:
+    results: Dict[int, Dict[str, float]] = {}
+    print(f"requests={requests} (per-request cost, microseconds)")
+    print("stored_keys  idempotency_us  rate_limit_us")
+    for stored in sizes:
+        results[stored] = {
+            "idempotency_us": asyncio.run(_idempotency_us(stored, requests)),
+            "rate_limit_us": asyncio.run(_rate_limit_us(stored, requests)),
+        }
+        print(f"{stored:>11}  {results[stored]['idempotency_us']:14.2f}  {results[stored]['rate_limit_us']:13.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Per-request cost of the in-memory webhook stores as the number of live keys grows."
+    )
+    parser.add_argument("--size", type=int, action="append", default=None, help="Chaves vivas no store (repetível)")
+    parser.add_argument("--requests", type=int, default=5000, help="Requisições medidas por tamanho")
+    args = parser.parse_args()
+
+    run_benchmark(args.size or [100, 1_000, 10_000, 100_000], args.requests)
@@ -0,0 +1,128 @@
+import os
+import json
+
+import sys
+
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from pinecone import Pinecone
+from tqdm import tqdm
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from ai.core.vector_snapshot import write_vector_snapshot  # noqa: E402
+
+# =========================
+# Config / Env
+# =========================
+load_dotenv()
+
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+PINECONE_INDEX = os.getenv("PINECONE_INDEX")
+
+# Quantos ids buscar por chamada de fetch
+FETCH_BATCH = int(os.getenv("FETCH_BATCH", "100"))
+
+
+def _vector_to_record(namespace: str, vector: Any) -> Dict[str, Any]:
+    if isinstance(vector, dict):
+        return {
+            "namespace": namespace,
+            "id": vector.get("id"),
+            "values": list(vector.get("values") or []),
+            "metadata": vector.get("metadata") or {},
+        }
+    return {
+        "namespace": namespace,
+        "id": getattr(vector, "id", None),
+        "values": list(getattr(vector, "values", None) or []),
+        "metadata": dict(getattr(vector, "metadata", None) or {}),
+    }
+
+
+def list_namespaces(index) -> List[str]:
+    stats = index.describe_index_stats()
+    namespaces = getattr(stats, "namespaces", None)
+    if namespaces is None and isinstance(stats, dict):
+        namespaces = stats.get("namespaces", {})
+    return sorted((namespaces or {}).keys())
+
+
+def export_namespace(index, namespace: str, fh) -> int:
+    written = 0
+    for id_batch in index.list(namespace=namespace):
+        ids = list(id_batch or [])
+        for start in range(0, len(ids), FETCH_BATCH):
+            chunk = ids[start:start + FETCH_BATCH]
+            response = index.fetch(ids=chunk, namespace=namespace)
+            vectors = getattr(response, "vectors", None)
+            if vectors is None and isinstance(response, dict):
+                vectors = response.get("vectors", {})
+            for vector in (vectors or {}).values():
+                record = _vector_to_record(namespace, vector)
+                if not record["id"] or not record["values"]:
+                    continue
+                fh.write(json.dumps(record, ensure_ascii=False))
+                fh.write("\n")
+                written += 1
+    return written
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def main(
+    output_path: str,
+    only_namespaces: Optional[List[str]] = None,
+    suffix: Optional[str] = None,
+    fmt: str = "jsonl",
+):
+    if not PINECONE_API_KEY:
+        raise RuntimeError("PINECONE_API_KEY não encontrada no .env")
+
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    index = pc.Index(PINECONE_INDEX)
+
+    namespaces = only_namespaces or list_namespaces(index)
+    if suffix:
+        namespaces = [ns for ns in namespaces if ns.endswith(suffix)]
+
+    jsonl_path = output_path if fmt == "jsonl" else f"{output_path.rstrip(os.sep)}.jsonl"
+    os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+    tmp_path = f"{jsonl_path}.tmp"
+    total = 0
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        for namespace in tqdm(namespaces, desc="Namespaces"):
+            total += export_namespace(index, namespace, fh)
+    os.replace(tmp_path, jsonl_path)
+
+    if fmt == "mmap":
+        # Converte o JSONL em snapshot int8 memory-mapped (ai.core.vector_snapshot).
+        write_vector_snapshot(output_path, _iter_jsonl(jsonl_path))
+
+    print(f"✅ Snapshot salvo em {output_path} ({total} vetores, {len(namespaces)} namespaces)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Export Pinecone vectors to a snapshot for LocalVectorStoreClient."
+    )
+    parser.add_argument("--output", required=True, help="Arquivo .jsonl (ou diretório, com --format mmap)")
+    parser.add_argument("--namespace", action="append", default=None, help="Namespace específico (repetível)")
+    parser.add_argument("--suffix", default=None, help="Filtra namespaces pelo sufixo (ex: _issues)")
+    parser.add_argument(
+        "--format",
+        choices=["jsonl", "mmap"],
+        default="jsonl",
+        help="jsonl (float32) ou mmap (int8 + metadados colunares)",
+    )
+    args = parser.parse_args()
+
+    main(args.output, only_namespaces=args.namespace, suffix=args.suffix, fmt=args.format)
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import time
 import re
@@ -13,6 +14,11 @@ from openai import OpenAI
 from pinecone import Pinecone
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from ai.core.lexical_index import LexicalIndexStore  # noqa: E402
+from ai.core.token_fingerprint import build_fingerprint_metadata  # noqa: E402
+
 # =========================
 # Config / Env
 # =========================
@@ -43,6 +49,10 @@ os.makedirs(CHECKPOINT_DIR, exist_ok=True)
 
 MAX_TEXT_CHARS = int(os.getenv("MAX_TEXT_CHARS", "20000"))  # ~bem abaixo de 8192 tokens na prática
 
+# Índice lexical BM25 por namespace (busca híbrida). Vazio = não gera.
+LEXICAL_INDEX_DIR = os.getenv("RAG_LEXICAL_INDEX_DIR")
+lexical_store = LexicalIndexStore(LEXICAL_INDEX_DIR) if LEXICAL_INDEX_DIR else None
+
 
 # =========================
 # Clients
@@ -184,14 +194,14 @@ def build_issue_text(r: Dict[str, Any]) -> str:
     # Texto canônico (o que o LLM vai ler)
     parts = [
         f"[Title] {strip_wrapping_quotes(norm(r.get('title')))}",
-        f"[Description] {strip_wrapping_quotes(norm(r.get("description_text")))}",
+        f"[Description] {strip_wrapping_quotes(norm(r.get('description_text')))}",
     ]
     full_text = "\n".join([p for p in parts if p is not None]).strip()
     return clamp_text(full_text)
 
 
 def build_issue_metadata(r: Dict[str, Any]) -> Dict[str, Any]:
-    return drop_nulls({
+    meta = drop_nulls({
         "doc_type": "issue",
         "source": "TAWOS",
 
@@ -215,6 +225,9 @@ def build_issue_metadata(r: Dict[str, Any]) -> Dict[str, Any]:
         # Descricao
         "description": strip_wrapping_quotes(norm(r.get('description_text')))[:1000],
     })
+    # Fingerprints (token ids hasheados) usados pelo rerank no lugar de re-tokenizar o texto
+    meta.update(build_fingerprint_metadata(meta))
+    return meta
 
 
 def retry(func, max_tries=5, base_sleep=1.0, what="op"):
@@ -342,6 +355,10 @@ def ingest_project_issues(project_id: int) -> None:
     cur.close()
     conn.close()
 
+    # O índice lexical do namespace é gravado uma vez por projeto, não a cada lote.
+    if lexical_store is not None:
+        lexical_store.save()
+
     print(f"✅ Done: ProjectID={project_id} | ingested={ingested} | last_issue_id={last_id} | namespace={ns}")
 
 
@@ -364,6 +381,13 @@ def flush_batch(batch_docs: List[Tuple[str, str, Dict[str, Any], int]], namespac
 
     pinecone_upsert(payload_all, namespace)
 
+    if lexical_store is not None:
+        lexical_store.add_documents(
+            namespace,
+            [{"id": p["id"], "metadata": p["metadata"]} for p in payload_all],
+            persist=False,
+        )
+
 # =========================
 # CLI entry
 # =========================
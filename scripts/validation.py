@@ -32,6 +32,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 from ai.dtos.issues_estimation_dto import IssueEstimationDTO
 from ai.core.effort_calibration import hours_to_range_payload
 from application.services.estimation_service import EstimationService
+from config.settings import settings
 
 VALIDATION_TABLE = "issue_estimation_validation"
 VALIDATION_KEY_COLUMNS = {
@@ -143,6 +144,10 @@ VALIDATION_DIAGNOSTIC_COLUMNS = {
     "primary_reviews_latency_ms": "INT NULL",
     "analogical_latency_ms": "INT NULL",
     "heuristic_ensemble_latency_ms": "INT NULL",
+    "heuristic_ensemble_strategy": "VARCHAR(16) NULL",
+    "heuristic_ensemble_llm_calls": "INT NULL",
+    "graph_route": "VARCHAR(16) NULL",
+    "deadline_miss_count": "INT NULL",
     "complexity_review_latency_ms": "INT NULL",
     "agile_guard_latency_ms": "INT NULL",
     "critic_latency_ms": "INT NULL",
@@ -457,6 +462,7 @@ def build_validation_payload(
         or estimation_model
     )
     execution_trace = dict(final_estimation.get("execution_trace") or state.get("execution_metrics") or {})
+    heuristic_ensemble_metrics = dict(state.get("heuristic_ensemble_metrics") or {})
 
     project_key = str(row.get("project_key") or row["project_id"]).strip().lower()
     predicted_hours = final_estimation.get("estimated_hours")
@@ -687,6 +693,10 @@ def build_validation_payload(
         "primary_reviews_latency_ms": maybe_int(execution_trace.get("primary_reviews_latency_ms")),
         "analogical_latency_ms": maybe_int(execution_trace.get("analogical_latency_ms")),
         "heuristic_ensemble_latency_ms": maybe_int(execution_trace.get("heuristic_ensemble_latency_ms")),
+        "heuristic_ensemble_strategy": maybe_text(heuristic_ensemble_metrics.get("strategy")),
+        "heuristic_ensemble_llm_calls": maybe_int(heuristic_ensemble_metrics.get("llm_calls")),
+        "graph_route": maybe_text(execution_trace.get("graph_route")),
+        "deadline_miss_count": maybe_int(execution_trace.get("deadline_miss_count")),
         "complexity_review_latency_ms": maybe_int(execution_trace.get("complexity_review_latency_ms")),
         "agile_guard_latency_ms": maybe_int(execution_trace.get("agile_guard_latency_ms")),
         "critic_latency_ms": maybe_int(execution_trace.get("critic_latency_ms")),
@@ -822,7 +832,8 @@ async def main():
     print(
         f"[INICIO] run_id={run_id} project_id={project_id} issues={len(issues)} "
         f"concurrency={max_concurrency} progress_every={progress_every} "
-        f"verbose_trace={str(save_verbose_trace).lower()} diagnostic_cols={len(active_diagnostic_columns)}"
+        f"verbose_trace={str(save_verbose_trace).lower()} diagnostic_cols={len(active_diagnostic_columns)} "
+        f"heuristic_strategy={getattr(settings, 'HEURISTIC_ENSEMBLE_STRATEGY', 'per_mode')}"
     )
 
     semaphore = asyncio.Semaphore(max_concurrency)
@@ -1,10 +1,10 @@
 from typing import Any, Dict
 import json
 
-from ai.core.llm_client import LLMClient
+from ai.core.llm_client import LLMClient, asend_with_usage, send_with_usage
 from ai.core.json_utils import parse_llm_json_response
 from ai.core.prompt_utils import build_system_prompt
-from ai.core.token_usage import coerce_token_usage
+from ai.core.token_usage import TokenUsage, coerce_token_usage
 
 
 def _normalize_delta(value: Any) -> int:
@@ -15,7 +15,7 @@ def _normalize_delta(value: Any) -> int:
     return max(-1, min(1, delta))
 
 
-def run_agile_guard(issue_context: Dict[str, Any], llm: LLMClient) -> Dict[str, Any]:
+def _build_prompt(issue_context: Dict[str, Any]) -> str:
     role = "You are an agile lead focused on healthy backlog item size."
     instruction = f"""
 Review the issue with focus on agile fit.
@@ -48,44 +48,66 @@ Return JSON only:
 Issue:
 {json.dumps(issue_context, ensure_ascii=False, indent=2)}
 """
+    return build_system_prompt(role, instruction)
+
+
+def _parse_response(raw: str, usage: TokenUsage) -> Dict[str, Any]:
+    parsed = parse_llm_json_response(raw)
+    fit_status = str(parsed.get("fit_status", "healthy") or "healthy").strip().lower()
+    if fit_status not in {"healthy", "borderline", "oversized"}:
+        fit_status = "healthy"
+    confidence = max(0.05, min(0.95, float(parsed.get("confidence", 0.5) or 0.5)))
+    bucket_delta = _normalize_delta(parsed.get("bucket_delta"))
+    if bucket_delta > 0 and fit_status == "healthy" and confidence < 0.8:
+        bucket_delta = 0
+
+    out = {
+        "mode": "agile_guard",
+        "fit_status": fit_status,
+        "bucket_delta": bucket_delta,
+        "confidence": confidence,
+        "justification": str(parsed.get("justification", "") or ""),
+        "evidence": list(parsed.get("evidence", []) or []),
+        "warnings": list(parsed.get("warnings", []) or []),
+        "assumptions": list(parsed.get("assumptions", []) or []),
+        "should_split": bool(parsed.get("should_split", False)) or fit_status == "oversized",
+        "split_reason": parsed.get("split_reason"),
+        "source": "agile_guard",
+        "token_usage": usage,
+    }
+    return out
+
+
+def _fallback_response(exc: Exception, usage: TokenUsage) -> Dict[str, Any]:
+    return {
+        "mode": "agile_guard",
+        "fit_status": "healthy",
+        "bucket_delta": 0,
+        "confidence": 0.25,
+        "justification": "Resposta de contingência da análise ágil.",
+        "evidence": [],
+        "warnings": [str(exc)],
+        "assumptions": [],
+        "should_split": False,
+        "split_reason": None,
+        "source": "agile_guard",
+        "token_usage": usage,
+    }
+
+
+def run_agile_guard(issue_context: Dict[str, Any], llm: LLMClient) -> Dict[str, Any]:
+    usage = coerce_token_usage(None)
+    try:
+        raw, usage = send_with_usage(llm, _build_prompt(issue_context), validate=parse_llm_json_response)
+        return _parse_response(raw, usage)
+    except Exception as exc:
+        return _fallback_response(exc, usage)
+
+
+async def arun_agile_guard(issue_context: Dict[str, Any], llm: LLMClient) -> Dict[str, Any]:
+    usage = coerce_token_usage(None)
     try:
-        raw = llm.send_prompt(build_system_prompt(role, instruction))
-        parsed = parse_llm_json_response(raw)
-        fit_status = str(parsed.get("fit_status", "healthy") or "healthy").strip().lower()
-        if fit_status not in {"healthy", "borderline", "oversized"}:
-            fit_status = "healthy"
-        confidence = max(0.05, min(0.95, float(parsed.get("confidence", 0.5) or 0.5)))
-        bucket_delta = _normalize_delta(parsed.get("bucket_delta"))
-        if bucket_delta > 0 and fit_status == "healthy" and confidence < 0.8:
-            bucket_delta = 0
-
-        out = {
-            "mode": "agile_guard",
-            "fit_status": fit_status,
-            "bucket_delta": bucket_delta,
-            "confidence": confidence,
-            "justification": str(parsed.get("justification", "") or ""),
-            "evidence": list(parsed.get("evidence", []) or []),
-            "warnings": list(parsed.get("warnings", []) or []),
-            "assumptions": list(parsed.get("assumptions", []) or []),
-            "should_split": bool(parsed.get("should_split", False)) or fit_status == "oversized",
-            "split_reason": parsed.get("split_reason"),
-            "source": "agile_guard",
-            "token_usage": coerce_token_usage(llm.get_last_token_usage()),
-        }
-        return out
+        raw, usage = await asend_with_usage(llm, _build_prompt(issue_context), validate=parse_llm_json_response)
+        return _parse_response(raw, usage)
     except Exception as exc:
-        return {
-            "mode": "agile_guard",
-            "fit_status": "healthy",
-            "bucket_delta": 0,
-            "confidence": 0.25,
-            "justification": "Resposta de contingência da análise ágil.",
-            "evidence": [],
-            "warnings": [str(exc)],
-            "assumptions": [],
-            "should_split": False,
-            "split_reason": None,
-            "source": "agile_guard",
-            "token_usage": coerce_token_usage(llm.get_last_token_usage()),
-        }
+        return _fallback_response(exc, usage)
@@ -1,9 +1,10 @@
+from functools import lru_cache
 from typing import Dict, Any, List
 import json
 import re
 
 from ai.core.effort_calibration import weighted_neighbor_range_estimate
-from ai.core.llm_client import LLMClient
+from ai.core.llm_client import LLMClient, asend_with_usage, send_with_usage
 from ai.core.json_utils import parse_llm_json_response
 from ai.core.prompt_utils import build_system_prompt
 from ai.core.token_usage import coerce_token_usage
@@ -38,9 +39,15 @@ def _normalize_text(text: str) -> List[str]:
     return [token for token in cleaned.split() if token]
 
 
+@lru_cache(maxsize=2048)
+def _token_set(text: str) -> frozenset:
+    # Anchor titles repeat across requests; memoize instead of re-tokenizing them.
+    return frozenset(_normalize_text(text))
+
+
 def _jaccard_similarity(left: str, right: str) -> float:
-    left_tokens = set(_normalize_text(left))
-    right_tokens = set(_normalize_text(right))
+    left_tokens = _token_set(str(left or ""))
+    right_tokens = _token_set(str(right or ""))
     if not left_tokens or not right_tokens:
         return 0.0
     union = left_tokens | right_tokens
@@ -155,14 +162,13 @@ def _compute_retrieval_stats(
     }
 
 
-def _llm_explanation(
+def _build_explanation_prompt(
     issue_context: Dict[str, Any],
     prepared_similar: List[Dict[str, Any]],
     deterministic_result: Dict[str, Any],
     retrieval_stats: Dict[str, Any],
     repository_technologies: Dict[str, float],
-    llm: LLMClient,
-) -> Dict[str, Any]:
+) -> str:
     payload = {
         "issue": {
             "issue_number": issue_context.get("issue_number"),
@@ -198,7 +204,10 @@ Return JSON only:
 Data:
 {json.dumps(payload, ensure_ascii=False, indent=2)}
 """
-    raw = llm.send_prompt(build_system_prompt(role, instruction))
+    return build_system_prompt(role, instruction)
+
+
+def _parse_explanation(raw: str) -> Dict[str, Any]:
     parsed = parse_llm_json_response(raw)
     return {
         "justification": str(parsed.get("justification", "") or ""),
@@ -210,12 +219,12 @@ Data:
     }
 
 
-def run_analogical(
+def _deterministic_estimate(
     issue_context: Dict[str, Any],
     similar_issues: List[Dict[str, Any]],
     repository_technologies: Dict[str, float],
-    llm: LLMClient,
-) -> Dict[str, Any]:
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """Neighbor-based estimate plus the inputs of the prompt asking the LLM to explain it."""
     prepared_similar = _prepare_similar_issues(similar_issues)
     retrieval_stats = _compute_retrieval_stats(issue_context, prepared_similar)
     deterministic_result = weighted_neighbor_range_estimate(
@@ -255,22 +264,50 @@ def run_analogical(
         "assumptions": [],
     }
 
+    explanation_inputs = {
+        "issue_context": issue_context,
+        "prepared_similar": prepared_similar,
+        "deterministic_result": deterministic_result,
+        "retrieval_stats": retrieval_stats,
+        "repository_technologies": repository_technologies,
+    }
+    return out, explanation_inputs
+
+
+def run_analogical(
+    issue_context: Dict[str, Any],
+    similar_issues: List[Dict[str, Any]],
+    repository_technologies: Dict[str, float],
+    llm: LLMClient,
+) -> Dict[str, Any]:
+    out, explanation_inputs = _deterministic_estimate(issue_context, similar_issues, repository_technologies)
+    usage = coerce_token_usage(None)
     try:
-        explanation = _llm_explanation(
-            issue_context=issue_context,
-            prepared_similar=prepared_similar,
-            deterministic_result=deterministic_result,
-            retrieval_stats=retrieval_stats,
-            repository_technologies=repository_technologies,
-            llm=llm,
-        )
-        out.update(explanation)
-        out["token_usage"] = coerce_token_usage(llm.get_last_token_usage())
-        return out
+        prompt = _build_explanation_prompt(**explanation_inputs)
+        raw, usage = send_with_usage(llm, prompt, validate=parse_llm_json_response)
+        out.update(_parse_explanation(raw))
+    except Exception as exc:
+        out["warnings"] = [str(exc)]
+    out["token_usage"] = usage
+    return out
+
+
+async def arun_analogical(
+    issue_context: Dict[str, Any],
+    similar_issues: List[Dict[str, Any]],
+    repository_technologies: Dict[str, float],
+    llm: LLMClient,
+) -> Dict[str, Any]:
+    out, explanation_inputs = _deterministic_estimate(issue_context, similar_issues, repository_technologies)
+    usage = coerce_token_usage(None)
+    try:
+        prompt = _build_explanation_prompt(**explanation_inputs)
+        raw, usage = await asend_with_usage(llm, prompt, validate=parse_llm_json_response)
+        out.update(_parse_explanation(raw))
     except Exception as exc:
         out["warnings"] = [str(exc)]
-        out["token_usage"] = coerce_token_usage(llm.get_last_token_usage())
-        return out
+    out["token_usage"] = usage
+    return out
 
 
-__all__ = ["run_analogical", "_compute_retrieval_stats"]
+__all__ = ["run_analogical", "arun_analogical", "_compute_retrieval_stats"]
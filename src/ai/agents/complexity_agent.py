@@ -1,10 +1,10 @@
 from typing import Any, Dict
 import json
 
-from ai.core.llm_client import LLMClient
+from ai.core.llm_client import LLMClient, asend_with_usage, send_with_usage
 from ai.core.json_utils import parse_llm_json_response
 from ai.core.prompt_utils import build_system_prompt
-from ai.core.token_usage import coerce_token_usage
+from ai.core.token_usage import TokenUsage, coerce_token_usage
 
 
 def _normalize_delta(value: Any) -> int:
@@ -15,7 +15,7 @@ def _normalize_delta(value: Any) -> int:
     return max(0, min(2, delta))
 
 
-def run_complexity_review(issue_context: Dict[str, Any], llm: LLMClient) -> Dict[str, Any]:
+def _build_prompt(issue_context: Dict[str, Any]) -> str:
     role = "You are a senior software architect focused on hidden technical complexity."
     instruction = f"""
 Review the issue below without using historical analogies.
@@ -49,44 +49,66 @@ Return JSON only:
 Issue:
 {json.dumps(issue_context, ensure_ascii=False, indent=2)}
 """
+    return build_system_prompt(role, instruction)
+
+
+def _parse_response(raw: str, usage: TokenUsage) -> Dict[str, Any]:
+    parsed = parse_llm_json_response(raw)
+    confidence = max(0.05, min(0.95, float(parsed.get("confidence", 0.5) or 0.5)))
+    risk_hidden_complexity = max(0.0, min(1.0, float(parsed.get("risk_hidden_complexity", 0.0) or 0.0)))
+    bucket_delta = _normalize_delta(parsed.get("bucket_delta"))
+    if bucket_delta == 2 and not bool(parsed.get("should_split", False)):
+        bucket_delta = 1
+    if bucket_delta > 0 and (risk_hidden_complexity < 0.78 or confidence < 0.82):
+        bucket_delta = 0
+
+    out = {
+        "mode": "complexity_review",
+        "bucket_delta": bucket_delta,
+        "confidence": confidence,
+        "risk_hidden_complexity": risk_hidden_complexity,
+        "justification": str(parsed.get("justification", "") or ""),
+        "evidence": list(parsed.get("evidence", []) or []),
+        "warnings": list(parsed.get("warnings", []) or []),
+        "assumptions": list(parsed.get("assumptions", []) or []),
+        "should_split": bool(parsed.get("should_split", False)),
+        "split_reason": parsed.get("split_reason"),
+        "source": "complexity_review",
+        "token_usage": usage,
+    }
+    return out
+
+
+def _fallback_response(exc: Exception, usage: TokenUsage) -> Dict[str, Any]:
+    return {
+        "mode": "complexity_review",
+        "bucket_delta": 0,
+        "confidence": 0.25,
+        "risk_hidden_complexity": 0.0,
+        "justification": "Resposta de contingência da análise de complexidade.",
+        "evidence": [],
+        "warnings": [str(exc)],
+        "assumptions": [],
+        "should_split": False,
+        "split_reason": None,
+        "source": "complexity_review",
+        "token_usage": usage,
+    }
+
+
+def run_complexity_review(issue_context: Dict[str, Any], llm: LLMClient) -> Dict[str, Any]:
+    usage = coerce_token_usage(None)
+    try:
+        raw, usage = send_with_usage(llm, _build_prompt(issue_context), validate=parse_llm_json_response)
+        return _parse_response(raw, usage)
+    except Exception as exc:
+        return _fallback_response(exc, usage)
+
+
+async def arun_complexity_review(issue_context: Dict[str, Any], llm: LLMClient) -> Dict[str, Any]:
+    usage = coerce_token_usage(None)
     try:
-        raw = llm.send_prompt(build_system_prompt(role, instruction))
-        parsed = parse_llm_json_response(raw)
-        confidence = max(0.05, min(0.95, float(parsed.get("confidence", 0.5) or 0.5)))
-        risk_hidden_complexity = max(0.0, min(1.0, float(parsed.get("risk_hidden_complexity", 0.0) or 0.0)))
-        bucket_delta = _normalize_delta(parsed.get("bucket_delta"))
-        if bucket_delta == 2 and not bool(parsed.get("should_split", False)):
-            bucket_delta = 1
-        if bucket_delta > 0 and (risk_hidden_complexity < 0.78 or confidence < 0.82):
-            bucket_delta = 0
-
-        out = {
-            "mode": "complexity_review",
-            "bucket_delta": bucket_delta,
-            "confidence": confidence,
-            "risk_hidden_complexity": risk_hidden_complexity,
-            "justification": str(parsed.get("justification", "") or ""),
-            "evidence": list(parsed.get("evidence", []) or []),
-            "warnings": list(parsed.get("warnings", []) or []),
-            "assumptions": list(parsed.get("assumptions", []) or []),
-            "should_split": bool(parsed.get("should_split", False)),
-            "split_reason": parsed.get("split_reason"),
-            "source": "complexity_review",
-            "token_usage": coerce_token_usage(llm.get_last_token_usage()),
-        }
-        return out
+        raw, usage = await asend_with_usage(llm, _build_prompt(issue_context), validate=parse_llm_json_response)
+        return _parse_response(raw, usage)
     except Exception as exc:
-        return {
-            "mode": "complexity_review",
-            "bucket_delta": 0,
-            "confidence": 0.25,
-            "risk_hidden_complexity": 0.0,
-            "justification": "Resposta de contingência da análise de complexidade.",
-            "evidence": [],
-            "warnings": [str(exc)],
-            "assumptions": [],
-            "should_split": False,
-            "split_reason": None,
-            "source": "complexity_review",
-            "token_usage": coerce_token_usage(llm.get_last_token_usage()),
-        }
+        return _fallback_response(exc, usage)
@@ -1,20 +1,19 @@
 from typing import Any, Dict, List
 import json
 
-from ai.core.llm_client import LLMClient
+from ai.core.llm_client import LLMClient, asend_with_usage, send_with_usage
 from ai.core.json_utils import parse_llm_json_response
 from ai.core.prompt_utils import build_system_prompt
-from ai.core.token_usage import coerce_token_usage
+from ai.core.token_usage import TokenUsage, coerce_token_usage
 
 
-def run_estimation_critic(
+def _build_prompt(
     issue_context: Dict[str, Any],
     analogical: Dict[str, Any] | None,
     heuristic_candidates: List[Dict[str, Any]],
     complexity_review: Dict[str, Any] | None,
     agile_guard_review: Dict[str, Any] | None,
-    llm: LLMClient,
-) -> Dict[str, Any]:
+) -> str:
     role = "You are a critical reviewer of software effort estimates."
 
     # [B1.3] Extract retrieval signal so the critic can weigh analogical properly.
@@ -76,18 +75,56 @@ Return JSON only:
 Data:
 {json.dumps(payload, ensure_ascii=False, indent=2)}
 """
+    return build_system_prompt(role, instruction)
+
+
+def _parse_response(raw: str, usage: TokenUsage) -> Dict[str, Any]:
+    parsed = parse_llm_json_response(raw)
+    parsed["token_usage"] = usage
+    return parsed
+
+
+def _fallback_response(exc: Exception, usage: TokenUsage) -> Dict[str, Any]:
+    return {
+        "risk_of_underestimation": 0.5,
+        "risk_of_overestimation": 0.5,
+        "contradictions": [f"Resposta de contingência do crítico: {exc}"],
+        "hidden_complexities": [],
+        "strongest_signal": "Não houve uma saída confiável do crítico.",
+        "recommendation": "Mantenha a estimativa calibrada de forma conservadora e a confiança em nível moderado.",
+        "token_usage": usage,
+    }
+
+
+def run_estimation_critic(
+    issue_context: Dict[str, Any],
+    analogical: Dict[str, Any] | None,
+    heuristic_candidates: List[Dict[str, Any]],
+    complexity_review: Dict[str, Any] | None,
+    agile_guard_review: Dict[str, Any] | None,
+    llm: LLMClient,
+) -> Dict[str, Any]:
+    usage = coerce_token_usage(None)
+    try:
+        prompt = _build_prompt(issue_context, analogical, heuristic_candidates, complexity_review, agile_guard_review)
+        raw, usage = send_with_usage(llm, prompt, validate=parse_llm_json_response)
+        return _parse_response(raw, usage)
+    except Exception as exc:
+        return _fallback_response(exc, usage)
+
+
+async def arun_estimation_critic(
+    issue_context: Dict[str, Any],
+    analogical: Dict[str, Any] | None,
+    heuristic_candidates: List[Dict[str, Any]],
+    complexity_review: Dict[str, Any] | None,
+    agile_guard_review: Dict[str, Any] | None,
+    llm: LLMClient,
+) -> Dict[str, Any]:
+    usage = coerce_token_usage(None)
     try:
-        raw = llm.send_prompt(build_system_prompt(role, instruction))
-        parsed = parse_llm_json_response(raw)
-        parsed["token_usage"] = coerce_token_usage(llm.get_last_token_usage())
-        return parsed
+        prompt = _build_prompt(issue_context, analogical, heuristic_candidates, complexity_review, agile_guard_review)
+        raw, usage = await asend_with_usage(llm, prompt, validate=parse_llm_json_response)
+        return _parse_response(raw, usage)
     except Exception as exc:
-        return {
-            "risk_of_underestimation": 0.5,
-            "risk_of_overestimation": 0.5,
-            "contradictions": [f"Resposta de contingência do crítico: {exc}"],
-            "hidden_complexities": [],
-            "strongest_signal": "Não houve uma saída confiável do crítico.",
-            "recommendation": "Mantenha a estimativa calibrada de forma conservadora e a confiança em nível moderado.",
-            "token_usage": coerce_token_usage(llm.get_last_token_usage()),
-        }
+        return _fallback_response(exc, usage)
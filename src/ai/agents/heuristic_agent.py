@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence
 import json
 
 from ai.core.effort_calibration import (
@@ -11,10 +11,10 @@ from ai.core.effort_calibration import (
     range_index_to_payload,
     rank_to_bucket,
 )
-from ai.core.llm_client import LLMClient
+from ai.core.llm_client import LLMClient, asend_with_usage, send_with_usage
 from ai.core.json_utils import parse_llm_json_response
 from ai.core.prompt_utils import build_system_prompt
-from ai.core.token_usage import coerce_token_usage
+from ai.core.token_usage import TokenUsage, coerce_token_usage
 
 
 MODE_GUIDANCE = {
@@ -57,31 +57,29 @@ MODE_GUIDANCE = {
 }
 
 
-def _build_prompt(issue_context: Dict[str, Any], mode: str) -> str:
-    guidance = MODE_GUIDANCE[mode]
-    available_ranges = [
-        "1=1-3h",
-        "2=3-6h",
-        "3=6-9h",
-        "4=9-12h",
-        "5=12-15h",
-        "6=15-18h",
-        "7=18-21h",
-        "8=21-24h",
-        "9=24-27h",
-        "10=27-30h",
-        "11=30-33h",
-        "12=33-36h",
-        "13=36-40h",
-    ]
-    instruction = f"""
-You received the full context of a software issue.
+AVAILABLE_RANGES = [
+    "1=1-3h",
+    "2=3-6h",
+    "3=6-9h",
+    "4=9-12h",
+    "5=12-15h",
+    "6=15-18h",
+    "7=18-21h",
+    "8=21-24h",
+    "9=24-27h",
+    "10=27-30h",
+    "11=30-33h",
+    "12=33-36h",
+    "13=36-40h",
+]
 
-Your task is to estimate the most plausible effort range, not an exact number of hours.
+RANGE_LABEL_SCHEMA = "1-3h|3-6h|6-9h|9-12h|12-15h|15-18h|18-21h|21-24h|24-27h|27-30h|30-33h|33-36h|36-40h"
 
-Rules:
+
+def _range_rules() -> str:
+    return f"""Rules:
 - Choose one ordinal range only from this catalog:
-{chr(10).join(f"- {item}" for item in available_ranges)}
+{chr(10).join(f"- {item}" for item in AVAILABLE_RANGES)}
 - Prefer lower ranges for local fixes, small validations, text/config changes, single-screen defects, and isolated bug fixes.
 - Use 9-15h when the issue implies investigation plus implementation, multi-step debugging, or more than one technical surface.
 - Use 15-24h when the issue implies investigation plus correction plus validation across more than one subsystem, integration path, environment, or operational surface.
@@ -90,7 +88,17 @@ Rules:
 - Do not inflate the range only because the issue looks risky, vague, or mentions an exception.
 - Use uncertainty to reduce confidence first. Only move the range up if the text clearly indicates broader work.
 - If the issue sounds large, prefer expressing that through the range rather than a generic warning.
-- Write every human-readable field in Brazilian Portuguese.
+- Write every human-readable field in Brazilian Portuguese."""
+
+
+def _build_prompt(issue_context: Dict[str, Any], mode: str) -> str:
+    guidance = MODE_GUIDANCE[mode]
+    instruction = f"""
+You received the full context of a software issue.
+
+Your task is to estimate the most plausible effort range, not an exact number of hours.
+
+{_range_rules()}
 
 Primary focus for this mode:
 {guidance["role"]}
@@ -102,7 +110,7 @@ Return JSON only:
 {{
   "mode": "{mode}",
   "range_index": 1,
-  "range_label": "1-3h|3-6h|6-9h|9-12h|12-15h|15-18h|18-21h|21-24h|24-27h|27-30h|30-33h|33-36h|36-40h",
+  "range_label": "{RANGE_LABEL_SCHEMA}",
   "confidence": 0.0,
   "justification": "short objective text",
   "evidence": ["short list"],
@@ -116,6 +124,48 @@ Issue:
     return build_system_prompt(guidance["role"], instruction)
 
 
+def _build_multi_mode_prompt(issue_context: Dict[str, Any], modes: Sequence[str]) -> str:
+    role = "You are a panel of senior reviewers, each estimating the issue from one independent perspective."
+    perspectives = "\n\n".join(
+        f"""Perspective "{mode}":
+{MODE_GUIDANCE[mode]["role"]}
+What to analyze:
+{chr(10).join(f"- {item}" for item in MODE_GUIDANCE[mode]["focus"])}"""
+        for mode in modes
+    )
+    instruction = f"""
+You received the full context of a software issue.
+
+Your task is to estimate the most plausible effort range, not an exact number of hours,
+once for each perspective below. Judge each perspective on its own focus; do not copy
+the range of one perspective into another unless the evidence really agrees.
+
+{_range_rules()}
+
+{perspectives}
+
+Return JSON only, with exactly one entry per perspective, in this order ({", ".join(modes)}):
+{{
+  "perspectives": [
+    {{
+      "mode": "{modes[0]}",
+      "range_index": 1,
+      "range_label": "{RANGE_LABEL_SCHEMA}",
+      "confidence": 0.0,
+      "justification": "short objective text",
+      "evidence": ["short list"],
+      "warnings": ["short list"],
+      "assumptions": ["short list"]
+    }}
+  ]
+}}
+
+Issue:
+{json.dumps(issue_context, ensure_ascii=False, indent=2)}
+"""
+    return build_system_prompt(role, instruction)
+
+
 def _normalize_bucket_payload(mode: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
     raw_range_index = parsed.get("range_index")
     raw_range_label = str(parsed.get("range_label") or "").strip().lower()
@@ -181,6 +231,22 @@ def _fallback(mode: str) -> Dict[str, Any]:
     }
 
 
+def _parse_response(raw: str, mode: str, usage: TokenUsage) -> Dict[str, Any]:
+    parsed = parse_llm_json_response(raw)
+    normalized = _normalize_bucket_payload(mode, parsed)
+    normalized["source"] = mode
+    normalized["token_usage"] = usage
+    return normalized
+
+
+def _fallback_response(exc: Exception, mode: str, usage: TokenUsage) -> Dict[str, Any]:
+    data = _fallback(mode)
+    data["warnings"].append(str(exc))
+    data["source"] = mode
+    data["token_usage"] = usage
+    return data
+
+
 def run_heuristic(
     issue_context: Dict[str, Any],
     llm: LLMClient,
@@ -190,17 +256,104 @@ def run_heuristic(
     if mode not in MODE_GUIDANCE:
         raise ValueError(f"Unsupported heuristic mode: {mode}")
 
+    usage = coerce_token_usage(None)
     try:
         prompt = _build_prompt(issue_context, mode)
-        raw = llm.send_prompt(prompt, temperature=temperature)
-        parsed = parse_llm_json_response(raw)
-        normalized = _normalize_bucket_payload(mode, parsed)
-        normalized["source"] = mode
-        normalized["token_usage"] = coerce_token_usage(llm.get_last_token_usage())
-        return normalized
+        raw, usage = send_with_usage(llm, prompt, temperature=temperature, validate=parse_llm_json_response)
+        return _parse_response(raw, mode, usage)
     except Exception as exc:
-        data = _fallback(mode)
-        data["warnings"].append(str(exc))
+        return _fallback_response(exc, mode, usage)
+
+
+async def arun_heuristic(
+    issue_context: Dict[str, Any],
+    llm: LLMClient,
+    temperature: float = 0.0,
+    mode: str = "scope",
+) -> Dict[str, Any]:
+    if mode not in MODE_GUIDANCE:
+        raise ValueError(f"Unsupported heuristic mode: {mode}")
+
+    usage = coerce_token_usage(None)
+    try:
+        prompt = _build_prompt(issue_context, mode)
+        raw, usage = await asend_with_usage(llm, prompt, temperature=temperature, validate=parse_llm_json_response)
+        return _parse_response(raw, mode, usage)
+    except Exception as exc:
+        return _fallback_response(exc, mode, usage)
+
+
+def _validate_modes(modes: Sequence[str]) -> List[str]:
+    modes = list(modes)
+    if not modes:
+        raise ValueError("At least one heuristic mode is required")
+    unsupported = [mode for mode in modes if mode not in MODE_GUIDANCE]
+    if unsupported:
+        raise ValueError(f"Unsupported heuristic mode: {unsupported[0]}")
+    return modes
+
+
+def _parse_multi_mode_response(raw: str, modes: List[str], usage: TokenUsage) -> List[Dict[str, Any]]:
+    parsed = parse_llm_json_response(raw)
+    entries = parsed.get("perspectives") if isinstance(parsed, dict) else None
+    by_mode: Dict[str, Dict[str, Any]] = {}
+    for entry in entries or []:
+        if isinstance(entry, dict) and entry.get("mode") in modes:
+            by_mode.setdefault(str(entry["mode"]), entry)
+
+    candidates = []
+    for mode in modes:
+        entry = by_mode.get(mode)
+        if entry is None:
+            data = _fallback(mode)
+            data["warnings"].append(f"Perspectiva {mode} ausente na resposta multi-modo.")
+        else:
+            data = _normalize_bucket_payload(mode, entry)
         data["source"] = mode
-        data["token_usage"] = coerce_token_usage(llm.get_last_token_usage())
-        return data
+        data["token_usage"] = coerce_token_usage(None)
+        candidates.append(data)
+    # A single call served every mode: its usage is reported once, on the first candidate,
+    # so summing the candidates still yields the real cost of the ensemble.
+    candidates[0]["token_usage"] = usage
+    return candidates
+
+
+def _multi_mode_fallback(exc: Exception, modes: List[str], usage: TokenUsage) -> List[Dict[str, Any]]:
+    candidates = [_fallback_response(exc, mode, coerce_token_usage(None)) for mode in modes]
+    candidates[0]["token_usage"] = usage
+    return candidates
+
+
+def run_heuristic_multi_mode(
+    issue_context: Dict[str, Any],
+    llm: LLMClient,
+    temperature: float = 0.0,
+    modes: Sequence[str] = tuple(MODE_GUIDANCE),
+) -> List[Dict[str, Any]]:
+    """All heuristic perspectives from one structured LLM call; one candidate per mode, in order."""
+    modes = _validate_modes(modes)
+
+    usage = coerce_token_usage(None)
+    try:
+        prompt = _build_multi_mode_prompt(issue_context, modes)
+        raw, usage = send_with_usage(llm, prompt, temperature=temperature, validate=parse_llm_json_response)
+        return _parse_multi_mode_response(raw, modes, usage)
+    except Exception as exc:
+        return _multi_mode_fallback(exc, modes, usage)
+
+
+async def arun_heuristic_multi_mode(
+    issue_context: Dict[str, Any],
+    llm: LLMClient,
+    temperature: float = 0.0,
+    modes: Sequence[str] = tuple(MODE_GUIDANCE),
+) -> List[Dict[str, Any]]:
+    modes = _validate_modes(modes)
+
+    usage = coerce_token_usage(None)
+    try:
+        prompt = _build_multi_mode_prompt(issue_context, modes)
+        raw, usage = await asend_with_usage(llm, prompt, temperature=temperature, validate=parse_llm_json_response)
+        return _parse_multi_mode_response(raw, modes, usage)
+    except Exception as exc:
+        return _multi_mode_fallback(exc, modes, usage)
@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+CacheKey = Tuple[str, str]
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed cache for query embeddings.
+
+    Notes:
+    - Keys are (embedding model, sha256(text)), so a model change never serves stale vectors.
+    - The in-memory tier is an LRU bounded by ``max_entries``.
+    - The optional SQLite tier stores float32 blobs and survives restarts / validation reruns.
+    """
+
+    def __init__(self, *, max_entries: int = 512, path: Optional[str] = None):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, List[float]]" = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if path:
+            self._conn = self._open_disk_tier(path)
+
+    @staticmethod
+    def _open_disk_tier(path: str) -> sqlite3.Connection | None:
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            conn.commit()
+            return conn
+        except Exception as exc:
+            logger.exception("Embedding cache disk tier disabled: %s", exc)
+            return None
+
+    @staticmethod
+    def make_key(model: str, text: str) -> CacheKey:
+        return str(model or ""), hashlib.sha256(str(text or "").encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = self.make_key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(vector)
+
+            vector = self._read_disk_locked(key)
+            if vector is not None:
+                self._store_memory_locked(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return list(vector)
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        key = self.make_key(model, text)
+        values = [float(v) for v in vector or []]
+        if not values:
+            return
+        with self._lock:
+            self._store_memory_locked(key, values)
+            self._write_disk_locked(key, values)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._entries),
+            }
+
+    def _store_memory_locked(self, key: CacheKey, vector: List[float]) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk_locked(self, key: CacheKey) -> Optional[List[float]]:
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT dim, vector FROM embedding_cache WHERE model = ? AND text_hash = ?",
+                key,
+            ).fetchone()
+        except Exception as exc:
+            logger.warning("Embedding cache disk read failed: %s", exc)
+            return None
+        if row is None:
+            return None
+        dim, blob = row
+        values = array("f")
+        values.frombytes(blob)
+        if len(values) != int(dim):
+            return None
+        return values.tolist()
+
+    def _write_disk_locked(self, key: CacheKey, vector: List[float]) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embedding_cache (model, text_hash, dim, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key[0], key[1], len(vector), array("f", vector).tobytes(), time.time()),
+            )
+            self._conn.commit()
+        except Exception as exc:
+            logger.warning("Embedding cache disk write failed: %s", exc)
+
+
+_default_cache: EmbeddingCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_embedding_cache() -> EmbeddingCache | None:
+    """Process-wide cache configured from settings (None when disabled)."""
+    global _default_cache
+    max_entries = int(getattr(settings, "RAG_EMBEDDING_CACHE_SIZE", 0) or 0)
+    if max_entries <= 0:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(
+                max_entries=max_entries,
+                path=getattr(settings, "RAG_EMBEDDING_CACHE_PATH", None),
+            )
+        return _default_cache
@@ -0,0 +1,248 @@
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ai.core.meta_calibrator import get_meta_model_path
+from config.settings import settings
+
+
+# IssueEstimationDTO fields that identify the issue content. Counters that drift between
+# runs without changing the issue (age_in_days, comments_count, repo_size, state) are left
+# out; the TTL bounds how long they can be stale.
+KEY_FIELDS = (
+    "repository",
+    "issue_number",
+    "title",
+    "description",
+    "labels",
+    "assignees",
+    "issue_type",
+    "author_role",
+    "repo_language",
+)
+
+EstimationState = Dict[str, Any]
+
+
+def _ignored_labels() -> set[str]:
+    # Workflow trigger labels come and go around the estimation itself.
+    raw = str(getattr(settings, "ESTIMATION_RESULT_CACHE_IGNORED_LABELS", "") or "")
+    return {label.strip().lower() for label in raw.split(",") if label.strip()}
+
+
+def _normalize_text(value: Any) -> str:
+    return " ".join(str(value or "").split())
+
+
+def _meta_model_fingerprint() -> str:
+    if not bool(getattr(settings, "META_CALIBRATOR_ENABLED", True)):
+        return "disabled"
+    path = get_meta_model_path()
+    try:
+        return f"{path}:{path.stat().st_mtime_ns}"
+    except OSError:
+        return "missing"
+
+
+def _issue_payload(dto: Any) -> Dict[str, Any]:
+    if hasattr(dto, "model_dump"):
+        return dto.model_dump()
+    return dict(dto or {})
+
+
+class EstimationResultCache:
+    """
+    LRU + TTL cache of final estimations with single-flight deduplication.
+
+    Notes:
+    - Keys are sha256 of the normalized issue content (``KEY_FIELDS``), the meta-calibrator
+      model file version and LLM_PROMPT_TEMPLATE_VERSION.
+    - Concurrent callers for a key being computed wait for that computation instead of
+      starting their own; sync and async callers share the same in-flight future.
+    - Only ``final_estimation`` is kept; errors and degraded runs (deadline misses) are
+      never cached.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        ttl_seconds: float = 6 * 3600.0,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        self._max_entries = max_entries
+        self._ttl_seconds = float(ttl_seconds)
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    @staticmethod
+    def make_key(dto: Any) -> str:
+        issue = _issue_payload(dto)
+        ignored = _ignored_labels()
+        content = {
+            name: sorted(
+                {_normalize_text(item).lower() for item in issue.get(name) or []} - ignored
+            )
+            if name in {"labels", "assignees"}
+            else _normalize_text(issue.get(name))
+            for name in KEY_FIELDS
+        }
+        content["repository"] = content["repository"].lower()
+        payload = json.dumps(
+            [
+                content,
+                _meta_model_fingerprint(),
+                str(getattr(settings, "LLM_PROMPT_TEMPLATE_VERSION", "1") or "1"),
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def put(self, key: str, state: EstimationState) -> None:
+        if not self._cacheable(state):
+            return
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(state["final_estimation"]), self._now())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], EstimationState]) -> EstimationState:
+        """Cached state, the state of an in-flight run for ``key``, or ``compute()``."""
+        cached, future, leader = self._claim(key)
+        if cached is not None:
+            return self._cached_state(cached, "hit")
+        if not leader:
+            return self._cached_state(future.result(), "shared")
+        try:
+            state = compute()
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, state=state)
+        return self._with_status(state, "miss")
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[EstimationState]],
+    ) -> EstimationState:
+        cached, future, leader = self._claim(key)
+        if cached is not None:
+            return self._cached_state(cached, "hit")
+        if not leader:
+            return self._cached_state(await asyncio.wrap_future(future), "shared")
+        try:
+            state = await compute()
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, state=state)
+        return self._with_status(state, "miss")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "inflight": len(self._inflight),
+                "size": len(self._entries),
+            }
+
+    def _claim(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[Future], bool]:
+        """(cached estimation, in-flight future, whether the caller must compute)."""
+        with self._lock:
+            cached = self._get_locked(key)
+            if cached is not None:
+                return cached, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                return None, future, False
+            future = Future()
+            self._inflight[key] = future
+            return None, future, True
+
+    def _finish(
+        self,
+        key: str,
+        future: Future,
+        state: Optional[EstimationState] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if state is not None:
+            self.put(key, state)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(copy.deepcopy((state or {}).get("final_estimation") or {}))
+
+    def _get_locked(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and self._ttl_seconds > 0 and (self._now() - entry[1]) >= self._ttl_seconds:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    @staticmethod
+    def _cacheable(state: EstimationState) -> bool:
+        if not isinstance(state, dict) or not state.get("final_estimation"):
+            return False
+        execution_metrics = state.get("execution_metrics") or {}
+        return not execution_metrics.get("deadline_misses")
+
+    @staticmethod
+    def _with_status(state: EstimationState, status: str) -> EstimationState:
+        execution_metrics = dict(state.get("execution_metrics") or {})
+        execution_metrics["estimation_cache"] = status
+        state["execution_metrics"] = execution_metrics
+        return state
+
+    @classmethod
+    def _cached_state(cls, final_estimation: Dict[str, Any], status: str) -> EstimationState:
+        # No graph run behind it: the state only carries the final estimation.
+        return cls._with_status({"final_estimation": copy.deepcopy(final_estimation)}, status)
+
+
+_default_cache: EstimationResultCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_estimation_result_cache() -> EstimationResultCache | None:
+    """Process-wide cache configured from settings (None when disabled)."""
+    global _default_cache
+    max_entries = int(getattr(settings, "ESTIMATION_RESULT_CACHE_SIZE", 0) or 0)
+    if max_entries <= 0:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EstimationResultCache(
+                max_entries=max_entries,
+                ttl_seconds=float(getattr(settings, "ESTIMATION_RESULT_CACHE_TTL_SECONDS", 0) or 0),
+            )
+        return _default_cache
@@ -0,0 +1,355 @@
+import heapq
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay serialized within the process only.
+    fcntl = None
+
+from ai.core.metadata_filter import matches_where
+from ai.core.rag_normalizer import normalize_match
+from ai.core.token_fingerprint import tokenize_text
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+LEXICAL_INDEX_VERSION = 1
+
+_FileStamp = Tuple[int, int, int]
+
+
+def _file_stamp(path: str) -> Optional[_FileStamp]:
+    # os.replace gives every save a new inode, so this changes even within one mtime tick.
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive advisory lock shared by every process writing the same index file."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a", encoding="utf-8") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def document_fields(metadata: Dict[str, Any]) -> Tuple[str, str]:
+    """Title/description exactly as normalize_match exposes them to the ranker."""
+    normalized = normalize_match({"metadata": metadata})
+    return normalized.get("title") or "", normalized.get("description") or ""
+
+
+class BM25Index:
+    """
+    BM25 inverted index for one namespace.
+
+    Notes:
+    - Postings map term -> {doc_idx: term frequency}; a query only touches its own terms.
+    - Documents keep their metadata (so lexical-only hits look like vector matches) and the
+      title/description token sets used by rag_ranker, computed once at ingestion.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75):
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.doc_ids: List[Optional[str]] = []
+        self.doc_lengths: List[int] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.title_tokens: List[List[str]] = []
+        self.desc_tokens: List[List[str]] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._row_by_id: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def add(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        doc_id = str(doc_id)
+        self.remove(doc_id)
+        title, description = document_fields(metadata)
+        title_terms = tokenize_text(title)
+        desc_terms = tokenize_text(description)
+        terms = title_terms + desc_terms
+
+        row = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(terms))
+        self.metadata.append(dict(metadata or {}))
+        self.title_tokens.append(sorted(set(title_terms)))
+        self.desc_tokens.append(sorted(set(desc_terms)))
+        self._row_by_id[doc_id] = row
+        self._total_length += len(terms)
+        for term, tf in Counter(terms).items():
+            self.postings.setdefault(term, {})[row] = tf
+
+    def remove(self, doc_id: str) -> None:
+        row = self._row_by_id.pop(str(doc_id), None)
+        if row is None:
+            return
+        # Tombstone: rows are append-only so postings of other docs stay valid.
+        for term in set(self.title_tokens[row]) | set(self.desc_tokens[row]):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(row, None)
+                if not postings:
+                    del self.postings[term]
+        self._total_length -= self.doc_lengths[row]
+        self.doc_ids[row] = None
+        self.doc_lengths[row] = 0
+
+    def search(
+        self,
+        query_terms: Iterable[str],
+        top_k: int,
+        where: Dict[str, Any] | None = None,
+    ) -> List[Tuple[int, float]]:
+        n_docs = len(self._row_by_id)
+        if n_docs == 0 or top_k <= 0:
+            return []
+        avg_len = max(1.0, self._total_length / n_docs)
+
+        scores: Dict[int, float] = {}
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for row, tf in postings.items():
+                norm = tf + self.k1 * (1.0 - self.b + self.b * self.doc_lengths[row] / avg_len)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1.0) / norm
+
+        if where:
+            scores = {row: score for row, score in scores.items() if matches_where(self.metadata[row], where)}
+        return heapq.nlargest(top_k, scores.items(), key=lambda it: it[1])
+
+    def tokens_for(self, doc_id: str) -> Optional[Tuple[set, set]]:
+        row = self._row_by_id.get(str(doc_id))
+        if row is None:
+            return None
+        return set(self.title_tokens[row]), set(self.desc_tokens[row])
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Compacts tombstoned rows away; postings are stored so loading never re-tokenizes.
+        live_rows = [row for row in range(len(self.doc_ids)) if self.doc_ids[row] is not None]
+        new_row = {row: idx for idx, row in enumerate(live_rows)}
+        return {
+            "version": LEXICAL_INDEX_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "docs": [
+                {
+                    "id": self.doc_ids[row],
+                    "length": self.doc_lengths[row],
+                    "metadata": self.metadata[row],
+                    "title_tokens": self.title_tokens[row],
+                    "desc_tokens": self.desc_tokens[row],
+                }
+                for row in live_rows
+            ],
+            "postings": {
+                term: [[new_row[row], tf] for row, tf in postings.items()]
+                for term, postings in self.postings.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "BM25Index":
+        if int(payload.get("version") or 0) != LEXICAL_INDEX_VERSION:
+            raise ValueError(f"Unsupported lexical index version: {payload.get('version')}")
+        index = cls(k1=payload.get("k1", 1.2), b=payload.get("b", 0.75))
+        for row, doc in enumerate(payload.get("docs") or []):
+            doc_id = str(doc["id"])
+            length = int(doc.get("length") or 0)
+            index.doc_ids.append(doc_id)
+            index.doc_lengths.append(length)
+            index.metadata.append(doc.get("metadata") or {})
+            index.title_tokens.append(list(doc.get("title_tokens") or []))
+            index.desc_tokens.append(list(doc.get("desc_tokens") or []))
+            index._row_by_id[doc_id] = row
+            index._total_length += length
+        index.postings = {
+            term: {int(row): int(tf) for row, tf in entries}
+            for term, entries in (payload.get("postings") or {}).items()
+        }
+        return index
+
+
+class LexicalIndexStore:
+    """
+    Per-namespace BM25 indexes persisted as ``<directory>/<namespace>.json``.
+
+    Indexes are loaded lazily and reloaded when the file changes on disk (e.g. after
+    scripts/pinecone/ingest_issues.py rebuilt them).
+
+    Notes:
+    - A persisted write reloads the file, applies the docs and replaces the file under an
+      advisory lock (``<namespace>.json.lock``), so processes sharing the directory (uvicorn
+      workers) do not lose each other's updates.
+    - ``persist=False`` keeps changes in memory until ``save()``: bulk ingestion writes each
+      namespace once instead of once per batch.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, BM25Index] = {}
+        self._stamps: Dict[str, Optional[_FileStamp]] = {}
+        # Docs added with persist=False, replayed by save() if the file changed meanwhile.
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _path(self, namespace: str) -> str:
+        safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in namespace)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def _get_locked(self, namespace: str) -> Optional[BM25Index]:
+        if namespace in self._pending:
+            # Unsaved changes win until save() merges them back to disk.
+            return self._indexes.get(namespace)
+        return self._load_locked(namespace)
+
+    def _load_locked(self, namespace: str) -> Optional[BM25Index]:
+        path = self._path(namespace)
+        stamp = _file_stamp(path)
+        if stamp is None:
+            return self._indexes.get(namespace)
+        if namespace in self._indexes and self._stamps.get(namespace) == stamp:
+            return self._indexes[namespace]
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                index = BM25Index.from_dict(json.load(fh))
+        except Exception as exc:
+            logger.warning("[RAG][Lexical] failed to load %s: %s", path, exc)
+            return self._indexes.get(namespace)
+        self._indexes[namespace] = index
+        self._stamps[namespace] = stamp
+        return index
+
+    def get(self, namespace: str) -> Optional[BM25Index]:
+        with self._lock:
+            return self._get_locked(namespace)
+
+    def add_documents(self, namespace: str, docs: Iterable[Dict[str, Any]], *, persist: bool = True) -> int:
+        """Index docs ({id, metadata}) into a namespace; ``persist=False`` defers the write to save()."""
+        namespace = str(namespace or "").strip().lower()
+        docs = [doc for doc in docs if str(doc.get("id") or "").strip()]
+        if not namespace or not docs:
+            return 0
+        with self._lock:
+            if persist:
+                self._write_locked(namespace, docs)
+            else:
+                self._add_locked(self._get_locked(namespace) or BM25Index(), namespace, docs)
+                self._pending.setdefault(namespace, []).extend(docs)
+        return len(docs)
+
+    def save(self) -> int:
+        """Write every namespace changed with ``persist=False``; returns how many were written."""
+        with self._lock:
+            namespaces = sorted(self._pending)
+            for namespace in namespaces:
+                self._write_locked(namespace, [])
+        return len(namespaces)
+
+    def _add_locked(self, index: BM25Index, namespace: str, docs: List[Dict[str, Any]]) -> None:
+        for doc in docs:
+            index.add(str(doc["id"]).strip(), doc.get("metadata") or {})
+        self._indexes[namespace] = index
+
+    def _write_locked(self, namespace: str, docs: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(namespace)
+        with _file_lock(path + ".lock"):
+            pending = self._pending.pop(namespace, [])
+            if pending and _file_stamp(path) == self._stamps.get(namespace):
+                # Nobody wrote the file since it was loaded: the in-memory index is current.
+                index = self._indexes[namespace]
+            else:
+                if pending:
+                    # Another process wrote the file: replay the deferred docs on top of it.
+                    self._indexes.pop(namespace, None)
+                    self._stamps.pop(namespace, None)
+                index = self._load_locked(namespace) or BM25Index()
+                self._add_locked(index, namespace, pending)
+            self._add_locked(index, namespace, docs)
+            # A unique temp file keeps concurrent writers from clobbering each other's output.
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(index.to_dict(), fh, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if pending:
+                    self._pending[namespace] = pending
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._stamps[namespace] = _file_stamp(path)
+
+    def search(
+        self,
+        query_text: str,
+        namespaces: List[str],
+        top_k: int = 8,
+        where: Dict[str, Any] | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Raw BM25 matches shaped like vector-store matches (score is the raw BM25 score)."""
+        query_terms = tokenize_text(query_text)
+        if not query_terms:
+            return []
+        matches: List[Dict[str, Any]] = []
+        for namespace in namespaces:
+            index = self.get(namespace)
+            if index is None:
+                continue
+            for row, score in index.search(query_terms, top_k, where):
+                matches.append(
+                    {
+                        "id": index.doc_ids[row],
+                        "score": score,
+                        "metadata": dict(index.metadata[row]),
+                        "namespace": namespace,
+                    }
+                )
+        return matches
+
+    def tokens_for(self, namespace: str, doc_id: str) -> Optional[Tuple[set, set]]:
+        index = self.get(namespace)
+        return index.tokens_for(doc_id) if index is not None else None
+
+
+_default_store: LexicalIndexStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_lexical_store() -> LexicalIndexStore | None:
+    """Process-wide lexical store from RAG_LEXICAL_INDEX_DIR (None when hybrid retrieval is off)."""
+    global _default_store
+    directory = getattr(settings, "RAG_LEXICAL_INDEX_DIR", None)
+    if not directory:
+        return None
+    with _default_store_lock:
+        if _default_store is None or _default_store.directory != directory:
+            _default_store = LexicalIndexStore(directory)
+        return _default_store
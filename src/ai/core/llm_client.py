@@ -1,16 +1,27 @@
+import asyncio
+import contextvars
 import os
-from typing import Optional
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-from ai.core.token_usage import extract_token_usage, TokenUsage
+from ai.core.llm_hedging import get_default_hedging_policy
+from ai.core.llm_response_cache import LLMResponseCache, get_default_llm_response_cache
+from ai.core.token_usage import extract_token_usage, coerce_token_usage, TokenUsage
 
 load_dotenv()
 
 
 class LLMClient:
-    """Simple client for LLM calls through LangChain Google GenAI."""
+    """Simple client for LLM calls through LangChain Google GenAI.
+
+    Instances are safe to share between threads/tasks (see ``get_llm_client``): token
+    usage is returned per call, and ``last_token_usage`` is local to the calling
+    thread/asyncio task. Temperature-0 calls go through the LLM response cache (only
+    replies accepted by ``validate``, when given, are stored or served), and model calls are hedged when LLM_HEDGING_ENABLED (usage then has ``hedged_calls``).
+    """
 
     def __init__(
         self,
@@ -23,11 +34,11 @@ class LLMClient:
         **extra,
     ):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        self.last_token_usage: TokenUsage = {
-            "prompt_tokens": 0,
-            "completion_tokens": 0,
-            "total_tokens": 0,
-        }
+        self.model = model
+        self.temperature = temperature
+        self._last_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar(
+            f"llm_last_usage_{id(self)}", default=None
+        )
         if self.api_key:
             os.environ.setdefault("GEMINI_API_KEY", self.api_key)
 
@@ -40,21 +51,153 @@ class LLMClient:
             **extra,
         )
 
-    def get_last_token_usage(self) -> TokenUsage:
-        return dict(self.last_token_usage)
+    @property
+    def last_token_usage(self) -> TokenUsage:
+        return coerce_token_usage(self._last_usage.get())
 
-    def send_prompt(self, prompt: str, **kwargs) -> str:
-        prompt_preview = prompt[:180].replace("\n", " ")
+    def get_last_token_usage(self) -> TokenUsage:
+        return self.last_token_usage
 
-        response = self.llm.invoke(prompt, **kwargs)
+    @staticmethod
+    def _handle_response(response) -> Tuple[Any, TokenUsage]:
         try:
-            self.last_token_usage = extract_token_usage(response)
+            usage = extract_token_usage(response)
         except Exception:
-            self.last_token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
         if hasattr(response, "content"):
-            content = response.content
-            resp_preview = str(content)[:180].replace("\n", " ")
-            return content
+            return response.content, usage
+        return response, usage
+
+    def _response_cache(self, prompt: str, kwargs: Dict[str, Any]) -> Tuple[Optional[LLMResponseCache], str]:
+        temperature = kwargs.get("temperature", self.temperature)
+        try:
+            deterministic = float(temperature or 0.0) == 0.0
+        except (TypeError, ValueError):
+            deterministic = False
+        cache = get_default_llm_response_cache() if deterministic else None
+        if cache is None:
+            return None, ""
+        return cache, cache.make_key(self.model, 0.0, prompt, kwargs)
+
+    @staticmethod
+    def _cached_usage(original: TokenUsage) -> TokenUsage:
+        return {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "cached_calls": 1,
+            "cached_tokens": int(original.get("total_tokens") or 0),
+        }
+
+    @staticmethod
+    def _is_valid(content: Any, validate: Optional[Callable[[Any], Any]]) -> bool:
+        if validate is None:
+            return True
+        try:
+            validate(content)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _with_hedge(usage: TokenUsage, hedged: bool) -> TokenUsage:
+        # The losing duplicate is cancelled/discarded, so only the winner's tokens are known.
+        if hedged:
+            usage = {**usage, "hedged_calls": 1}
+        return usage
+
+    def send_prompt_with_usage(
+        self, prompt: str, *, validate: Optional[Callable[[Any], Any]] = None, **kwargs
+    ) -> Tuple[str, TokenUsage]:
+        cache, key = self._response_cache(prompt, kwargs)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None and self._is_valid(cached[0], validate):
+            return cached[0], self._cached_usage(cached[1])
+        policy = get_default_hedging_policy()
+        if policy is None:
+            response, hedged = self.llm.invoke(prompt, **kwargs), False
+        else:
+            response, hedged = policy.call(lambda: self.llm.invoke(prompt, **kwargs))
+        content, usage = self._handle_response(response)
+        # A truncated or malformed reply must not be replayed for the whole cache TTL.
+        if cache is not None and self._is_valid(content, validate):
+            cache.put(key, content, usage)
+        return content, self._with_hedge(usage, hedged)
+
+    async def asend_prompt_with_usage(
+        self, prompt: str, *, validate: Optional[Callable[[Any], Any]] = None, **kwargs
+    ) -> Tuple[str, TokenUsage]:
+        """Same as send_prompt_with_usage, through the model's native async client; only the
+        response cache (SQLite tier, under its lock) is touched from a worker thread."""
+        cache, key = self._response_cache(prompt, kwargs)
+        cached = await asyncio.to_thread(cache.get, key) if cache is not None else None
+        if cached is not None and self._is_valid(cached[0], validate):
+            return cached[0], self._cached_usage(cached[1])
+        policy = get_default_hedging_policy()
+        if policy is None:
+            response, hedged = await self.llm.ainvoke(prompt, **kwargs), False
+        else:
+            response, hedged = await policy.acall(lambda: self.llm.ainvoke(prompt, **kwargs))
+        content, usage = self._handle_response(response)
+        # A truncated or malformed reply must not be replayed for the whole cache TTL.
+        if cache is not None and self._is_valid(content, validate):
+            await asyncio.to_thread(cache.put, key, content, usage)
+        return content, self._with_hedge(usage, hedged)
+
+    def send_prompt(self, prompt: str, **kwargs) -> str:
+        content, usage = self.send_prompt_with_usage(prompt, **kwargs)
+        self._last_usage.set(usage)
+        return content
+
+    async def asend_prompt(self, prompt: str, **kwargs) -> str:
+        content, usage = await self.asend_prompt_with_usage(prompt, **kwargs)
+        self._last_usage.set(usage)
+        return content
+
+
+def send_with_usage(
+    llm: Any, prompt: str, *, validate: Optional[Callable[[Any], Any]] = None, **kwargs
+) -> Tuple[str, TokenUsage]:
+    """
+    Call ``llm`` and return (content, usage); simple clients (mocks) only need send_prompt.
+
+    ``validate`` (e.g. parse_llm_json_response) decides whether the reply may be cached.
+    """
+    if hasattr(llm, "send_prompt_with_usage"):
+        return llm.send_prompt_with_usage(prompt, validate=validate, **kwargs)
+    raw = llm.send_prompt(prompt, **kwargs)
+    getter = getattr(llm, "get_last_token_usage", None)
+    return raw, coerce_token_usage(getter() if getter else None)
+
+
+async def asend_with_usage(
+    llm: Any, prompt: str, *, validate: Optional[Callable[[Any], Any]] = None, **kwargs
+) -> Tuple[str, TokenUsage]:
+    if hasattr(llm, "asend_prompt_with_usage"):
+        return await llm.asend_prompt_with_usage(prompt, validate=validate, **kwargs)
+    raw = await llm.asend_prompt(prompt, **kwargs)
+    getter = getattr(llm, "get_last_token_usage", None)
+    return raw, coerce_token_usage(getter() if getter else None)
+
+
+_client_pool: Dict[Tuple[Any, ...], LLMClient] = {}
+_client_pool_lock = threading.Lock()
+
+
+def get_llm_client(**kwargs) -> LLMClient:
+    """
+    Shared LLMClient per configuration (model, temperature, ...).
 
-        resp_preview = str(response)[:180].replace("\n", " ")
-        return response
+    The underlying ChatGoogleGenerativeAI and its HTTP transport are built once per key,
+    so connections are kept alive across estimations instead of set up per agent call.
+    """
+    key = tuple(sorted((name, repr(value)) for name, value in kwargs.items()))
+    client = _client_pool.get(key)
+    if client is not None:
+        return client
+    with _client_pool_lock:
+        client = _client_pool.get(key)
+        if client is None:
+            client = LLMClient(**kwargs)
+            _client_pool[key] = client
+        return client
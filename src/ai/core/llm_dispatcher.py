@@ -0,0 +1,268 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+from config.settings import settings
+
+
+class _Task:
+    __slots__ = ("future", "fn", "args", "kwargs", "lane", "context", "enqueued_at", "session")
+
+    def __init__(self, session: "DispatchSession", fn: Callable[..., Any], args, kwargs, lane: str):
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.lane = lane
+        # Runs in the submitter's context so contextvars (request/issue ids) follow the call.
+        self.context = contextvars.copy_context()
+        self.enqueued_at = time.perf_counter()
+        self.session = session
+
+
+class _AsyncWaiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class DispatchSession:
+    """
+    Calls of one estimation. Each lane (e.g. "review", "heuristic") has its own share of
+    the global budget; lanes without a limit are only bounded by the dispatcher.
+    """
+
+    def __init__(self, dispatcher: "LLMDispatcher", lanes: Optional[Dict[str, int]] = None, label: str = ""):
+        self._dispatcher = dispatcher
+        self.label = label
+        self.lanes = {lane: max(1, int(limit)) for lane, limit in (lanes or {}).items()}
+        self._pending: Deque[_Task] = deque()
+        self._running: Counter = Counter()
+        self._scheduled = False
+        self.calls = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, lane: str = "default", **kwargs) -> Future:
+        task = _Task(self, fn, args, kwargs, lane)
+        self._dispatcher._enqueue(task)
+        return task.future
+
+    def _pop_runnable(self) -> Optional[_Task]:
+        for idx, task in enumerate(self._pending):
+            limit = self.lanes.get(task.lane)
+            if limit is None or self._running[task.lane] < limit:
+                del self._pending[idx]
+                self._running[task.lane] += 1
+                return task
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "queue_wait_ms": int(self.wait_ms_total),
+            "queue_wait_max_ms": int(self.wait_ms_max),
+        }
+
+
+class LLMDispatcher:
+    """
+    Process-wide executor for LLM calls.
+
+    Notes:
+    - ``max_concurrency`` worker threads: total in-flight calls never exceed it, whatever
+      the number of estimations running.
+    - Fair queuing: runnable sessions are served round-robin, one call at a time, so a
+      burst of estimations progresses together instead of first-come-first-served.
+    - Only leaf calls should be submitted; a task that waits on another submitted task
+      can deadlock the pool.
+    - Coroutines share the same budget through ``aslot()`` (async flow) and extra calls
+      such as hedges through ``try_acquire()``/``release()``; when a slot frees up, queued
+      threads and async waiters take turns.
+    """
+
+    def __init__(self, max_concurrency: int):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be > 0")
+        self.max_concurrency = int(max_concurrency)
+        self._cond = threading.Condition()
+        self._sessions: Deque[DispatchSession] = deque()
+        self._workers: List[threading.Thread] = []
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._async_waiters: Deque[_AsyncWaiter] = deque()
+        self._prefer_async = False
+        self.submitted = 0
+        self.completed = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def session(self, lanes: Optional[Dict[str, int]] = None, label: str = "") -> DispatchSession:
+        return DispatchSession(self, lanes=lanes, label=label)
+
+    def _enqueue(self, task: _Task) -> None:
+        with self._cond:
+            session = task.session
+            session._pending.append(task)
+            if not session._scheduled:
+                session._scheduled = True
+                self._sessions.append(session)
+            self._queue_depth += 1
+            self.submitted += 1
+            if len(self._workers) < self.max_concurrency:
+                worker = threading.Thread(target=self._worker_loop, name="llm-dispatch", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Hold one slot of the budget while the ``async with`` body runs on the event loop."""
+        await self._aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def _aacquire(self) -> None:
+        with self._cond:
+            if self._in_flight < self.max_concurrency and not self._async_waiters:
+                self._in_flight += 1
+                return
+            waiter = _AsyncWaiter(asyncio.get_running_loop())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter.future
+        except BaseException:
+            with self._cond:
+                if waiter.granted:
+                    self._release_locked()
+                else:
+                    self._async_waiters.remove(waiter)
+            raise
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is idle (nothing queued); pair with ``release()``."""
+        with self._cond:
+            if self._in_flight >= self.max_concurrency or self._queue_depth or self._async_waiters:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._release_locked()
+
+    def _release_locked(self) -> None:
+        self._in_flight -= 1
+        if self._async_waiters and (self._prefer_async or not self._queue_depth):
+            self._grant_async_locked()
+            self._prefer_async = False
+        else:
+            self._prefer_async = True
+        # Workers also pick up waiters their sessions' lane limits leave room for.
+        self._cond.notify_all()
+
+    def _grant_async_locked(self) -> None:
+        while self._async_waiters and self._in_flight < self.max_concurrency:
+            waiter = self._async_waiters.popleft()
+            try:
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            except RuntimeError:
+                # Loop closed while waiting: nobody will use (or release) this slot.
+                continue
+            waiter.granted = True
+            self._in_flight += 1
+            return
+
+    def _next_task_locked(self) -> Optional[_Task]:
+        if self._in_flight >= self.max_concurrency:
+            return None
+        for _ in range(len(self._sessions)):
+            session = self._sessions[0]
+            task = session._pop_runnable()
+            if task is None:
+                self._sessions.rotate(-1)
+                continue
+            self._sessions.popleft()
+            if session._pending:
+                self._sessions.append(session)
+            else:
+                session._scheduled = False
+
+            wait_ms = (time.perf_counter() - task.enqueued_at) * 1000.0
+            session.calls += 1
+            session.wait_ms_total += wait_ms
+            session.wait_ms_max = max(session.wait_ms_max, wait_ms)
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self._queue_depth -= 1
+            self._in_flight += 1
+            return task
+        return None
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next_task_locked()
+                while task is None:
+                    # Slot free but no runnable task (empty queue or lane limits): hand it over.
+                    self._grant_async_locked()
+                    self._cond.wait()
+                    task = self._next_task_locked()
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        result = task.context.run(task.fn, *task.args, **task.kwargs)
+                    except BaseException as exc:
+                        task.future.set_exception(exc)
+                    else:
+                        task.future.set_result(result)
+            finally:
+                with self._cond:
+                    task.session._running[task.lane] -= 1
+                    self.completed += 1
+                    # A freed lane can make a queued task of the same session runnable.
+                    self._release_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            started = self.submitted - self._queue_depth
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queue_depth": self._queue_depth,
+                "async_waiters": len(self._async_waiters),
+                "waiting_sessions": len(self._sessions),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "queue_wait_avg_ms": int(self.wait_ms_total / started) if started else 0,
+                "queue_wait_max_ms": int(self.wait_ms_max),
+            }
+
+
+_default_dispatcher: LLMDispatcher | None = None
+_default_dispatcher_lock = threading.Lock()
+
+
+def get_default_llm_dispatcher() -> LLMDispatcher:
+    """Process-wide dispatcher sized by LLM_MAX_CONCURRENCY."""
+    global _default_dispatcher
+    with _default_dispatcher_lock:
+        if _default_dispatcher is None:
+            limit = int(getattr(settings, "LLM_MAX_CONCURRENCY", 16) or 16)
+            _default_dispatcher = LLMDispatcher(max(1, limit))
+        return _default_dispatcher
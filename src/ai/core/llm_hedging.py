@@ -0,0 +1,208 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from ai.core.llm_dispatcher import LLMDispatcher, get_default_llm_dispatcher
+from config.settings import settings
+
+
+class HedgingPolicy:
+    """
+    Hedged requests for LLM calls (tail-latency cut).
+
+    Notes:
+    - The hedge delay is the ``percentile`` of the last ``window`` call latencies; until
+      ``min_samples`` are known (or below ``min_delay_seconds``) no hedge is sent early.
+    - A call still running after the delay gets one duplicate; the first successful
+      response wins and the other is cancelled (async) or discarded (sync threads
+      cannot be interrupted).
+    - Hedges are capped by ``max_extra_ratio`` of the primary calls (e.g. 0.05 = 5% extra).
+    - With a ``budget`` (the LLMDispatcher) a hedge also needs an idle slot of it, held
+      until both copies finish; the primary runs on the caller's own slot.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 0.95,
+        max_extra_ratio: float = 0.05,
+        window: int = 256,
+        min_samples: int = 20,
+        min_delay_seconds: float = 1.0,
+        max_workers: int = 32,
+        budget: Optional[LLMDispatcher] = None,
+    ):
+        if not 0.0 < percentile < 1.0:
+            raise ValueError("percentile must be in (0, 1)")
+        if window <= 0:
+            raise ValueError("window must be > 0")
+
+        self.percentile = float(percentile)
+        self.max_extra_ratio = max(0.0, float(max_extra_ratio))
+        self.min_samples = max(1, int(min_samples))
+        self.min_delay_seconds = max(0.0, float(min_delay_seconds))
+        self._max_workers = max(2, int(max_workers))
+        self._budget = budget
+        self._latencies: Deque[float] = deque(maxlen=int(window))
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency_seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(max(0.0, float(latency_seconds)))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        idx = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay_seconds, ordered[idx])
+
+    def _start_call(self) -> Optional[float]:
+        with self._lock:
+            self.calls += 1
+        return self.hedge_delay()
+
+    def _try_acquire_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_extra_ratio * self.calls:
+                return False
+            if self._budget is not None and not self._budget.try_acquire():
+                return False
+            self.hedges += 1
+            return True
+
+    def _release_when_both_done(self, primary: Any, hedge: Any) -> None:
+        if self._budget is None:
+            return
+        remaining = [2]
+        lock = threading.Lock()
+
+        def _done(_: Any) -> None:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._budget.release()
+
+        primary.add_done_callback(_done)
+        hedge.add_done_callback(_done)
+
+    def _won_by_hedge(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        started_at = time.perf_counter()
+        result = fn()
+        self.record(time.perf_counter() - started_at)
+        return result
+
+    async def _atimed(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        started_at = time.perf_counter()
+        result = await make_call()
+        self.record(time.perf_counter() - started_at)
+        return result
+
+    def call(self, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` (blocking) with hedging; returns (result, hedge_sent)."""
+        delay = self._start_call()
+        if delay is None:
+            return self._timed(fn), False
+
+        primary: Future = self._pool().submit(self._timed, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._try_acquire_hedge():
+            return primary.result(), False
+
+        hedge: Future = self._pool().submit(self._timed, fn)
+        self._release_when_both_done(primary, hedge)
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        self._won_by_hedge()
+                    return future.result(), True
+                error = future.exception()
+        raise error if error is not None else RuntimeError("hedged LLM call failed")
+
+    async def acall(self, make_call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async counterpart of ``call``; ``make_call`` builds a fresh coroutine per attempt."""
+        delay = self._start_call()
+        if delay is None:
+            return await self._atimed(make_call), False
+
+        primary = asyncio.ensure_future(self._atimed(make_call))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._try_acquire_hedge():
+            return await primary, False
+
+        hedge = asyncio.ensure_future(self._atimed(make_call))
+        self._release_when_both_done(primary, hedge)
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._won_by_hedge()
+                        return task.result(), True
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error if error is not None else RuntimeError("hedged LLM call failed")
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedges / self.calls, 4) if self.calls else 0.0,
+                "hedge_delay_ms": int(delay * 1000) if delay is not None else None,
+            }
+
+
+_default_policy: HedgingPolicy | None = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_hedging_policy() -> HedgingPolicy | None:
+    """Process-wide policy configured from settings (None when hedging is disabled)."""
+    global _default_policy
+    if not bool(getattr(settings, "LLM_HEDGING_ENABLED", False)):
+        return None
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = HedgingPolicy(
+                percentile=float(getattr(settings, "LLM_HEDGING_PERCENTILE", 0.95) or 0.95),
+                max_extra_ratio=float(getattr(settings, "LLM_HEDGING_MAX_EXTRA_RATIO", 0.05) or 0.0),
+                min_samples=int(getattr(settings, "LLM_HEDGING_MIN_SAMPLES", 20) or 20),
+                min_delay_seconds=float(getattr(settings, "LLM_HEDGING_MIN_DELAY_SECONDS", 1.0) or 0.0),
+                max_workers=2 * int(getattr(settings, "LLM_MAX_CONCURRENCY", 16) or 16),
+                budget=get_default_llm_dispatcher(),
+            )
+        return _default_policy
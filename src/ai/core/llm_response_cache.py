@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from ai.core.token_usage import TokenUsage, coerce_token_usage
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Prompt-response cache for deterministic (temperature 0) LLM calls.
+
+    Notes:
+    - Keys are sha256 of (prompt template version, model, temperature, call kwargs, prompt),
+      so bumping LLM_PROMPT_TEMPLATE_VERSION invalidates every entry at once.
+    - The in-memory tier is an LRU bounded by ``max_entries``; the optional SQLite tier
+      survives restarts / validation reruns. Both honor ``ttl_seconds`` (<= 0: no expiry).
+    - Each entry keeps the token usage of the original call, reported as saved tokens.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+        ttl_seconds: float = 0.0,
+        template_version: str = "1",
+        now_fn: Callable[[], float] | None = None,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+
+        self._max_entries = max_entries
+        self._ttl_seconds = float(ttl_seconds)
+        self.template_version = str(template_version)
+        self._now = now_fn or time.time
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, TokenUsage, float]]" = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if path:
+            self._conn = self._open_disk_tier(path, self.template_version)
+
+    @staticmethod
+    def _open_disk_tier(path: str, template_version: str) -> sqlite3.Connection | None:
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    template_version TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    usage TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            # Entries of older prompt templates can never match again.
+            conn.execute("DELETE FROM llm_response_cache WHERE template_version != ?", (template_version,))
+            conn.commit()
+            return conn
+        except Exception as exc:
+            logger.exception("LLM response cache disk tier disabled: %s", exc)
+            return None
+
+    def make_key(self, model: str, temperature: float, prompt: str, kwargs: Mapping[str, Any] | None = None) -> str:
+        payload = json.dumps(
+            [
+                self.template_version,
+                str(model or ""),
+                float(temperature or 0.0),
+                sorted((str(k), repr(v)) for k, v in (kwargs or {}).items()),
+                hashlib.sha256(str(prompt or "").encode("utf-8")).hexdigest(),
+            ]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self._ttl_seconds > 0 and (self._now() - created_at) >= self._ttl_seconds
+
+    def get(self, key: str) -> Optional[Tuple[str, TokenUsage]]:
+        """(content, usage of the original call) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[2]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], dict(entry[1])
+
+            entry = self._read_disk_locked(key)
+            if entry is not None:
+                self._store_memory_locked(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[0], dict(entry[1])
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, content: str, usage: Any) -> None:
+        if not isinstance(content, str) or not content.strip():
+            return
+        entry = (content, coerce_token_usage(usage), self._now())
+        with self._lock:
+            self._store_memory_locked(key, entry)
+            self._write_disk_locked(key, entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._entries),
+            }
+
+    def _store_memory_locked(self, key: str, entry: Tuple[str, TokenUsage, float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk_locked(self, key: str) -> Optional[Tuple[str, TokenUsage, float]]:
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT content, usage, created_at FROM llm_response_cache "
+                "WHERE cache_key = ? AND template_version = ?",
+                (key, self.template_version),
+            ).fetchone()
+        except Exception as exc:
+            logger.warning("LLM response cache disk read failed: %s", exc)
+            return None
+        if row is None:
+            return None
+        content, usage, created_at = row
+        if self._expired(float(created_at)):
+            return None
+        return content, coerce_token_usage(json.loads(usage)), float(created_at)
+
+    def _write_disk_locked(self, key: str, entry: Tuple[str, TokenUsage, float]) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (cache_key, template_version, content, usage, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, self.template_version, entry[0], json.dumps(entry[1]), entry[2]),
+            )
+            self._conn.commit()
+        except Exception as exc:
+            logger.warning("LLM response cache disk write failed: %s", exc)
+
+
+_default_cache: LLMResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_llm_response_cache() -> LLMResponseCache | None:
+    """Process-wide cache configured from settings (None when disabled)."""
+    global _default_cache
+    max_entries = int(getattr(settings, "LLM_RESPONSE_CACHE_SIZE", 0) or 0)
+    if max_entries <= 0:
+        return None
+    template_version = str(getattr(settings, "LLM_PROMPT_TEMPLATE_VERSION", "1") or "1")
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.template_version != template_version:
+            _default_cache = LLMResponseCache(
+                max_entries=max_entries,
+                path=getattr(settings, "LLM_RESPONSE_CACHE_PATH", None),
+                ttl_seconds=float(getattr(settings, "LLM_RESPONSE_CACHE_TTL_SECONDS", 0) or 0),
+                template_version=template_version,
+            )
+        return _default_cache
@@ -0,0 +1,534 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai.core.embedding_cache import get_default_embedding_cache
+from ai.core.metadata_filter import matches_where, where_fields
+from ai.core.namespace_router import NamespaceRouter, route_namespaces_with
+from ai.core.retrieval_cache import bump_namespace_versions
+from ai.core.vector_snapshot import VectorSnapshot, is_vector_snapshot
+from ai.core.vector_store import NamespaceRouting, NamespaceSearch, VectorStoreClient
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def _where_key(where: Dict[str, Any]) -> str:
+    return json.dumps(where, sort_keys=True, default=str)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first (argpartition + sort of k items)."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.zeros((0,), dtype=np.int64)
+    if k < scores.shape[0]:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.shape[0])
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class _NamespaceSegment:
+    """Row-normalized float32 matrix plus ids/metadata for one namespace."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.row_by_id: Dict[str, int] = {}
+        # where-filter masks are stable between upserts; the retriever always sends the same filter.
+        self.mask_cache: Dict[str, np.ndarray] = {}
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, metadata: Sequence[Dict[str, Any]]) -> None:
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        new_rows: List[int] = []
+        for i, doc_id in enumerate(ids):
+            row = self.row_by_id.get(doc_id)
+            if row is None:
+                new_rows.append(i)
+                continue
+            self.matrix[row] = vectors[i]
+            self.metadata[row] = dict(metadata[i])
+
+        if new_rows:
+            start = len(self.ids)
+            self.matrix = np.vstack([self.matrix, vectors[new_rows]])
+            for offset, i in enumerate(new_rows):
+                self.ids.append(ids[i])
+                self.metadata.append(dict(metadata[i]))
+                self.row_by_id[ids[i]] = start + offset
+        self.mask_cache.clear()
+
+    def mask_for(self, where: Dict[str, Any] | None) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        key = _where_key(where)
+        mask = self.mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (matches_where(meta, where) for meta in self.metadata),
+                dtype=bool,
+                count=len(self.metadata),
+            )
+            self.mask_cache[key] = mask
+        return mask
+
+    def search(self, query: np.ndarray, top_k: int, where: Dict[str, Any] | None) -> List[tuple[int, float]]:
+        if not self.ids or top_k <= 0:
+            return []
+        scores = self.matrix @ query
+        mask = self.mask_for(where)
+        if mask is not None:
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        else:
+            candidates = None
+
+        top = _top_k(scores, top_k)
+        rows = candidates[top] if candidates is not None else top
+        return [(int(row), float(scores[idx])) for row, idx in zip(rows, top)]
+
+
+class _SnapshotSegment:
+    """
+    Read-only namespace slice of a VectorSnapshot (int8 rows scored in place).
+
+    Rows overwritten by later upserts live in the float32 overlay and are hidden here
+    through the ``deleted`` mask.
+    """
+
+    def __init__(self, snapshot: VectorSnapshot, namespace: str):
+        self.snapshot = snapshot
+        self.start, self.end = snapshot.namespace_range(namespace) or (0, 0)
+        self.deleted = np.zeros((self.end - self.start,), dtype=bool)
+        self.mask_cache: Dict[str, np.ndarray] = {}
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+    def delete_ids(self, ids: Sequence[str]) -> None:
+        if self._row_by_id is None:
+            all_ids = self.snapshot.ids
+            self._row_by_id = {all_ids[row]: row - self.start for row in range(self.start, self.end)}
+        changed = False
+        for doc_id in ids:
+            local = self._row_by_id.get(doc_id)
+            if local is not None and not self.deleted[local]:
+                self.deleted[local] = True
+                changed = True
+        if changed:
+            self.mask_cache.clear()
+
+    def mask_for(self, where: Dict[str, Any] | None) -> Optional[np.ndarray]:
+        if not where and not self.deleted.any():
+            return None
+        key = _where_key(where or {})
+        mask = self.mask_cache.get(key)
+        if mask is None:
+            if where:
+                fields = where_fields(where)
+                columns = {name: self.snapshot.column(name) for name in fields}
+                mask = np.fromiter(
+                    (
+                        matches_where(
+                            {name: col[row] for name, col in columns.items() if col[row] is not None},
+                            where,
+                        )
+                        for row in range(self.start, self.end)
+                    ),
+                    dtype=bool,
+                    count=self.size,
+                )
+            else:
+                mask = np.ones((self.size,), dtype=bool)
+            mask &= ~self.deleted
+            self.mask_cache[key] = mask
+        return mask
+
+    def search(self, query: np.ndarray, top_k: int, where: Dict[str, Any] | None) -> List[tuple[int, float]]:
+        if self.size <= 0 or top_k <= 0:
+            return []
+        scores = self.snapshot.scores(query, self.start, self.end)
+        mask = self.mask_for(where)
+        candidates = None
+        if mask is not None:
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        top = _top_k(scores, top_k)
+        rows = candidates[top] if candidates is not None else top
+        return [(self.start + int(row), float(scores[idx])) for row, idx in zip(rows, top)]
+
+
+class LocalVectorStoreClient(VectorStoreClient):
+    """
+    In-process vector store with the same contract as PineconeVectorStoreClient.
+
+    Notes:
+    - One row-normalized float32 matrix per namespace; cosine scores are a single mat-vec.
+    - Top-k uses argpartition, so cost is O(n) per namespace instead of a full sort.
+    - Loads a JSONL snapshot exported from Pinecone (scripts/pinecone/export_snapshot.py);
+      upserts are appended to the same file so the snapshot stays current.
+    - A snapshot directory (ai.core.vector_snapshot) is memory-mapped as a read-only int8
+      base; upserts go to a float32 overlay journaled in ``overlay.jsonl`` next to it.
+    - ``embed_fn`` is injectable for offline runs/benchmarks; by default it calls OpenAI.
+    """
+
+    def __init__(
+        self,
+        *,
+        snapshot_path: Optional[str] = None,
+        embed_fn: Optional[EmbedFn] = None,
+        embedding_model: Optional[str] = None,
+    ):
+        self._snapshot_path = snapshot_path
+        self._embed_fn = embed_fn
+        self._embedding_model = embedding_model or settings.RAG_EMBEDDING_MODEL
+        self._openai = None
+        self._lock = threading.RLock()
+        self._segments: Dict[str, _NamespaceSegment] = {}
+        self._dim: Optional[int] = None
+        self._base: Optional[VectorSnapshot] = None
+        self._base_segments: Dict[str, _SnapshotSegment] = {}
+        self._embedding_cache = get_default_embedding_cache()
+        self.last_embedding_tokens: int = 0
+        self.last_embedding_cache_hit: bool = False
+        # Centroids are derived from the store's own matrices, rebuilt lazily after upserts.
+        self._router: Optional[NamespaceRouter] = None
+        if is_vector_snapshot(snapshot_path):
+            self._open_base(snapshot_path)
+        elif snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+
+    # ---- embeddings -------------------------------------------------------
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        vectors, self.last_embedding_tokens = self._embed_texts_with_usage(texts)
+        return vectors
+
+    def _embed_texts_with_usage(self, texts: List[str]) -> Tuple[List[List[float]], int]:
+        if self._embed_fn is not None:
+            return [list(v) for v in self._embed_fn(texts)], 0
+
+        if self._openai is None:
+            api_key = settings.OPENAI_API_KEY_RAG
+            if not api_key:
+                raise RuntimeError("LocalVectorStoreClient needs embed_fn or OPENAI_API_KEY_RAG.")
+            from openai import OpenAI
+
+            self._openai = OpenAI(api_key=api_key)
+
+        response = self._openai.embeddings.create(model=self._embedding_model, input=texts)
+        usage = getattr(response, "usage", None)
+        return [item.embedding for item in response.data], max(0, int(getattr(usage, "total_tokens", 0) or 0))
+
+    def _embed_query(self, text: str) -> List[float]:
+        vector, self.last_embedding_tokens, self.last_embedding_cache_hit = self._embed_query_with_usage(text)
+        return vector
+
+    def _embed_query_with_usage(self, text: str) -> Tuple[List[float], int, bool]:
+        """(vector, embedding tokens, cache hit) for this call only."""
+        cache = self._embedding_cache
+        if cache is not None:
+            cached = cache.get(self._embedding_model, text)
+            if cached is not None:
+                return cached, 0, True
+
+        vectors, tokens = self._embed_texts_with_usage([text])
+        if cache is not None:
+            cache.put(self._embedding_model, text, vectors[0])
+        return vectors[0], tokens, False
+
+    def embedding_cache_stats(self) -> Dict[str, int]:
+        cache = self._embedding_cache
+        return cache.stats() if cache is not None else {}
+
+    # ---- writes -----------------------------------------------------------
+
+    def _segment_locked(self, namespace: str, dim: int) -> _NamespaceSegment:
+        if self._dim is None:
+            self._dim = dim
+        elif self._dim != dim:
+            raise ValueError(f"Vector dimension mismatch: {dim} != {self._dim}")
+        segment = self._segments.get(namespace)
+        if segment is None:
+            segment = self._segments[namespace] = _NamespaceSegment(dim)
+        return segment
+
+    def _open_base(self, path: str) -> None:
+        self._base = VectorSnapshot(path)
+        self._dim = self._base.dim or None
+        self._base_segments = {ns: _SnapshotSegment(self._base, ns) for ns in self._base.namespaces()}
+        self._snapshot_path = os.path.join(path, "overlay.jsonl")
+        logger.info(
+            "[RAG][Local] vector snapshot opened path=%s vectors=%d namespaces=%d",
+            path,
+            self._base.count,
+            len(self._base_segments),
+        )
+        if os.path.exists(self._snapshot_path):
+            self.load_snapshot(self._snapshot_path)
+
+    def upsert_vectors(self, namespace: str, records: List[Dict[str, Any]]) -> int:
+        """Insert already-embedded records ({id, values, metadata}) into a namespace."""
+        namespace = str(namespace or "").strip().lower()
+        records = [r for r in records if r.get("id") and r.get("values")]
+        if not namespace or not records:
+            return 0
+        vectors = np.asarray([r["values"] for r in records], dtype=np.float32)
+        with self._lock:
+            segment = self._segment_locked(namespace, int(vectors.shape[1]))
+            ids = [str(r["id"]) for r in records]
+            segment.upsert(ids, vectors, [r.get("metadata") or {} for r in records])
+            base_segment = self._base_segments.get(namespace)
+            if base_segment is not None:
+                base_segment.delete_ids(ids)
+            self._router = None
+        bump_namespace_versions([namespace])
+        return len(records)
+
+    def upsert(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not docs:
+            return {"skipped": False, "reason": None, "upserted": 0}
+
+        prepared: List[Dict[str, Any]] = []
+        for doc in docs:
+            if not isinstance(doc, dict):
+                continue
+            doc_id = str(doc.get("id") or "").strip()
+            namespace = str(doc.get("namespace") or "").strip().lower()
+            text = str(doc.get("text") or "").strip()
+            metadata = doc.get("metadata") or {}
+            if not doc_id or not namespace or not text:
+                continue
+            if not isinstance(metadata, dict):
+                metadata = {"value": metadata}
+            prepared.append({"id": doc_id, "namespace": namespace, "text": text, "metadata": metadata})
+
+        if not prepared:
+            return {"skipped": False, "reason": "no_valid_docs", "upserted": 0}
+
+        vectors = self._embed_texts([doc["text"] for doc in prepared])
+        if len(vectors) != len(prepared):
+            raise RuntimeError(f"Embedding count mismatch: {len(vectors)} != {len(prepared)}")
+
+        by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+        for doc, values in zip(prepared, vectors):
+            by_namespace.setdefault(doc["namespace"], []).append(
+                {"id": doc["id"], "values": values, "metadata": doc["metadata"]}
+            )
+
+        upserted = 0
+        namespace_counts: Dict[str, int] = {}
+        for ns, records in by_namespace.items():
+            count = self.upsert_vectors(ns, records)
+            upserted += count
+            namespace_counts[ns] = count
+            if self._snapshot_path:
+                self._append_snapshot(ns, records)
+
+        return {"skipped": False, "reason": None, "upserted": upserted, "namespaces": namespace_counts}
+
+    # ---- snapshot ---------------------------------------------------------
+
+    def load_snapshot(self, path: str) -> int:
+        """Load a JSONL snapshot ({namespace, id, values, metadata} per line). Later lines win."""
+        by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                by_namespace.setdefault(str(record.get("namespace") or ""), []).append(record)
+
+        loaded = 0
+        for namespace, records in by_namespace.items():
+            loaded += self.upsert_vectors(namespace, records)
+        logger.info("[RAG][Local] snapshot loaded path=%s vectors=%d namespaces=%d", path, loaded, len(by_namespace))
+        return loaded
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield every live record ({namespace, id, values, metadata}); base rows are dequantized."""
+        with self._lock:
+            if self._base is not None:
+                ids = self._base.ids
+                for namespace, base_segment in self._base_segments.items():
+                    for local in np.flatnonzero(~base_segment.deleted):
+                        row = base_segment.start + int(local)
+                        values = self._base.codes[row].astype(np.float32) * self._base.scales[row]
+                        yield {
+                            "namespace": namespace,
+                            "id": ids[row],
+                            "values": values.tolist(),
+                            "metadata": self._base.metadata_row(row),
+                        }
+            for namespace, segment in self._segments.items():
+                for row, doc_id in enumerate(segment.ids):
+                    yield {
+                        "namespace": namespace,
+                        "id": doc_id,
+                        "values": segment.matrix[row].tolist(),
+                        "metadata": segment.metadata[row],
+                    }
+
+    def save_snapshot(self, path: str) -> int:
+        written = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for record in self.iter_records():
+                fh.write(json.dumps(record, ensure_ascii=False))
+                fh.write("\n")
+                written += 1
+        os.replace(tmp_path, path)
+        return written
+
+    def _append_snapshot(self, namespace: str, records: List[Dict[str, Any]]) -> None:
+        try:
+            with open(self._snapshot_path, "a", encoding="utf-8") as fh:
+                for record in records:
+                    fh.write(json.dumps({"namespace": namespace, **record}, ensure_ascii=False))
+                    fh.write("\n")
+        except Exception as exc:
+            logger.exception("[RAG][Local] snapshot append failed: %s", exc)
+
+    # ---- reads ------------------------------------------------------------
+
+    def semantic_search(
+        self,
+        text: str,
+        namespaces: List[str],
+        top_k: int = 8,
+        where: Dict[str, Any] | None = None,
+    ) -> List[Dict[str, Any]]:
+        return self.search_with_stats(text, namespaces, top_k=top_k, where=where).matches
+
+    def search_with_stats(
+        self,
+        text: str,
+        namespaces: List[str],
+        top_k: int = 8,
+        where: Dict[str, Any] | None = None,
+    ) -> NamespaceSearch:
+        if not text.strip() or not namespaces:
+            return NamespaceSearch(matches=[])
+
+        vector, embedding_tokens, cache_hit = self._embed_query_with_usage(text)
+        query = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+
+        all_matches: List[Dict[str, Any]] = []
+        latencies: Dict[str, int] = {}
+        with self._lock:
+            for namespace in namespaces:
+                started_at = time.perf_counter()
+                all_matches.extend(self._search_namespace_locked(namespace, query, top_k, where))
+                latencies[namespace] = int((time.perf_counter() - started_at) * 1000)
+        return NamespaceSearch(
+            matches=all_matches,
+            namespace_latency_ms=latencies,
+            embedding_tokens=embedding_tokens,
+            embedding_cache_hit=cache_hit,
+        )
+
+    def _search_namespace_locked(
+        self,
+        namespace: str,
+        query: np.ndarray,
+        top_k: int,
+        where: Dict[str, Any] | None,
+    ) -> List[Dict[str, Any]]:
+        records: List[Dict[str, Any]] = []
+        base_segment = self._base_segments.get(namespace)
+        if base_segment is not None and self._base.dim == query.shape[0]:
+            ids = self._base.ids
+            for row, score in base_segment.search(query, top_k, where):
+                records.append(
+                    {
+                        "id": ids[row],
+                        "score": score,
+                        "metadata": self._base.metadata_row(row),
+                        "namespace": namespace,
+                    }
+                )
+
+        segment = self._segments.get(namespace)
+        if segment is not None and segment.dim == query.shape[0]:
+            for row, score in segment.search(query, top_k, where):
+                records.append(
+                    {
+                        "id": segment.ids[row],
+                        "score": score,
+                        "metadata": dict(segment.metadata[row]),
+                        "namespace": namespace,
+                    }
+                )
+
+        if base_segment is not None and segment is not None:
+            records = sorted(records, key=lambda r: r["score"], reverse=True)[:top_k]
+        return records
+
+    def _build_router_locked(self) -> NamespaceRouter:
+        router = NamespaceRouter()
+        for namespace, base_segment in self._base_segments.items():
+            live = np.flatnonzero(~base_segment.deleted) + base_segment.start
+            if live.size:
+                rows = np.asarray(self._base.codes[live], dtype=np.float32) * self._base.scales[live][:, None]
+                router.observe(namespace, rows, [self._base.metadata_row(int(r), ["total_effort_hours"]) for r in live])
+        for namespace, segment in self._segments.items():
+            if segment.ids:
+                router.observe(namespace, segment.matrix, segment.metadata)
+        return router
+
+    def route_namespaces(self, text: str, namespaces: List[str], keep: List[str] | None = None) -> List[str]:
+        return self.route_namespaces_with_stats(text, namespaces, keep=keep).namespaces
+
+    def route_namespaces_with_stats(
+        self, text: str, namespaces: List[str], keep: List[str] | None = None
+    ) -> NamespaceRouting:
+        if not text.strip() or not namespaces:
+            return NamespaceRouting(namespaces=list(namespaces))
+        if not getattr(settings, "RAG_NAMESPACE_ROUTER_ENABLED", False):
+            return NamespaceRouting(namespaces=list(namespaces))
+        query_vector, tokens, cache_hit = self._embed_query_with_usage(text)
+        with self._lock:
+            if self._router is None:
+                self._router = self._build_router_locked()
+            router = self._router
+        return NamespaceRouting(
+            namespaces=route_namespaces_with(router, query_vector, namespaces, keep or []),
+            embedding_tokens=tokens,
+            embedding_calls=0 if cache_hit else 1,
+        )
+
+    def list_namespaces(self) -> List[str]:
+        with self._lock:
+            namespaces = [ns for ns, segment in self._base_segments.items() if segment.size]
+            namespaces.extend(
+                ns for ns, segment in self._segments.items() if segment.ids and ns not in namespaces
+            )
+            return namespaces
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List
+
+
+_MISSING = object()
+
+
+def _compare(op: str, value: Any, expected: Any) -> bool:
+    if op == "$eq":
+        return value == expected
+    if op == "$ne":
+        return value != expected
+    if op == "$in":
+        return value in (expected or [])
+    if op == "$nin":
+        return value not in (expected or [])
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > expected
+        if op == "$gte":
+            return value >= expected
+        if op == "$lt":
+            return value < expected
+        if op == "$lte":
+            return value <= expected
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def matches_where(metadata: Dict[str, Any], where: Dict[str, Any] | None) -> bool:
+    """Evaluate a Pinecone-style metadata filter against one record."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition or []):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition or []):
+                return False
+            continue
+
+        value = metadata.get(key, _MISSING)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$exists":
+                if (value is not _MISSING) != bool(expected):
+                    return False
+                continue
+            if value is _MISSING and op in ("$eq", "$in"):
+                return False
+            if not _compare(op, value, expected):
+                return False
+    return True
+
+
+def where_fields(where: Dict[str, Any] | None) -> List[str]:
+    """Metadata keys referenced by a filter (used to load only the needed columns)."""
+    fields: List[str] = []
+    for key, condition in (where or {}).items():
+        if key in ("$and", "$or"):
+            for sub in condition or []:
+                fields.extend(f for f in where_fields(sub) if f not in fields)
+        elif key not in fields:
+            fields.append(key)
+    return fields
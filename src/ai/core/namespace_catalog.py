@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, List, Optional
+
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class NamespaceCatalog:
+    """
+    TTL cache over ``vector_store.list_namespaces()``.
+
+    Notes:
+    - The first lookup is synchronous; afterwards callers always get the cached list.
+    - Once the TTL expires, the stale list is served while a background thread refreshes it
+      (stale-while-revalidate), so discovery never sits on the estimation critical path.
+    - Empty discovery results are not cached: Pinecone returns [] on errors.
+    """
+
+    def __init__(
+        self,
+        vector_store: Any,
+        *,
+        ttl_seconds: float,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+
+        self._vs_ref = weakref.ref(vector_store)
+        self._ttl_seconds = float(ttl_seconds)
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        self._namespaces: Optional[List[str]] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self.refresh_count = 0
+
+    def get(self) -> List[str]:
+        now = self._now()
+        with self._lock:
+            cached = self._namespaces
+            stale = cached is not None and (now - self._loaded_at) >= self._ttl_seconds
+            start_background = stale and not self._refreshing
+            if start_background:
+                self._refreshing = True
+
+        if cached is None:
+            return list(self._refresh())
+
+        if start_background:
+            thread = threading.Thread(
+                target=self._background_refresh,
+                name="namespace-catalog-refresh",
+                daemon=True,
+            )
+            thread.start()
+        return list(cached)
+
+    def invalidate(self, namespace: str | None = None) -> None:
+        """
+        Mark the catalog stale. A namespace that was just written is added immediately
+        so the next estimation already queries it, before the refresh completes.
+        """
+        ns = str(namespace or "").strip().lower()
+        with self._lock:
+            if self._namespaces is None:
+                return
+            if ns and ns in self._namespaces:
+                return
+            if ns:
+                self._namespaces = [*self._namespaces, ns]
+            self._loaded_at = self._now() - self._ttl_seconds
+
+    def _background_refresh(self) -> None:
+        try:
+            self._refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh(self) -> List[str]:
+        vector_store = self._vs_ref()
+        if vector_store is None:
+            return []
+        try:
+            namespaces = list(vector_store.list_namespaces() or [])
+        except Exception as exc:
+            logger.warning("[RAG] namespace discovery failed: %s", exc)
+            namespaces = []
+
+        with self._lock:
+            self.refresh_count += 1
+            if namespaces:
+                self._namespaces = namespaces
+                self._loaded_at = self._now()
+            return list(self._namespaces or [])
+
+
+_catalogs: "weakref.WeakKeyDictionary[Any, NamespaceCatalog]" = weakref.WeakKeyDictionary()
+_catalogs_lock = threading.Lock()
+
+
+def get_namespace_catalog(vector_store: Any) -> NamespaceCatalog | None:
+    """Return the shared catalog for a vector store (None when caching is disabled)."""
+    ttl_seconds = float(getattr(settings, "RAG_NAMESPACE_CACHE_TTL_SECONDS", 0) or 0)
+    if ttl_seconds <= 0:
+        return None
+    with _catalogs_lock:
+        try:
+            catalog = _catalogs.get(vector_store)
+            if catalog is None:
+                catalog = NamespaceCatalog(vector_store, ttl_seconds=ttl_seconds)
+                _catalogs[vector_store] = catalog
+            return catalog
+        except TypeError:
+            # Not weak-referenceable/hashable: skip caching for this store.
+            return None
+
+
+def invalidate_namespace_catalogs(namespace: str | None = None) -> None:
+    """Invalidate every catalog in the process (all clients share the same index)."""
+    with _catalogs_lock:
+        catalogs = list(_catalogs.values())
+    for catalog in catalogs:
+        catalog.invalidate(namespace)
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+NAMESPACE_ROUTER_VERSION = 1
+# Upper bounds (hours) of the effort histogram buckets; the last bucket is open-ended.
+EFFORT_BUCKETS = (2.0, 4.0, 8.0, 16.0, 24.0, 40.0)
+
+
+def _effort_bucket(value: Any) -> Optional[int]:
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        return None
+    return bisect_right(EFFORT_BUCKETS, hours)
+
+
+class NamespaceRouter:
+    """
+    Picks the namespaces worth querying for one query vector.
+
+    Notes:
+    - Each namespace keeps the running sum of its (L2-normalized) vectors, so the centroid
+      is an incremental mean fed by upserts, plus an effort histogram of its issues.
+    - ``route`` keeps the top-N namespaces by centroid cosine, every namespace within
+      ``margin`` of the N-th score (recall safety), the ``keep`` namespaces (primary project)
+      and any namespace the router has never seen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+        self._efforts: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sums)
+
+    def namespaces(self) -> List[str]:
+        with self._lock:
+            return list(self._sums)
+
+    def observe(
+        self,
+        namespace: str,
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        namespace = str(namespace or "").strip().lower()
+        matrix = np.asarray(vectors, dtype=np.float64)
+        if not namespace or matrix.ndim != 2 or matrix.shape[0] == 0:
+            return
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        total = (matrix / norms).sum(axis=0)
+
+        with self._lock:
+            current = self._sums.get(namespace)
+            if current is not None and current.shape != total.shape:
+                logger.warning("[RAG][Router] dimension change for namespace=%s; resetting centroid", namespace)
+                current = None
+                self._counts[namespace] = 0
+                self._efforts[namespace] = [0] * (len(EFFORT_BUCKETS) + 1)
+            self._sums[namespace] = total if current is None else current + total
+            self._counts[namespace] = self._counts.get(namespace, 0) + int(matrix.shape[0])
+            histogram = self._efforts.setdefault(namespace, [0] * (len(EFFORT_BUCKETS) + 1))
+            for meta in metadata or []:
+                bucket = _effort_bucket((meta or {}).get("total_effort_hours"))
+                if bucket is not None:
+                    histogram[bucket] += 1
+
+    def effort_histogram(self, namespace: str) -> List[int]:
+        with self._lock:
+            return list(self._efforts.get(namespace) or [])
+
+    def scores(self, query_vector: Sequence[float], namespaces: Iterable[str]) -> Dict[str, float]:
+        """Cosine between the query and each known namespace centroid."""
+        query = np.asarray(query_vector, dtype=np.float64)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+        out: Dict[str, float] = {}
+        with self._lock:
+            for namespace in namespaces:
+                total = self._sums.get(namespace)
+                if total is None or total.shape != query.shape:
+                    continue
+                centroid_norm = float(np.linalg.norm(total))
+                out[namespace] = float(total @ query) / centroid_norm if centroid_norm > 0 else 0.0
+        return out
+
+    def route(
+        self,
+        query_vector: Sequence[float],
+        namespaces: Sequence[str],
+        *,
+        top_n: int,
+        margin: float = 0.0,
+        keep: Iterable[str] = (),
+    ) -> List[str]:
+        if top_n <= 0 or len(namespaces) <= top_n:
+            return list(namespaces)
+
+        scores = self.scores(query_vector, namespaces)
+        ranked = sorted(scores.items(), key=lambda it: it[1], reverse=True)
+        selected = {ns for ns, _ in ranked[:top_n]}
+        if len(ranked) > top_n:
+            cutoff = ranked[top_n - 1][1] - max(0.0, float(margin))
+            selected.update(ns for ns, score in ranked[top_n:] if score >= cutoff)
+        selected.update(ns for ns in keep if ns)
+        # Unknown namespaces (no centroid yet) are always queried: never trade recall for them.
+        selected.update(ns for ns in namespaces if ns not in scores)
+        return [ns for ns in namespaces if ns in selected]
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": NAMESPACE_ROUTER_VERSION,
+                "effort_buckets": list(EFFORT_BUCKETS),
+                "namespaces": {
+                    ns: {
+                        "count": self._counts.get(ns, 0),
+                        "sum": total.tolist(),
+                        "effort_histogram": list(self._efforts.get(ns) or []),
+                    }
+                    for ns, total in self._sums.items()
+                },
+            }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "NamespaceRouter":
+        if int(payload.get("version") or 0) != NAMESPACE_ROUTER_VERSION:
+            raise ValueError(f"Unsupported namespace router version: {payload.get('version')}")
+        router = cls()
+        for ns, entry in (payload.get("namespaces") or {}).items():
+            router._sums[ns] = np.asarray(entry.get("sum") or [], dtype=np.float64)
+            router._counts[ns] = int(entry.get("count") or 0)
+            router._efforts[ns] = list(entry.get("effort_histogram") or [0] * (len(EFFORT_BUCKETS) + 1))
+        return router
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NamespaceRouter":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def route_namespaces_with(
+    router: Optional[NamespaceRouter],
+    query_vector: Sequence[float],
+    namespaces: Sequence[str],
+    keep: Iterable[str] = (),
+) -> List[str]:
+    """Apply the RAG_NAMESPACE_ROUTER_* settings; returns all namespaces when routing is off."""
+    if router is None or not getattr(settings, "RAG_NAMESPACE_ROUTER_ENABLED", False):
+        return list(namespaces)
+    return router.route(
+        query_vector,
+        namespaces,
+        top_n=int(getattr(settings, "RAG_NAMESPACE_ROUTER_TOP_N", 0) or 0),
+        margin=float(getattr(settings, "RAG_NAMESPACE_ROUTER_MARGIN", 0.0) or 0.0),
+        keep=keep,
+    )
+
+
+_default_router: NamespaceRouter | None = None
+_default_router_lock = threading.Lock()
+
+
+def get_default_namespace_router() -> NamespaceRouter:
+    """Process-wide router, loaded from RAG_NAMESPACE_ROUTER_PATH when the file exists."""
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            path = getattr(settings, "RAG_NAMESPACE_ROUTER_PATH", None)
+            router = None
+            if path and os.path.exists(path):
+                try:
+                    router = NamespaceRouter.load(path)
+                except Exception as exc:
+                    logger.warning("[RAG][Router] failed to load %s: %s", path, exc)
+            _default_router = router or NamespaceRouter()
+        return _default_router
+
+
+def persist_default_namespace_router() -> None:
+    path = getattr(settings, "RAG_NAMESPACE_ROUTER_PATH", None)
+    if not path:
+        return
+    try:
+        get_default_namespace_router().save(path)
+    except Exception as exc:
+        logger.warning("[RAG][Router] failed to save %s: %s", path, exc)
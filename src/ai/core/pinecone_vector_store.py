@@ -1,7 +1,17 @@
 import logging
-from typing import Any, Dict, List
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
 
-from ai.core.vector_store import VectorStoreClient
+from ai.core.embedding_cache import get_default_embedding_cache
+from ai.core.namespace_router import (
+    get_default_namespace_router,
+    persist_default_namespace_router,
+    route_namespaces_with,
+)
+from ai.core.retrieval_cache import bump_namespace_versions
+from ai.core.vector_store import NamespaceRouting, NamespaceSearch, VectorStoreClient
 from config.settings import settings
 
 
@@ -15,9 +25,24 @@ class PineconeVectorStoreClient(VectorStoreClient):
         self._index = None
         self._openai = None
         self.last_embedding_tokens: int = 0
+        self.last_embedding_cache_hit: bool = False
+        self._embedding_cache = get_default_embedding_cache()
+        self._query_executor = self._build_query_executor()
         self._bootstrap()
 
+    @staticmethod
+    def _build_query_executor() -> Optional[ThreadPoolExecutor]:
+        """Namespace fan-out pool, sized once from RAG_NAMESPACE_QUERY_MAX_CONCURRENCY (None: sequential)."""
+        workers = int(getattr(settings, "RAG_NAMESPACE_QUERY_MAX_CONCURRENCY", 1) or 1)
+        if workers <= 1:
+            return None
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pinecone-query")
+
     def _update_last_embedding_tokens(self, response: Any) -> None:
+        self.last_embedding_tokens = self._usage_tokens(response)
+
+    @staticmethod
+    def _usage_tokens(response: Any) -> int:
         tokens = 0
         usage = getattr(response, "usage", None)
         if usage is None and isinstance(response, dict):
@@ -30,7 +55,7 @@ class PineconeVectorStoreClient(VectorStoreClient):
                     tokens = int((usage.get("total_tokens") or usage.get("prompt_tokens") or 0) if isinstance(usage, dict) else 0)
                 except Exception:
                     tokens = 0
-        self.last_embedding_tokens = max(0, int(tokens or 0))
+        return max(0, int(tokens or 0))
 
     def _bootstrap(self) -> None:
         api_key = settings.PINECONE_API_KEY
@@ -57,12 +82,30 @@ class PineconeVectorStoreClient(VectorStoreClient):
             logger.exception("RAG disabled: Pinecone/OpenAI client init failed: %s", exc)
 
     def _embed_query(self, text: str) -> List[float]:
+        vector, self.last_embedding_tokens, self.last_embedding_cache_hit = self._embed_query_with_usage(text)
+        return vector
+
+    def _embed_query_with_usage(self, text: str) -> Tuple[List[float], int, bool]:
+        """(vector, embedding tokens, cache hit) for this call only."""
+        model = settings.RAG_EMBEDDING_MODEL
+        cache = getattr(self, "_embedding_cache", None)
+        if cache is not None:
+            cached = cache.get(model, text)
+            if cached is not None:
+                return cached, 0, True
+
         response = self._openai.embeddings.create(
-            model=settings.RAG_EMBEDDING_MODEL,
+            model=model,
             input=text,
         )
-        self._update_last_embedding_tokens(response)
-        return response.data[0].embedding
+        vector = response.data[0].embedding
+        if cache is not None:
+            cache.put(model, text, vector)
+        return vector, self._usage_tokens(response), False
+
+    def embedding_cache_stats(self) -> Dict[str, int]:
+        cache = getattr(self, "_embedding_cache", None)
+        return cache.stats() if cache is not None else {}
 
     def upsert(self, docs: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not self._ready:
@@ -107,13 +150,45 @@ class PineconeVectorStoreClient(VectorStoreClient):
 
         upserted = 0
         namespace_counts: Dict[str, int] = {}
+        router_enabled = bool(getattr(settings, "RAG_NAMESPACE_ROUTER_ENABLED", False))
         for ns, vecs in by_namespace.items():
             self._index.upsert(vectors=vecs, namespace=ns)
             upserted += len(vecs)
             namespace_counts[ns] = len(vecs)
+            bump_namespace_versions([ns])
+            if router_enabled:
+                get_default_namespace_router().observe(
+                    ns,
+                    [vec["values"] for vec in vecs],
+                    [vec["metadata"] for vec in vecs],
+                )
+        if router_enabled:
+            persist_default_namespace_router()
 
         return {"skipped": False, "reason": None, "upserted": upserted, "namespaces": namespace_counts}
 
+    def route_namespaces(self, text: str, namespaces: List[str], keep: List[str] | None = None) -> List[str]:
+        return self.route_namespaces_with_stats(text, namespaces, keep=keep).namespaces
+
+    def route_namespaces_with_stats(
+        self, text: str, namespaces: List[str], keep: List[str] | None = None
+    ) -> NamespaceRouting:
+        """
+        Narrow the namespace fan-out with the centroid router. The query embedding goes
+        through the embedding cache, so the semantic_search that follows does not re-embed
+        (unless the cache is disabled: the returned stats count this call's embedding only).
+        """
+        if not self._ready or not text.strip() or not namespaces:
+            return NamespaceRouting(namespaces=list(namespaces))
+        if not getattr(settings, "RAG_NAMESPACE_ROUTER_ENABLED", False):
+            return NamespaceRouting(namespaces=list(namespaces))
+        query_vector, tokens, cache_hit = self._embed_query_with_usage(text)
+        return NamespaceRouting(
+            namespaces=route_namespaces_with(get_default_namespace_router(), query_vector, namespaces, keep or []),
+            embedding_tokens=tokens,
+            embedding_calls=0 if cache_hit else 1,
+        )
+
     def semantic_search(
         self,
         text: str,
@@ -121,43 +196,176 @@ class PineconeVectorStoreClient(VectorStoreClient):
         top_k: int = 8,
         where: Dict[str, Any] | None = None,
     ) -> List[Dict[str, Any]]:
-        # Reset so callers don't accidentally read stale values when no embedding happens.
-        self.last_embedding_tokens = 0
+        return self.search_with_stats(text, namespaces, top_k=top_k, where=where).matches
+
+    def search_with_stats(
+        self,
+        text: str,
+        namespaces: List[str],
+        top_k: int = 8,
+        where: Dict[str, Any] | None = None,
+    ) -> NamespaceSearch:
         if not self._ready:
-            return []
+            return NamespaceSearch(matches=[])
         if not text.strip() or not namespaces:
-            return []
+            return NamespaceSearch(matches=[])
 
-        query_vector = self._embed_query(text)
-        all_matches: List[Dict[str, Any]] = []
+        query_vector, embedding_tokens, cache_hit = self._embed_query_with_usage(text)
+        executor = getattr(self, "_query_executor", None)
+        if executor is None or len(namespaces) <= 1:
+            result = self._search_sequential(query_vector, namespaces, top_k, where)
+        else:
+            result = self._search_parallel(executor, query_vector, namespaces, top_k, where)
+        result.embedding_tokens = embedding_tokens
+        result.embedding_cache_hit = cache_hit
+        return result
+
+    def _query_namespace(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int,
+        where: Dict[str, Any] | None,
+        timeout_s: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        options: Dict[str, Any] = {}
+        if timeout_s > 0:
+            # Frees the pool thread once the caller has given up on this namespace.
+            options["_request_timeout"] = timeout_s
+        response = self._index.query(
+            vector=query_vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=True,
+            filter=where or None,
+            **options,
+        )
+
+        records: List[Dict[str, Any]] = []
+        matches = getattr(response, "matches", None) or response.get("matches", [])
+        for match in matches:
+            if isinstance(match, dict):
+                record = match
+            else:
+                record = {
+                    "id": getattr(match, "id", ""),
+                    "score": getattr(match, "score", 0),
+                    "metadata": getattr(match, "metadata", {}) or {},
+                }
+            record["namespace"] = namespace
+            logger.debug("[RAG][Pinecone] match namespace=%s record=%s", namespace, record)
+            records.append(record)
+        return records
 
+    def _timed_query_namespace(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        top_k: int,
+        where: Dict[str, Any] | None,
+        timeout_s: float = 0.0,
+    ) -> tuple[List[Dict[str, Any]], int, bool]:
+        """(records, latency_ms, failed)."""
+        started_at = time.perf_counter()
+        failed = False
+        try:
+            records = self._query_namespace(query_vector, namespace, top_k, where, timeout_s)
+        except Exception as exc:
+            logger.exception("Pinecone query failed for namespace=%s: %s", namespace, exc)
+            records = []
+            failed = True
+        return records, int((time.perf_counter() - started_at) * 1000), failed
+
+    def _search_sequential(
+        self,
+        query_vector: List[float],
+        namespaces: List[str],
+        top_k: int,
+        where: Dict[str, Any] | None,
+    ) -> NamespaceSearch:
+        all_matches: List[Dict[str, Any]] = []
+        latencies: Dict[str, int] = {}
+        failed: List[str] = []
         for namespace in namespaces:
-            try:
-                response = self._index.query(
-                    vector=query_vector,
-                    top_k=top_k,
-                    namespace=namespace,
-                    include_metadata=True,
-                    filter=where or None,
-                )
+            records, latency_ms, query_failed = self._timed_query_namespace(query_vector, namespace, top_k, where)
+            latencies[namespace] = latency_ms
+            if query_failed:
+                failed.append(namespace)
+            all_matches.extend(records)
+        return NamespaceSearch(matches=all_matches, namespace_latency_ms=latencies, failed_namespaces=sorted(failed))
+
+    def _search_parallel(
+        self,
+        executor: ThreadPoolExecutor,
+        query_vector: List[float],
+        namespaces: List[str],
+        top_k: int,
+        where: Dict[str, Any] | None,
+    ) -> NamespaceSearch:
+        timeout_s = float(getattr(settings, "RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS", 0.0) or 0.0)
+        # The pool is shared by concurrent searches: each namespace's budget starts when its
+        # query does, not when it was queued behind someone else's.
+        started_at: Dict[str, float] = {}
+        abandoned = threading.Event()
+
+        def run(namespace: str) -> tuple[List[Dict[str, Any]], int, bool]:
+            if abandoned.is_set():
+                return [], 0, False
+            started_at[namespace] = time.monotonic()
+            return self._timed_query_namespace(query_vector, namespace, top_k, where, timeout_s)
 
-                matches = getattr(response, "matches", None) or response.get("matches", [])
-                for match in matches:
-                    if isinstance(match, dict):
-                        record = match
+        future_to_namespace: Dict[Future, str] = {executor.submit(run, ns): ns for ns in namespaces}
+        pending = set(future_to_namespace)
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        latencies: Dict[str, int] = {}
+        failed: List[str] = []
+        timed_out: List[str] = []
+        while pending:
+            wait_s: Optional[float] = None
+            if timeout_s > 0:
+                now = time.monotonic()
+                deadlines: List[float] = []
+                for future in list(pending):
+                    namespace = future_to_namespace[future]
+                    deadline = started_at.get(namespace, now + timeout_s) + timeout_s
+                    if namespace in started_at and deadline <= now and not future.done():
+                        pending.discard(future)
+                        timed_out.append(namespace)
                     else:
-                        record = {
-                            "id": getattr(match, "id", ""),
-                            "score": getattr(match, "score", 0),
-                            "metadata": getattr(match, "metadata", {}) or {},
-                        }
-                    record["namespace"] = namespace
-                    logger.debug("[RAG][Pinecone] match namespace=%s record=%s", namespace, record)
-                    all_matches.append(record)
-            except Exception as exc:
-                logger.exception("Pinecone query failed for namespace=%s: %s", namespace, exc)
-
-        return all_matches
+                        deadlines.append(deadline)
+                if not pending:
+                    break
+                # Queued namespaces have no deadline yet: poll until they start.
+                wait_s = max(0.0, min(min(deadlines) - now, timeout_s / 10))
+            done, pending = wait(pending, timeout=wait_s, return_when=FIRST_COMPLETED)
+            for future in done:
+                namespace = future_to_namespace[future]
+                records, latency_ms, query_failed = future.result()
+                results[namespace] = records
+                latencies[namespace] = latency_ms
+                if query_failed:
+                    failed.append(namespace)
+
+        abandoned.set()
+        if timed_out:
+            logger.warning(
+                "[RAG][Pinecone] %d/%d namespaces exceeded %.2fs budget; returning partial results: %s",
+                len(timed_out),
+                len(namespaces),
+                timeout_s,
+                sorted(timed_out),
+            )
+
+        # Preserve the caller's namespace order so merging stays deterministic.
+        all_matches: List[Dict[str, Any]] = []
+        for namespace in namespaces:
+            all_matches.extend(results.get(namespace, []))
+        return NamespaceSearch(
+            matches=all_matches,
+            namespace_latency_ms=latencies,
+            timed_out_namespaces=sorted(timed_out),
+            failed_namespaces=sorted(failed),
+        )
 
     def list_namespaces(self) -> List[str]:
         if not self._ready:
@@ -1,5 +1,13 @@
 from collections import defaultdict
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, List
+
+from ai.core.token_fingerprint import (
+    DESCRIPTION_FINGERPRINT_FIELD,
+    TITLE_FINGERPRINT_FIELD,
+    decode_fingerprint,
+    token_ids,
+    tokenize_text,
+)
 
 
 PROJECT_WEIGHTS = {
@@ -23,12 +31,22 @@ def blended_score(item: Dict[str, Any]) -> float:
 
 
 def _normalize_tokens(value: Any) -> set[str]:
-    text = str(value or "").lower()
-    cleaned = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
-    return {token for token in cleaned.split() if len(token) >= 3}
+    return set(tokenize_text(value))
+
 
+def _candidate_token_ids(item: Dict[str, Any], tokens_key: str, fingerprint_key: str, text: Any) -> FrozenSet[int]:
+    # Prefer fingerprints stored at ingestion, then token sets from the lexical index;
+    # only legacy records without either are tokenized here.
+    fingerprint = (item.get("metadata") or {}).get(fingerprint_key)
+    if fingerprint:
+        return decode_fingerprint(fingerprint)
+    tokens = item.get(tokens_key)
+    if tokens is None:
+        tokens = tokenize_text(text)
+    return token_ids(tokens)
 
-def _jaccard(left: set[str], right: set[str]) -> float:
+
+def _jaccard(left: set | FrozenSet, right: set | FrozenSet) -> float:
     if not left or not right:
         return 0.0
     union = left | right
@@ -38,8 +56,9 @@ def _jaccard(left: set[str], right: set[str]) -> float:
 
 
 def rerank_issue_context(items: List[Dict[str, Any]], issue_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    query_title_tokens = _normalize_tokens(issue_payload.get("title"))
-    query_desc_tokens = _normalize_tokens(issue_payload.get("description"))
+    # Overlaps run on hashed token ids (integer set ops), matching ingestion fingerprints.
+    query_title_ids = token_ids(_normalize_tokens(issue_payload.get("title")))
+    query_desc_ids = token_ids(_normalize_tokens(issue_payload.get("description")))
     query_type = str(issue_payload.get("issue_type") or "").strip().lower()
     labels_raw = issue_payload.get("labels") or []
     if isinstance(labels_raw, list):
@@ -51,11 +70,16 @@ def rerank_issue_context(items: List[Dict[str, Any]], issue_payload: Dict[str, A
 
     ranked: List[Dict[str, Any]] = []
     for item in items or []:
-        title_tokens = _normalize_tokens(item.get("title"))
-        desc_tokens = _normalize_tokens(item.get("description") or item.get("snippet"))
+        title_ids = _candidate_token_ids(item, "title_tokens", TITLE_FINGERPRINT_FIELD, item.get("title"))
+        desc_ids = _candidate_token_ids(
+            item,
+            "desc_tokens",
+            DESCRIPTION_FINGERPRINT_FIELD,
+            item.get("description") or item.get("snippet"),
+        )
         semantic_score = float(item.get("score") or 0.0)
-        title_overlap = _jaccard(query_title_tokens, title_tokens)
-        desc_overlap = _jaccard(query_desc_tokens, desc_tokens)
+        title_overlap = _jaccard(query_title_ids, title_ids)
+        desc_overlap = _jaccard(query_desc_ids, desc_ids)
         item_type = str(item.get("issue_type") or "").strip().lower()
         item_labels = {
             str(label).strip().lower()
@@ -73,6 +97,8 @@ def rerank_issue_context(items: List[Dict[str, Any]], issue_payload: Dict[str, A
             + label_bonus
         )
         enriched = dict(item)
+        enriched.pop("title_tokens", None)
+        enriched.pop("desc_tokens", None)
         enriched["semantic_score"] = round(semantic_score, 4)
         enriched["title_overlap"] = round(title_overlap, 4)
         enriched["desc_overlap"] = round(desc_overlap, 4)
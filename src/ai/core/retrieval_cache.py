@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+
+
+# Process-wide write versions per namespace. Every upsert bumps the namespaces it touched,
+# so cached retrievals that depended on them stop matching. Writes from other processes
+# (ingestion scripts) are only picked up through the TTL.
+_namespace_versions: Dict[str, int] = {}
+_namespace_versions_lock = threading.Lock()
+
+
+def bump_namespace_versions(namespaces: Iterable[str]) -> None:
+    with _namespace_versions_lock:
+        for namespace in namespaces:
+            ns = str(namespace or "").strip().lower()
+            if ns:
+                _namespace_versions[ns] = _namespace_versions.get(ns, 0) + 1
+
+
+def namespace_versions(namespaces: Iterable[str]) -> Dict[str, int]:
+    with _namespace_versions_lock:
+        return {ns: _namespace_versions.get(ns, 0) for ns in namespaces}
+
+
+def _retrieval_settings_fingerprint() -> Tuple[Any, ...]:
+    # Settings that change what get_similar_issues returns for the same query.
+    names = (
+        "RAG_TOPK_PER_NAMESPACE",
+        "RAG_MIN_SCORE_MAIN",
+        "RAG_FINAL_CONTEXT_SIZE",
+        "RAG_LEXICAL_INDEX_DIR",
+        "RAG_HYBRID_RRF_K",
+        "RAG_HYBRID_LEXICAL_SCORE_CEILING",
+        "RAG_NAMESPACE_ROUTER_ENABLED",
+        "RAG_NAMESPACE_ROUTER_TOP_N",
+        "RAG_NAMESPACE_ROUTER_MARGIN",
+        "RAG_EMBEDDING_MODEL",
+    )
+    return tuple(getattr(settings, name, None) for name in names)
+
+
+class RetrievalCache:
+    """
+    LRU + TTL cache of final retriever results.
+
+    Key: sha256 of the retriever query text, the sorted namespace set, top_k and the
+    retrieval settings. Each entry stores the namespace versions seen before the search;
+    an entry is served only while none of its namespaces has been written since.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        self._max_entries = max_entries
+        self._ttl_seconds = float(ttl_seconds)
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def make_key(query_text: str, namespaces: Iterable[str], top_k: int) -> str:
+        payload = json.dumps(
+            [
+                hashlib.sha256(str(query_text or "").encode("utf-8")).hexdigest(),
+                sorted(set(namespaces)),
+                int(top_k),
+                _retrieval_settings_fingerprint(),
+            ],
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expired = self._ttl_seconds > 0 and (self._now() - entry["created_at"]) >= self._ttl_seconds
+            if expired or namespace_versions(entry["versions"]) != entry["versions"]:
+                del self._entries[key]
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["result"]), dict(entry["usage"])
+
+    def put(
+        self,
+        key: str,
+        versions: Dict[str, int],
+        result: List[Dict[str, Any]],
+        usage: Dict[str, Any],
+    ) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "versions": dict(versions),
+                "result": copy.deepcopy(result),
+                "usage": dict(usage),
+                "created_at": self._now(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "stale": self.stale, "size": len(self._entries)}
+
+
+_caches: "weakref.WeakKeyDictionary[Any, RetrievalCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def get_retrieval_cache(vector_store: Any) -> RetrievalCache | None:
+    """Cache for one vector store (results differ across backends). None when disabled."""
+    max_entries = int(getattr(settings, "RAG_RETRIEVAL_CACHE_SIZE", 0) or 0)
+    if max_entries <= 0:
+        return None
+    with _caches_lock:
+        try:
+            cache = _caches.get(vector_store)
+            if cache is None:
+                cache = RetrievalCache(
+                    max_entries=max_entries,
+                    ttl_seconds=float(getattr(settings, "RAG_RETRIEVAL_CACHE_TTL_SECONDS", 0) or 0),
+                )
+                _caches[vector_store] = cache
+            return cache
+        except TypeError:
+            return None
@@ -1,15 +1,19 @@
 import logging
 from collections import Counter
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from config.settings import settings
 
+from ai.core.lexical_index import get_default_lexical_store
+from ai.core.namespace_catalog import get_namespace_catalog
 from ai.core.rag_namespace_policy import (
     extract_project_issue_namespace,
     group_issue_namespaces,
 )
 from ai.core.rag_normalizer import normalize_match
+from ai.core.retrieval_cache import get_retrieval_cache, namespace_versions
 from ai.core.rag_ranker import join_issue_context, rerank_issue_context
+from ai.core.vector_store import NamespaceRouting, NamespaceSearch, VectorStoreClient
 
 
 logger = logging.getLogger(__name__)
@@ -88,6 +92,64 @@ class Retriever:
             return f"issue:{issue_id}"
         return str(match.get("id") or "")
 
+    @staticmethod
+    def _lexical_query(issue_payload: Dict[str, Any]) -> str:
+        # Sem os marcadores [Title]/[Description] do _build_query: viram termos em todo documento.
+        labels_raw = issue_payload.get("labels") or []
+        labels = " ".join(str(item) for item in labels_raw) if isinstance(labels_raw, list) else str(labels_raw)
+        return " ".join(
+            str(part or "") for part in (issue_payload.get("title"), labels, issue_payload.get("description"))
+        ).strip()
+
+    @staticmethod
+    def _fusion_key(match: Dict[str, Any]) -> tuple[str, str]:
+        return str(match.get("namespace") or ""), str(match.get("id") or "")
+
+    def _fuse_rrf(
+        self,
+        vector_matches: List[Dict[str, Any]],
+        lexical_matches: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Reciprocal-rank fusion of vector and BM25 rankings (global rank across namespaces)."""
+        rrf_k = max(1, int(getattr(settings, "RAG_HYBRID_RRF_K", 60) or 60))
+        ceiling = float(getattr(settings, "RAG_HYBRID_LEXICAL_SCORE_CEILING", 0.68) or 0.0)
+
+        fused: Dict[tuple[str, str], Dict[str, Any]] = {}
+        rrf_scores: Dict[tuple[str, str], float] = {}
+        for rank, match in enumerate(sorted(vector_matches, key=self._safe_score, reverse=True)):
+            key = self._fusion_key(match)
+            if key not in fused:
+                fused[key] = dict(match)
+                rrf_scores[key] = rrf_scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+        ranked_lexical = sorted(lexical_matches, key=self._safe_score, reverse=True)
+        best_bm25 = self._safe_score(ranked_lexical[0]) if ranked_lexical else 0.0
+        for rank, match in enumerate(ranked_lexical):
+            key = self._fusion_key(match)
+            bm25 = self._safe_score(match)
+            rrf_scores[key] = rrf_scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            if key in fused:
+                fused[key]["bm25_score"] = round(bm25, 4)
+                continue
+            # Hit só lexical: score normalizado e limitado para nunca virar âncora forte.
+            record = dict(match)
+            record["bm25_score"] = round(bm25, 4)
+            record["score"] = round(ceiling * (bm25 / best_bm25), 4) if best_bm25 > 0 else 0.0
+            record["lexical_only"] = True
+            fused[key] = record
+
+        for key, record in fused.items():
+            record["rrf_score"] = rrf_scores[key]
+        return sorted(fused.values(), key=lambda m: m["rrf_score"], reverse=True)
+
+    def _list_namespaces(self) -> List[str]:
+        # O catálogo (TTL + refresh em background) evita um describe_index_stats
+        # no caminho crítico de cada estimativa.
+        catalog = get_namespace_catalog(self.vs)
+        if catalog is None:
+            return self.vs.list_namespaces()
+        return catalog.get()
+
     @staticmethod
     def _pinecone_where_filter() -> Dict[str, Any]:
         return {
@@ -128,7 +190,7 @@ class Retriever:
         discovered_issue_namespaces: List[str] = []
         if hasattr(self.vs, "list_namespaces"):
             try:
-                discovered = self.vs.list_namespaces()
+                discovered = self._list_namespaces()
             except Exception:
                 discovered = []
             discovered_issue_namespaces = group_issue_namespaces(discovered)
@@ -146,6 +208,46 @@ class Retriever:
             logger.warning("[RAG] nenhum namespace disponível para busca")
             return []
 
+        # Cache do resultado final: mesma query + mesmos namespaces, enquanto
+        # nenhum desses namespaces receber upsert. As versões são lidas antes da
+        # busca para que um upsert concorrente invalide a entrada gravada.
+        retrieval_cache = get_retrieval_cache(self.vs)
+        cache_key = None
+        versions_before: Dict[str, int] = {}
+        if retrieval_cache is not None:
+            cache_key = retrieval_cache.make_key(query_text, namespaces_to_query, top_k)
+            cached = retrieval_cache.get(cache_key)
+            if cached is not None:
+                result, usage = cached
+                self.last_rag_usage = {
+                    **usage,
+                    "embedding_tokens": 0,
+                    "embedding_calls": 0,
+                    "retrieval_cache_hit": True,
+                    "retrieval_cache": retrieval_cache.stats(),
+                }
+                logger.info("[RAG] retrieval cache hit primary_namespace=%s results=%d", primary_namespace, len(result))
+                return result
+            versions_before = namespace_versions(namespaces_to_query)
+
+        # Roteamento por centróide: consulta só os namespaces mais próximos da
+        # issue (+ primário). Desligado por padrão (RAG_NAMESPACE_ROUTER_ENABLED).
+        total_namespaces = len(namespaces_to_query)
+        routing = NamespaceRouting(namespaces=list(namespaces_to_query))
+        if getattr(settings, "RAG_NAMESPACE_ROUTER_ENABLED", False) and hasattr(self.vs, "route_namespaces"):
+            keep = [primary_namespace] if primary_namespace else []
+            try:
+                if hasattr(self.vs, "route_namespaces_with_stats"):
+                    routing = self.vs.route_namespaces_with_stats(query_text, namespaces_to_query, keep=keep)
+                else:
+                    routed = self.vs.route_namespaces(query_text, namespaces_to_query, keep=keep)
+                    routing = NamespaceRouting(namespaces=list(routed or []))
+                routed = routing.namespaces
+                if routed:
+                    namespaces_to_query = list(routed)
+            except Exception as exc:
+                logger.exception("[RAG] roteamento de namespaces falhou: %s", exc)
+
         logger.debug(
             "[RAG] busca global — primary=%s total_namespaces=%d",
             primary_namespace,
@@ -154,17 +256,31 @@ class Retriever:
 
         where = self._pinecone_where_filter()
         embedding_tokens_total = 0
+        fallback_failed_namespaces: List[str] = []
+        search: Optional[NamespaceSearch] = None
 
         # Uma única chamada que consulta todos os namespaces. O Pinecone client
-        # itera internamente e reusa o embedding da query. Se o client não
-        # aceitar lista (mocks antigos), faz fallback para loop sequencial.
+        # faz o fan-out em paralelo (RAG_NAMESPACE_QUERY_MAX_CONCURRENCY) e reusa
+        # o embedding da query. As métricas (latência, timeouts, falhas) voltam
+        # junto com os matches: o client é compartilhado entre estimativas
+        # concorrentes. Se o client não aceitar lista (mocks antigos), faz
+        # fallback para loop sequencial.
         try:
-            raw_matches = self.vs.semantic_search(
-                query_text,
-                namespaces=namespaces_to_query,
-                top_k=top_k,
-                where=where,
-            )
+            if isinstance(self.vs, VectorStoreClient):
+                search = self.vs.search_with_stats(
+                    query_text,
+                    namespaces=namespaces_to_query,
+                    top_k=top_k,
+                    where=where,
+                )
+                raw_matches = search.matches
+            else:
+                raw_matches = self.vs.semantic_search(
+                    query_text,
+                    namespaces=namespaces_to_query,
+                    top_k=top_k,
+                    where=where,
+                )
         except TypeError:
             # Backward-compatibility com mocks/clients antigos que não aceitam
             # `where` ou múltiplos namespaces de uma vez.
@@ -179,17 +295,64 @@ class Retriever:
                         )
                     )
                 except Exception as exc:
+                    fallback_failed_namespaces.append(ns)
                     logger.exception("semantic_search fallback falhou para %s: %s", ns, exc)
 
-        try:
-            embedding_tokens_total = int(getattr(self.vs, "last_embedding_tokens", 0) or 0)
-        except Exception:
-            embedding_tokens_total = 0
+        if search is None:
+            search = NamespaceSearch(
+                matches=raw_matches,
+                failed_namespaces=fallback_failed_namespaces,
+                embedding_tokens=int(getattr(self.vs, "last_embedding_tokens", 0) or 0),
+                embedding_cache_hit=bool(getattr(self.vs, "last_embedding_cache_hit", False)),
+            )
+        embedding_tokens_total = max(0, int(search.embedding_tokens or 0))
+        embedding_cache_hit = bool(search.embedding_cache_hit)
+        embedding_cache_stats: Dict[str, int] = {}
+        if hasattr(self.vs, "embedding_cache_stats"):
+            try:
+                embedding_cache_stats = dict(self.vs.embedding_cache_stats() or {})
+            except Exception:
+                embedding_cache_stats = {}
 
+        lexical_store = get_default_lexical_store()
+        lexical_matches: List[Dict[str, Any]] = []
+        lexical_failed = False
+        if lexical_store is not None:
+            try:
+                lexical_matches = lexical_store.search(
+                    self._lexical_query(issue_payload),
+                    namespaces_to_query,
+                    top_k=top_k,
+                    where=where,
+                )
+            except Exception as exc:
+                logger.exception("[RAG] busca lexical falhou: %s", exc)
+                lexical_matches = []
+                lexical_failed = True
+        hybrid = bool(lexical_matches)
+        if hybrid:
+            raw_matches = self._fuse_rrf(raw_matches, lexical_matches)
+
+        # Com roteamento, o embedding é feito no route_namespaces e a busca
+        # reaproveita o vetor via cache; sem cache (RAG_EMBEDDING_CACHE_SIZE<=0)
+        # a busca embeda de novo e as duas chamadas são contadas.
+        embedding_tokens_total += max(0, int(routing.embedding_tokens or 0))
+        search_embedding_calls = 0 if embedding_cache_hit or raw_matches is None else 1
         self.last_rag_usage = {
             "embedding_tokens": max(0, int(embedding_tokens_total)),
-            # Uma única chamada de embedding mesmo consultando N namespaces
-            "embedding_calls": 1 if raw_matches is not None else 0,
+            # Uma única chamada de embedding por busca mesmo consultando N
+            # namespaces; nenhuma quando o vetor da query veio do cache.
+            "embedding_calls": int(routing.embedding_calls) + search_embedding_calls,
+            "embedding_cache_hit": embedding_cache_hit,
+            "embedding_cache": embedding_cache_stats,
+            "namespace_latency_ms": dict(search.namespace_latency_ms),
+            "timed_out_namespaces": list(search.timed_out_namespaces),
+            "failed_namespaces": sorted(search.failed_namespaces),
+            "lexical_failed": lexical_failed,
+            "routed_namespaces": len(namespaces_to_query),
+            "total_namespaces": total_namespaces,
+            "lexical_hits": len(lexical_matches),
+            "lexical_only_hits": sum(1 for m in raw_matches if m.get("lexical_only")) if hybrid else 0,
         }
 
         # Filtros por score e descrição mínima
@@ -207,14 +370,20 @@ class Retriever:
 
         # Ordena globalmente por score e trunca em target_size. Aqui está a
         # diferença chave vs o comportamento antigo: o melhor match sempre
-        # vence, independentemente de qual namespace ele veio.
+        # vence, independentemente de qual namespace ele veio. Com busca
+        # híbrida, a ordem de corte é a da fusão RRF.
         qualified_raw_matches = sorted(
             qualified_raw_matches,
-            key=self._safe_score,
+            key=(lambda m: float(m.get("rrf_score") or 0.0)) if hybrid else self._safe_score,
             reverse=True,
         )[:target_size]
 
         normalized = [normalize_match(match) for match in qualified_raw_matches]
+        if lexical_store is not None:
+            for item in normalized:
+                tokens = lexical_store.tokens_for(item.get("namespace") or "", item.get("id") or "")
+                if tokens is not None:
+                    item["title_tokens"], item["desc_tokens"] = tokens
         normalized = rerank_issue_context(normalized, issue_payload)
         joined = join_issue_context(normalized)
         context = sorted(joined, key=lambda it: float(it.get("score") or 0.0), reverse=True)[
@@ -257,4 +426,17 @@ class Retriever:
             for item in context
         ]
 
+        self.last_rag_usage["retrieval_cache_hit"] = False
+        # Resultado parcial (namespace lento ou com erro) não vai para o cache: a
+        # próxima estimativa consulta de novo em vez de herdar o buraco por 1h.
+        partial = bool(
+            self.last_rag_usage["timed_out_namespaces"]
+            or self.last_rag_usage["failed_namespaces"]
+            or lexical_failed
+        )
+        if retrieval_cache is not None and cache_key is not None:
+            if not partial:
+                retrieval_cache.put(cache_key, versions_before, result, self.last_rag_usage)
+            self.last_rag_usage["retrieval_cache"] = retrieval_cache.stats()
+
         return result
@@ -0,0 +1,64 @@
+import json
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List
+
+from ai.core.rag_normalizer import normalize_match
+
+
+TITLE_FINGERPRINT_FIELD = "title_fp"
+DESCRIPTION_FINGERPRINT_FIELD = "desc_fp"
+# Pinecone rejects vectors whose metadata exceeds 40KB (JSON-encoded).
+PINECONE_METADATA_LIMIT_BYTES = 40 * 1024
+
+
+def tokenize_text(value: Any) -> List[str]:
+    """Lowercased alphanumeric tokens (len >= 3), in order and with repetitions."""
+    text = str(value or "").lower()
+    cleaned = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
+    return [token for token in cleaned.split() if len(token) >= 3]
+
+
+def token_ids(tokens: Iterable[str]) -> FrozenSet[int]:
+    """Hash ranker tokens to 32-bit ids (crc32; stable across processes, unlike hash())."""
+    return frozenset(zlib.crc32(token.encode("utf-8")) for token in tokens)
+
+
+def encode_fingerprint(ids: Iterable[int]) -> str:
+    """Sorted ids as fixed-width hex (8 chars per id): compact and valid Pinecone metadata."""
+    return "".join(f"{value:08x}" for value in sorted(set(ids)))
+
+
+@lru_cache(maxsize=8192)
+def decode_fingerprint(value: str) -> FrozenSet[int]:
+    # The same corpus documents come back on many requests, so decoding is memoized.
+    text = str(value or "")
+    return frozenset(int(text[i:i + 8], 16) for i in range(0, len(text) - 7, 8))
+
+
+def text_fingerprint(text: Any) -> str:
+    return encode_fingerprint(token_ids(tokenize_text(text)))
+
+
+def metadata_size(metadata: Dict[str, Any]) -> int:
+    return len(json.dumps(metadata, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def build_fingerprint_metadata(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Fingerprints for the title/description the reranker sees (same extraction as normalize_match).
+    Empty fields are omitted so the reranker falls back to tokenizing the text; so is a
+    description fingerprint (8 chars per unique token) that would push the metadata past
+    PINECONE_METADATA_LIMIT_BYTES.
+    """
+    normalized = normalize_match({"metadata": metadata})
+    out: Dict[str, str] = {}
+    title_fp = text_fingerprint(normalized.get("title"))
+    if title_fp:
+        out[TITLE_FINGERPRINT_FIELD] = title_fp
+    desc_fp = text_fingerprint(normalized.get("description"))
+    if desc_fp:
+        with_desc = {**metadata, **out, DESCRIPTION_FINGERPRINT_FIELD: desc_fp}
+        if metadata_size(with_desc) <= PINECONE_METADATA_LIMIT_BYTES:
+            out[DESCRIPTION_FINGERPRINT_FIELD] = desc_fp
+    return out
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Mapping, TypedDict, cast
+from typing import Any, Mapping, NotRequired, TypedDict, cast
 
 
 class TokenUsage(TypedDict):
     prompt_tokens: int
     completion_tokens: int
     total_tokens: int
+    # Calls served by the LLM response cache (tokens above are 0 for them) and the
+    # tokens the original calls had cost.
+    cached_calls: NotRequired[int]
+    cached_tokens: NotRequired[int]
+    # Calls that also sent a hedged duplicate request (see ai.core.llm_hedging).
+    hedged_calls: NotRequired[int]
 
 
 def _to_int(value: Any) -> int:
@@ -45,11 +51,16 @@ def _normalize_usage_dict(usage: Mapping[str, Any]) -> TokenUsage:
     if total_i <= 0:
         total_i = prompt_i + completion_i
 
-    return {
+    out: TokenUsage = {
         "prompt_tokens": prompt_i,
         "completion_tokens": completion_i,
         "total_tokens": total_i,
     }
+    for key in ("cached_calls", "cached_tokens", "hedged_calls"):
+        value = max(0, _to_int(usage.get(key)))
+        if value:
+            out[key] = value
+    return out
 
 
 def _maybe_mapping(value: Any) -> Mapping[str, Any] | None:
@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.i8"
+SCALES_FILE = "scales.f32"
+IDS_FILE = "ids.json"
+METADATA_DIR = "metadata"
+# Rows converted to float32 at a time when scoring: bounds the per-query copy of the int8 rows.
+SCORE_CHUNK_ROWS = 4096
+
+
+def is_vector_snapshot(path: Optional[str]) -> bool:
+    return bool(path) and os.path.isfile(os.path.join(str(path), MANIFEST_FILE))
+
+
+def quantize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization of L2-normalized rows.
+
+    Returns (int8 codes, float32 scales) such that ``codes[i] * scales[i] ~= normalized row i``.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized = matrix / norms
+    max_abs = np.abs(normalized).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(normalized / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def _column_file(name: str) -> str:
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name)
+    return f"{safe}.json"
+
+
+def write_vector_snapshot(path: str, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Write records ({namespace, id, values, metadata}) to a snapshot directory.
+
+    Layout:
+    - vectors.i8 / scales.f32: int8 rows + per-row float32 scales (np.memmap friendly)
+    - ids.json and metadata/<column>.json: columnar sidecar, one list per metadata key
+    - manifest.json: dim, row count, [start, end) row range per namespace and column files
+    Rows of the same namespace are contiguous. Later records with the same (namespace, id) win.
+    """
+    by_namespace: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    dim: Optional[int] = None
+    for record in records:
+        namespace = str(record.get("namespace") or "").strip().lower()
+        doc_id = str(record.get("id") or "").strip()
+        values = record.get("values") or []
+        if not namespace or not doc_id or not values:
+            continue
+        if dim is None:
+            dim = len(values)
+        elif len(values) != dim:
+            raise ValueError(f"Vector dimension mismatch for {namespace}/{doc_id}: {len(values)} != {dim}")
+        by_namespace.setdefault(namespace, {})[doc_id] = record
+
+    os.makedirs(path, exist_ok=True)
+    os.makedirs(os.path.join(path, METADATA_DIR), exist_ok=True)
+
+    ids: List[str] = []
+    rows: List[List[float]] = []
+    metadata_rows: List[Dict[str, Any]] = []
+    ranges: Dict[str, List[int]] = {}
+    for namespace in sorted(by_namespace):
+        start = len(ids)
+        for doc_id, record in by_namespace[namespace].items():
+            ids.append(doc_id)
+            rows.append(record["values"])
+            metadata_rows.append(dict(record.get("metadata") or {}))
+        ranges[namespace] = [start, len(ids)]
+
+    count = len(ids)
+    dim = int(dim or 0)
+    codes, scales = quantize_rows(np.asarray(rows, dtype=np.float32).reshape(count, dim))
+    codes.tofile(os.path.join(path, VECTORS_FILE))
+    scales.tofile(os.path.join(path, SCALES_FILE))
+
+    with open(os.path.join(path, IDS_FILE), "w", encoding="utf-8") as fh:
+        json.dump(ids, fh, ensure_ascii=False)
+
+    column_names = sorted({key for meta in metadata_rows for key in meta})
+    columns: Dict[str, str] = {}
+    for name in column_names:
+        filename = _column_file(name)
+        columns[name] = filename
+        with open(os.path.join(path, METADATA_DIR, filename), "w", encoding="utf-8") as fh:
+            json.dump([meta.get(name) for meta in metadata_rows], fh, ensure_ascii=False)
+
+    manifest = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "dim": dim,
+        "count": count,
+        "namespaces": ranges,
+        "columns": columns,
+    }
+    tmp_manifest = os.path.join(path, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2)
+    # Manifest last: a half-written snapshot is never picked up by readers.
+    os.replace(tmp_manifest, os.path.join(path, MANIFEST_FILE))
+    return manifest
+
+
+class VectorSnapshot:
+    """
+    Read-only view over a snapshot directory written by ``write_vector_snapshot``.
+
+    Vectors and scales are np.memmap'ed (read-only), so opening costs one manifest read and
+    all uvicorn workers share the same pages through the OS page cache. Ids and metadata
+    columns are loaded lazily on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        version = int(manifest.get("version") or 0)
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector snapshot version: {version}")
+
+        self.dim = int(manifest["dim"])
+        self.count = int(manifest["count"])
+        self._ranges: Dict[str, Tuple[int, int]] = {
+            ns: (int(bounds[0]), int(bounds[1])) for ns, bounds in (manifest.get("namespaces") or {}).items()
+        }
+        self._column_files: Dict[str, str] = dict(manifest.get("columns") or {})
+        self._lock = threading.Lock()
+        self._ids: Optional[List[str]] = None
+        self._columns: Dict[str, List[Any]] = {}
+
+        if self.count and self.dim:
+            self.codes = np.memmap(
+                os.path.join(path, VECTORS_FILE), dtype=np.int8, mode="r", shape=(self.count, self.dim)
+            )
+            self.scales = np.memmap(os.path.join(path, SCALES_FILE), dtype=np.float32, mode="r", shape=(self.count,))
+        else:
+            self.codes = np.zeros((0, self.dim), dtype=np.int8)
+            self.scales = np.zeros((0,), dtype=np.float32)
+
+    def namespaces(self) -> List[str]:
+        return [ns for ns, (start, end) in self._ranges.items() if end > start]
+
+    def namespace_range(self, namespace: str) -> Optional[Tuple[int, int]]:
+        return self._ranges.get(namespace)
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._column_files)
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            with self._lock:
+                if self._ids is None:
+                    with open(os.path.join(self.path, IDS_FILE), "r", encoding="utf-8") as fh:
+                        self._ids = json.load(fh)
+        return self._ids
+
+    def column(self, name: str) -> List[Any]:
+        values = self._columns.get(name)
+        if values is not None:
+            return values
+        filename = self._column_files.get(name)
+        if filename is None:
+            return [None] * self.count
+        with self._lock:
+            values = self._columns.get(name)
+            if values is None:
+                with open(os.path.join(self.path, METADATA_DIR, filename), "r", encoding="utf-8") as fh:
+                    values = json.load(fh)
+                self._columns[name] = values
+        return values
+
+    def metadata_row(self, row: int, columns: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Rebuild the metadata dict of one row. Missing values (None) are omitted, as in Pinecone."""
+        out: Dict[str, Any] = {}
+        for name in columns if columns is not None else self._column_files:
+            value = self.column(name)[row]
+            if value is not None:
+                out[name] = value
+        return out
+
+    def scores(self, query: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Approximate cosine scores of rows [start, end) against an L2-normalized query."""
+        if end <= start:
+            return np.zeros((0,), dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty((end - start,), dtype=np.float32)
+        for chunk_start in range(start, end, SCORE_CHUNK_ROWS):
+            chunk_end = min(chunk_start + SCORE_CHUNK_ROWS, end)
+            block = np.asarray(self.codes[chunk_start:chunk_end], dtype=np.float32)
+            out[chunk_start - start : chunk_end - start] = block @ query
+        out *= self.scales[start:end]
+        return out
@@ -1,6 +1,28 @@
+from dataclasses import dataclass, field
 from typing import Any, Dict, List
 
 
+@dataclass
+class NamespaceSearch:
+    """Matches of one semantic_search call plus the stats of that call only."""
+
+    matches: List[Dict[str, Any]]
+    namespace_latency_ms: Dict[str, int] = field(default_factory=dict)
+    timed_out_namespaces: List[str] = field(default_factory=list)
+    failed_namespaces: List[str] = field(default_factory=list)
+    embedding_tokens: int = 0
+    embedding_cache_hit: bool = False
+
+
+@dataclass
+class NamespaceRouting:
+    """Namespaces kept by one route_namespaces call plus the query embedding it cost."""
+
+    namespaces: List[str]
+    embedding_tokens: int = 0
+    embedding_calls: int = 0
+
+
 class VectorStoreClient:
     """Vector store contract used by RAG retrieval (and optional ingestion)."""
 
@@ -21,6 +43,16 @@ class VectorStoreClient:
         """Return raw matches from multiple namespaces."""
         raise NotImplementedError
 
+    def search_with_stats(
+        self,
+        text: str,
+        namespaces: List[str],
+        top_k: int = 8,
+        where: Dict[str, Any] | None = None,
+    ) -> NamespaceSearch:
+        """semantic_search plus per-call stats; the client may be shared by concurrent calls."""
+        return NamespaceSearch(matches=self.semantic_search(text, namespaces=namespaces, top_k=top_k, where=where))
+
     def list_namespaces(self) -> List[str]:
         """Return available namespaces in the backing store."""
         raise NotImplementedError
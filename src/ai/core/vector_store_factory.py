@@ -0,0 +1,36 @@
+import logging
+import threading
+
+from ai.core.vector_store import VectorStoreClient
+from config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+_default_vector_store: VectorStoreClient | None = None
+_default_vector_store_lock = threading.Lock()
+
+
+def build_vector_store() -> VectorStoreClient:
+    """Build the vector store selected by VECTOR_STORE_BACKEND ("pinecone" or "local")."""
+    backend = str(getattr(settings, "VECTOR_STORE_BACKEND", "pinecone") or "pinecone").strip().lower()
+    if backend == "local":
+        from ai.core.local_vector_store import LocalVectorStoreClient
+
+        return LocalVectorStoreClient(snapshot_path=getattr(settings, "LOCAL_VECTOR_SNAPSHOT_PATH", None))
+
+    if backend != "pinecone":
+        logger.warning("Unknown VECTOR_STORE_BACKEND=%s; falling back to pinecone.", backend)
+
+    from ai.core.pinecone_vector_store import PineconeVectorStoreClient
+
+    return PineconeVectorStoreClient()
+
+
+def get_default_vector_store() -> VectorStoreClient:
+    """Process-wide vector store: the estimator and the closed-issue indexer share one index."""
+    global _default_vector_store
+    with _default_vector_store_lock:
+        if _default_vector_store is None:
+            _default_vector_store = build_vector_store()
+        return _default_vector_store
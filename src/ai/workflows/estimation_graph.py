@@ -1,7 +1,9 @@
+import asyncio
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import TypedDict, Dict, Any, List, Optional
+import weakref
+from concurrent.futures import Future, as_completed
+from typing import AsyncContextManager, TypedDict, Dict, Any, List, Optional
 
 from langgraph.graph import StateGraph, START, END
 
@@ -22,17 +24,23 @@ from ai.core.meta_calibrator import (
     predict_meta_calibration,
 )
 from ai.core.retriever import Retriever
-from ai.core.llm_client import LLMClient
-from ai.core.pinecone_vector_store import PineconeVectorStoreClient
+from ai.core.llm_client import get_llm_client
+from ai.core.llm_dispatcher import DispatchSession, get_default_llm_dispatcher
+from ai.core.vector_store_factory import get_default_vector_store
 from ai.core.token_usage import TokenUsage, coerce_token_usage
 from config.settings import settings
 from ai.dtos.issues_estimation_dto import IssueEstimationDTO
 
-from ai.agents.analogical_agent import run_analogical
-from ai.agents.heuristic_agent import run_heuristic
-from ai.agents.complexity_agent import run_complexity_review
-from ai.agents.agile_guard_agent import run_agile_guard
-from ai.agents.critic_agent import run_estimation_critic
+from ai.agents.analogical_agent import _compute_retrieval_stats, run_analogical, arun_analogical
+from ai.agents.heuristic_agent import (
+    arun_heuristic,
+    arun_heuristic_multi_mode,
+    run_heuristic,
+    run_heuristic_multi_mode,
+)
+from ai.agents.complexity_agent import run_complexity_review, arun_complexity_review
+from ai.agents.agile_guard_agent import run_agile_guard, arun_agile_guard
+from ai.agents.critic_agent import run_estimation_critic, arun_estimation_critic
 from ai.agents.supervisor_agent import combine_multi_agent_estimations
 
 
@@ -141,6 +149,8 @@ class EstimationState(TypedDict, total=False):
     rag_context_sufficient: bool
     strategy: str
     rag_stats: Dict[str, Any]
+    graph_route: str
+    deadline_at: float
     token_usage_summary: Dict[str, int]
     execution_metrics: Dict[str, Any]
 
@@ -156,7 +166,7 @@ class EstimationState(TypedDict, total=False):
 
 
 logger = logging.getLogger(__name__)
-vector_store = PineconeVectorStoreClient()
+vector_store = get_default_vector_store()
 
 
 def _optional_float(value: Any) -> Optional[float]:
@@ -403,6 +413,48 @@ def model_from_finalization(
     return "multiagent_heuristic_consensus"
 
 
+def _select_graph_route(issue: Dict[str, Any], similar_issues: List[Dict[str, Any]]) -> str:
+    """
+    "fast_path" quando a âncora analógica é forte o bastante para dispensar as revisões;
+    senão "pipelined" (critic em paralelo às revisões tardias) se habilitado, ou "full".
+
+    Com analogical_primary + strong anchor a calibração já ignora as inflações de
+    complexity/agile_guard/critic ([B1.1]); aqui os limiares são configuráveis e mais
+    exigentes que os do roteamento do agente analógico.
+    """
+    if _has_fast_path_anchor(issue, similar_issues):
+        return "fast_path"
+    if bool(getattr(settings, "ESTIMATION_PIPELINED_CRITIC_ENABLED", False)):
+        return "pipelined"
+    return "full"
+
+
+def _has_fast_path_anchor(issue: Dict[str, Any], similar_issues: List[Dict[str, Any]]) -> bool:
+    if not bool(getattr(settings, "ESTIMATION_FAST_PATH_ENABLED", False)):
+        return False
+    retrieval_stats = _compute_retrieval_stats(issue, similar_issues)
+    if retrieval_stats.get("route") != "analogical_primary" or not retrieval_stats.get("has_strong_anchor"):
+        return False
+    min_score = float(getattr(settings, "ESTIMATION_FAST_PATH_MIN_ANCHOR_SCORE", 0.95) or 0.0)
+    min_overlap = float(getattr(settings, "ESTIMATION_FAST_PATH_MIN_ANCHOR_OVERLAP", 0.40) or 0.0)
+    if float(retrieval_stats.get("anchor_score") or 0.0) < min_score:
+        return False
+    return float(retrieval_stats.get("anchor_overlap") or 0.0) >= min_overlap
+
+
+def _route_after_retriever(state: EstimationState) -> str:
+    route = state.get("graph_route")
+    return route if route in {"fast_path", "pipelined"} else "full"
+
+
+def _fast_path_heuristic_modes() -> List[str]:
+    # Modos heurísticos mantidos no fast path (vazio = nenhum): alimentam o consenso
+    # heurístico usado nas features do meta-calibrador.
+    raw = str(getattr(settings, "ESTIMATION_FAST_PATH_HEURISTIC_MODES", "scope") or "")
+    requested = {mode.strip() for mode in raw.split(",") if mode.strip()}
+    return [mode for mode in HEURISTIC_MODES if mode in requested]
+
+
 def retriever_node(state: EstimationState) -> EstimationState:
     retriever = Retriever(vector_store)
     issue = state["issue"]
@@ -434,25 +486,248 @@ def retriever_node(state: EstimationState) -> EstimationState:
         "repository_technologies": techs,
         "rag_context_sufficient": rag_context_sufficient,
         "strategy": strategy,
+        "graph_route": _select_graph_route(issue, similar),
         "rag_stats": {
             "qualified_hits": qualified_hits,
             "min_hits": min_hits,
             "min_score": min_score,
             "token_usage": rag_usage or {"embedding_tokens": 0, "embedding_calls": 0},
+            "embedding_cache": {
+                "hit": bool((rag_usage or {}).get("embedding_cache_hit")),
+                **dict((rag_usage or {}).get("embedding_cache") or {}),
+            },
+            "retrieval_cache": {
+                "hit": bool((rag_usage or {}).get("retrieval_cache_hit")),
+                **dict((rag_usage or {}).get("retrieval_cache") or {}),
+            },
         },
     }
 
 
-def _run_heuristic_ensemble(issue: Dict[str, Any]) -> tuple[List[Estimation], Dict[str, Any]]:
-    modes = ["scope", "complexity", "uncertainty", "agile_fit"]
-    temperature = float(getattr(settings, "HEURISTIC_ENSEMBLE_TEMPERATURE", 0.0) or 0.0)
-    max_concurrency = int(
-        getattr(settings, "HEURISTIC_ENSEMBLE_MAX_CONCURRENCY", len(modes)) or len(modes)
+# --- Deadlines ----------------------------------------------------------------------
+# Cada estimativa carrega um prazo absoluto (time.monotonic) em EstimationState; cada nó
+# de LLM usa min(prazo da estimativa, timeout do nó). Ao estourar, o nó degrada em vez de
+# segurar a tarefa em background além do TTL da reserva de idempotência.
+class DeadlineExceeded(TimeoutError):
+    """An LLM call did not finish within the estimation/node time budget."""
+
+    def __init__(self, what: str = "llm call"):
+        super().__init__(f"Deadline exceeded: {what}")
+
+
+def _estimation_deadline() -> Optional[float]:
+    seconds = float(getattr(settings, "ESTIMATION_DEADLINE_SECONDS", 0) or 0)
+    return time.monotonic() + seconds if seconds > 0 else None
+
+
+def _node_deadline(state: EstimationState, timeout_setting: str) -> Optional[float]:
+    deadlines = []
+    if state.get("deadline_at") is not None:
+        deadlines.append(float(state["deadline_at"]))
+    node_timeout = float(getattr(settings, timeout_setting, 0) or 0)
+    if node_timeout > 0:
+        deadlines.append(time.monotonic() + node_timeout)
+    return min(deadlines) if deadlines else None
+
+
+def _time_left(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def _result_by(future: Future, deadline: Optional[float], what: str) -> Any:
+    """future.result() bounded by ``deadline``; a call still queued at that point is cancelled."""
+    try:
+        return future.result(timeout=_time_left(deadline))
+    except TimeoutError:
+        if future.done():
+            raise
+        future.cancel()
+        raise DeadlineExceeded(what) from None
+
+
+async def _await_by(awaitable, deadline: Optional[float], what: str) -> Any:
+    left = _time_left(deadline)
+    if left is None:
+        return await awaitable
+    budget = asyncio.timeout(left)
+    try:
+        async with budget:
+            return await awaitable
+    except TimeoutError:
+        if budget.expired():
+            raise DeadlineExceeded(what) from None
+        raise
+
+
+def _review_deadline_fallback(name: str, exc: DeadlineExceeded) -> Estimation:
+    # Sem estimativa própria: a calibração trata a revisão como ausente.
+    return normalize_estimation(
+        {
+            "justification": f"Review {name} skipped: deadline exceeded.",
+            "warnings": [str(exc)],
+            "error": "deadline_exceeded",
+            "latency_ms": 0,
+        },
+        fallback_mode=name,
+    )
+
+
+HEURISTIC_MODES = ("scope", "complexity", "uncertainty", "agile_fit")
+HEURISTIC_ENSEMBLE_STRATEGIES = ("per_mode", "single_call", "adaptive")
+PRIMARY_REVIEWS = ("analogical", "complexity_review", "agile_guard_review")
+# Entradas mínimas do critic no modo pipelined (além do ensemble heurístico).
+PIPELINED_CRITIC_REVIEWS = ("analogical",)
+
+
+def _heuristic_failure(mode_name: str, exc: BaseException) -> Estimation:
+    return normalize_estimation(
+        {
+            "mode": mode_name,
+            "size_bucket": "M",
+            "bucket_rank": 3,
+            "confidence": 0.25,
+            "justification": f"Heuristic mode {mode_name} failed; fallback applied.",
+            "warnings": [str(exc)],
+            "latency_ms": 0,
+        },
+        fallback_mode=mode_name,
+    )
+
+
+def _heuristic_share(modes: List[str]) -> int:
+    share = int(getattr(settings, "HEURISTIC_ENSEMBLE_MAX_CONCURRENCY", len(modes)) or len(modes))
+    return max(1, min(share, len(modes)))
+
+
+def _heuristic_ensemble_strategy() -> str:
+    strategy = str(getattr(settings, "HEURISTIC_ENSEMBLE_STRATEGY", "per_mode") or "per_mode").strip().lower()
+    return strategy if strategy in HEURISTIC_ENSEMBLE_STRATEGIES else "per_mode"
+
+
+def _single_call_candidates(results: List[Dict[str, Any]], modes: List[str], started_at: float) -> List[Estimation]:
+    # Uma única chamada atende todos os modos: a latência é a mesma para cada candidato.
+    latency_ms = int((time.perf_counter() - started_at) * 1000)
+    candidates: List[Estimation] = []
+    for mode_name, res in zip(modes, results):
+        normalized = normalize_estimation(res, fallback_mode=mode_name)
+        normalized["latency_ms"] = latency_ms
+        candidates.append(normalized)
+    return candidates
+
+
+def _heuristic_ensemble_metrics(
+    candidates: List[Estimation],
+    strategy: str,
+    started_at: float,
+    modes_cancelled: Optional[List[str]] = None,
+    deadline_misses: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    return {
+        "latency_ms": int((time.perf_counter() - started_at) * 1000),
+        "candidate_count": len(candidates),
+        "strategy": strategy,
+        "llm_calls": 1 if strategy == "single_call" and candidates else len(candidates),
+        "modes_run": len(candidates),
+        "modes_cancelled": list(modes_cancelled or []),
+        "deadline_misses": list(deadline_misses or []),
+    }
+
+
+def _adaptive_stop_reached(candidates: List[Estimation]) -> bool:
+    # Parada antecipada: modos suficientes e consenso de faixa estreito e confiante.
+    min_modes = max(1, int(getattr(settings, "HEURISTIC_ADAPTIVE_MIN_MODES", 2) or 2))
+    if len(candidates) < min_modes:
+        return False
+    consensus = aggregate_range_consensus(candidates)
+    consensus_index = clamp_range_index(consensus.get("range_index") or 4)
+    tolerance = max(0, int(getattr(settings, "HEURISTIC_ADAPTIVE_RANGE_TOLERANCE", 0) or 0))
+    agreeing = sum(
+        1 for candidate in candidates
+        if abs(_candidate_range_index(candidate, fallback_bucket_rank=3) - consensus_index) <= tolerance
+    )
+    min_agreement = float(getattr(settings, "HEURISTIC_ADAPTIVE_MIN_AGREEMENT", 0.66) or 0.0)
+    min_confidence = float(getattr(settings, "HEURISTIC_ADAPTIVE_MIN_CONFIDENCE", 0.6) or 0.0)
+    return (
+        agreeing / len(candidates) >= min_agreement
+        and float(consensus.get("confidence") or 0.0) >= min_confidence
     )
-    max_concurrency = max(1, min(max_concurrency, len(modes)))
+
+
+def _adaptive_first_wave(modes: List[str]) -> List[str]:
+    min_modes = max(1, int(getattr(settings, "HEURISTIC_ADAPTIVE_MIN_MODES", 2) or 2))
+    return modes[:min_modes]
+
+
+def _run_adaptive_ensemble(
+    session: DispatchSession,
+    modes: List[str],
+    run_once,
+    deadline: Optional[float] = None,
+    deadline_misses: Optional[List[str]] = None,
+) -> tuple[List[Estimation], List[str]]:
+    """
+    Modos em ordem de prioridade: primeiro HEURISTIC_ADAPTIVE_MIN_MODES em paralelo; sem
+    consenso, os demais são enviados e, assim que o consenso é atingido, os que ainda
+    estão na fila do dispatcher são cancelados (os já em execução são aproveitados).
+    """
+    results: Dict[str, Estimation] = {}
+    futures: Dict[str, Future] = {}
+
+    def _collect(mode_name: str) -> None:
+        try:
+            results[mode_name] = _result_by(futures[mode_name], deadline, f"heuristic:{mode_name}")
+        except Exception as exc:
+            if isinstance(exc, DeadlineExceeded) and deadline_misses is not None:
+                deadline_misses.append(mode_name)
+            results[mode_name] = _heuristic_failure(mode_name, exc)
+
+    def _ordered() -> List[Estimation]:
+        return [results[mode_name] for mode_name in modes if mode_name in results]
+
+    first_wave = _adaptive_first_wave(modes)
+    for mode_name in first_wave:
+        futures[mode_name] = session.submit(run_once, mode_name, lane="heuristic")
+    for mode_name in first_wave:
+        _collect(mode_name)
+
+    cancelled: List[str] = []
+    rest = [mode_name for mode_name in modes if mode_name not in futures]
+    if rest and not _adaptive_stop_reached(_ordered()):
+        for mode_name in rest:
+            futures[mode_name] = session.submit(run_once, mode_name, lane="heuristic")
+        mode_by_future = {futures[mode_name]: mode_name for mode_name in rest}
+        try:
+            for future in as_completed(mode_by_future, timeout=_time_left(deadline)):
+                _collect(mode_by_future[future])
+                if _adaptive_stop_reached(_ordered()):
+                    cancelled = [mode_name for mode_name in rest if futures[mode_name].cancel()]
+                    break
+        except TimeoutError:
+            pass  # os modos restantes viram fallback em _collect abaixo
+        for mode_name in rest:
+            if mode_name not in results and mode_name not in cancelled:
+                _collect(mode_name)
+
+    return _ordered(), cancelled
+
+
+def _run_heuristic_ensemble(
+    issue: Dict[str, Any],
+    session: Optional[DispatchSession] = None,
+    modes: Optional[List[str]] = None,
+    deadline: Optional[float] = None,
+) -> tuple[List[Estimation], Dict[str, Any]]:
+    modes = list(HEURISTIC_MODES) if modes is None else list(modes)
+    temperature = float(getattr(settings, "HEURISTIC_ENSEMBLE_TEMPERATURE", 0.0) or 0.0)
+    if not modes:
+        return [], _heuristic_ensemble_metrics([], "per_mode", time.perf_counter())
+    if session is None:
+        session = get_default_llm_dispatcher().session(lanes={"heuristic": _heuristic_share(modes)})
 
     def _run_once(mode_name: str) -> Estimation:
-        llm = LLMClient(temperature=temperature)
+        llm = get_llm_client(temperature=temperature)
         started_at = time.perf_counter()
         res = run_heuristic(
             issue_context=issue,
@@ -464,46 +739,109 @@ def _run_heuristic_ensemble(issue: Dict[str, Any]) -> tuple[List[Estimation], Di
         normalized["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
         return normalized
 
+    def _run_single_call() -> List[Estimation]:
+        llm = get_llm_client(temperature=temperature)
+        call_started_at = time.perf_counter()
+        results = run_heuristic_multi_mode(
+            issue_context=issue,
+            llm=llm,
+            temperature=temperature,
+            modes=modes,
+        )
+        return _single_call_candidates(results, modes, call_started_at)
+
+    strategy = _heuristic_ensemble_strategy()
     started_at = time.perf_counter()
-    results: List[Optional[Estimation]] = [None] * len(modes)
-    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
-        future_to_idx = {executor.submit(_run_once, mode): idx for idx, mode in enumerate(modes)}
-        for future in as_completed(future_to_idx):
-            idx = future_to_idx[future]
-            mode_name = modes[idx]
+    candidates: List[Estimation] = []
+    cancelled: List[str] = []
+    misses: List[str] = []
+    if strategy == "single_call":
+        future = session.submit(_run_single_call, lane="heuristic")
+        try:
+            candidates = _result_by(future, deadline, "heuristic:single_call")
+        except Exception as exc:
+            if isinstance(exc, DeadlineExceeded):
+                misses.extend(modes)
+            candidates = [_heuristic_failure(mode_name, exc) for mode_name in modes]
+    elif strategy == "adaptive":
+        candidates, cancelled = _run_adaptive_ensemble(session, modes, _run_once, deadline, misses)
+    else:
+        futures = [session.submit(_run_once, mode, lane="heuristic") for mode in modes]
+        for mode_name, future in zip(modes, futures):
             try:
-                results[idx] = future.result()
+                candidates.append(_result_by(future, deadline, f"heuristic:{mode_name}"))
             except Exception as exc:
-                results[idx] = normalize_estimation(
-                    {
-                        "mode": mode_name,
-                        "size_bucket": "M",
-                        "bucket_rank": 3,
-                        "confidence": 0.25,
-                        "justification": f"Heuristic mode {mode_name} failed; fallback applied.",
-                        "warnings": [str(exc)],
-                        "latency_ms": 0,
-                    },
-                    fallback_mode=mode_name,
-                )
-
-    candidates = [item for item in results if item is not None]
-    metrics = {
-        "latency_ms": int((time.perf_counter() - started_at) * 1000),
-        "candidate_count": len(candidates),
+                if isinstance(exc, DeadlineExceeded):
+                    misses.append(mode_name)
+                candidates.append(_heuristic_failure(mode_name, exc))
+
+    return candidates, _heuristic_ensemble_metrics(candidates, strategy, started_at, cancelled, misses)
+
+
+def _with_primary_reviews_metrics(
+    out: EstimationState,
+    started_at: float,
+    review_misses: Optional[List[str]] = None,
+) -> EstimationState:
+    heuristic_misses = (out.get("heuristic_ensemble_metrics") or {}).get("deadline_misses") or []
+    out["execution_metrics"] = {
+        "primary_reviews_latency_ms": int((time.perf_counter() - started_at) * 1000),
+        "analogical_latency_ms": int((out.get("analogical") or {}).get("latency_ms") or 0),
+        "heuristic_ensemble_latency_ms": int((out.get("heuristic_ensemble_metrics") or {}).get("latency_ms") or 0),
+        "complexity_review_latency_ms": int((out.get("complexity_review") or {}).get("latency_ms") or 0),
+        "agile_guard_latency_ms": int((out.get("agile_guard_review") or {}).get("latency_ms") or 0),
+        "deadline_misses": list(review_misses or []) + [f"heuristic:{mode}" for mode in heuristic_misses],
     }
-    return candidates, metrics
+    return out
 
 
-def primary_reviews_node(state: EstimationState) -> EstimationState:
+def _critic_ready_reviews(out: EstimationState) -> List[str]:
+    return ["heuristic_candidates"] + [name for name in PRIMARY_REVIEWS if name in out]
+
+
+def _with_pipelined_critic(
+    out: EstimationState,
+    critic_out: EstimationState,
+    critic_inputs: List[str],
+) -> EstimationState:
+    # Revisões que chegaram depois do início do critic só alimentam calibração/supervisor.
+    critic_metrics = dict(critic_out.get("execution_metrics") or {})
+    execution_metrics = out["execution_metrics"]
+    deadline_misses = list(execution_metrics.get("deadline_misses") or [])
+    deadline_misses += list(critic_metrics.pop("deadline_misses", None) or [])
+    execution_metrics.update(critic_metrics)
+    execution_metrics["deadline_misses"] = deadline_misses
+    execution_metrics["critic_pipelined"] = True
+    execution_metrics["critic_inputs"] = list(critic_inputs)
+    execution_metrics["critic_late_reviews"] = [
+        name for name in PRIMARY_REVIEWS if name in out and name not in critic_inputs
+    ]
+    if "critic_review" in critic_out:
+        out["critic_review"] = critic_out["critic_review"]
+    return out
+
+
+def _run_primary_reviews(
+    state: EstimationState,
+    reviews: tuple[str, ...],
+    heuristic_modes: List[str],
+    pipelined_critic: bool = False,
+) -> EstimationState:
     issue = state["issue"]
     similar_issues = state.get("similar_issues", [])
     repository_technologies = state.get("repository_technologies", {})
-    max_concurrency = int(getattr(settings, "PRIMARY_AGENT_MAX_CONCURRENCY", 4) or 4)
-    max_concurrency = max(1, min(max_concurrency, 4))
+    # Parcelas desta estimativa no orçamento global do dispatcher de LLM.
+    review_share = int(getattr(settings, "PRIMARY_AGENT_MAX_CONCURRENCY", 4) or 4)
+    session = get_default_llm_dispatcher().session(
+        lanes={
+            "review": max(1, min(review_share, len(reviews))),
+            "heuristic": _heuristic_share(list(heuristic_modes or HEURISTIC_MODES)),
+        },
+        label=f"primary_reviews:{issue.get('issue_number')}",
+    )
 
     def _analogical_call() -> Estimation:
-        llm = LLMClient()
+        llm = get_llm_client()
         started_at = time.perf_counter()
         res = run_analogical(
             issue_context=issue,
@@ -516,7 +854,7 @@ def primary_reviews_node(state: EstimationState) -> EstimationState:
         return normalized
 
     def _complexity_call() -> Estimation:
-        llm = LLMClient()
+        llm = get_llm_client()
         started_at = time.perf_counter()
         res = run_complexity_review(issue_context=issue, llm=llm)
         normalized = normalize_estimation(res, fallback_mode="complexity_review")
@@ -524,62 +862,117 @@ def primary_reviews_node(state: EstimationState) -> EstimationState:
         return normalized
 
     def _agile_guard_call() -> Estimation:
-        llm = LLMClient()
+        llm = get_llm_client()
         started_at = time.perf_counter()
         res = run_agile_guard(issue_context=issue, llm=llm)
         normalized = normalize_estimation(res, fallback_mode="agile_guard")
         normalized["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
         return normalized
 
-    started_at = time.perf_counter()
-    tasks = {
+    review_calls = {
         "analogical": _analogical_call,
-        "heuristic_bundle": lambda: _run_heuristic_ensemble(issue),
         "complexity_review": _complexity_call,
         "agile_guard_review": _agile_guard_call,
     }
+    deadline = _node_deadline(state, "ESTIMATION_PRIMARY_REVIEWS_TIMEOUT_SECONDS")
+    started_at = time.perf_counter()
+    review_futures = {name: session.submit(review_calls[name], lane="review") for name in reviews}
 
     out: EstimationState = {}
-    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
-        future_to_name = {executor.submit(task): task_name for task_name, task in tasks.items()}
-        for future in as_completed(future_to_name):
-            task_name = future_to_name[future]
-            if task_name == "heuristic_bundle":
-                candidates, metrics = future.result()
-                out["heuristic_candidates"] = candidates
-                out["heuristic_ensemble_metrics"] = metrics
-            else:
-                out[task_name] = future.result()
+    candidates, metrics = _run_heuristic_ensemble(issue, session, heuristic_modes, deadline)
+    out["heuristic_candidates"] = candidates
+    out["heuristic_ensemble_metrics"] = metrics
+    review_misses: List[str] = []
 
-    out["execution_metrics"] = {
-        "primary_reviews_latency_ms": int((time.perf_counter() - started_at) * 1000),
-        "analogical_latency_ms": int((out.get("analogical") or {}).get("latency_ms") or 0),
-        "heuristic_ensemble_latency_ms": int((out.get("heuristic_ensemble_metrics") or {}).get("latency_ms") or 0),
-        "complexity_review_latency_ms": int((out.get("complexity_review") or {}).get("latency_ms") or 0),
-        "agile_guard_latency_ms": int((out.get("agile_guard_review") or {}).get("latency_ms") or 0),
-    }
+    def _collect(task_name: str) -> None:
+        try:
+            out[task_name] = _result_by(review_futures[task_name], deadline, task_name)
+        except DeadlineExceeded as exc:
+            review_misses.append(task_name)
+            out[task_name] = _review_deadline_fallback(task_name, exc)
+
+    critic_out: Optional[EstimationState] = None
+    critic_inputs: List[str] = []
+    if pipelined_critic:
+        for task_name in PIPELINED_CRITIC_REVIEWS:
+            if task_name in review_futures:
+                _collect(task_name)
+        for task_name, future in review_futures.items():
+            if task_name not in out and future.done():
+                _collect(task_name)
+        critic_inputs = _critic_ready_reviews(out)
+        # O critic ocupa a lane "review" enquanto as revisões restantes terminam no dispatcher.
+        critic_out = critic_node({**state, **out, "execution_metrics": {}})
+
+    for task_name in review_futures:
+        if task_name not in out:
+            _collect(task_name)
+
+    out = _with_primary_reviews_metrics(out, started_at, [name for name in reviews if name in review_misses])
+    out["execution_metrics"]["primary_reviews_queue_wait_ms"] = session.stats()["queue_wait_ms"]
+    if critic_out is not None:
+        out = _with_pipelined_critic(out, critic_out, critic_inputs)
     return out
 
 
+def primary_reviews_node(state: EstimationState) -> EstimationState:
+    return _run_primary_reviews(state, PRIMARY_REVIEWS, list(HEURISTIC_MODES))
+
+
+def fast_path_reviews_node(state: EstimationState) -> EstimationState:
+    # Âncora forte: só o analógico (e os modos heurísticos configurados); sem critic.
+    return _run_primary_reviews(state, ("analogical",), _fast_path_heuristic_modes())
+
+
+def pipelined_reviews_node(state: EstimationState) -> EstimationState:
+    # Revisões primárias + critic no mesmo nó: o critic parte de analógico + ensemble heurístico.
+    return _run_primary_reviews(state, PRIMARY_REVIEWS, list(HEURISTIC_MODES), pipelined_critic=True)
+
+
+def _critic_output(state: EstimationState, res: Dict[str, Any], started_at: float) -> EstimationState:
+    res["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
+
+    execution_metrics = dict(state.get("execution_metrics") or {})
+    execution_metrics["critic_latency_ms"] = int(res.get("latency_ms") or 0)
+    return {
+        "critic_review": normalize_critic(res),
+        "execution_metrics": execution_metrics,
+    }
+
+
+def _critic_skipped(state: EstimationState, started_at: float) -> EstimationState:
+    # Sem critic_review a calibração e o supervisor seguem sem os ajustes do crítico.
+    execution_metrics = dict(state.get("execution_metrics") or {})
+    execution_metrics["critic_latency_ms"] = int((time.perf_counter() - started_at) * 1000)
+    execution_metrics["critic_skipped"] = True
+    execution_metrics["deadline_misses"] = list(execution_metrics.get("deadline_misses") or []) + ["critic"]
+    return {"execution_metrics": execution_metrics}
+
+
 def critic_node(state: EstimationState) -> EstimationState:
-    llm = LLMClient()
     started_at = time.perf_counter()
-    res = run_estimation_critic(
+    deadline = _node_deadline(state, "ESTIMATION_CRITIC_TIMEOUT_SECONDS")
+    if _time_left(deadline) == 0.0:
+        return _critic_skipped(state, started_at)
+    llm = get_llm_client()
+    session = get_default_llm_dispatcher().session(label=f"critic:{state['issue'].get('issue_number')}")
+    future = session.submit(
+        run_estimation_critic,
         issue_context=state["issue"],
         analogical=state.get("analogical"),
         heuristic_candidates=state.get("heuristic_candidates", []),
         complexity_review=state.get("complexity_review"),
         agile_guard_review=state.get("agile_guard_review"),
         llm=llm,
+        lane="review",
     )
-    res["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
-
-    execution_metrics = dict(state.get("execution_metrics") or {})
-    execution_metrics["critic_latency_ms"] = int(res.get("latency_ms") or 0)
-    return {
-        "critic_review": normalize_critic(res),
-        "execution_metrics": execution_metrics,
-    }
+    try:
+        res = _result_by(future, deadline, "critic")
+    except DeadlineExceeded:
+        return _critic_skipped(state, started_at)
+    out = _critic_output(state, res, started_at)
+    out["execution_metrics"]["critic_queue_wait_ms"] = session.stats()["queue_wait_ms"]
+    return out
 
 
 def _enrich_heuristic_candidates(
@@ -1029,28 +1422,329 @@ def supervisor_node(state: EstimationState) -> EstimationState:
     }
 
 
-graph = StateGraph(EstimationState)
-graph.add_node("retriever", retriever_node)
-graph.add_node("primary_reviews", primary_reviews_node)
-graph.add_node("critic", critic_node)
-graph.add_node("calibration", calibration_node)
-graph.add_node("supervisor", supervisor_node)
+# --- Execução assíncrona -------------------------------------------------------------
+# Nós como corrotinas: as chamadas LLM usam o cliente async (ainvoke) em vez de threads
+# aninhadas. Cada chamada ocupa um slot do LLMDispatcher global (o mesmo orçamento
+# LLM_MAX_CONCURRENCY do fluxo síncrono); as buscas vetoriais, que rodam em threads, têm um
+# semáforo próprio por event loop, então uma rajada de webhooks não multiplica threads.
+_async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_slot() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slot = _async_slots.get(loop)
+    if slot is None:
+        limit = int(getattr(settings, "ESTIMATION_ASYNC_MAX_CONCURRENCY", 16) or 16)
+        slot = asyncio.Semaphore(max(1, limit))
+        _async_slots[loop] = slot
+    return slot
+
 
-graph.add_edge(START, "retriever")
-graph.add_edge("retriever", "primary_reviews")
-graph.add_edge("primary_reviews", "critic")
-graph.add_edge("critic", "calibration")
-graph.add_edge("calibration", "supervisor")
-graph.add_edge("supervisor", END)
+def _llm_slot() -> AsyncContextManager[None]:
+    return get_default_llm_dispatcher().aslot()
+
+
+async def aretriever_node(state: EstimationState) -> EstimationState:
+    # O cliente Pinecone/embeddings é síncrono: a busca roda numa thread, mas ocupa um slot.
+    async with _async_slot():
+        return await asyncio.to_thread(retriever_node, state)
+
+
+async def _arun_heuristic_ensemble(
+    issue: Dict[str, Any],
+    modes: Optional[List[str]] = None,
+    deadline: Optional[float] = None,
+) -> tuple[List[Estimation], Dict[str, Any]]:
+    modes = list(HEURISTIC_MODES) if modes is None else list(modes)
+    if not modes:
+        return [], _heuristic_ensemble_metrics([], "per_mode", time.perf_counter())
+    temperature = float(getattr(settings, "HEURISTIC_ENSEMBLE_TEMPERATURE", 0.0) or 0.0)
+
+    started_modes: set[str] = set()
+
+    async def _run_once(mode_name: str) -> Estimation:
+        llm = get_llm_client(temperature=temperature)
+        started_at = time.perf_counter()
+        async with _llm_slot():
+            started_modes.add(mode_name)
+            res = await arun_heuristic(
+                issue_context=issue,
+                llm=llm,
+                temperature=temperature,
+                mode=mode_name,
+            )
+        normalized = normalize_estimation(res, fallback_mode=mode_name)
+        normalized["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
+        return normalized
+
+    misses: List[str] = []
+
+    async def _run_bounded(mode_name: str) -> Estimation:
+        try:
+            return await _await_by(_run_once(mode_name), deadline, f"heuristic:{mode_name}")
+        except DeadlineExceeded as exc:
+            misses.append(mode_name)
+            return _heuristic_failure(mode_name, exc)
+
+    async def _run_single_call() -> List[Estimation]:
+        llm = get_llm_client(temperature=temperature)
+        call_started_at = time.perf_counter()
+        async with _llm_slot():
+            results = await arun_heuristic_multi_mode(
+                issue_context=issue,
+                llm=llm,
+                temperature=temperature,
+                modes=modes,
+            )
+        return _single_call_candidates(results, modes, call_started_at)
+
+    async def _run_adaptive() -> tuple[List[Estimation], List[str]]:
+        # Mesma política de _run_adaptive_ensemble; "na fila" = aguardando um slot do dispatcher.
+        results: Dict[str, Estimation] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def _collect(mode_name: str) -> None:
+            try:
+                results[mode_name] = await tasks[mode_name]
+            except Exception as exc:
+                results[mode_name] = _heuristic_failure(mode_name, exc)
+
+        def _ordered() -> List[Estimation]:
+            return [results[mode_name] for mode_name in modes if mode_name in results]
+
+        first_wave = _adaptive_first_wave(modes)
+        for mode_name in first_wave:
+            tasks[mode_name] = asyncio.create_task(_run_bounded(mode_name))
+        for mode_name in first_wave:
+            await _collect(mode_name)
+
+        cancelled: List[str] = []
+        rest = [mode_name for mode_name in modes if mode_name not in tasks]
+        if rest and not _adaptive_stop_reached(_ordered()):
+            for mode_name in rest:
+                tasks[mode_name] = asyncio.create_task(_run_bounded(mode_name))
+            mode_by_task = {tasks[mode_name]: mode_name for mode_name in rest}
+            pending = set(mode_by_task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    await _collect(mode_by_task[task])
+                if _adaptive_stop_reached(_ordered()):
+                    for task in pending:
+                        mode_name = mode_by_task[task]
+                        if mode_name not in started_modes:
+                            task.cancel()
+                            cancelled.append(mode_name)
+                    break
+            for mode_name in rest:
+                if mode_name not in results and mode_name not in cancelled:
+                    await _collect(mode_name)
+        return _ordered(), [mode_name for mode_name in modes if mode_name in cancelled]
+
+    strategy = _heuristic_ensemble_strategy()
+    started_at = time.perf_counter()
+    cancelled: List[str] = []
+    if strategy == "single_call":
+        try:
+            candidates = await _await_by(_run_single_call(), deadline, "heuristic:single_call")
+        except Exception as exc:
+            if isinstance(exc, DeadlineExceeded):
+                misses.extend(modes)
+            candidates = [_heuristic_failure(mode_name, exc) for mode_name in modes]
+    elif strategy == "adaptive":
+        candidates, cancelled = await _run_adaptive()
+    else:
+        results = await asyncio.gather(*(_run_bounded(mode) for mode in modes), return_exceptions=True)
+        candidates = [
+            _heuristic_failure(mode_name, res) if isinstance(res, BaseException) else res
+            for mode_name, res in zip(modes, results)
+        ]
+    return candidates, _heuristic_ensemble_metrics(candidates, strategy, started_at, cancelled, misses)
+
+
+async def _arun_primary_reviews(
+    state: EstimationState,
+    reviews: tuple[str, ...],
+    heuristic_modes: List[str],
+    pipelined_critic: bool = False,
+) -> EstimationState:
+    issue = state["issue"]
+    similar_issues = state.get("similar_issues", [])
+    repository_technologies = state.get("repository_technologies", {})
 
+    async def _analogical_call() -> Estimation:
+        llm = get_llm_client()
+        started_at = time.perf_counter()
+        async with _llm_slot():
+            res = await arun_analogical(
+                issue_context=issue,
+                similar_issues=similar_issues,
+                repository_technologies=repository_technologies,
+                llm=llm,
+            )
+        normalized = normalize_estimation(res, fallback_mode="analogical")
+        normalized["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
+        return normalized
+
+    async def _complexity_call() -> Estimation:
+        llm = get_llm_client()
+        started_at = time.perf_counter()
+        async with _llm_slot():
+            res = await arun_complexity_review(issue_context=issue, llm=llm)
+        normalized = normalize_estimation(res, fallback_mode="complexity_review")
+        normalized["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
+        return normalized
+
+    async def _agile_guard_call() -> Estimation:
+        llm = get_llm_client()
+        started_at = time.perf_counter()
+        async with _llm_slot():
+            res = await arun_agile_guard(issue_context=issue, llm=llm)
+        normalized = normalize_estimation(res, fallback_mode="agile_guard")
+        normalized["latency_ms"] = int((time.perf_counter() - started_at) * 1000)
+        return normalized
+
+    review_calls = {
+        "analogical": _analogical_call,
+        "complexity_review": _complexity_call,
+        "agile_guard_review": _agile_guard_call,
+    }
+    deadline = _node_deadline(state, "ESTIMATION_PRIMARY_REVIEWS_TIMEOUT_SECONDS")
+    review_misses: List[str] = []
+
+    async def _bounded_review(name: str) -> Estimation:
+        try:
+            return await _await_by(review_calls[name](), deadline, name)
+        except DeadlineExceeded as exc:
+            review_misses.append(name)
+            return _review_deadline_fallback(name, exc)
+
+    started_at = time.perf_counter()
+    review_tasks = {name: asyncio.ensure_future(_bounded_review(name)) for name in reviews}
+    heuristic_task = asyncio.ensure_future(_arun_heuristic_ensemble(issue, heuristic_modes, deadline))
+    out: EstimationState = {}
+    critic_task: Optional[asyncio.Future] = None
+    critic_inputs: List[str] = []
+    try:
+        if pipelined_critic:
+            await asyncio.wait(
+                [heuristic_task, *(review_tasks[name] for name in PIPELINED_CRITIC_REVIEWS if name in review_tasks)]
+            )
+            out["heuristic_candidates"], out["heuristic_ensemble_metrics"] = heuristic_task.result()
+            for name, task in review_tasks.items():
+                if task.done():
+                    out[name] = task.result()
+            critic_inputs = _critic_ready_reviews(out)
+            critic_task = asyncio.ensure_future(acritic_node({**state, **out, "execution_metrics": {}}))
+
+        out["heuristic_candidates"], out["heuristic_ensemble_metrics"] = await heuristic_task
+        for name in reviews:
+            out[name] = await review_tasks[name]
+        out = _with_primary_reviews_metrics(out, started_at, [name for name in reviews if name in review_misses])
+        if critic_task is not None:
+            out = _with_pipelined_critic(out, await critic_task, critic_inputs)
+    finally:
+        for task in [*review_tasks.values(), heuristic_task, *([critic_task] if critic_task else [])]:
+            task.cancel()
+    return out
+
+
+async def aprimary_reviews_node(state: EstimationState) -> EstimationState:
+    return await _arun_primary_reviews(state, PRIMARY_REVIEWS, list(HEURISTIC_MODES))
+
+
+async def afast_path_reviews_node(state: EstimationState) -> EstimationState:
+    return await _arun_primary_reviews(state, ("analogical",), _fast_path_heuristic_modes())
+
+
+async def apipelined_reviews_node(state: EstimationState) -> EstimationState:
+    return await _arun_primary_reviews(state, PRIMARY_REVIEWS, list(HEURISTIC_MODES), pipelined_critic=True)
+
+
+async def acritic_node(state: EstimationState) -> EstimationState:
+    started_at = time.perf_counter()
+    deadline = _node_deadline(state, "ESTIMATION_CRITIC_TIMEOUT_SECONDS")
+    if _time_left(deadline) == 0.0:
+        return _critic_skipped(state, started_at)
+    llm = get_llm_client()
+
+    async def _call() -> Dict[str, Any]:
+        async with _llm_slot():
+            return await arun_estimation_critic(
+                issue_context=state["issue"],
+                analogical=state.get("analogical"),
+                heuristic_candidates=state.get("heuristic_candidates", []),
+                complexity_review=state.get("complexity_review"),
+                agile_guard_review=state.get("agile_guard_review"),
+                llm=llm,
+            )
+
+    try:
+        res = await _await_by(_call(), deadline, "critic")
+    except DeadlineExceeded:
+        return _critic_skipped(state, started_at)
+    return _critic_output(state, res, started_at)
+
+
+def _build_graph(retriever, primary_reviews, fast_path_reviews, pipelined_reviews, critic) -> StateGraph:
+    graph = StateGraph(EstimationState)
+    graph.add_node("retriever", retriever)
+    graph.add_node("primary_reviews", primary_reviews)
+    graph.add_node("fast_path_reviews", fast_path_reviews)
+    graph.add_node("pipelined_reviews", pipelined_reviews)
+    graph.add_node("critic", critic)
+    graph.add_node("calibration", calibration_node)
+    graph.add_node("supervisor", supervisor_node)
+
+    graph.add_edge(START, "retriever")
+    graph.add_conditional_edges(
+        "retriever",
+        _route_after_retriever,
+        {"full": "primary_reviews", "fast_path": "fast_path_reviews", "pipelined": "pipelined_reviews"},
+    )
+    graph.add_edge("primary_reviews", "critic")
+    graph.add_edge("fast_path_reviews", "calibration")
+    graph.add_edge("pipelined_reviews", "calibration")
+    graph.add_edge("critic", "calibration")
+    graph.add_edge("calibration", "supervisor")
+    graph.add_edge("supervisor", END)
+    return graph
+
+
+graph = _build_graph(retriever_node, primary_reviews_node, fast_path_reviews_node, pipelined_reviews_node, critic_node)
 estimation_graph = graph.compile()
 
+# calibration/supervisor são CPU puro e continuam síncronos nos dois grafos.
+async_graph = _build_graph(
+    aretriever_node, aprimary_reviews_node, afast_path_reviews_node, apipelined_reviews_node, acritic_node
+)
+async_estimation_graph = async_graph.compile()
+
+
+def _initial_state(dto: IssueEstimationDTO) -> EstimationState:
+    initial_state: EstimationState = {"issue": dto.model_dump()}
+    deadline_at = _estimation_deadline()
+    if deadline_at is not None:
+        initial_state["deadline_at"] = deadline_at
+    return initial_state
+
 
 def run_estimation_flow(dto: IssueEstimationDTO) -> EstimationState:
     workflow_started_at = time.perf_counter()
-    initial_state: EstimationState = {"issue": dto.model_dump()}
-    state: EstimationState = estimation_graph.invoke(initial_state)
+    state: EstimationState = estimation_graph.invoke(_initial_state(dto))
+    return _finalize_flow_state(state, workflow_started_at)
+
+
+async def arun_estimation_flow(dto: IssueEstimationDTO) -> EstimationState:
+    """Async counterpart of run_estimation_flow (graph executed through ainvoke)."""
+    workflow_started_at = time.perf_counter()
+    state: EstimationState = await async_estimation_graph.ainvoke(_initial_state(dto))
+    return _finalize_flow_state(state, workflow_started_at)
+
 
+def _finalize_flow_state(state: EstimationState, workflow_started_at: float) -> EstimationState:
     def _sum_llm_usage(usages: List[Dict[str, Any]]) -> TokenUsage:
         total: TokenUsage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
         for usage in usages:
@@ -1076,17 +1770,32 @@ def run_estimation_flow(dto: IssueEstimationDTO) -> EstimationState:
             llm_usages.append(candidate.get("token_usage") or {})
 
     llm_total = _sum_llm_usage(llm_usages)
+    # Chamadas servidas pelo cache de respostas LLM já vêm com 0 tokens; contadas à parte.
+    llm_cached_usages = [coerce_token_usage(usage) for usage in llm_usages]
     summary = {
         "predicted_llm_prompt_tokens": int(llm_total["prompt_tokens"]),
         "predicted_llm_completion_tokens": int(llm_total["completion_tokens"]),
         "predicted_llm_total_tokens": int(llm_total["total_tokens"]),
         "predicted_rag_embedding_tokens": int(rag_embedding_tokens),
         "predicted_total_tokens": int(llm_total["total_tokens"] + rag_embedding_tokens),
+        "llm_cache_hits": sum(int(usage.get("cached_calls") or 0) for usage in llm_cached_usages),
+        "llm_cache_saved_tokens": sum(int(usage.get("cached_tokens") or 0) for usage in llm_cached_usages),
     }
+    # Hedge rate = chamadas que enviaram requisição duplicada / chamadas que foram ao modelo.
+    llm_calls = sum(
+        1 for usage in llm_cached_usages
+        if not usage.get("cached_calls") and (usage["total_tokens"] > 0 or usage.get("hedged_calls"))
+    )
+    hedged_calls = sum(int(usage.get("hedged_calls") or 0) for usage in llm_cached_usages)
+    summary["llm_hedged_calls"] = hedged_calls
+    summary["llm_hedge_rate"] = round(hedged_calls / llm_calls, 4) if llm_calls else 0.0
     state["token_usage_summary"] = summary
 
     execution_metrics = dict(state.get("execution_metrics") or {})
+    execution_metrics["graph_route"] = str(state.get("graph_route") or "full")
+    execution_metrics["deadline_miss_count"] = len(execution_metrics.get("deadline_misses") or [])
     execution_metrics["workflow_latency_ms"] = int((time.perf_counter() - workflow_started_at) * 1000)
+    execution_metrics["llm_dispatcher"] = get_default_llm_dispatcher().stats()
     state["execution_metrics"] = execution_metrics
 
     final_estimation = state.get("final_estimation")
@@ -1,7 +1,8 @@
 from typing import List, Dict, Any, Optional, TypedDict
 import logging
 from ai.workflows.estimation_graph import run_estimation_flow
-from ai.core.llm_client import LLMClient
+from ai.core.estimation_result_cache import get_default_estimation_result_cache
+from ai.core.llm_client import get_llm_client
 from langgraph.graph import StateGraph, END
 from ai.dtos.issues_estimation_dto import IssueEstimationDTO
 from ai.agents.prioritize_agent import run_task_prioritization_for_user
@@ -27,7 +28,7 @@ logger = logging.getLogger(__name__)
 
 def prioritize_tasks(state: SprintPlanningState):
 
-    llm = LLMClient()
+    llm = get_llm_client()
 
     # Agrupa tarefas por usuário (assignee) a partir do backlog
     tasks_by_user = {}
@@ -60,6 +61,14 @@ def prioritize_tasks(state: SprintPlanningState):
     return {"priorities": all_prioritized}
 
 
+def _run_cached_estimation(dto: IssueEstimationDTO) -> Dict[str, Any]:
+    # Mesmo cache (e single-flight) do webhook: backlog re-estimado não repete o grafo.
+    cache = get_default_estimation_result_cache()
+    if cache is None:
+        return run_estimation_flow(dto)
+    return cache.get_or_compute(cache.make_key(dto), lambda: run_estimation_flow(dto))
+
+
 def estimate_tasks(state: SprintPlanningState):
     cache = {}
     estimated = []
@@ -102,7 +111,7 @@ def estimate_tasks(state: SprintPlanningState):
         if key in cache:
             hours = cache[key]
         else:
-            est_state = run_estimation_flow(orig)
+            est_state = _run_cached_estimation(orig)
             hours = float(
                 est_state.get("final_estimation", {}).get("estimated_hours", 0)
             )
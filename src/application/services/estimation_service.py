@@ -1,10 +1,21 @@
 import asyncio
 from typing import Any, Dict
 
+from ai.core.estimation_result_cache import get_default_estimation_result_cache
 from ai.dtos.issues_estimation_dto import IssueEstimationDTO
-from ai.workflows.estimation_graph import run_estimation_flow
+from ai.workflows.estimation_graph import arun_estimation_flow, run_estimation_flow
+from config.settings import settings
 
 
 class EstimationService:
     async def run(self, dto: IssueEstimationDTO) -> Dict[str, Any]:
+        cache = get_default_estimation_result_cache()
+        if cache is None:
+            return await self._run_flow(dto)
+        return await cache.aget_or_compute(cache.make_key(dto), lambda: self._run_flow(dto))
+
+    @staticmethod
+    async def _run_flow(dto: IssueEstimationDTO) -> Dict[str, Any]:
+        if getattr(settings, "ESTIMATION_ASYNC_ENABLED", False):
+            return await arun_estimation_flow(dto)
         return await asyncio.to_thread(run_estimation_flow, dto)
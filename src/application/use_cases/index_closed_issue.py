@@ -1,10 +1,14 @@
+import asyncio
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-from ai.core.pinecone_vector_store import PineconeVectorStoreClient
+from ai.core.lexical_index import get_default_lexical_store
+from ai.core.namespace_catalog import invalidate_namespace_catalogs
 from ai.core.rag_namespace_policy import extract_project_issue_namespace, extract_project_name
+from ai.core.token_fingerprint import build_fingerprint_metadata
+from ai.core.vector_store_factory import get_default_vector_store
 from config.settings import settings
 from web.schemas.github_payloads import GitHubIssuesWebhookPayload
 
@@ -53,7 +57,17 @@ class IndexClosedIssueResult:
 
 class IndexClosedIssueUseCase:
     def __init__(self, vector_store: Any | None = None):
-        self.vector_store = vector_store or PineconeVectorStoreClient()
+        self.vector_store = vector_store or get_default_vector_store()
+
+    @staticmethod
+    def _index_lexical(namespace: str, vector_id: str, metadata: Dict[str, Any]) -> None:
+        lexical_store = get_default_lexical_store()
+        if lexical_store is None:
+            return
+        try:
+            lexical_store.add_documents(namespace, [{"id": vector_id, "metadata": metadata}])
+        except Exception as exc:
+            logger.exception("Failed to update lexical index namespace=%s id=%s: %s", namespace, vector_id, exc)
 
     async def execute(self, payload: GitHubIssuesWebhookPayload) -> Dict[str, Any]:
         if not payload.issue:
@@ -126,6 +140,8 @@ class IndexClosedIssueUseCase:
             "labels": labels,
             "effort_fallback": effort_fallback,
         }
+        # Hashed token ids used by the reranker instead of re-tokenizing title/description.
+        metadata.update(build_fingerprint_metadata(metadata))
 
         # If Pinecone is not configured, do a no-op to avoid GitHub retries.
         if hasattr(self.vector_store, "_ready") and not bool(getattr(self.vector_store, "_ready")):
@@ -160,6 +176,10 @@ class IndexClosedIssueUseCase:
                 issue_number,
                 namespace,
             )
+            # A new namespace must show up in the next retrieval without waiting for the TTL.
+            invalidate_namespace_catalogs(namespace)
+            # JSON rewrite of the namespace index: keep it off the event loop.
+            await asyncio.to_thread(self._index_lexical, namespace, vector_id, metadata)
             if isinstance(result, dict):
                 metadata = dict(metadata)
                 metadata["upsert_result"] = result
@@ -15,19 +15,120 @@ class Settings(BaseSettings):
     PINECONE_INDEX_NAME: Optional[str] = None
     OPENAI_API_KEY_RAG: Optional[str] = None
     RAG_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Vector store backend: "pinecone" (remote) or "local" (in-process NumPy store).
+    VECTOR_STORE_BACKEND: str = "pinecone"
+    # Snapshot loaded by the local backend: a JSONL file or an int8 memory-mapped
+    # snapshot directory (see scripts/pinecone/export_snapshot.py --format).
+    LOCAL_VECTOR_SNAPSHOT_PATH: Optional[str] = None
     RAG_TOPK_PER_NAMESPACE: int = 10
     RAG_MIN_HITS_MAIN: int = 2
     RAG_MIN_SCORE_MAIN: float = 0.55
     RAG_MAX_FALLBACK_BASES: int = 99
     RAG_FINAL_CONTEXT_SIZE: int = 12
+    # Threads of the Pinecone client's namespace query pool (sized once, shared by all
+    # estimations). If <= 1, namespaces are queried sequentially.
+    RAG_NAMESPACE_QUERY_MAX_CONCURRENCY: int = 8
+    # Time budget (seconds) for each namespace query, counted from when the query starts
+    # (also sent as the request timeout). Namespaces that miss it are dropped and the
+    # partial result set is returned. If <= 0, waits for all.
+    RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS: float = 3.0
+    # Query-embedding cache (LRU entries). If <= 0, every query is embedded.
+    RAG_EMBEDDING_CACHE_SIZE: int = 512
+    # Optional SQLite file that persists the embedding cache across restarts.
+    RAG_EMBEDDING_CACHE_PATH: Optional[str] = None
+    # TTL (seconds) of the namespace catalog used for discovery. Expired catalogs
+    # are refreshed in the background. If <= 0, list_namespaces runs every request.
+    RAG_NAMESPACE_CACHE_TTL_SECONDS: int = 300
+    # Directory with per-namespace BM25 indexes (built at ingestion). When set, the
+    # retriever also runs a lexical search and fuses it with the vector results (RRF).
+    RAG_LEXICAL_INDEX_DIR: Optional[str] = None
+    # Reciprocal-rank fusion constant: score = sum(1 / (k + rank)).
+    RAG_HYBRID_RRF_K: int = 60
+    # Score given to the best lexical-only hit (others scale down by BM25 ratio).
+    # Kept below the analogical "useful"/strong-anchor thresholds on purpose.
+    RAG_HYBRID_LEXICAL_SCORE_CEILING: float = 0.68
+    # Centroid-based namespace routing: query only the top-N namespaces closest to the
+    # issue (plus the primary one and any within MARGIN of the N-th score).
+    RAG_NAMESPACE_ROUTER_ENABLED: bool = False
+    RAG_NAMESPACE_ROUTER_TOP_N: int = 8
+    RAG_NAMESPACE_ROUTER_MARGIN: float = 0.05
+    # Centroids/effort histograms fed by upserts (scripts/benchmark_namespace_router.py --save builds it).
+    RAG_NAMESPACE_ROUTER_PATH: Optional[str] = "artifacts/namespace_router.json"
+    # Cache of final retrieval results (LRU entries) keyed by query text + namespaces.
+    # Entries are dropped when any of their namespaces receives an upsert. If <= 0, disabled.
+    RAG_RETRIEVAL_CACHE_SIZE: int = 256
+    # Max age (seconds) of a cached retrieval; covers writes made by other processes.
+    RAG_RETRIEVAL_CACHE_TTL_SECONDS: int = 3600
     HEURISTIC_ENSEMBLE_RUNS: int = 4
     HEURISTIC_ENSEMBLE_TEMPERATURE: float = 0.0
-    # Max number of parallel LLM calls for the heuristic ensemble.
+    # "per_mode": one LLM call per heuristic mode; "single_call": every mode in one
+    # structured JSON response (fewer calls/tokens, compare accuracy in scripts/validation.py);
+    # "adaptive": modes in priority order, stopping early once they agree (see below).
+    HEURISTIC_ENSEMBLE_STRATEGY: str = "per_mode"
+    # Adaptive ensemble: modes always run before stopping is considered; then it stops once
+    # this share of the modes lies within RANGE_TOLERANCE range indices of the consensus
+    # range and the consensus confidence reaches MIN_CONFIDENCE.
+    HEURISTIC_ADAPTIVE_MIN_MODES: int = 2
+    HEURISTIC_ADAPTIVE_MIN_AGREEMENT: float = 0.66
+    HEURISTIC_ADAPTIVE_RANGE_TOLERANCE: int = 0
+    HEURISTIC_ADAPTIVE_MIN_CONFIDENCE: float = 0.6
+    # Cache of temperature-0 LLM responses (LRU entries). If <= 0, every call hits the model.
+    LLM_RESPONSE_CACHE_SIZE: int = 1024
+    # Optional SQLite file that persists the LLM response cache across restarts.
+    LLM_RESPONSE_CACHE_PATH: Optional[str] = None
+    # Max age (seconds) of a cached LLM response. If <= 0, entries never expire.
+    LLM_RESPONSE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Bump whenever agent prompts/parsing change: invalidates every cached LLM response.
+    LLM_PROMPT_TEMPLATE_VERSION: str = "1"
+    # Hedged LLM requests: a call slower than the LLM_HEDGING_PERCENTILE of recent latencies
+    # (at least LLM_HEDGING_MIN_DELAY_SECONDS, after LLM_HEDGING_MIN_SAMPLES calls) gets one
+    # duplicate request; the first to answer wins. Hedges never exceed
+    # LLM_HEDGING_MAX_EXTRA_RATIO of the calls (0.05 = at most 5% extra calls).
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGING_PERCENTILE: float = 0.95
+    LLM_HEDGING_MAX_EXTRA_RATIO: float = 0.05
+    LLM_HEDGING_MIN_SAMPLES: int = 20
+    LLM_HEDGING_MIN_DELAY_SECONDS: float = 1.0
+    # Process-wide cap of in-flight LLM calls (shared by all concurrent estimations, sync
+    # and async flows, and hedged duplicates).
+    LLM_MAX_CONCURRENCY: int = 16
+    # Per-estimation share of LLM_MAX_CONCURRENCY for the heuristic ensemble calls.
     # If <= 0, it will default to HEURISTIC_ENSEMBLE_RUNS.
     HEURISTIC_ENSEMBLE_MAX_CONCURRENCY: int = 4
-    # Max number of high-level review branches executed in parallel for one issue:
-    # analogical, heuristic ensemble, complexity review, and agile guard.
+    # Per-estimation share of LLM_MAX_CONCURRENCY for the review calls of one issue:
+    # analogical, complexity review, and agile guard (capped at 3).
     PRIMARY_AGENT_MAX_CONCURRENCY: int = 4
+    # Async execution: graph nodes as coroutines (ainvoke) instead of nested thread pools.
+    ESTIMATION_ASYNC_ENABLED: bool = False
+    # Max simultaneous vector-store searches (run in threads) across all estimations on one
+    # event loop; async LLM calls are bounded by LLM_MAX_CONCURRENCY instead.
+    ESTIMATION_ASYNC_MAX_CONCURRENCY: int = 16
+    # Cache of final estimations keyed by the normalized issue content + meta-model/prompt
+    # versions; concurrent requests for the same issue share one run. If 0, cache is disabled.
+    ESTIMATION_RESULT_CACHE_SIZE: int = 256
+    ESTIMATION_RESULT_CACHE_TTL_SECONDS: int = 6 * 3600
+    # Comma-separated workflow labels ignored by the cache key (they change around a run).
+    ESTIMATION_RESULT_CACHE_IGNORED_LABELS: str = "Estimate,Planning"
+    # Per-estimation time budget (seconds) carried through the graph; keep it below
+    # GITHUB_WEBHOOK_INFLIGHT_TTL_SECONDS so a slow run never outlives its reservation (the
+    # webhook worker restarts that TTL when it picks the job up, so queue wait does not count).
+    # Calls still pending when it runs out fall back (heuristic/reviews) or are skipped (critic).
+    # If <= 0, there is no deadline.
+    ESTIMATION_DEADLINE_SECONDS: float = 240.0
+    # Per-node caps within the deadline. If <= 0, only the estimation deadline applies.
+    ESTIMATION_PRIMARY_REVIEWS_TIMEOUT_SECONDS: float = 150.0
+    ESTIMATION_CRITIC_TIMEOUT_SECONDS: float = 60.0
+    # Fast path: with a strong analogical anchor (analogical_primary + has_strong_anchor and
+    # both thresholds below), skip complexity/agile guard/critic and trim the heuristic ensemble.
+    ESTIMATION_FAST_PATH_ENABLED: bool = False
+    ESTIMATION_FAST_PATH_MIN_ANCHOR_SCORE: float = 0.95
+    ESTIMATION_FAST_PATH_MIN_ANCHOR_OVERLAP: float = 0.40
+    # Comma-separated heuristic modes still run on the fast path (empty: none).
+    ESTIMATION_FAST_PATH_HEURISTIC_MODES: str = "scope"
+    # Pipelined critic: on the full route, start the critic as soon as the analogical review
+    # and the heuristic ensemble are in; complexity/agile guard reviews that arrive later
+    # feed only the deterministic calibration/supervisor steps.
+    ESTIMATION_PIPELINED_CRITIC_ENABLED: bool = False
     META_CALIBRATOR_ENABLED: bool = True
     META_CALIBRATOR_MODEL_PATH: str = "artifacts/meta_calibrator.json"
     META_CALIBRATOR_MIN_SEGMENT_COUNT: int = 3
@@ -5,12 +5,22 @@ import sys
 # `from web.routes...` work when running from project root or Docker /app
 sys.path.insert(0, os.path.dirname(__file__))
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from web.routes.github_webhook import router as github_webhook_router
+from web.routes.github_webhook import start_webhook_workers
 
 import uvicorn
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    start_webhook_workers()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(github_webhook_router)
 
 if __name__ == "__main__":
@@ -1,11 +1,46 @@
 import asyncio
+import heapq
+import json
+import threading
 import time
+import uuid
 from dataclasses import dataclass
-from typing import Any, Dict, Literal, Optional, Tuple
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+
+from starlette.responses import Response
+
+from web.sqlite_utils import connect, immediate_transaction
 
 
 State = Literal["ok", "in_progress", "done"]
 
+# Redis value prefix of an in-flight reservation, followed by its owner token (done keys
+# hold the encoded response).
+_IN_PROGRESS = "__in_progress__"
+
+# Compare-and-delete: only the owner's token releases a reservation.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# ARGV: token, ttl, in-flight prefix, adopt. Extends our reservation, takes a missing one,
+# and (adopt=1) takes over another in-flight one; done keys are left alone.
+_REFRESH_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value == ARGV[1] then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if (not value) or (ARGV[4] == '1' and string.sub(value, 1, string.len(ARGV[3])) == ARGV[3]) then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
 
 @dataclass
 class _Entry:
@@ -22,6 +57,8 @@ class InMemoryIdempotencyStore:
     Notes:
     - Works only within a single Python process (no cross-worker / cross-pod dedupe).
     - Uses TTLs to avoid leaks and to recover from stuck in-flight processing.
+    - Expiry is driven by a min-heap of (expires_at, key): cleanup only touches expired
+      keys, so each call is O(log n) amortized instead of a scan of every entry.
     """
 
     def __init__(self, *, ttl_seconds: int = 600, inflight_ttl_seconds: int = 300):
@@ -34,6 +71,8 @@ class InMemoryIdempotencyStore:
         self._inflight_ttl_seconds = inflight_ttl_seconds
         self._lock = asyncio.Lock()
         self._entries: Dict[str, _Entry] = {}
+        # Lazily invalidated: items whose entry was replaced or released are skipped on pop.
+        self._expiry_heap: List[Tuple[float, str]] = []
 
     async def reserve(self, key: str) -> Tuple[State, Optional[Any]]:
         """
@@ -50,12 +89,14 @@ class InMemoryIdempotencyStore:
 
             entry = self._entries.get(key)
             if entry is None:
-                self._entries[key] = _Entry(
+                entry = _Entry(
                     state="in_progress",
                     created_at=now,
                     updated_at=now,
                     response=None,
                 )
+                self._entries[key] = entry
+                self._schedule_locked(key, entry)
                 return "ok", None
 
             if entry.state == "done" and entry.response is not None:
@@ -66,13 +107,31 @@ class InMemoryIdempotencyStore:
     async def mark_done(self, key: str, response: Any) -> None:
         now = time.monotonic()
         async with self._lock:
-            self._entries[key] = _Entry(
+            entry = _Entry(
                 state="done",
                 created_at=now,
                 updated_at=now,
                 response=response,
             )
+            self._entries[key] = entry
+            self._schedule_locked(key, entry)
+            self._cleanup_locked(now)
+
+    async def refresh(self, key: str) -> bool:
+        """
+        Restart the in-flight TTL of a reservation when its work actually starts (a queued
+        job may wait longer than the TTL). Returns False if the key is already done.
+        """
+        now = time.monotonic()
+        async with self._lock:
             self._cleanup_locked(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry.state == "done":
+                return False
+            entry = _Entry(state="in_progress", created_at=now, updated_at=now, response=None)
+            self._entries[key] = entry
+            self._schedule_locked(key, entry)
+            return True
 
     async def release(self, key: str) -> None:
         """
@@ -83,19 +142,246 @@ class InMemoryIdempotencyStore:
             if entry is not None and entry.state == "in_progress":
                 self._entries.pop(key, None)
 
+    def _expires_at(self, entry: _Entry) -> float:
+        if entry.state == "done":
+            return entry.updated_at + self._ttl_seconds
+        # in_progress: expires when it looks stuck for too long
+        return entry.created_at + self._inflight_ttl_seconds
+
+    def _schedule_locked(self, key: str, entry: _Entry) -> None:
+        heapq.heappush(self._expiry_heap, (self._expires_at(entry), key))
+
     def _cleanup_locked(self, now: float) -> None:
-        to_delete = []
-        for key, entry in self._entries.items():
-            age = now - entry.updated_at
-            if entry.state == "done":
-                if age > self._ttl_seconds:
-                    to_delete.append(key)
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and self._expires_at(entry) == expires_at:
+                self._entries.pop(key, None)
+
+        # Released / replaced keys leave stale items behind; rebuild before they dominate.
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(self._expires_at(entry), key) for key, entry in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+
+def _encode_response(response: Any) -> str:
+    # Shared stores keep cached responses as JSON; Response objects keep status and body.
+    if isinstance(response, Response):
+        return json.dumps(
+            {
+                "response": {
+                    "status_code": response.status_code,
+                    "body": bytes(response.body).decode("utf-8"),
+                    "media_type": response.media_type,
+                }
+            }
+        )
+    return json.dumps({"value": response})
+
+
+def _decode_response(raw: str) -> Any:
+    data = json.loads(raw)
+    if "response" in data:
+        stored = data["response"]
+        return Response(
+            content=stored["body"],
+            status_code=int(stored["status_code"]),
+            media_type=stored.get("media_type"),
+        )
+    return data.get("value")
+
+
+class SQLiteIdempotencyStore:
+    """
+    Idempotency store on a shared SQLite file (WAL), for several workers on one host.
+
+    Notes:
+    - Same semantics and TTLs as InMemoryIdempotencyStore; every operation is one
+      IMMEDIATE transaction, so ``reserve`` has a single owner across processes.
+    - Cached responses are stored as JSON (see ``_encode_response``).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl_seconds: int = 600,
+        inflight_ttl_seconds: int = 300,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+        if inflight_ttl_seconds <= 0:
+            raise ValueError("inflight_ttl_seconds must be > 0")
+
+        self._ttl_seconds = ttl_seconds
+        self._inflight_ttl_seconds = inflight_ttl_seconds
+        # Wall clock: expiries are compared across processes.
+        self._now = now_fn or time.time
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_idempotency (
+                key TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                response TEXT,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        # reserve() sweeps expired keys on every call: keep that an index range scan.
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS webhook_idempotency_expires_at ON webhook_idempotency (expires_at)"
+        )
+
+    async def reserve(self, key: str) -> Tuple[State, Optional[Any]]:
+        state, raw = await asyncio.to_thread(self._reserve, key)
+        return state, (_decode_response(raw) if raw is not None else None)
+
+    async def mark_done(self, key: str, response: Any) -> None:
+        encoded = _encode_response(response)
+        await asyncio.to_thread(self._mark_done, key, encoded)
+
+    async def refresh(self, key: str) -> bool:
+        return await asyncio.to_thread(self._refresh, key)
+
+    async def release(self, key: str) -> None:
+        await asyncio.to_thread(self._release, key)
+
+    def _reserve(self, key: str) -> Tuple[State, Optional[str]]:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            self._conn.execute("DELETE FROM webhook_idempotency WHERE expires_at <= ?", (now,))
+            row = self._conn.execute(
+                "SELECT state, response FROM webhook_idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO webhook_idempotency (key, state, response, expires_at) VALUES (?, 'in_progress', NULL, ?)",
+                    (key, now + self._inflight_ttl_seconds),
+                )
+                return "ok", None
+        state, raw = row
+        if state == "done" and raw is not None:
+            return "done", raw
+        return "in_progress", None
+
+    def _refresh(self, key: str) -> bool:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            row = self._conn.execute(
+                "SELECT state FROM webhook_idempotency WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None and row[0] == "done":
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO webhook_idempotency (key, state, response, expires_at) VALUES (?, 'in_progress', NULL, ?)",
+                (key, now + self._inflight_ttl_seconds),
+            )
+        return True
+
+    def _mark_done(self, key: str, encoded: str) -> None:
+        now = self._now()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO webhook_idempotency (key, state, response, expires_at) VALUES (?, 'done', ?, ?)",
+                (key, encoded, now + self._ttl_seconds),
+            )
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM webhook_idempotency WHERE key = ? AND state = 'in_progress'", (key,)
+            )
+
+
+class RedisIdempotencyStore:
+    """
+    Idempotency store on Redis, shared by every worker and pod using the same server.
+
+    Notes:
+    - ``client`` is a ``redis.asyncio.Redis`` (or compatible) client created with
+      ``decode_responses=True``; SET NX/EX, GET and two short Lua scripts (EVAL) are used.
+    - A reservation holds a random owner token. ``release`` is a compare-and-delete on that
+      token, so a late release never drops a reservation taken after ours expired.
+    - TTLs are Redis key expiries: in-flight keys expire after ``inflight_ttl_seconds``,
+      done keys after ``ttl_seconds``.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        ttl_seconds: int = 600,
+        inflight_ttl_seconds: int = 300,
+        prefix: str = "zenite:webhook:idempotency:",
+    ):
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be > 0")
+        if inflight_ttl_seconds <= 0:
+            raise ValueError("inflight_ttl_seconds must be > 0")
+
+        self._client = client
+        self._ttl_seconds = ttl_seconds
+        self._inflight_ttl_seconds = inflight_ttl_seconds
+        self._prefix = prefix
+        # Tokens of the reservations this process holds (key -> in-flight value).
+        self._tokens: Dict[str, str] = {}
+
+    @staticmethod
+    def _new_token() -> str:
+        return f"{_IN_PROGRESS}:{uuid.uuid4().hex}"
+
+    async def reserve(self, key: str) -> Tuple[State, Optional[Any]]:
+        name = self._prefix + key
+        token = self._new_token()
+        # Two rounds: the holder may expire between a failed SET NX and the GET.
+        for _ in range(2):
+            if await self._client.set(name, token, nx=True, ex=self._inflight_ttl_seconds):
+                self._tokens[key] = token
+                return "ok", None
+            raw = await self._client.get(name)
+            if raw is None:
                 continue
+            if not raw.startswith(_IN_PROGRESS):
+                return "done", _decode_response(raw)
+            return "in_progress", None
+        return "in_progress", None
 
-            # in_progress: remove if it looks stuck for too long
-            inflight_age = now - entry.created_at
-            if inflight_age > self._inflight_ttl_seconds:
-                to_delete.append(key)
+    async def refresh(self, key: str) -> bool:
+        """
+        Extend our reservation (False if the key is done or another worker now holds it).
+
+        Without a token of ours (e.g. a durable job picked up after a restart) the job's
+        reservation is taken over, since the job is what it was protecting.
+        """
+        token = self._tokens.get(key)
+        adopt = token is None
+        if token is None:
+            token = self._new_token()
+        refreshed = await self._client.eval(
+            _REFRESH_SCRIPT,
+            1,
+            self._prefix + key,
+            token,
+            self._inflight_ttl_seconds,
+            _IN_PROGRESS,
+            "1" if adopt else "0",
+        )
+        if not int(refreshed):
+            self._tokens.pop(key, None)
+            return False
+        self._tokens[key] = token
+        return True
+
+    async def mark_done(self, key: str, response: Any) -> None:
+        self._tokens.pop(key, None)
+        await self._client.set(self._prefix + key, _encode_response(response), ex=self._ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        token = self._tokens.pop(key, None)
+        if token is not None:
+            await self._client.eval(_RELEASE_SCRIPT, 1, self._prefix + key, token)
 
-        for key in to_delete:
-            self._entries.pop(key, None)
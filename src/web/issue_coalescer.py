@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Literal, Optional, Tuple
+
+from web.job_queue import DurableJobQueue
+from web.job_store import MergeFn
+
+
+logger = logging.getLogger(__name__)
+
+CoalesceKey = Tuple[str, str]
+# submit(lane, job, job_id) -> accepted; called once per coalesced burst.
+SubmitFn = Callable[[str, Dict[str, Any], str], Awaitable[bool]]
+StartStatus = Literal["scheduled", "coalesced", "full"]
+
+
+def fold_job(current: Dict[str, Any], job_id: str, merge: MergeFn) -> Dict[str, Any]:
+    """
+    ``merge(current)`` as the burst's job; ``coalesced_deliveries`` keeps every delivery id
+    of the burst except the job's own ``delivery_id``.
+    """
+    delivery_ids = [current["delivery_id"], *current.get("coalesced_deliveries", []), job_id]
+    job = dict(merge(current))
+    job["coalesced_deliveries"] = [
+        delivery_id for delivery_id in dict.fromkeys(delivery_ids) if delivery_id != job["delivery_id"]
+    ]
+    return job
+
+
+@dataclass
+class _PendingBurst:
+    lane: str
+    job: Dict[str, Any]
+    first_at: float
+    last_at: float
+
+
+class InMemoryIssueCoalescer:
+    """
+    Best-effort per-issue debounce in front of the in-memory job queue.
+
+    Notes:
+    - Works only within a single Python process; bursts still waiting for their window are
+      lost on restart, like the jobs of InMemoryJobQueue itself (use DurableIssueCoalescer
+      with the durable queue).
+    - ``start`` opens a burst for a key (lane, issue node id); ``fold`` merges later events
+      into it. The burst runs once ``window_seconds`` after its last event (never later than
+      ``max_wait_seconds`` after the first one).
+    - A burst the queue rejects (lane full) stays pending and is retried one window later.
+    """
+
+    def __init__(
+        self,
+        submit: SubmitFn,
+        *,
+        window_seconds: float = 2.0,
+        max_wait_seconds: float = 10.0,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be > 0")
+        self._submit = submit
+        self._window_seconds = float(window_seconds)
+        self._max_wait_seconds = max(float(max_wait_seconds), self._window_seconds)
+        self._now = now_fn or time.monotonic
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[CoalesceKey, _PendingBurst] = {}
+        self._tasks: Dict[CoalesceKey, asyncio.Task] = {}
+        self.scheduled = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.rejected = 0
+
+    async def fold(self, key: CoalesceKey, job_id: str, merge: MergeFn) -> bool:
+        """Fold delivery ``job_id`` into the pending burst of ``key``; False when there is none."""
+        self._ensure_loop()
+        pending = self._pending.get(key)
+        if pending is None:
+            return False
+        pending.job = fold_job(pending.job, job_id, merge)
+        pending.last_at = self._now()
+        self.coalesced += 1
+        return True
+
+    async def start(self, key: CoalesceKey, job: Dict[str, Any], *, job_id: str) -> StartStatus:
+        """Open a burst for ``key`` with ``job`` (folded into the pending one, if any)."""
+        if await self.fold(key, job_id, lambda _current: job):
+            return "coalesced"
+        now = self._now()
+        self._pending[key] = _PendingBurst(lane=key[0], job={**job, "coalesced_deliveries": []}, first_at=now, last_at=now)
+        self._tasks[key] = asyncio.get_running_loop().create_task(
+            self._flush_when_quiet(key), name=f"issue-coalescer-{key[0]}-{key[1]}"
+        )
+        self.scheduled += 1
+        return "scheduled"
+
+    async def flush_all(self) -> None:
+        """Submit every pending burst now (tests / graceful shutdown)."""
+        for key in list(self._pending):
+            task = self._tasks.pop(key, None)
+            if task is not None:
+                task.cancel()
+            await self._flush(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self._window_seconds,
+            "max_wait_seconds": self._max_wait_seconds,
+            "pending": len(self._pending) if self._loop_is_current() else 0,
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "rejected": self.rejected,
+        }
+
+    def _loop_is_current(self) -> bool:
+        try:
+            return self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def _ensure_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not loop.is_closed():
+            return
+        # New (or closed) event loop: flush tasks bound to the old one can no longer run.
+        self._loop = loop
+        self._pending = {}
+        self._tasks = {}
+
+    async def _flush_when_quiet(self, key: CoalesceKey) -> None:
+        try:
+            while True:
+                pending = self._pending.get(key)
+                if pending is None:
+                    return
+                flush_at = min(pending.last_at + self._window_seconds, pending.first_at + self._max_wait_seconds)
+                delay = flush_at - self._now()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                if await self._flush(key):
+                    return
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    async def _flush(self, key: CoalesceKey) -> bool:
+        """Submit the burst of ``key``; False when it was put back to retry later."""
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return True
+        job = pending.job
+        try:
+            accepted = await self._submit(pending.lane, job, job["delivery_id"])
+        except Exception:
+            logger.exception("Coalesced submit failed lane=%s key=%s job_id=%s", pending.lane, key[1], job["delivery_id"])
+            accepted = False
+        if accepted:
+            self.flushed += 1
+            if job["coalesced_deliveries"]:
+                logger.info(
+                    "Coalesced webhook burst lane=%s key=%s job_id=%s folded=%s",
+                    pending.lane,
+                    key[1],
+                    job["delivery_id"],
+                    job["coalesced_deliveries"],
+                )
+            return True
+
+        self.rejected += 1
+        newer = self._pending.get(key)
+        if newer is not None:
+            # A new burst opened while submitting: it carries the latest payload.
+            for delivery_id in [job["delivery_id"], *job["coalesced_deliveries"]]:
+                newer.job = fold_job(newer.job, delivery_id, lambda current: current)
+            return True
+        logger.warning(
+            "Coalesced burst rejected (queue full) lane=%s key=%s job_id=%s; retrying in %.1fs",
+            pending.lane,
+            key[1],
+            job["delivery_id"],
+            self._window_seconds,
+        )
+        now = self._now()
+        pending.first_at = pending.last_at = now
+        self._pending[key] = pending
+        return False
+
+
+class DurableIssueCoalescer:
+    """
+    Per-issue debounce persisted in the durable job queue (same interface as
+    InMemoryIssueCoalescer).
+
+    Notes:
+    - ``start`` stores the burst as a job hidden for ``window_seconds``; ``fold`` rewrites
+      that stored job in place and pushes its start back (never past ``max_wait_seconds``
+      after the first event). Both return only once the store has the change, so accepted
+      deliveries survive restarts.
+    - The burst holds its lane slot while it waits: a full lane rejects it at ``start``.
+    """
+
+    def __init__(self, queue: DurableJobQueue, *, window_seconds: float = 2.0, max_wait_seconds: float = 10.0):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be > 0")
+        self._queue = queue
+        self._window_seconds = float(window_seconds)
+        self._max_wait_seconds = max(float(max_wait_seconds), self._window_seconds)
+        self.scheduled = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def fold(self, key: CoalesceKey, job_id: str, merge: MergeFn) -> bool:
+        folded = await self._queue.fold(
+            key[0],
+            key[1],
+            lambda current: fold_job(current, job_id, merge),
+            delay_seconds=self._window_seconds,
+            max_delay_seconds=self._max_wait_seconds,
+        )
+        if folded:
+            self.coalesced += 1
+        return folded
+
+    async def start(self, key: CoalesceKey, job: Dict[str, Any], *, job_id: str) -> StartStatus:
+        status = await self._queue.submit_coalesced(
+            key[0],
+            {**job, "coalesced_deliveries": []},
+            job_id=job_id,
+            coalesce_key=key[1],
+            merge=lambda current: fold_job(current, job_id, lambda _current: job),
+            delay_seconds=self._window_seconds,
+            max_delay_seconds=self._max_wait_seconds,
+        )
+        if status == "coalesced":
+            self.coalesced += 1
+            return "coalesced"
+        if status == "full":
+            self.rejected += 1
+            return "full"
+        self.scheduled += 1
+        return "scheduled"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self._window_seconds,
+            "max_wait_seconds": self._max_wait_seconds,
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
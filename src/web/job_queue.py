@@ -0,0 +1,416 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Mapping, Optional, Tuple
+
+from web.job_store import EnqueueStatus, JobStore, MergeFn
+
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+# Runs one job payload (a JSON-serializable dict); raising marks the attempt as failed.
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    workers: int
+    max_depth: int
+
+
+@dataclass
+class _LaneStats:
+    enqueued: int = 0
+    rejected: int = 0
+    completed: int = 0
+    failed: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    running: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    last_wait_ms: float = 0.0
+
+    def record_wait(self, wait_ms: float) -> None:
+        wait_ms = max(0.0, wait_ms)
+        self.last_wait_ms = wait_ms
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def as_dict(self, config: LaneConfig, depth: int) -> Dict[str, Any]:
+        started = self.completed + self.failed
+        return {
+            "workers": config.workers,
+            "max_depth": config.max_depth,
+            "depth": depth,
+            "running": self.running,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": int(self.wait_ms_total / started) if started else 0,
+            "max_wait_ms": int(self.wait_ms_max),
+            "last_wait_ms": int(self.last_wait_ms),
+        }
+
+
+def _validate_lanes(lanes: Mapping[str, LaneConfig]) -> None:
+    if not lanes:
+        raise ValueError("lanes must not be empty")
+    for name, config in lanes.items():
+        if config.workers <= 0:
+            raise ValueError(f"lane {name}: workers must be > 0")
+        if config.max_depth <= 0:
+            raise ValueError(f"lane {name}: max_depth must be > 0")
+
+
+class InMemoryJobQueue:
+    """
+    Best-effort bounded in-process job queue with one worker pool per lane.
+
+    Notes:
+    - Works only within a single Python process; queued jobs are lost on restart.
+    - Each lane runs at most ``workers`` jobs at once and holds at most ``max_depth`` waiting
+      jobs; ``submit`` never waits for room and returns False when the lane is full
+      (backpressure).
+    - Workers start lazily on the running event loop (and restart if the loop changes).
+    - Without ``handler`` jobs are coroutine functions; with it, jobs are payloads passed to
+      ``handler`` (same calling convention as DurableJobQueue).
+    - ``submit`` with a job id that is still queued or running is accepted without enqueuing
+      it again.
+    """
+
+    def __init__(
+        self,
+        lanes: Mapping[str, LaneConfig],
+        *,
+        handler: JobHandler | None = None,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        _validate_lanes(lanes)
+        self._lanes: Dict[str, LaneConfig] = dict(lanes)
+        self._handler = handler
+        self._now = now_fn or time.monotonic
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, "asyncio.Queue[Tuple[str, Any, float]]"] = {}
+        self._workers: List[asyncio.Task] = []
+        self._job_ids: set[str] = set()
+        self._stats: Dict[str, _LaneStats] = {name: _LaneStats() for name in self._lanes}
+
+    def max_depth(self, lane: str) -> int:
+        return self._lanes[lane].max_depth
+
+    async def is_full(self, lane: str) -> bool:
+        queue = self._queues.get(lane) if self._loop_is_current() else None
+        return queue is not None and queue.full()
+
+    def start(self) -> None:
+        """Start the workers on the running event loop (app startup)."""
+        self._ensure_workers()
+
+    async def submit(self, lane: str, job: Any, *, job_id: str = "") -> bool:
+        """Enqueue ``job`` on ``lane``; False (nothing enqueued) when the lane is full."""
+        if lane not in self._lanes:
+            raise ValueError(f"unknown lane: {lane}")
+        self._ensure_workers()
+        if job_id and job_id in self._job_ids:
+            logger.info("Job already queued lane=%s job_id=%s", lane, job_id)
+            return True
+        stats = self._stats[lane]
+        try:
+            self._queues[lane].put_nowait((job_id, job, self._now()))
+        except asyncio.QueueFull:
+            stats.rejected += 1
+            logger.warning("Job queue lane=%s full (max_depth=%s) job_id=%s", lane, self._lanes[lane].max_depth, job_id)
+            return False
+        if job_id:
+            self._job_ids.add(job_id)
+        stats.enqueued += 1
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued job has run (tests / graceful shutdown)."""
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    async def stats(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        current = self._loop_is_current()
+        for name, config in self._lanes.items():
+            queue = self._queues.get(name) if current else None
+            out[name] = self._stats[name].as_dict(config, queue.qsize() if queue is not None else 0)
+        return out
+
+    def _loop_is_current(self) -> bool:
+        try:
+            return self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not loop.is_closed():
+            return
+        # New (or closed) event loop: queues/workers bound to the old one can no longer run.
+        self._loop = loop
+        self._queues = {name: asyncio.Queue(maxsize=config.max_depth) for name, config in self._lanes.items()}
+        self._job_ids = set()
+        for stats in self._stats.values():
+            stats.running = 0
+        self._workers = [
+            loop.create_task(self._worker(name), name=f"job-queue-{name}-{idx}")
+            for name, config in self._lanes.items()
+            for idx in range(config.workers)
+        ]
+
+    async def _worker(self, lane: str) -> None:
+        queue = self._queues[lane]
+        stats = self._stats[lane]
+        while True:
+            job_id, job, enqueued_at = await queue.get()
+            stats.record_wait((self._now() - enqueued_at) * 1000)
+            stats.running += 1
+            try:
+                await (self._handler(job) if self._handler is not None else job())
+                stats.completed += 1
+            except Exception:
+                stats.failed += 1
+                logger.exception("Job failed lane=%s job_id=%s", lane, job_id)
+            finally:
+                stats.running -= 1
+                self._job_ids.discard(job_id)
+                queue.task_done()
+
+
+class DurableJobQueue:
+    """
+    Bounded per-lane job queue persisted in a JobStore (at-least-once delivery).
+
+    Notes:
+    - Jobs are JSON-serializable payloads run by ``handler``; accepted jobs survive restarts
+      and are drained by the workers on startup (``start``).
+    - A claimed job is leased for ``visibility_timeout`` seconds; if the process dies the
+      job becomes visible again and is retried, so ``handler`` must be idempotent and the
+      timeout must exceed the longest expected run.
+    - Failed attempts are retried with exponential backoff; after ``max_attempts`` the job is
+      dead-lettered (kept in the store with its last error).
+    - ``submit`` with a job id already in the store is accepted without enqueuing it again.
+    - ``submit_coalesced``/``fold`` debounce jobs sharing a key inside the store (see
+      JobStore): the burst is persisted before the caller answers, and it keeps its slot
+      in the lane while it waits.
+    - Store calls run in threads (``asyncio.to_thread``) so SQLite never blocks the loop; a
+      failed ack/retry is logged and the lease expiry redelivers the job.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        lanes: Mapping[str, LaneConfig],
+        handler: JobHandler,
+        *,
+        visibility_timeout: float = 600.0,
+        max_attempts: int = 3,
+        backoff_seconds: float = 30.0,
+        max_backoff_seconds: float = 900.0,
+        poll_interval: float = 1.0,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        _validate_lanes(lanes)
+        if visibility_timeout <= 0:
+            raise ValueError("visibility_timeout must be > 0")
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be > 0")
+        self._store = store
+        self._lanes: Dict[str, LaneConfig] = dict(lanes)
+        self._handler = handler
+        self._visibility_timeout = float(visibility_timeout)
+        self._max_attempts = int(max_attempts)
+        self._backoff_seconds = max(0.0, float(backoff_seconds))
+        self._max_backoff_seconds = max(0.0, float(max_backoff_seconds))
+        self._poll_interval = max(0.001, float(poll_interval))
+        # Wall clock: enqueue times and leases are compared across restarts.
+        self._now = now_fn or time.time
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+        self._stats: Dict[str, _LaneStats] = {name: _LaneStats() for name in self._lanes}
+
+    def start(self) -> None:
+        """Start the workers on the running event loop; they drain jobs left by a previous run."""
+        self._ensure_workers()
+
+    def max_depth(self, lane: str) -> int:
+        return self._lanes[lane].max_depth
+
+    async def is_full(self, lane: str) -> bool:
+        return await asyncio.to_thread(self._store.depth, lane) >= self._lanes[lane].max_depth
+
+    async def submit(self, lane: str, job: Dict[str, Any], *, job_id: str) -> bool:
+        """Persist ``job`` on ``lane``; False (nothing enqueued) when the lane is full."""
+        return await self._submit(lane, job, job_id) != "full"
+
+    async def submit_coalesced(
+        self,
+        lane: str,
+        job: Dict[str, Any],
+        *,
+        job_id: str,
+        coalesce_key: str,
+        merge: MergeFn,
+        delay_seconds: float,
+        max_delay_seconds: float,
+    ) -> Literal["enqueued", "coalesced", "full"]:
+        """Fold ``job`` into the waiting job with ``coalesce_key`` or persist it, hidden for ``delay_seconds``."""
+        status = await self._submit(
+            lane,
+            job,
+            job_id,
+            coalesce_key=coalesce_key,
+            merge=merge,
+            delay_seconds=delay_seconds,
+            max_delay_seconds=max_delay_seconds,
+        )
+        return "enqueued" if status == "duplicate" else status
+
+    async def fold(
+        self, lane: str, coalesce_key: str, merge: MergeFn, *, delay_seconds: float, max_delay_seconds: float
+    ) -> bool:
+        """Fold into the waiting job with ``coalesce_key``; False when there is none."""
+        if lane not in self._lanes:
+            raise ValueError(f"unknown lane: {lane}")
+        return await asyncio.to_thread(
+            self._store.fold,
+            lane,
+            coalesce_key,
+            merge,
+            delay_seconds=delay_seconds,
+            max_delay_seconds=max_delay_seconds,
+        )
+
+    async def _submit(self, lane: str, job: Dict[str, Any], job_id: str, **coalesce: Any) -> EnqueueStatus:
+        if lane not in self._lanes:
+            raise ValueError(f"unknown lane: {lane}")
+        if not job_id:
+            raise ValueError("job_id is required")
+        self._ensure_workers()
+        stats = self._stats[lane]
+        status = await asyncio.to_thread(
+            self._store.enqueue, lane, job_id, job, max_depth=self._lanes[lane].max_depth, **coalesce
+        )
+        if status == "full":
+            stats.rejected += 1
+            logger.warning("Job queue lane=%s full (max_depth=%s) job_id=%s", lane, self._lanes[lane].max_depth, job_id)
+        elif status == "duplicate":
+            logger.info("Job already queued lane=%s job_id=%s", lane, job_id)
+        elif status == "enqueued":
+            stats.enqueued += 1
+            self._wakeups[lane].set()
+        return status
+
+    async def join(self) -> None:
+        """Wait until no job of these lanes is pending or running (tests / graceful shutdown)."""
+        while True:
+            counts = await asyncio.to_thread(self._store.counts)
+            busy = sum(
+                counts.get(lane, {}).get(status, 0) for lane in self._lanes for status in ("pending", "running")
+            )
+            if not busy:
+                return
+            await asyncio.sleep(min(self._poll_interval, 0.05))
+
+    async def stats(self) -> Dict[str, Dict[str, Any]]:
+        counts = await asyncio.to_thread(self._store.counts)
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, config in self._lanes.items():
+            stats = self._stats[name]
+            lane_counts = counts.get(name, {})
+            out[name] = {
+                **stats.as_dict(config, lane_counts.get("pending", 0)),
+                "retried": stats.retried,
+                "dead_lettered": stats.dead_lettered,
+                "stored": dict(lane_counts),
+            }
+        return out
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not loop.is_closed():
+            return
+        self._loop = loop
+        self._wakeups = {name: asyncio.Event() for name in self._lanes}
+        for stats in self._stats.values():
+            stats.running = 0
+        self._workers = [
+            loop.create_task(self._worker(name), name=f"durable-job-queue-{name}-{idx}")
+            for name, config in self._lanes.items()
+            for idx in range(config.workers)
+        ]
+
+    async def _worker(self, lane: str) -> None:
+        wakeup = self._wakeups[lane]
+        stats = self._stats[lane]
+        while True:
+            # Cleared before claiming so a submit racing with an empty claim is not missed.
+            wakeup.clear()
+            try:
+                record = await asyncio.to_thread(self._store.claim, lane, self._visibility_timeout)
+            except Exception:
+                logger.exception("Job store claim failed lane=%s", lane)
+                record = None
+            if record is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            stats.record_wait((self._now() - record.enqueued_at) * 1000)
+            stats.running += 1
+            try:
+                await self._handler(record.payload)
+            except Exception as exc:
+                stats.failed += 1
+                await self._after_failure(lane, record.job_id, record.attempts, exc)
+            else:
+                stats.completed += 1
+                await self._settle(lane, record.job_id, self._store.ack, record.job_id)
+            finally:
+                stats.running -= 1
+
+    async def _settle(self, lane: str, job_id: str, fn: Callable[..., None], *args: Any) -> None:
+        # e.g. "database is locked": the worker keeps going; the lease expires and the job is
+        # claimed again (handlers are idempotent).
+        try:
+            await asyncio.to_thread(fn, *args)
+        except Exception:
+            logger.exception("Job store update failed lane=%s job_id=%s", lane, job_id)
+
+    async def _after_failure(self, lane: str, job_id: str, attempts: int, exc: Exception) -> None:
+        stats = self._stats[lane]
+        error = f"{type(exc).__name__}: {exc}"
+        if attempts >= self._max_attempts:
+            stats.dead_lettered += 1
+            logger.error(
+                "Job dead-lettered lane=%s job_id=%s attempts=%s error=%s",
+                lane,
+                job_id,
+                attempts,
+                error,
+                exc_info=exc,
+            )
+            await self._settle(lane, job_id, self._store.dead_letter, job_id, error)
+            return
+        delay = min(self._backoff_seconds * (2 ** (attempts - 1)), self._max_backoff_seconds)
+        stats.retried += 1
+        logger.warning(
+            "Job failed lane=%s job_id=%s attempt=%s/%s; retrying in %.1fs error=%s",
+            lane,
+            job_id,
+            attempts,
+            self._max_attempts,
+            delay,
+            error,
+        )
+        await self._settle(lane, job_id, self._store.retry, job_id, error, self._now() + delay)
@@ -0,0 +1,265 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Literal, Optional
+
+from web.sqlite_utils import connect, immediate_transaction
+
+
+EnqueueStatus = Literal["enqueued", "duplicate", "full", "coalesced"]
+# merge(current payload) -> new payload, for a job still waiting to run.
+MergeFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class JobRecord:
+    job_id: str
+    lane: str
+    payload: Dict[str, Any]
+    attempts: int
+    enqueued_at: float
+
+
+class JobStore(ABC):
+    """
+    Persistence for webhook jobs (at-least-once delivery).
+
+    A job is ``pending`` until a worker claims it; the claim is a lease that expires after
+    the visibility timeout, after which the job can be claimed again (crashed worker).
+    Workers then ``ack`` it (done), ``retry`` it later, or ``dead_letter`` it.
+
+    Jobs stored with a ``coalesce_key`` stay hidden for ``delay_seconds``; until a worker
+    claims one, later jobs with the same key are folded into it (``merge``) and push its
+    start back, never past ``max_delay_seconds`` after it was stored.
+    """
+
+    @abstractmethod
+    def enqueue(
+        self,
+        lane: str,
+        job_id: str,
+        payload: Dict[str, Any],
+        *,
+        max_depth: int,
+        coalesce_key: Optional[str] = None,
+        merge: Optional[MergeFn] = None,
+        delay_seconds: float = 0.0,
+        max_delay_seconds: float = 0.0,
+    ) -> EnqueueStatus:
+        """Store a new pending job (or fold it, see above); known job ids are duplicates."""
+
+    @abstractmethod
+    def fold(
+        self, lane: str, coalesce_key: str, merge: MergeFn, *, delay_seconds: float, max_delay_seconds: float
+    ) -> bool:
+        """Fold into the waiting job with ``coalesce_key``; False when there is none."""
+
+    @abstractmethod
+    def claim(self, lane: str, visibility_timeout: float) -> Optional[JobRecord]:
+        """Lease the oldest visible job of ``lane`` (counts one attempt)."""
+
+    @abstractmethod
+    def ack(self, job_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def retry(self, job_id: str, error: str, visible_at: float) -> None:
+        ...
+
+    @abstractmethod
+    def dead_letter(self, job_id: str, error: str) -> None:
+        ...
+
+    @abstractmethod
+    def depth(self, lane: str) -> int:
+        """Jobs of ``lane`` waiting to run (pending, including scheduled retries)."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """{lane: {status: count}}."""
+
+
+class SQLiteJobStore(JobStore):
+    """
+    JobStore on a local SQLite file in WAL mode (no external service).
+
+    Notes:
+    - Safe across threads and across local processes sharing the file: claims run in
+      IMMEDIATE transactions, so one job is leased to one worker at a time.
+    - Finished jobs (done/dead) are kept ``retention_seconds`` so redeliveries of the same
+      GitHub delivery id stay deduplicated across restarts.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        retention_seconds: float = 7 * 24 * 3600,
+        now_fn: Callable[[], float] | None = None,
+    ):
+        self._retention_seconds = float(retention_seconds)
+        self._now = now_fn or time.time
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_jobs (
+                job_id TEXT PRIMARY KEY,
+                lane TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                visible_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                last_error TEXT,
+                coalesce_key TEXT
+            )
+            """
+        )
+        with self._lock, immediate_transaction(self._conn):
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(webhook_jobs)")}
+            if "coalesce_key" not in columns:
+                # Files created before per-issue coalescing.
+                self._conn.execute("ALTER TABLE webhook_jobs ADD COLUMN coalesce_key TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS webhook_jobs_claim ON webhook_jobs (lane, status, visible_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS webhook_jobs_coalesce ON webhook_jobs (lane, coalesce_key, status)"
+        )
+
+    def enqueue(
+        self,
+        lane: str,
+        job_id: str,
+        payload: Dict[str, Any],
+        *,
+        max_depth: int,
+        coalesce_key: Optional[str] = None,
+        merge: Optional[MergeFn] = None,
+        delay_seconds: float = 0.0,
+        max_delay_seconds: float = 0.0,
+    ) -> EnqueueStatus:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            self._prune_locked(now)
+            if self._conn.execute("SELECT 1 FROM webhook_jobs WHERE job_id = ?", (job_id,)).fetchone():
+                return "duplicate"
+            if coalesce_key is not None and merge is not None:
+                if self._fold_locked(lane, coalesce_key, merge, now, delay_seconds, max_delay_seconds):
+                    return "coalesced"
+            if self._depth_locked(lane) >= max_depth:
+                return "full"
+            self._conn.execute(
+                "INSERT INTO webhook_jobs "
+                "(job_id, lane, payload, status, attempts, enqueued_at, visible_at, updated_at, coalesce_key) "
+                "VALUES (?, ?, ?, 'pending', 0, ?, ?, ?, ?)",
+                (job_id, lane, json.dumps(payload), now, now + max(0.0, delay_seconds), now, coalesce_key),
+            )
+        return "enqueued"
+
+    def fold(
+        self, lane: str, coalesce_key: str, merge: MergeFn, *, delay_seconds: float, max_delay_seconds: float
+    ) -> bool:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            return self._fold_locked(lane, coalesce_key, merge, now, delay_seconds, max_delay_seconds)
+
+    def claim(self, lane: str, visibility_timeout: float) -> Optional[JobRecord]:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            # 'running' rows past their lease belong to a worker that died: claim them again.
+            row = self._conn.execute(
+                "SELECT job_id, lane, payload, attempts, enqueued_at FROM webhook_jobs "
+                "WHERE lane = ? AND status IN ('pending', 'running') AND visible_at <= ? "
+                "ORDER BY visible_at, enqueued_at LIMIT 1",
+                (lane, now),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE webhook_jobs SET status = 'running', attempts = attempts + 1, "
+                    "visible_at = ?, updated_at = ? WHERE job_id = ?",
+                    (now + float(visibility_timeout), now, row[0]),
+                )
+        if row is None:
+            return None
+        job_id, lane_name, payload, attempts, enqueued_at = row
+        return JobRecord(
+            job_id=job_id,
+            lane=lane_name,
+            payload=json.loads(payload),
+            attempts=int(attempts) + 1,
+            enqueued_at=float(enqueued_at),
+        )
+
+    def ack(self, job_id: str) -> None:
+        self._finish(job_id, "done", None, self._now())
+
+    def retry(self, job_id: str, error: str, visible_at: float) -> None:
+        self._finish(job_id, "pending", error, visible_at)
+
+    def dead_letter(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "dead", error, self._now())
+
+    def depth(self, lane: str) -> int:
+        with self._lock:
+            return self._depth_locked(lane)
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT lane, status, COUNT(*) FROM webhook_jobs GROUP BY lane, status"
+            ).fetchall()
+        out: Dict[str, Dict[str, int]] = {}
+        for lane, status, count in rows:
+            out.setdefault(lane, {})[status] = int(count)
+        return out
+
+    def _finish(self, job_id: str, status: str, error: Optional[str], visible_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE webhook_jobs SET status = ?, last_error = ?, visible_at = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, visible_at, self._now(), job_id),
+            )
+
+    def _fold_locked(
+        self,
+        lane: str,
+        coalesce_key: str,
+        merge: MergeFn,
+        now: float,
+        delay_seconds: float,
+        max_delay_seconds: float,
+    ) -> bool:
+        # Only never-claimed jobs: a retry already ran on the payload it carries.
+        row = self._conn.execute(
+            "SELECT job_id, payload, enqueued_at FROM webhook_jobs "
+            "WHERE lane = ? AND coalesce_key = ? AND status = 'pending' AND attempts = 0 "
+            "ORDER BY enqueued_at LIMIT 1",
+            (lane, coalesce_key),
+        ).fetchone()
+        if row is None:
+            return False
+        job_id, payload, enqueued_at = row
+        visible_at = min(now + max(0.0, delay_seconds), float(enqueued_at) + max(delay_seconds, max_delay_seconds))
+        self._conn.execute(
+            "UPDATE webhook_jobs SET payload = ?, visible_at = ?, updated_at = ? WHERE job_id = ?",
+            (json.dumps(merge(json.loads(payload))), visible_at, now, job_id),
+        )
+        return True
+
+    def _depth_locked(self, lane: str) -> int:
+        row = self._conn.execute(
+            "SELECT COUNT(*) FROM webhook_jobs WHERE lane = ? AND status = 'pending'", (lane,)
+        ).fetchone()
+        return int(row[0])
+
+    def _prune_locked(self, now: float) -> None:
+        if self._retention_seconds > 0:
+            self._conn.execute(
+                "DELETE FROM webhook_jobs WHERE status IN ('done', 'dead') AND updated_at < ?",
+                (now - self._retention_seconds,),
+            )
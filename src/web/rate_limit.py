@@ -1,8 +1,12 @@
 import asyncio
+import heapq
+import threading
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Dict
+from typing import Any, Callable, Dict, List, Tuple
+
+from web.sqlite_utils import connect, immediate_transaction
 
 
 @dataclass(frozen=True)
@@ -20,6 +24,43 @@ class _CounterEntry:
     last_seen_epoch: float
 
 
+def _next_midnight_utc_epoch(now_epoch: float) -> float:
+    now_dt = datetime.fromtimestamp(now_epoch, tz=timezone.utc)
+    tomorrow = (now_dt.date() + timedelta(days=1))
+    reset_dt = datetime(
+        year=tomorrow.year,
+        month=tomorrow.month,
+        day=tomorrow.day,
+        tzinfo=timezone.utc,
+    )
+    return reset_dt.timestamp()
+
+
+def _iso_utc(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _effective_limit(key: str, limit: int | None, limit_default: int) -> int:
+    if not key:
+        raise ValueError("key must be non-empty")
+    effective_limit = limit if limit is not None else limit_default
+    if effective_limit <= 0:
+        raise ValueError("limit must be > 0")
+    return effective_limit
+
+
+def _decision(count: int, limit: int, reset_at_epoch: float) -> RateLimitDecision:
+    # ``count`` is the value after this request was counted (or limit+ when denied).
+    if count > limit:
+        return RateLimitDecision(allowed=False, count=limit, remaining=0, reset_at_iso_utc=_iso_utc(reset_at_epoch))
+    return RateLimitDecision(
+        allowed=True,
+        count=count,
+        remaining=max(0, limit - count),
+        reset_at_iso_utc=_iso_utc(reset_at_epoch),
+    )
+
+
 class InMemoryDailyRateLimiter:
     """
     Best-effort in-memory daily rate limiter (UTC day boundaries).
@@ -27,6 +68,8 @@ class InMemoryDailyRateLimiter:
     Notes:
     - Works only within a single Python process (no cross-worker / cross-pod limits).
     - Resets at the next 00:00:00 UTC boundary.
+    - Expiry is driven by a min-heap, so cleanup only touches expired keys (O(log n)
+      amortized per call instead of a scan of every counter).
     """
 
     def __init__(
@@ -48,29 +91,12 @@ class InMemoryDailyRateLimiter:
         self._lock = asyncio.Lock()
         self._counters: Dict[str, _CounterEntry] = {}
         self._notify_expiry: Dict[str, float] = {}
-
-    @staticmethod
-    def _next_midnight_utc_epoch(now_epoch: float) -> float:
-        now_dt = datetime.fromtimestamp(now_epoch, tz=timezone.utc)
-        tomorrow = (now_dt.date() + timedelta(days=1))
-        reset_dt = datetime(
-            year=tomorrow.year,
-            month=tomorrow.month,
-            day=tomorrow.day,
-            tzinfo=timezone.utc,
-        )
-        return reset_dt.timestamp()
-
-    @staticmethod
-    def _iso_utc(epoch_seconds: float) -> str:
-        return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+        # (expires_at, kind, key), lazily invalidated: items for keys that were reset or
+        # re-armed since are skipped on pop.
+        self._expiry_heap: List[Tuple[float, str, str]] = []
 
     async def check_and_increment(self, key: str, limit: int | None = None) -> RateLimitDecision:
-        if not key:
-            raise ValueError("key must be non-empty")
-        effective_limit = limit if limit is not None else self._limit_default
-        if effective_limit <= 0:
-            raise ValueError("limit must be > 0")
+        effective_limit = _effective_limit(key, limit, self._limit_default)
 
         now = self._now()
         async with self._lock:
@@ -78,9 +104,10 @@ class InMemoryDailyRateLimiter:
 
             entry = self._counters.get(key)
             if entry is None or now >= entry.reset_at_epoch:
-                reset_at = self._next_midnight_utc_epoch(now)
+                reset_at = _next_midnight_utc_epoch(now)
                 entry = _CounterEntry(count=0, reset_at_epoch=reset_at, last_seen_epoch=now)
                 self._counters[key] = entry
+                heapq.heappush(self._expiry_heap, (reset_at + self._max_retention_seconds, "counter", key))
 
             entry.last_seen_epoch = now
 
@@ -89,7 +116,7 @@ class InMemoryDailyRateLimiter:
                     allowed=False,
                     count=entry.count,
                     remaining=0,
-                    reset_at_iso_utc=self._iso_utc(entry.reset_at_epoch),
+                    reset_at_iso_utc=_iso_utc(entry.reset_at_epoch),
                 )
 
             entry.count += 1
@@ -98,7 +125,7 @@ class InMemoryDailyRateLimiter:
                 allowed=True,
                 count=entry.count,
                 remaining=remaining,
-                reset_at_iso_utc=self._iso_utc(entry.reset_at_epoch),
+                reset_at_iso_utc=_iso_utc(entry.reset_at_epoch),
             )
 
     async def should_notify_once(self, key: str) -> bool:
@@ -119,22 +146,163 @@ class InMemoryDailyRateLimiter:
                 return False
 
             # Keep the marker long enough to survive retries for the same "day".
-            self._notify_expiry[key] = now + self._max_retention_seconds
+            expiry = now + self._max_retention_seconds
+            self._notify_expiry[key] = expiry
+            heapq.heappush(self._expiry_heap, (expiry, "notify", key))
             return True
 
     def _cleanup_locked(self, now_epoch: float) -> None:
-        # Counters: keep only for a bounded time after reset to avoid leaks.
-        counter_delete = []
-        for key, entry in self._counters.items():
-            if now_epoch > (entry.reset_at_epoch + self._max_retention_seconds):
-                counter_delete.append(key)
-        for key in counter_delete:
-            self._counters.pop(key, None)
-
-        notify_delete = []
-        for key, expiry in self._notify_expiry.items():
-            if now_epoch > expiry:
-                notify_delete.append(key)
-        for key in notify_delete:
-            self._notify_expiry.pop(key, None)
+        # Counters are kept for a bounded time after reset, notify markers until expiry.
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now_epoch:
+            expires_at, kind, key = heapq.heappop(heap)
+            if kind == "counter":
+                entry = self._counters.get(key)
+                if entry is not None and entry.reset_at_epoch + self._max_retention_seconds == expires_at:
+                    self._counters.pop(key, None)
+            elif self._notify_expiry.get(key) == expires_at:
+                self._notify_expiry.pop(key, None)
+
+        live = len(self._counters) + len(self._notify_expiry)
+        if len(heap) > 2 * live + 64:
+            self._expiry_heap = [
+                (entry.reset_at_epoch + self._max_retention_seconds, "counter", key)
+                for key, entry in self._counters.items()
+            ] + [(expiry, "notify", key) for key, expiry in self._notify_expiry.items()]
+            heapq.heapify(self._expiry_heap)
+
+
+class SQLiteDailyRateLimiter:
+    """
+    Daily rate limiter on a shared SQLite file (WAL), for several workers on one host.
+
+    Notes:
+    - Same UTC-day semantics as InMemoryDailyRateLimiter; each check is one IMMEDIATE
+      transaction, so concurrent workers never over-admit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        limit_default: int = 10,
+        now_fn: Callable[[], float] | None = None,
+        max_retention_seconds: int = 48 * 3600,
+    ):
+        if limit_default <= 0:
+            raise ValueError("limit_default must be > 0")
+        if max_retention_seconds <= 0:
+            raise ValueError("max_retention_seconds must be > 0")
+
+        self._limit_default = limit_default
+        self._now = now_fn or time.time
+        self._max_retention_seconds = max_retention_seconds
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS webhook_rate_counters (key TEXT PRIMARY KEY, count INTEGER NOT NULL, reset_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS webhook_rate_notify (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        # Every call sweeps expired rows: index the expiry columns so that stays a range scan.
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS webhook_rate_counters_reset_at ON webhook_rate_counters (reset_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS webhook_rate_notify_expires_at ON webhook_rate_notify (expires_at)"
+        )
+
+    async def check_and_increment(self, key: str, limit: int | None = None) -> RateLimitDecision:
+        effective_limit = _effective_limit(key, limit, self._limit_default)
+        return await asyncio.to_thread(self._check_and_increment, key, effective_limit)
+
+    async def should_notify_once(self, key: str) -> bool:
+        if not key:
+            raise ValueError("key must be non-empty")
+        return await asyncio.to_thread(self._should_notify_once, key)
+
+    def _check_and_increment(self, key: str, limit: int) -> RateLimitDecision:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            self._cleanup_locked(now)
+            row = self._conn.execute(
+                "SELECT count, reset_at FROM webhook_rate_counters WHERE key = ?", (key,)
+            ).fetchone()
+            count, reset_at = row if row is not None else (0, 0.0)
+            if row is None or now >= reset_at:
+                count, reset_at = 0, _next_midnight_utc_epoch(now)
+            if count < limit:
+                count += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO webhook_rate_counters (key, count, reset_at) VALUES (?, ?, ?)",
+                    (key, count, reset_at),
+                )
+                return _decision(count, limit, reset_at)
+        return _decision(limit + 1, limit, reset_at)
+
+    def _should_notify_once(self, key: str) -> bool:
+        now = self._now()
+        with self._lock, immediate_transaction(self._conn):
+            self._cleanup_locked(now)
+            if self._conn.execute("SELECT 1 FROM webhook_rate_notify WHERE key = ?", (key,)).fetchone():
+                return False
+            self._conn.execute(
+                "INSERT INTO webhook_rate_notify (key, expires_at) VALUES (?, ?)",
+                (key, now + self._max_retention_seconds),
+            )
+        return True
+
+    def _cleanup_locked(self, now_epoch: float) -> None:
+        self._conn.execute(
+            "DELETE FROM webhook_rate_counters WHERE reset_at < ?", (now_epoch - self._max_retention_seconds,)
+        )
+        self._conn.execute("DELETE FROM webhook_rate_notify WHERE expires_at < ?", (now_epoch,))
+
+
+class RedisDailyRateLimiter:
+    """
+    Daily rate limiter on Redis, shared by every worker and pod using the same server.
+
+    Notes:
+    - ``client`` is a ``redis.asyncio.Redis`` (or compatible) client; only SET NX with
+      EX/EXAT and INCR are used.
+    - Counters expire at the next 00:00:00 UTC boundary; denied requests still INCR the
+      counter, but reported counts are capped at the limit.
+    """
 
+    def __init__(
+        self,
+        client: Any,
+        *,
+        limit_default: int = 10,
+        now_fn: Callable[[], float] | None = None,
+        max_retention_seconds: int = 48 * 3600,
+        prefix: str = "zenite:webhook:rate:",
+    ):
+        if limit_default <= 0:
+            raise ValueError("limit_default must be > 0")
+        if max_retention_seconds <= 0:
+            raise ValueError("max_retention_seconds must be > 0")
+
+        self._client = client
+        self._limit_default = limit_default
+        self._now = now_fn or time.time
+        self._max_retention_seconds = max_retention_seconds
+        self._prefix = prefix
+
+    async def check_and_increment(self, key: str, limit: int | None = None) -> RateLimitDecision:
+        effective_limit = _effective_limit(key, limit, self._limit_default)
+        reset_at = _next_midnight_utc_epoch(self._now())
+        # The UTC day is part of the Redis key, so a counter never spans two days.
+        name = f"{self._prefix}count:{_iso_utc(reset_at)}:{key}"
+        # Create with its expiry first: INCR keeps the TTL, and no counter is left without one.
+        await self._client.set(name, 0, nx=True, exat=int(reset_at))
+        count = int(await self._client.incr(name))
+        return _decision(count, effective_limit, reset_at)
+
+    async def should_notify_once(self, key: str) -> bool:
+        if not key:
+            raise ValueError("key must be non-empty")
+        created = await self._client.set(f"{self._prefix}notify:{key}", 1, nx=True, ex=self._max_retention_seconds)
+        return bool(created)
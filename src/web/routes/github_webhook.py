@@ -2,8 +2,8 @@ import json
 import logging
 import os
 import time
-import asyncio
 from datetime import datetime, timezone
+from typing import Any, Callable, Dict
 
 from fastapi import APIRouter, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
@@ -14,22 +14,243 @@ from clients.github.github_auth import verify_signature
 from clients.github.utils import extract_label_names
 from domain.webhook_rules import decide_flow
 from domain.webhook_models import WebhookFlow
-from web.idempotency import InMemoryIdempotencyStore
-from web.rate_limit import InMemoryDailyRateLimiter
+from web.idempotency import InMemoryIdempotencyStore, RedisIdempotencyStore, SQLiteIdempotencyStore
+from web.job_queue import DurableJobQueue, InMemoryJobQueue, LaneConfig
+from web.issue_coalescer import DurableIssueCoalescer, InMemoryIssueCoalescer
+from web.job_store import SQLiteJobStore
+from web.rate_limit import InMemoryDailyRateLimiter, RedisDailyRateLimiter, SQLiteDailyRateLimiter
 from web.schemas.github_payloads import GitHubIssuesWebhookPayload
 
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 use_case = HandleGithubWebhookUseCase()
-idempotency = InMemoryIdempotencyStore(
-    ttl_seconds=int(os.getenv("GITHUB_WEBHOOK_DEDUP_TTL_SECONDS", "600")),
-    inflight_ttl_seconds=int(os.getenv("GITHUB_WEBHOOK_INFLIGHT_TTL_SECONDS", "300")),
-)
+
+
+def _build_shared_state():
+    """
+    Idempotency store and rate limiter: Redis (GITHUB_WEBHOOK_REDIS_URL) or a shared SQLite
+    file (GITHUB_WEBHOOK_STATE_PATH) when several uvicorn workers serve the webhook,
+    in-memory otherwise.
+    """
+    ttl_seconds = int(os.getenv("GITHUB_WEBHOOK_DEDUP_TTL_SECONDS", "600"))
+    inflight_ttl_seconds = int(os.getenv("GITHUB_WEBHOOK_INFLIGHT_TTL_SECONDS", "300"))
+    redis_url = os.getenv("GITHUB_WEBHOOK_REDIS_URL", "").strip()
+    state_path = os.getenv("GITHUB_WEBHOOK_STATE_PATH", "").strip()
+    if redis_url:
+        import redis.asyncio as redis_asyncio
+
+        client = redis_asyncio.from_url(redis_url, decode_responses=True)
+        return (
+            RedisIdempotencyStore(client, ttl_seconds=ttl_seconds, inflight_ttl_seconds=inflight_ttl_seconds),
+            RedisDailyRateLimiter(client, limit_default=daily_limit),
+        )
+    if state_path:
+        return (
+            SQLiteIdempotencyStore(state_path, ttl_seconds=ttl_seconds, inflight_ttl_seconds=inflight_ttl_seconds),
+            SQLiteDailyRateLimiter(state_path, limit_default=daily_limit),
+        )
+    return (
+        InMemoryIdempotencyStore(ttl_seconds=ttl_seconds, inflight_ttl_seconds=inflight_ttl_seconds),
+        InMemoryDailyRateLimiter(limit_default=daily_limit),
+    )
+
+
 daily_limit = int(os.getenv("GITHUB_WEBHOOK_DAILY_LIMIT", "10"))
-rate_limiter = InMemoryDailyRateLimiter(
-    limit_default=daily_limit,
-)
+idempotency, rate_limiter = _build_shared_state()
+
+
+async def _run_delivery(job: Dict[str, Any]) -> None:
+    """Job handler: runs one accepted delivery (payload, event and delivery id)."""
+    delivery_id = job["delivery_id"]
+    # Deliveries folded into this one by the coalescer share its outcome.
+    delivery_ids = [delivery_id, *job.get("coalesced_deliveries", [])]
+    # The reservations were taken at enqueue time; queue wait must not eat the in-flight TTL
+    # (GITHUB_WEBHOOK_INFLIGHT_TTL_SECONDS only has to cover the run itself).
+    if not await idempotency.refresh(delivery_id):
+        logger.info("Delivery already processed while queued delivery_id=%s; skipping", delivery_id)
+        return
+    for folded_id in delivery_ids[1:]:
+        await idempotency.refresh(folded_id)
+    try:
+        result = await use_case.handle(
+            payload=GitHubIssuesWebhookPayload(**job["payload"]),
+            event=job["event"],
+            delivery_id=delivery_id,
+        )
+    except Exception:
+        # Let a GitHub redelivery through; the queue logs the failure (and retries, if durable).
+        for folded_id in delivery_ids:
+            await idempotency.release(folded_id)
+        raise
+    response = result.to_dict()
+    for folded_id in delivery_ids:
+        await idempotency.mark_done(folded_id, response)
+
+
+def _build_job_queue() -> InMemoryJobQueue | DurableJobQueue:
+    # Heavy webhook work runs on bounded per-flow lanes instead of one task per delivery.
+    lanes = {
+        "estimation": LaneConfig(
+            workers=int(os.getenv("GITHUB_WEBHOOK_ESTIMATION_WORKERS", "2")),
+            max_depth=queue_max_depth,
+        ),
+        "planning": LaneConfig(
+            workers=int(os.getenv("GITHUB_WEBHOOK_PLANNING_WORKERS", "1")),
+            max_depth=queue_max_depth,
+        ),
+        "indexing": LaneConfig(
+            workers=int(os.getenv("GITHUB_WEBHOOK_INDEXING_WORKERS", "2")),
+            max_depth=queue_max_depth,
+        ),
+    }
+    # With a path, accepted deliveries are persisted (SQLite WAL) and survive restarts.
+    path = os.getenv("GITHUB_WEBHOOK_QUEUE_PATH", "").strip()
+    if not path:
+        return InMemoryJobQueue(lanes, handler=_run_delivery)
+    return DurableJobQueue(
+        SQLiteJobStore(path),
+        lanes,
+        _run_delivery,
+        visibility_timeout=float(os.getenv("GITHUB_WEBHOOK_JOB_VISIBILITY_TIMEOUT_SECONDS", "900")),
+        max_attempts=int(os.getenv("GITHUB_WEBHOOK_JOB_MAX_ATTEMPTS", "3")),
+        backoff_seconds=float(os.getenv("GITHUB_WEBHOOK_JOB_RETRY_BACKOFF_SECONDS", "30")),
+    )
+
+
+queue_max_depth = int(os.getenv("GITHUB_WEBHOOK_QUEUE_MAX_DEPTH", "20"))
+job_queue = _build_job_queue()
+
+
+async def _submit_coalesced(lane: str, job: Dict[str, Any], job_id: str) -> bool:
+    # A rejected burst stays pending in the coalescer and is retried; nothing is dropped.
+    return await job_queue.submit(lane, job, job_id=job_id)
+
+
+def _build_coalescer() -> InMemoryIssueCoalescer | DurableIssueCoalescer | None:
+    window_seconds = float(os.getenv("GITHUB_WEBHOOK_COALESCE_WINDOW_SECONDS", "2"))
+    if window_seconds <= 0:
+        return None
+    max_wait_seconds = float(os.getenv("GITHUB_WEBHOOK_COALESCE_MAX_WAIT_SECONDS", "10"))
+    # Durable queue: bursts are stored (delayed) before the 202, like any other accepted job.
+    if isinstance(job_queue, DurableJobQueue):
+        return DurableIssueCoalescer(job_queue, window_seconds=window_seconds, max_wait_seconds=max_wait_seconds)
+    return InMemoryIssueCoalescer(_submit_coalesced, window_seconds=window_seconds, max_wait_seconds=max_wait_seconds)
+
+
+# Bursts of events for one issue run once, on the latest payload (window 0 disables).
+COALESCED_LANES = ("estimation", "planning")
+coalescer = _build_coalescer()
+
+
+def _lane_for(event: str, action: str, flow: WebhookFlow) -> str | None:
+    if flow == WebhookFlow.ESTIMATION:
+        return "estimation"
+    if flow == WebhookFlow.PLANNING:
+        return "planning"
+    if event == "issues" and action == "closed":
+        return "indexing"
+    return None
+
+
+async def _queue_full_response(event: str, action: str, flow: str, lane: str, delivery_id: str) -> JSONResponse:
+    # Nothing was stored: drop the reservation and answer 429 so GitHub shows the delivery as
+    # failed and it can be redelivered (a 2xx is never redelivered).
+    await idempotency.release(delivery_id)
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": "60"},
+        content={
+            "status": "error",
+            "event": event,
+            "action": action,
+            "flow": flow,
+            "details": {
+                "reason": "queue_full",
+                "lane": lane,
+                "max_depth": job_queue.max_depth(lane),
+                "delivery_id": delivery_id,
+            },
+        },
+    )
+
+
+def _coalesce_key(lane: str | None, payload: GitHubIssuesWebhookPayload) -> tuple[str, str] | None:
+    if coalescer is None or lane not in COALESCED_LANES or payload.issue is None or not payload.issue.node_id:
+        return None
+    return lane, payload.issue.node_id
+
+
+def _job(payload_dict: Dict[str, Any], event: str, delivery_id: str) -> Dict[str, Any]:
+    return {"event": event, "delivery_id": delivery_id, "payload": payload_dict}
+
+
+def _replace_job(job: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    # A later triggering event (e.g. another label) supersedes the pending one.
+    return lambda current: dict(job)
+
+
+def _with_issue(issue: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    # A non-triggering event (opened, edited, ...) only refreshes the issue the burst will read.
+    return lambda current: {**current, "payload": {**current["payload"], "issue": issue}}
+
+
+async def _fold_issue_update(payload_dict: Dict[str, Any], delivery_id: str) -> str | None:
+    """Fold an issue event with no flow of its own into a pending burst; returns its lane."""
+    issue = payload_dict.get("issue") or {}
+    node_id = issue.get("node_id")
+    if coalescer is None or not node_id:
+        return None
+    for lane in COALESCED_LANES:
+        if await coalescer.fold((lane, node_id), delivery_id, _with_issue(issue)):
+            return lane
+    return None
+
+
+async def _enqueue(lane: str, payload_dict: Dict[str, Any], event: str, delivery_id: str) -> bool:
+    return await job_queue.submit(lane, _job(payload_dict, event, delivery_id), job_id=delivery_id)
+
+
+def _coalesced_response(event: str, action: str, flow: str, lane: str, delivery_id: str, issue_node_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted",
+            "event": event,
+            "action": action,
+            "flow": flow,
+            "details": {
+                "reason": "coalesced",
+                "lane": lane,
+                "delivery_id": delivery_id,
+                "issue_node_id": issue_node_id,
+            },
+        },
+    )
+
+
+def _accepted_response(event: str, action: str, flow: str, lane: str, delivery_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted",
+            "event": event,
+            "action": action,
+            "flow": flow,
+            "details": {"reason": "async_processing", "lane": lane, "delivery_id": delivery_id},
+        },
+    )
+
+
+def start_webhook_workers() -> None:
+    """Start the job queue workers (app startup); durable queues drain jobs left by a restart."""
+    job_queue.start()
+
+
+@router.get("/webhook/github/queue")
+async def webhook_queue_stats():
+    """Depth, running jobs and queue wait time per lane, plus per-issue coalescing counters."""
+    return {"lanes": await job_queue.stats(), "coalescer": coalescer.stats() if coalescer is not None else None}
 
 
 @router.post("/webhook/github")
@@ -92,6 +313,29 @@ async def handle_github_issues(
 
         # Decide flow early: if no applicable flow, delegate to use_case (returns IGNORED dict)
         flow = decide_flow(x_github_event, payload.action, labels)
+        lane = _lane_for(x_github_event, payload.action, flow)
+        coalesce_key = _coalesce_key(lane, payload)
+        # Events folded into a pending burst take no queue slot and no rate-limit charge:
+        # the burst was charged once, when it started.
+        if lane is None and x_github_event == "issues":
+            folded_lane = await _fold_issue_update(payload_dict, x_github_delivery)
+            if folded_lane is not None:
+                return _coalesced_response(
+                    x_github_event, payload.action, flow.value, folded_lane, x_github_delivery, payload.issue.node_id
+                )
+        if coalesce_key is not None:
+            job = _job(payload_dict, x_github_event, x_github_delivery)
+            if await coalescer.fold(coalesce_key, x_github_delivery, _replace_job(job)):
+                return _coalesced_response(
+                    x_github_event, payload.action, flow.value, lane, x_github_delivery, coalesce_key[1]
+                )
+        if lane is not None and await job_queue.is_full(lane):
+            return await _queue_full_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
+        if flow == WebhookFlow.NONE and lane == "indexing" and payload.issue is not None:
+            # Closed issues: embedding + upsert also run off the request, on their own lane.
+            if not await _enqueue(lane, payload_dict, x_github_event, x_github_delivery):
+                return await _queue_full_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
+            return _accepted_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
         if flow == WebhookFlow.NONE:
             result = await use_case.handle(
                 payload=payload,
@@ -159,36 +403,21 @@ async def handle_github_issues(
         return response
 
     try:
-        async def _process_in_background() -> None:
-            try:
-                result = await use_case.handle(
-                    payload=payload,
-                    event=x_github_event,
-                    delivery_id=x_github_delivery,
-                )
-                await idempotency.mark_done(x_github_delivery, result.to_dict())
-            except Exception:
-                await idempotency.release(x_github_delivery)
-                logger.exception(
-                    "Background webhook processing failed delivery_id=%s event=%s",
-                    x_github_delivery,
-                    x_github_event,
-                )
-
         # GitHub may treat long-running webhook handlers as failed deliveries.
-        # Always acknowledge quickly and process the heavy work asynchronously.
-        asyncio.create_task(_process_in_background())
-
-        return JSONResponse(
-            status_code=202,
-            content={
-                "status": "accepted",
-                "event": x_github_event,
-                "action": payload.action,
-                "flow": flow.value,
-                "details": {"reason": "async_processing", "delivery_id": x_github_delivery},
-            },
-        )
+        # Always acknowledge quickly and process the heavy work on the bounded job queue.
+        if coalesce_key is not None:
+            # Returns once the burst is stored (durable queue) or scheduled (in-memory queue).
+            outcome = await coalescer.start(coalesce_key, job, job_id=x_github_delivery)
+            if outcome == "full":
+                return await _queue_full_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
+            if outcome == "coalesced":
+                return _coalesced_response(
+                    x_github_event, payload.action, flow.value, lane, x_github_delivery, coalesce_key[1]
+                )
+            return _accepted_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
+        if not await _enqueue(lane, payload_dict, x_github_event, x_github_delivery):
+            return await _queue_full_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
+        return _accepted_response(x_github_event, payload.action, flow.value, lane, x_github_delivery)
     except Exception as e:
         await idempotency.release(x_github_delivery)
         logger.exception(
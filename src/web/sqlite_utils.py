@@ -0,0 +1,34 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Autocommit connection in WAL mode, shareable across threads and local processes.
+
+    Callers serialize use of the connection within a process and wrap read-modify-write
+    sequences in ``immediate_transaction`` so they stay atomic across processes.
+    """
+    if not path:
+        raise ValueError("path must be non-empty")
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    # IMMEDIATE takes the write lock up front: concurrent writers wait (busy_timeout) instead
+    # of failing on lock upgrade.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
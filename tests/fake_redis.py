@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from web.idempotency import _REFRESH_SCRIPT, _RELEASE_SCRIPT
+
+
+class FakeRedis:
+    """
+    Local stand-in for ``redis.asyncio.Redis(decode_responses=True)``.
+
+    Implements the subset used by the webhook stores (GET, SET NX/EX/EXAT, INCR, DEL, and
+    EVAL of the stores' own Lua scripts, emulated in Python) with key expiry driven by
+    ``now_fn``; commands are atomic like on a real server.
+    """
+
+    def __init__(self, now_fn: Callable[[], float] | None = None):
+        self._now = now_fn or time.time
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def _live(self, name: str) -> Optional[Tuple[str, Optional[float]]]:
+        entry = self._data.get(name)
+        if entry is not None and entry[1] is not None and self._now() >= entry[1]:
+            del self._data[name]
+            return None
+        return entry
+
+    async def get(self, name: str) -> Optional[str]:
+        await asyncio.sleep(0)
+        entry = self._live(name)
+        return entry[0] if entry is not None else None
+
+    async def set(self, name: str, value: Any, *, nx: bool = False, ex: int | None = None, exat: int | None = None):
+        await asyncio.sleep(0)
+        if nx and self._live(name) is not None:
+            return None
+        expires_at = self._now() + ex if ex is not None else (float(exat) if exat is not None else None)
+        self._data[name] = (str(value), expires_at)
+        return True
+
+    async def incr(self, name: str) -> int:
+        await asyncio.sleep(0)
+        entry = self._live(name)
+        value = int(entry[0]) + 1 if entry is not None else 1
+        self._data[name] = (str(value), entry[1] if entry is not None else None)
+        return value
+
+    async def delete(self, *names: str) -> int:
+        await asyncio.sleep(0)
+        return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> int:
+        await asyncio.sleep(0)
+        (name,), args = keys_and_args[:numkeys], [str(arg) for arg in keys_and_args[numkeys:]]
+        entry = self._live(name)
+        value = entry[0] if entry is not None else None
+        if script == _RELEASE_SCRIPT:
+            if value == args[0]:
+                del self._data[name]
+                return 1
+            return 0
+        if script == _REFRESH_SCRIPT:
+            token, ttl, prefix, adopt = args
+            if value is None or value == token or (adopt == "1" and value.startswith(prefix)):
+                self._data[name] = (token, self._now() + int(ttl))
+                return 1
+            return 0
+        raise NotImplementedError("script not emulated by FakeRedis")
@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.embedding_cache import EmbeddingCache
+from ai.core.pinecone_vector_store import PineconeVectorStoreClient
+
+
+class _Usage:
+    total_tokens = 7
+
+
+class _EmbItem:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+
+class _EmbResp:
+    def __init__(self, embeddings):
+        self.data = [_EmbItem(e) for e in embeddings]
+        self.usage = _Usage()
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_lru_evicts_least_recently_used(self):
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("m", "a", [1.0])
+        cache.put("m", "b", [2.0])
+        self.assertEqual(cache.get("m", "a"), [1.0])
+        cache.put("m", "c", [3.0])
+
+        self.assertIsNone(cache.get("m", "b"))
+        self.assertEqual(cache.get("m", "a"), [1.0])
+        self.assertEqual(cache.get("m", "c"), [3.0])
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_key_includes_model(self):
+        cache = EmbeddingCache(max_entries=4)
+        cache.put("model-a", "text", [1.0])
+        self.assertIsNone(cache.get("model-b", "text"))
+
+    def test_disk_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emb.sqlite")
+            EmbeddingCache(max_entries=4, path=path).put("m", "text", [0.5, -0.25])
+
+            reopened = EmbeddingCache(max_entries=4, path=path)
+            self.assertEqual(reopened.get("m", "text"), [0.5, -0.25])
+            self.assertEqual(reopened.stats()["disk_hits"], 1)
+
+    def test_client_cache_hit_reports_zero_tokens(self):
+        client = PineconeVectorStoreClient.__new__(PineconeVectorStoreClient)
+        client._ready = True
+        client._embedding_cache = EmbeddingCache(max_entries=4)
+        client._openai = Mock()
+        client._openai.embeddings.create = Mock(return_value=_EmbResp([[0.1, 0.2]]))
+
+        first = client._embed_query("same issue")
+        self.assertEqual(client.last_embedding_tokens, 7)
+        self.assertFalse(client.last_embedding_cache_hit)
+
+        second = client._embed_query("same issue")
+        self.assertEqual(second, first)
+        self.assertEqual(client.last_embedding_tokens, 0)
+        self.assertTrue(client.last_embedding_cache_hit)
+        client._openai.embeddings.create.assert_called_once()
+        self.assertEqual(client.embedding_cache_stats()["hits"], 1)
+        self.assertEqual(client.embedding_cache_stats()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,390 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from ai.core import llm_dispatcher
+from ai.core.llm_dispatcher import LLMDispatcher
+from ai.workflows import estimation_graph as eg
+from application.services import estimation_service as es
+from config.settings import settings
+from ai.dtos.issues_estimation_dto import IssueEstimationDTO
+
+
+class _FakeRetrieverInsufficient:
+    def __init__(self, _vs):
+        pass
+
+    def get_similar_issues(self, _issue):
+        return [{"id": "1", "score": 0.5, "total_effort_hours": 5, "title": "A", "issue_type": "bug"}]
+
+
+class _NoTechVectorStore:
+    pass
+
+
+def _dto(issue_number: int = 1) -> IssueEstimationDTO:
+    return IssueEstimationDTO(
+        issue_number=issue_number,
+        repository="x/y",
+        title="A",
+        description="B",
+        labels=[],
+        assignees=[],
+        state="open",
+        is_open=False,
+        comments_count=0,
+        age_in_days=0,
+        author_login="bot",
+        author_role="NONE",
+        repo_language=None,
+        repo_size=None,
+        issue_type="bug",
+    )
+
+
+class _ConcurrencyProbe:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def call(self, payload):
+        self.active += 1
+        self.calls += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.005)
+            return dict(payload)
+        finally:
+            self.active -= 1
+
+
+def _usage(total: int):
+    return {"prompt_tokens": total, "completion_tokens": 0, "total_tokens": total}
+
+
+class _ScriptedSession:
+    """Runs submitted calls inline, except the modes in ``queued`` which stay pending."""
+
+    def __init__(self, queued=()):
+        self.queued = set(queued)
+        self.submitted = []
+
+    def submit(self, fn, mode_name, lane="default"):
+        self.submitted.append(mode_name)
+        future = Future()
+        if mode_name not in self.queued:
+            future.set_result(fn(mode_name))
+        return future
+
+
+def _ranged(mode_name, range_index):
+    return {"mode": mode_name, "range_index": range_index, "confidence": 0.8}
+
+
+class TestAdaptiveHeuristicEnsemble(unittest.TestCase):
+    def test_stops_after_first_wave_when_modes_agree(self):
+        session = _ScriptedSession()
+        candidates, cancelled = eg._run_adaptive_ensemble(
+            session, list(eg.HEURISTIC_MODES), lambda mode: _ranged(mode, 3)
+        )
+        self.assertEqual(session.submitted, ["scope", "complexity"])
+        self.assertEqual([c["mode"] for c in candidates], ["scope", "complexity"])
+        self.assertEqual(cancelled, [])
+
+    def test_cancels_queued_modes_once_consensus_is_reached(self):
+        session = _ScriptedSession(queued={"agile_fit"})
+        ranges = {"scope": 2, "complexity": 5, "uncertainty": 2}
+        candidates, cancelled = eg._run_adaptive_ensemble(
+            session, list(eg.HEURISTIC_MODES), lambda mode: _ranged(mode, ranges[mode])
+        )
+        self.assertEqual(session.submitted, list(eg.HEURISTIC_MODES))
+        self.assertEqual([c["mode"] for c in candidates], ["scope", "complexity", "uncertainty"])
+        self.assertEqual(cancelled, ["agile_fit"])
+
+    def test_runs_every_mode_without_agreement(self):
+        ranges = {"scope": 1, "complexity": 5, "uncertainty": 9, "agile_fit": 13}
+        candidates, cancelled = eg._run_adaptive_ensemble(
+            _ScriptedSession(), list(eg.HEURISTIC_MODES), lambda mode: _ranged(mode, ranges[mode])
+        )
+        self.assertEqual(len(candidates), 4)
+        self.assertEqual(cancelled, [])
+
+
+class TestEstimationDeadlines(unittest.TestCase):
+    def setUp(self):
+        # No real client: building ChatGoogleGenerativeAI needs credentials.
+        self.llm_patch = patch.object(eg, "get_llm_client")
+        self.get_llm_client = self.llm_patch.start()
+
+    def tearDown(self):
+        self.llm_patch.stop()
+
+    def test_heuristic_mode_past_deadline_gets_fallback(self):
+        def slow_heuristic(**kwargs):
+            if kwargs["mode"] == "uncertainty":
+                time.sleep(0.3)
+            return {"size_bucket": "S", "bucket_rank": 2, "confidence": 0.6}
+
+        with patch.object(eg, "run_heuristic", slow_heuristic):
+            candidates, metrics = eg._run_heuristic_ensemble(
+                {"title": "A"}, deadline=time.monotonic() + 0.1
+            )
+
+        self.assertEqual(metrics["deadline_misses"], ["uncertainty"])
+        failed = candidates[list(eg.HEURISTIC_MODES).index("uncertainty")]
+        self.assertEqual(failed["confidence"], 0.25)
+        self.assertIn("Deadline exceeded", failed["warnings"][0])
+
+    def test_critic_is_skipped_once_the_deadline_passed(self):
+        with patch.object(eg, "run_estimation_critic") as critic_mock:
+            out = eg.critic_node(
+                {"issue": {"title": "A"}, "deadline_at": time.monotonic() - 1, "execution_metrics": {"deadline_misses": []}}
+            )
+
+        critic_mock.assert_not_called()
+        self.get_llm_client.assert_not_called()
+        self.assertNotIn("critic_review", out)
+        self.assertTrue(out["execution_metrics"]["critic_skipped"])
+        self.assertEqual(out["execution_metrics"]["deadline_misses"], ["critic"])
+
+    def test_async_critic_is_skipped_without_building_a_client(self):
+        with patch.object(eg, "arun_estimation_critic") as critic_mock:
+            out = asyncio.run(
+                eg.acritic_node(
+                    {"issue": {"title": "A"}, "deadline_at": time.monotonic() - 1, "execution_metrics": {"deadline_misses": []}}
+                )
+            )
+
+        critic_mock.assert_not_called()
+        self.get_llm_client.assert_not_called()
+        self.assertTrue(out["execution_metrics"]["critic_skipped"])
+
+
+class TestEstimationGraphAsync(unittest.TestCase):
+    def setUp(self):
+        self.original_vs = eg.vector_store
+        self.prev_limit = settings.ESTIMATION_ASYNC_MAX_CONCURRENCY
+        eg.vector_store = _NoTechVectorStore()
+        self.probe = _ConcurrencyProbe()
+        probe = self.probe
+
+        async def fake_analogical(**_kwargs):
+            return await probe.call(
+                {"estimated_hours": 11.0, "confidence": 0.3, "retrieval_route": "analogical_weak", "token_usage": _usage(3)}
+            )
+
+        async def fake_heuristic(**kwargs):
+            return await probe.call(
+                {"size_bucket": "M", "bucket_rank": 3, "confidence": 0.6, "mode": kwargs["mode"], "token_usage": _usage(2)}
+            )
+
+        async def fake_complexity(**_kwargs):
+            return await probe.call(
+                {
+                    "bucket_delta": 0,
+                    "confidence": 0.7,
+                    "token_usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_calls": 1, "cached_tokens": 9},
+                }
+            )
+
+        async def fake_agile(**_kwargs):
+            return await probe.call({"fit_status": "healthy", "bucket_delta": 0, "confidence": 0.7, "token_usage": _usage(1)})
+
+        async def fake_critic(**_kwargs):
+            return await probe.call(
+                {"risk_of_underestimation": 0.3, "risk_of_overestimation": 0.3, "token_usage": _usage(4)}
+            )
+
+        self.patches = [
+            patch.object(eg, "Retriever", _FakeRetrieverInsufficient),
+            patch.object(eg, "arun_analogical", fake_analogical),
+            patch.object(eg, "arun_heuristic", fake_heuristic),
+            patch.object(eg, "arun_complexity_review", fake_complexity),
+            patch.object(eg, "arun_agile_guard", fake_agile),
+            patch.object(eg, "arun_estimation_critic", fake_critic),
+            patch.object(eg, "get_llm_client"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        eg.vector_store = self.original_vs
+        settings.ESTIMATION_ASYNC_MAX_CONCURRENCY = self.prev_limit
+
+    def test_arun_estimation_flow_produces_final_estimation_and_usage(self):
+        state = asyncio.run(eg.arun_estimation_flow(_dto()))
+
+        self.assertIn("final_estimation", state)
+        self.assertEqual(len(state["heuristic_candidates"]), 4)
+        self.assertEqual(
+            [c["mode"] for c in state["heuristic_candidates"]],
+            list(eg.HEURISTIC_MODES),
+        )
+        usage = state["token_usage_summary"]
+        self.assertEqual(usage["predicted_llm_total_tokens"], 3 + 4 * 2 + 0 + 1 + 4)
+        self.assertEqual(usage["llm_cache_hits"], 1)
+        self.assertEqual(usage["llm_cache_saved_tokens"], 9)
+        self.assertIn("critic_latency_ms", state["execution_metrics"])
+        self.assertIn("workflow_latency_ms", state["execution_metrics"])
+        self.assertIn("llm_dispatcher", state["execution_metrics"])
+        self.assertIn("llm_dispatcher", state["final_estimation"]["execution_trace"])
+
+    def test_dispatcher_budget_bounds_llm_calls_across_concurrent_estimations(self):
+        async def burst():
+            return await asyncio.gather(*(eg.arun_estimation_flow(_dto(n)) for n in range(3)))
+
+        with patch.object(llm_dispatcher, "_default_dispatcher", LLMDispatcher(2)):
+            states = asyncio.run(burst())
+
+        self.assertEqual(len(states), 3)
+        self.assertEqual(self.probe.calls, 3 * 8)
+        self.assertLessEqual(self.probe.peak, 2)
+        self.assertEqual(self.probe.peak, 2)
+
+    def test_failed_heuristic_mode_falls_back(self):
+        async def broken_heuristic(**kwargs):
+            if kwargs["mode"] == "uncertainty":
+                raise RuntimeError("boom")
+            return {"size_bucket": "S", "bucket_rank": 2, "confidence": 0.6}
+
+        with patch.object(eg, "arun_heuristic", broken_heuristic):
+            candidates, metrics = asyncio.run(eg._arun_heuristic_ensemble({"title": "A"}))
+
+        self.assertEqual(metrics["candidate_count"], 4)
+        failed = candidates[list(eg.HEURISTIC_MODES).index("uncertainty")]
+        self.assertEqual(failed["mode"], "uncertainty")
+        self.assertIn("boom", failed["warnings"])
+
+    def test_single_call_strategy_uses_one_llm_call_for_all_modes(self):
+        prev = settings.HEURISTIC_ENSEMBLE_STRATEGY
+        calls = []
+
+        def _candidates(modes):
+            return [{"size_bucket": "S", "bucket_rank": 2, "confidence": 0.6, "mode": mode} for mode in modes]
+
+        def fake_multi_mode(**kwargs):
+            calls.append("sync")
+            return _candidates(kwargs["modes"])
+
+        async def afake_multi_mode(**kwargs):
+            calls.append("async")
+            return _candidates(kwargs["modes"])
+
+        try:
+            settings.HEURISTIC_ENSEMBLE_STRATEGY = "single_call"
+            with patch.object(eg, "run_heuristic_multi_mode", fake_multi_mode), patch.object(
+                eg, "arun_heuristic_multi_mode", afake_multi_mode
+            ):
+                sync_candidates, sync_metrics = eg._run_heuristic_ensemble({"title": "A"})
+                async_candidates, async_metrics = asyncio.run(eg._arun_heuristic_ensemble({"title": "A"}))
+        finally:
+            settings.HEURISTIC_ENSEMBLE_STRATEGY = prev
+
+        self.assertEqual(calls, ["sync", "async"])
+        self.assertEqual(self.probe.calls, 0)
+        for candidates, metrics in ((sync_candidates, sync_metrics), (async_candidates, async_metrics)):
+            self.assertEqual([c["mode"] for c in candidates], list(eg.HEURISTIC_MODES))
+            self.assertEqual(metrics["strategy"], "single_call")
+            self.assertEqual(metrics["llm_calls"], 1)
+            self.assertEqual(metrics["candidate_count"], 4)
+
+    def test_adaptive_strategy_reports_modes_run(self):
+        prev = settings.HEURISTIC_ENSEMBLE_STRATEGY
+        try:
+            settings.HEURISTIC_ENSEMBLE_STRATEGY = "adaptive"
+            candidates, metrics = asyncio.run(eg._arun_heuristic_ensemble({"title": "A"}))
+        finally:
+            settings.HEURISTIC_ENSEMBLE_STRATEGY = prev
+
+        # Every fake mode answers the same bucket, so the first wave is enough.
+        self.assertEqual([c["mode"] for c in candidates], ["scope", "complexity"])
+        self.assertEqual(self.probe.calls, 2)
+        self.assertEqual(metrics["strategy"], "adaptive")
+        self.assertEqual(metrics["modes_run"], 2)
+        self.assertEqual(metrics["llm_calls"], 2)
+        self.assertEqual(metrics["modes_cancelled"], [])
+
+    def test_slow_critic_is_skipped_and_counted(self):
+        prev = settings.ESTIMATION_CRITIC_TIMEOUT_SECONDS
+
+        async def slow_critic(**_kwargs):
+            await asyncio.sleep(1)
+            return {"risk_of_underestimation": 0.9}
+
+        try:
+            settings.ESTIMATION_CRITIC_TIMEOUT_SECONDS = 0.05
+            with patch.object(eg, "arun_estimation_critic", slow_critic):
+                state = asyncio.run(eg.arun_estimation_flow(_dto()))
+        finally:
+            settings.ESTIMATION_CRITIC_TIMEOUT_SECONDS = prev
+
+        self.assertIn("final_estimation", state)
+        self.assertNotIn("critic_review", state)
+        self.assertEqual(state["execution_metrics"]["deadline_misses"], ["critic"])
+        self.assertEqual(state["execution_metrics"]["deadline_miss_count"], 1)
+        self.assertIn("deadline_at", state)
+
+    def test_pipelined_critic_does_not_wait_for_late_reviews(self):
+        prev = settings.ESTIMATION_PIPELINED_CRITIC_ENABLED
+        critic_calls = []
+
+        async def late_agile(**_kwargs):
+            for _ in range(500):
+                if critic_calls:
+                    break
+                await asyncio.sleep(0.002)
+            return {"fit_status": "healthy", "bucket_delta": 0, "confidence": 0.7, "token_usage": _usage(1)}
+
+        async def critic(**kwargs):
+            critic_calls.append(kwargs)
+            return {"risk_of_underestimation": 0.3, "risk_of_overestimation": 0.3, "token_usage": _usage(4)}
+
+        try:
+            settings.ESTIMATION_PIPELINED_CRITIC_ENABLED = True
+            with patch.object(eg, "arun_agile_guard", late_agile), patch.object(eg, "arun_estimation_critic", critic):
+                state = asyncio.run(eg.arun_estimation_flow(_dto()))
+        finally:
+            settings.ESTIMATION_PIPELINED_CRITIC_ENABLED = prev
+
+        metrics = state["execution_metrics"]
+        self.assertEqual(metrics["graph_route"], "pipelined")
+        self.assertIn("agile_guard_review", metrics["critic_late_reviews"])
+        self.assertIsNone(critic_calls[0]["agile_guard_review"])
+        self.assertEqual(state["agile_guard_review"]["fit_status"], "healthy")
+        self.assertIn("critic_review", state)
+        self.assertIn("critic_latency_ms", metrics)
+        self.assertEqual(state["token_usage_summary"]["predicted_llm_total_tokens"], 3 + 4 * 2 + 0 + 1 + 4)
+
+    def test_estimation_service_switches_on_setting(self):
+        prev = settings.ESTIMATION_ASYNC_ENABLED
+        calls = []
+
+        async def fake_async_flow(dto):
+            calls.append("async")
+            return {"final_estimation": {}}
+
+        def fake_sync_flow(dto):
+            calls.append("sync")
+            return {"final_estimation": {}}
+
+        try:
+            with patch.object(es, "arun_estimation_flow", fake_async_flow), patch.object(
+                es, "run_estimation_flow", fake_sync_flow
+            ):
+                settings.ESTIMATION_ASYNC_ENABLED = True
+                asyncio.run(es.EstimationService().run(_dto()))
+                settings.ESTIMATION_ASYNC_ENABLED = False
+                asyncio.run(es.EstimationService().run(_dto()))
+        finally:
+            settings.ESTIMATION_ASYNC_ENABLED = prev
+
+        self.assertEqual(calls, ["async", "sync"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import threading
 import unittest
 from unittest.mock import patch
 
@@ -38,6 +39,17 @@ class _FakeRetrieverModerate:
         ]
 
 
+class _FakeRetrieverStrongAnchor:
+    def __init__(self, _vs):
+        pass
+
+    def get_similar_issues(self, _issue):
+        return [
+            {"id": "1", "score": 0.97, "total_effort_hours": 5, "title": "Fix login timeout", "issue_type": "bug"},
+            {"id": "2", "score": 0.88, "total_effort_hours": 6, "title": "B", "issue_type": "bug"},
+        ]
+
+
 class _NoTechVectorStore:
     pass
 
@@ -409,5 +421,143 @@ class TestEstimationGraphRouting(unittest.TestCase):
             eg.vector_store = original_vs
 
 
+    def test_fast_path_skips_reviews_when_anchor_is_strong(self):
+        prev = (
+            settings.ESTIMATION_FAST_PATH_ENABLED,
+            settings.ESTIMATION_FAST_PATH_HEURISTIC_MODES,
+        )
+        settings.ESTIMATION_FAST_PATH_ENABLED = True
+        settings.ESTIMATION_FAST_PATH_HEURISTIC_MODES = "scope"
+
+        original_vs = eg.vector_store
+        eg.vector_store = _NoTechVectorStore()
+        issue = {"title": "Fix login timeout", "description": "B", "labels": [], "repository": "x/y", "issue_type": "bug"}
+        try:
+            with patch.object(eg, "Retriever", _FakeRetrieverStrongAnchor), patch.object(
+                eg,
+                "run_analogical",
+                return_value={
+                    "estimated_hours": 5.0,
+                    "confidence": 0.85,
+                    "justification": "Analogical anchor.",
+                    "retrieval_route": "analogical_primary",
+                    "retrieval_stats": {"top1_score": 0.97, "has_strong_anchor": True, "route": "analogical_primary"},
+                },
+            ) as analogical_mock, patch.object(
+                eg,
+                "run_heuristic",
+                return_value={"size_bucket": "S", "bucket_rank": 2, "confidence": 0.6, "justification": "h"},
+            ) as heuristic_mock, patch.object(eg, "run_complexity_review") as complexity_mock, patch.object(
+                eg, "run_agile_guard"
+            ) as agile_mock, patch.object(eg, "run_estimation_critic") as critic_mock:
+                state = eg.run_estimation_flow(
+                    IssueEstimationDTO(
+                        issue_number=1,
+                        repository="x/y",
+                        title=issue["title"],
+                        description="B",
+                        labels=[],
+                        assignees=[],
+                        state="open",
+                        is_open=True,
+                        comments_count=0,
+                        age_in_days=0,
+                        author_login="bot",
+                        author_role="NONE",
+                        repo_language=None,
+                        repo_size=None,
+                        issue_type="bug",
+                    )
+                )
+
+                self.assertEqual(state["execution_metrics"]["graph_route"], "fast_path")
+                self.assertEqual(state["calibrated_estimation"]["finalization_mode"], "analogical_calibrated")
+                self.assertIn("final_estimation", state)
+                analogical_mock.assert_called_once()
+                self.assertEqual(heuristic_mock.call_count, 1)
+                self.assertEqual([c["mode"] for c in state["heuristic_candidates"]], ["scope"])
+                complexity_mock.assert_not_called()
+                agile_mock.assert_not_called()
+                critic_mock.assert_not_called()
+
+                # Same anchor, stricter threshold: back to the full graph.
+                prev_score = settings.ESTIMATION_FAST_PATH_MIN_ANCHOR_SCORE
+                settings.ESTIMATION_FAST_PATH_MIN_ANCHOR_SCORE = 0.99
+                try:
+                    self.assertEqual(eg._select_graph_route(issue, _FakeRetrieverStrongAnchor(None).get_similar_issues(issue)), "full")
+                finally:
+                    settings.ESTIMATION_FAST_PATH_MIN_ANCHOR_SCORE = prev_score
+        finally:
+            settings.ESTIMATION_FAST_PATH_ENABLED, settings.ESTIMATION_FAST_PATH_HEURISTIC_MODES = prev
+            eg.vector_store = original_vs
+
+    def test_pipelined_critic_starts_before_late_reviews_finish(self):
+        prev = settings.ESTIMATION_PIPELINED_CRITIC_ENABLED
+        settings.ESTIMATION_PIPELINED_CRITIC_ENABLED = True
+        original_vs = eg.vector_store
+        eg.vector_store = _NoTechVectorStore()
+        critic_started = threading.Event()
+        critic_calls = []
+
+        def late_review(**_kwargs):
+            # Só termina depois que o critic começou: prova que ele não esperou esta revisão.
+            critic_started.wait(5)
+            return {"bucket_delta": 1, "fit_status": "healthy", "confidence": 0.7}
+
+        def critic(**kwargs):
+            critic_calls.append(kwargs)
+            critic_started.set()
+            return {"risk_of_underestimation": 0.2, "risk_of_overestimation": 0.2}
+
+        try:
+            with patch.object(eg, "Retriever", _FakeRetrieverInsufficient), patch.object(
+                eg,
+                "run_analogical",
+                return_value={"estimated_hours": 11.0, "confidence": 0.3, "retrieval_route": "analogical_weak"},
+            ), patch.object(
+                eg,
+                "run_heuristic",
+                return_value={"size_bucket": "M", "bucket_rank": 3, "confidence": 0.6, "justification": "h"},
+            ), patch.object(eg, "run_complexity_review", late_review), patch.object(
+                eg, "run_agile_guard", late_review
+            ), patch.object(eg, "run_estimation_critic", critic):
+                state = eg.run_estimation_flow(
+                    IssueEstimationDTO(
+                        issue_number=1,
+                        repository="x/y",
+                        title="A",
+                        description="B",
+                        labels=[],
+                        assignees=[],
+                        state="open",
+                        is_open=True,
+                        comments_count=0,
+                        age_in_days=0,
+                        author_login="bot",
+                        author_role="NONE",
+                        repo_language=None,
+                        repo_size=None,
+                        issue_type="bug",
+                    )
+                )
+        finally:
+            settings.ESTIMATION_PIPELINED_CRITIC_ENABLED = prev
+            eg.vector_store = original_vs
+
+        metrics = state["execution_metrics"]
+        self.assertEqual(metrics["graph_route"], "pipelined")
+        self.assertTrue(metrics["critic_pipelined"])
+        self.assertEqual(metrics["critic_inputs"], ["heuristic_candidates", "analogical"])
+        self.assertEqual(metrics["critic_late_reviews"], ["complexity_review", "agile_guard_review"])
+        self.assertEqual(len(critic_calls), 1)
+        self.assertIsNone(critic_calls[0]["complexity_review"])
+        self.assertIsNone(critic_calls[0]["agile_guard_review"])
+        self.assertEqual(len(critic_calls[0]["heuristic_candidates"]), 4)
+        # As revisões tardias ainda chegam à calibração.
+        self.assertEqual(state["complexity_review"]["bucket_delta"], 1)
+        self.assertIn("critic_review", state)
+        self.assertIn("final_estimation", state)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from ai.core import estimation_result_cache as erc
+from ai.core.estimation_result_cache import EstimationResultCache
+from ai.dtos.issues_estimation_dto import IssueEstimationDTO
+from application.services import estimation_service as es
+from config.settings import settings
+
+
+def _dto(**overrides) -> IssueEstimationDTO:
+    fields = {
+        "issue_number": 7,
+        "repository": "org/repo",
+        "title": "Fix login timeout",
+        "description": "Users are logged out.",
+        "labels": ["bug", "backend"],
+        "assignees": [],
+        "state": "open",
+        "is_open": True,
+        "comments_count": 0,
+        "age_in_days": 1,
+        "author_login": "a",
+        "author_role": "MEMBER",
+        "repo_language": "Python",
+        "repo_size": 10,
+        "issue_type": "bug",
+    }
+    fields.update(overrides)
+    return IssueEstimationDTO(**fields)
+
+
+def _state(hours: float = 6.0, **metrics):
+    return {"final_estimation": {"estimated_hours": hours}, "execution_metrics": dict(metrics)}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestEstimationResultCacheKey(unittest.TestCase):
+    def test_key_ignores_formatting_volatile_counters_and_trigger_labels(self):
+        base = EstimationResultCache.make_key(_dto())
+        self.assertEqual(
+            base,
+            EstimationResultCache.make_key(
+                _dto(
+                    title="  Fix   login timeout ",
+                    labels=["Backend", "bug", "Estimate"],
+                    age_in_days=30,
+                    comments_count=4,
+                )
+            ),
+        )
+        self.assertNotEqual(base, EstimationResultCache.make_key(_dto(description="Users are logged out twice.")))
+        self.assertNotEqual(base, EstimationResultCache.make_key(_dto(labels=["bug"])))
+
+    def test_key_depends_on_prompt_and_meta_model_versions(self):
+        base = EstimationResultCache.make_key(_dto())
+        prev = settings.LLM_PROMPT_TEMPLATE_VERSION
+        try:
+            settings.LLM_PROMPT_TEMPLATE_VERSION = "bumped"
+            self.assertNotEqual(base, EstimationResultCache.make_key(_dto()))
+        finally:
+            settings.LLM_PROMPT_TEMPLATE_VERSION = prev
+
+        with patch.object(erc, "_meta_model_fingerprint", return_value="retrained"):
+            self.assertNotEqual(base, EstimationResultCache.make_key(_dto()))
+
+
+class TestEstimationResultCache(unittest.TestCase):
+    def test_hit_returns_copy_of_final_estimation_until_ttl(self):
+        clock = _Clock()
+        cache = EstimationResultCache(ttl_seconds=60, now_fn=clock)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return _state()
+
+        first = cache.get_or_compute("k", compute)
+        self.assertEqual(first["execution_metrics"]["estimation_cache"], "miss")
+        second = cache.get_or_compute("k", compute)
+        self.assertEqual(second["execution_metrics"]["estimation_cache"], "hit")
+        self.assertEqual(second["final_estimation"], {"estimated_hours": 6.0})
+        second["final_estimation"]["estimated_hours"] = 99
+        self.assertEqual(cache.get("k"), {"estimated_hours": 6.0})
+
+        clock.now = 61
+        cache.get_or_compute("k", compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_threads_share_one_computation(self):
+        cache = EstimationResultCache()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return _state(8.0)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(4)]
+            while cache.stats()["shared"] < 3:
+                time.sleep(0.001)
+            release.set()
+            states = [future.result(5) for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({s["final_estimation"]["estimated_hours"] for s in states}, {8.0})
+        self.assertEqual(
+            sorted(s["execution_metrics"]["estimation_cache"] for s in states),
+            ["miss", "shared", "shared", "shared"],
+        )
+
+    def test_concurrent_tasks_share_one_computation(self):
+        cache = EstimationResultCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return _state(3.0)
+
+        async def burst():
+            return await asyncio.gather(*(cache.aget_or_compute("k", compute) for _ in range(3)))
+
+        states = asyncio.run(burst())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([s["final_estimation"]["estimated_hours"] for s in states], [3.0, 3.0, 3.0])
+        self.assertEqual(cache.stats()["inflight"], 0)
+
+    def test_errors_reach_waiters_and_degraded_runs_are_not_cached(self):
+        cache = EstimationResultCache()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def burst():
+            return await asyncio.gather(
+                *(cache.aget_or_compute("k", failing) for _ in range(2)), return_exceptions=True
+            )
+
+        results = asyncio.run(burst())
+        self.assertTrue(all(isinstance(res, RuntimeError) for res in results))
+        self.assertIsNone(cache.get("k"))
+
+        cache.get_or_compute("k", lambda: _state(deadline_misses=["critic"]))
+        self.assertIsNone(cache.get("k"))
+
+
+class TestEstimationServiceCache(unittest.TestCase):
+    def setUp(self):
+        self._prev = (settings.ESTIMATION_RESULT_CACHE_SIZE, settings.ESTIMATION_ASYNC_ENABLED)
+        settings.ESTIMATION_RESULT_CACHE_SIZE = 8
+        settings.ESTIMATION_ASYNC_ENABLED = True
+        erc._default_cache = None
+
+    def tearDown(self):
+        settings.ESTIMATION_RESULT_CACHE_SIZE, settings.ESTIMATION_ASYNC_ENABLED = self._prev
+        erc._default_cache = None
+
+    def test_repeated_webhook_estimation_is_served_from_cache(self):
+        calls = []
+
+        async def fake_flow(dto):
+            calls.append(dto.issue_number)
+            return _state(5.0)
+
+        with patch.object(es, "arun_estimation_flow", fake_flow):
+            service = es.EstimationService()
+            asyncio.run(service.run(_dto()))
+            state = asyncio.run(service.run(_dto(labels=["bug", "backend", "Estimate"])))
+
+        self.assertEqual(calls, [7])
+        self.assertEqual(state["final_estimation"]["estimated_hours"], 5.0)
+        self.assertEqual(state["execution_metrics"]["estimation_cache"], "hit")
+
+
+if __name__ == "__main__":
+    unittest.main()
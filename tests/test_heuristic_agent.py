@@ -1,6 +1,12 @@
+import asyncio
 import unittest
 
-from ai.agents.heuristic_agent import run_heuristic
+from ai.agents.heuristic_agent import (
+    arun_heuristic,
+    arun_heuristic_multi_mode,
+    run_heuristic,
+    run_heuristic_multi_mode,
+)
 
 
 class _CaptureLLM:
@@ -12,6 +18,9 @@ class _CaptureLLM:
         self.last_kwargs = kwargs
         return '{"range_index":2,"range_label":"3-6h","confidence":0.6,"justification":"ok"}'
 
+    async def asend_prompt(self, prompt: str, **kwargs) -> str:
+        return self.send_prompt(prompt, **kwargs)
+
     def get_last_token_usage(self):
         return self.last_usage
 
@@ -31,6 +40,66 @@ class TestHeuristicAgent(unittest.TestCase):
         self.assertEqual(out["estimated_hours"], 5.0)
         self.assertEqual(llm.last_kwargs["temperature"], 0.42)
 
+    def test_arun_heuristic_matches_sync_result(self):
+        issue = {"title": "Task", "description": "Desc"}
+        llm = _CaptureLLM()
+        out = asyncio.run(arun_heuristic(issue_context=issue, llm=llm, temperature=0.42, mode="complexity"))
+        self.assertEqual(out, run_heuristic(issue_context=issue, llm=_CaptureLLM(), temperature=0.42, mode="complexity"))
+        self.assertEqual(llm.last_kwargs["temperature"], 0.42)
+
+
+class _MultiModeLLM(_CaptureLLM):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.last_usage = {"prompt_tokens": 90, "completion_tokens": 30, "total_tokens": 120}
+
+    def send_prompt(self, _prompt: str, **kwargs) -> str:
+        self.calls += 1
+        self.last_kwargs = kwargs
+        return (
+            '{"perspectives":['
+            '{"mode":"scope","range_index":2,"confidence":0.6},'
+            '{"mode":"complexity","range_label":"9-12h","confidence":0.7},'
+            '{"mode":"agile_fit","range_index":6,"confidence":0.5}'
+            "]}"
+        )
+
+
+class TestHeuristicAgentMultiMode(unittest.TestCase):
+    modes = ("scope", "complexity", "uncertainty", "agile_fit")
+
+    def test_one_call_returns_one_candidate_per_mode(self):
+        llm = _MultiModeLLM()
+        out = run_heuristic_multi_mode(
+            issue_context={"title": "Task", "description": "Desc"},
+            llm=llm,
+            temperature=0.3,
+            modes=self.modes,
+        )
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(llm.last_kwargs["temperature"], 0.3)
+        self.assertEqual([c["mode"] for c in out], list(self.modes))
+        self.assertEqual([c["range_index"] for c in out], [2, 4, 4, 6])
+        # Perspective missing from the response falls back with a warning.
+        self.assertEqual(out[2]["confidence"], 0.25)
+        self.assertIn("uncertainty", out[2]["warnings"][-1])
+        # The call's usage is counted once across the candidates.
+        self.assertEqual(sum(c["token_usage"]["total_tokens"] for c in out), 120)
+
+    def test_unparseable_response_falls_back_for_every_mode(self):
+        class _BrokenLLM(_MultiModeLLM):
+            def send_prompt(self, _prompt: str, **kwargs) -> str:
+                return "not json"
+
+        out = asyncio.run(arun_heuristic_multi_mode(issue_context={"title": "Task"}, llm=_BrokenLLM(), modes=self.modes))
+        self.assertEqual([c["mode"] for c in out], list(self.modes))
+        self.assertTrue(all(c["confidence"] == 0.25 for c in out))
+
+    def test_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            run_heuristic_multi_mode(issue_context={}, llm=_MultiModeLLM(), modes=("scope", "vibes"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,11 +2,15 @@ import asyncio
 import os
 import sys
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
+from ai.core import vector_store_factory
+from ai.core.local_vector_store import LocalVectorStoreClient
+from ai.workflows import estimation_graph as eg
 from application.use_cases.index_closed_issue import IndexClosedIssueUseCase
+from config.settings import settings
 from web.schemas.github_payloads import GitHubIssuesWebhookPayload
 
 
@@ -63,6 +67,35 @@ class TestIndexClosedIssueUseCase(unittest.TestCase):
         asyncio.run(run())
 
 
+class TestSharedVectorStore(unittest.TestCase):
+    def test_indexer_and_estimator_share_the_process_vector_store(self):
+        self.assertIs(IndexClosedIssueUseCase().vector_store, eg.vector_store)
+        self.assertIs(vector_store_factory.get_default_vector_store(), eg.vector_store)
+
+    def test_closed_issue_upsert_is_found_by_the_shared_local_store(self):
+        def embed(self, texts):
+            return [[1.0, 0.0, 0.0] for _ in texts], 0
+
+        payload = GitHubIssuesWebhookPayload(
+            action="closed",
+            issue={"node_id": "N", "number": 7, "title": "Login bug", "body": "Crash on login"},
+            repository={"full_name": "org/repo"},
+            installation={"id": 1},
+        )
+        with patch.object(settings, "VECTOR_STORE_BACKEND", "local"), patch.object(
+            settings, "LOCAL_VECTOR_SNAPSHOT_PATH", None
+        ), patch.object(vector_store_factory, "_default_vector_store", None), patch.object(
+            LocalVectorStoreClient, "_embed_texts_with_usage", embed
+        ):
+            store = vector_store_factory.get_default_vector_store()
+            store._embedding_cache = None
+            result = asyncio.run(IndexClosedIssueUseCase().execute(payload))
+            matches = vector_store_factory.get_default_vector_store().semantic_search("login", ["repo_issues"])
+
+        self.assertFalse(result["skipped"])
+        self.assertEqual([m["id"] for m in matches], ["org/repo#7"])
+
+
 if __name__ == "__main__":
     unittest.main()
 
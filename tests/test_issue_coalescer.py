@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from domain.webhook_models import WebhookFlow, WebhookResult, WebhookStatus
+from main import app
+from web.idempotency import InMemoryIdempotencyStore
+from web.issue_coalescer import DurableIssueCoalescer, InMemoryIssueCoalescer
+from web.job_queue import DurableJobQueue, InMemoryJobQueue, LaneConfig
+from web.job_store import SQLiteJobStore
+from web.rate_limit import InMemoryDailyRateLimiter
+from web.routes import github_webhook
+
+
+def _replace(job):
+    return lambda current: dict(job)
+
+
+class TestInMemoryIssueCoalescer(unittest.TestCase):
+    def _coalescer(self, submitted, accept=lambda: True, **kwargs):
+        async def submit(lane, job, job_id):
+            submitted.append((lane, job, job_id))
+            return accept()
+
+        return InMemoryIssueCoalescer(submit, **kwargs)
+
+    def test_burst_runs_once_on_latest_job_and_records_folded_deliveries(self):
+        submitted = []
+        coalescer = self._coalescer(submitted, window_seconds=0.05)
+
+        async def run():
+            folded_early = await coalescer.fold(("estimation", "ISSUE_A"), "d-early", _replace({}))
+            first = await coalescer.start(
+                ("estimation", "ISSUE_A"), {"delivery_id": "d1", "v": 1}, job_id="d1"
+            )
+            # An update of the issue keeps the triggering job; a new trigger replaces it.
+            await coalescer.fold(("estimation", "ISSUE_A"), "d-edit", lambda current: {**current, "v": 2})
+            await coalescer.fold(("estimation", "ISSUE_A"), "d3", _replace({"delivery_id": "d3", "v": 3}))
+            await coalescer.start(("estimation", "ISSUE_B"), {"delivery_id": "d-other"}, job_id="d-other")
+            await coalescer.start(("planning", "ISSUE_A"), {"delivery_id": "d-planning"}, job_id="d-planning")
+            await asyncio.sleep(0.2)
+            return folded_early, first
+
+        folded_early, first = asyncio.run(run())
+        self.assertFalse(folded_early)
+        self.assertEqual(first, "scheduled")
+        by_id = {job_id: (lane, job) for lane, job, job_id in submitted}
+        self.assertEqual(sorted(by_id), ["d-other", "d-planning", "d3"])
+        self.assertEqual(
+            by_id["d3"],
+            ("estimation", {"delivery_id": "d3", "v": 3, "coalesced_deliveries": ["d1", "d-edit"]}),
+        )
+        self.assertEqual(by_id["d-other"][1]["coalesced_deliveries"], [])
+        self.assertEqual(coalescer.stats()["coalesced"], 2)
+        self.assertEqual(coalescer.stats()["flushed"], 3)
+
+    def test_window_restarts_per_event_but_is_capped_by_max_wait(self):
+        submitted = []
+        coalescer = self._coalescer(submitted, window_seconds=0.08, max_wait_seconds=0.15)
+
+        async def run():
+            # Events 0.03s apart never leave a quiet window; only max_wait splits the stream.
+            for idx in range(10):
+                job = {"delivery_id": f"d{idx}"}
+                await coalescer.start(("estimation", "ISSUE_A"), job, job_id=f"d{idx}")
+                await asyncio.sleep(0.03)
+            await coalescer.flush_all()
+
+        asyncio.run(run())
+        self.assertGreaterEqual(len(submitted), 2)
+        self.assertLess(len(submitted), 10)
+        deliveries = [d for _, job, job_id in submitted for d in [*job["coalesced_deliveries"], job_id]]
+        self.assertEqual(sorted(deliveries), sorted(f"d{idx}" for idx in range(10)))
+
+    def test_burst_rejected_by_a_full_lane_is_retried_not_dropped(self):
+        submitted = []
+        answers = iter([False, True])
+        coalescer = self._coalescer(submitted, accept=lambda: next(answers), window_seconds=0.05)
+
+        async def run():
+            await coalescer.start(("estimation", "ISSUE_A"), {"delivery_id": "d1"}, job_id="d1")
+            await asyncio.sleep(0.3)
+
+        asyncio.run(run())
+        self.assertEqual([job_id for _, _, job_id in submitted], ["d1", "d1"])
+        stats = coalescer.stats()
+        self.assertEqual((stats["rejected"], stats["flushed"]), (1, 1))
+
+
+class TestDurableIssueCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "webhook_jobs.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_burst_is_stored_before_returning_and_updated_in_place(self):
+        seen = []
+
+        async def handler(job):
+            seen.append(job)
+
+        queue = DurableJobQueue(
+            SQLiteJobStore(self.path), {"estimation": LaneConfig(1, 1)}, handler, poll_interval=0.01
+        )
+        coalescer = DurableIssueCoalescer(queue, window_seconds=0.2)
+        key = ("estimation", "ISSUE_A")
+
+        async def run():
+            started = await coalescer.start(key, {"delivery_id": "d1", "v": 1}, job_id="d1")
+            # Nothing runs during the window, but the burst is already in the file.
+            stored = SQLiteJobStore(self.path).counts()
+            folded = await coalescer.fold(key, "d-edit", lambda current: {**current, "v": 2})
+            again = await coalescer.start(key, {"delivery_id": "d3", "v": 3}, job_id="d3")
+            # The waiting burst holds the only slot of the lane: other issues are rejected.
+            other = await coalescer.start(("estimation", "ISSUE_B"), {"delivery_id": "d4"}, job_id="d4")
+            early = list(seen)
+            await queue.join()
+            return started, stored, folded, again, other, early
+
+        started, stored, folded, again, other, early = asyncio.run(run())
+        self.assertEqual((started, folded, again, other), ("scheduled", True, "coalesced", "full"))
+        self.assertEqual(stored, {"estimation": {"pending": 1}})
+        self.assertEqual(early, [])
+        self.assertEqual(seen, [{"delivery_id": "d3", "v": 3, "coalesced_deliveries": ["d1", "d-edit"]}])
+
+
+class TestWebhookRouteCoalescing(unittest.TestCase):
+    def setUp(self):
+        self._prev = (
+            github_webhook.job_queue,
+            github_webhook.rate_limiter,
+            github_webhook.idempotency,
+            github_webhook.coalescer,
+        )
+        github_webhook.job_queue = InMemoryJobQueue(
+            {name: LaneConfig(workers=1, max_depth=5) for name in ("estimation", "planning", "indexing")},
+            handler=github_webhook._run_delivery,
+        )
+        github_webhook.rate_limiter = InMemoryDailyRateLimiter(limit_default=100)
+        github_webhook.idempotency = InMemoryIdempotencyStore()
+        github_webhook.coalescer = InMemoryIssueCoalescer(github_webhook._submit_coalesced, window_seconds=0.1)
+
+    def tearDown(self):
+        (
+            github_webhook.job_queue,
+            github_webhook.rate_limiter,
+            github_webhook.idempotency,
+            github_webhook.coalescer,
+        ) = self._prev
+
+    def _post(self, client, delivery: str, title: str, action: str = "labeled"):
+        payload = {
+            "action": action,
+            "issue": {"node_id": "ISSUE_NODE", "number": 1, "title": title, "labels": [{"id": 1, "name": "Estimate"}]},
+            "repository": {"full_name": "org/repo"},
+            "installation": {"id": 321},
+        }
+        if action == "labeled":
+            payload["label"] = {"name": "Estimate"}
+        return client.post(
+            "/webhook/github",
+            content=json.dumps(payload).encode("utf-8"),
+            headers={"x-github-event": "issues", "x-github-delivery": delivery},
+        )
+
+    def _wait_for_run(self, calls):
+        for _ in range(500):
+            if calls and github_webhook.job_queue._stats["estimation"].completed:
+                return
+            time.sleep(0.005)
+
+    def test_burst_for_one_issue_runs_one_estimation_on_latest_payload(self):
+        calls = []
+        charged = []
+        check_and_increment = github_webhook.rate_limiter.check_and_increment
+
+        async def fake_handle(payload, event, delivery_id):
+            calls.append((delivery_id, payload.action, payload.issue.title))
+            return WebhookResult(WebhookStatus.PROCESSED, event, payload.action, WebhookFlow.ESTIMATION)
+
+        async def counted_check(key, limit=None):
+            charged.append(key)
+            return await check_and_increment(key, limit)
+
+        with patch.object(github_webhook.use_case, "handle", fake_handle), patch.object(
+            github_webhook.rate_limiter, "check_and_increment", counted_check
+        ), TestClient(app) as client:
+            responses = [
+                self._post(client, "burst-0", "v0"),
+                self._post(client, "burst-1", "v1"),
+                # An edit while the burst waits: folded, not handled inline.
+                self._post(client, "burst-2", "v2", action="edited"),
+            ]
+            self._wait_for_run(calls)
+            redelivered = self._post(client, "burst-2", "v2", action="edited")
+            stats = client.get("/webhook/github/queue").json()["coalescer"]
+
+        self.assertEqual([r.status_code for r in responses], [202, 202, 202])
+        self.assertEqual(
+            [r.json()["details"]["reason"] for r in responses],
+            ["async_processing", "coalesced", "coalesced"],
+        )
+        # One run, on the latest issue, for the triggering action.
+        self.assertEqual(calls, [("burst-1", "labeled", "v2")])
+        # Folded deliveries share the outcome of the run that absorbed them.
+        self.assertEqual(redelivered.status_code, 200)
+        self.assertEqual(redelivered.json()["status"], "processed")
+        self.assertEqual(stats["coalesced"], 2)
+        # The burst is charged once against the daily limit.
+        self.assertEqual(len(charged), 1)
+
+    def test_edit_without_a_pending_burst_is_handled_inline(self):
+        calls = []
+
+        async def fake_handle(payload, event, delivery_id):
+            calls.append((delivery_id, payload.action))
+            return WebhookResult(WebhookStatus.IGNORED, event, payload.action, WebhookFlow.NONE)
+
+        with patch.object(github_webhook.use_case, "handle", fake_handle), TestClient(app) as client:
+            response = self._post(client, "edit-0", "v0", action="edited")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [("edit-0", "edited")])
+        self.assertEqual(github_webhook.coalescer.stats()["coalesced"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
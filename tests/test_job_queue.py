@@ -0,0 +1,425 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from domain.webhook_models import WebhookFlow, WebhookResult, WebhookStatus
+from main import app
+from web.idempotency import InMemoryIdempotencyStore
+from web.job_queue import DurableJobQueue, InMemoryJobQueue, LaneConfig
+from web.job_store import SQLiteJobStore
+from web.rate_limit import InMemoryDailyRateLimiter
+from web.routes import github_webhook
+
+
+class TestInMemoryJobQueue(unittest.TestCase):
+    def test_lane_runs_at_most_its_workers_and_rejects_past_max_depth(self):
+        queue = InMemoryJobQueue({"estimation": LaneConfig(workers=2, max_depth=2), "indexing": LaneConfig(1, 1)})
+        active = {"now": 0, "peak": 0}
+
+        async def job():
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+
+        async def run():
+            accepted = [await queue.submit("estimation", job, job_id=str(idx)) for idx in range(5)]
+            await asyncio.sleep(0)
+            # Workers took the first two; two more fit in the queue.
+            accepted.append(await queue.submit("estimation", job, job_id="late"))
+            self.assertTrue(await queue.submit("indexing", lambda: asyncio.sleep(0), job_id="other-lane"))
+            await queue.join()
+            return accepted, await queue.stats()
+
+        accepted, all_stats = asyncio.run(run())
+        self.assertEqual(accepted, [True, True, False, False, False, True])
+        self.assertEqual(active["peak"], 2)
+        stats = all_stats["estimation"]
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["rejected"], 3)
+        self.assertEqual(stats["running"], 0)
+
+    def test_reports_wait_time_and_survives_failed_jobs(self):
+        clock = {"now": 0.0}
+        queue = InMemoryJobQueue({"planning": LaneConfig(1, 4)}, now_fn=lambda: clock["now"])
+
+        async def slow():
+            clock["now"] += 0.5
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        async def run():
+            await queue.submit("planning", slow)
+            await queue.submit("planning", broken)
+            await queue.submit("planning", slow)
+            await queue.join()
+            return await queue.stats()
+
+        stats = asyncio.run(run())["planning"]
+        self.assertEqual(stats["completed"], 2)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["max_wait_ms"], 500)
+        self.assertEqual(stats["depth"], 0)
+
+    def test_job_id_still_queued_is_not_enqueued_twice(self):
+        queue = InMemoryJobQueue({"estimation": LaneConfig(1, 4)})
+        runs = []
+
+        async def job():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+
+        async def run():
+            self.assertTrue(await queue.submit("estimation", job, job_id="d-1"))
+            self.assertTrue(await queue.submit("estimation", job, job_id="d-1"))
+            await queue.join()
+            # Finished jobs no longer dedupe (the idempotency store covers redeliveries).
+            self.assertTrue(await queue.submit("estimation", job, job_id="d-1"))
+            await queue.join()
+            return await queue.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(stats["estimation"]["enqueued"], 2)
+
+    def test_unknown_lane_is_rejected(self):
+        queue = InMemoryJobQueue({"estimation": LaneConfig(1, 1)})
+
+        async def run():
+            await queue.submit("nope", lambda: asyncio.sleep(0))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSQLiteJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "jobs", "webhook_jobs.sqlite3")
+        self.clock = _Clock()
+        self.store = SQLiteJobStore(self.path, retention_seconds=60, now_fn=self.clock)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_enqueue_dedupes_job_ids_and_bounds_pending_depth(self):
+        self.assertEqual(self.store.enqueue("estimation", "d1", {"n": 1}, max_depth=2), "enqueued")
+        self.assertEqual(self.store.enqueue("estimation", "d1", {"n": 1}, max_depth=2), "duplicate")
+        self.assertEqual(self.store.enqueue("estimation", "d2", {"n": 2}, max_depth=2), "enqueued")
+        self.assertEqual(self.store.enqueue("estimation", "d3", {"n": 3}, max_depth=2), "full")
+        self.assertEqual(self.store.enqueue("indexing", "d4", {"n": 4}, max_depth=2), "enqueued")
+        self.assertEqual(self.store.depth("estimation"), 2)
+
+    def test_expired_lease_is_claimed_again(self):
+        self.store.enqueue("estimation", "d1", {"n": 1}, max_depth=5)
+        first = self.store.claim("estimation", visibility_timeout=30)
+        self.assertEqual((first.job_id, first.payload, first.attempts), ("d1", {"n": 1}, 1))
+        self.assertIsNone(self.store.claim("estimation", visibility_timeout=30))
+        self.assertEqual(self.store.depth("estimation"), 0)
+
+        self.clock.now += 31
+        again = self.store.claim("estimation", visibility_timeout=30)
+        self.assertEqual((again.job_id, again.attempts), ("d1", 2))
+
+    def test_retry_waits_for_visible_at_and_finished_jobs_are_pruned(self):
+        self.store.enqueue("estimation", "d1", {}, max_depth=5)
+        self.store.claim("estimation", visibility_timeout=30)
+        self.store.retry("d1", "RuntimeError: boom", visible_at=self.clock.now + 10)
+        self.assertIsNone(self.store.claim("estimation", visibility_timeout=30))
+        self.clock.now += 10
+        self.store.ack(self.store.claim("estimation", visibility_timeout=30).job_id)
+        self.assertEqual(self.store.counts(), {"estimation": {"done": 1}})
+        # Still deduplicated while retained.
+        self.assertEqual(self.store.enqueue("estimation", "d1", {}, max_depth=5), "duplicate")
+
+        self.clock.now += 61
+        self.assertEqual(self.store.enqueue("estimation", "d1", {}, max_depth=5), "enqueued")
+
+    def test_coalesced_job_waits_its_delay_and_is_updated_in_place(self):
+        def enqueue(job_id, n):
+            return self.store.enqueue(
+                "estimation",
+                job_id,
+                {"n": n},
+                max_depth=1,
+                coalesce_key="ISSUE_A",
+                merge=lambda current: {"n": current["n"] + n},
+                delay_seconds=5,
+                max_delay_seconds=8,
+            )
+
+        self.assertEqual(enqueue("d1", 1), "enqueued")
+        self.assertIsNone(self.store.claim("estimation", visibility_timeout=30))
+        self.clock.now += 4
+        # Folded: no new row (the lane holds one job) and the start moves to now + 5, capped at 8.
+        self.assertEqual(enqueue("d2", 2), "coalesced")
+        self.assertEqual(self.store.depth("estimation"), 1)
+        self.clock.now += 3
+        self.assertIsNone(self.store.claim("estimation", visibility_timeout=30))
+        self.clock.now += 1
+        job = self.store.claim("estimation", visibility_timeout=30)
+        self.assertEqual((job.job_id, job.payload), ("d1", {"n": 3}))
+        # A claimed job no longer absorbs events.
+        self.assertFalse(
+            self.store.fold("estimation", "ISSUE_A", lambda current: current, delay_seconds=5, max_delay_seconds=8)
+        )
+
+    def test_files_created_before_coalescing_are_migrated(self):
+        path = os.path.join(self.tmp.name, "old.sqlite3")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE webhook_jobs (job_id TEXT PRIMARY KEY, lane TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, enqueued_at REAL NOT NULL, "
+            "visible_at REAL NOT NULL, updated_at REAL NOT NULL, last_error TEXT)"
+        )
+        conn.close()
+        store = SQLiteJobStore(path, now_fn=self.clock)
+        self.assertEqual(
+            store.enqueue("estimation", "d1", {}, max_depth=5, coalesce_key="ISSUE_A", merge=dict), "enqueued"
+        )
+        self.assertTrue(store.fold("estimation", "ISSUE_A", dict, delay_seconds=1, max_delay_seconds=1))
+
+
+class TestDurableJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "webhook_jobs.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _queue(self, handler, **kwargs):
+        options = {"backoff_seconds": 0, "poll_interval": 0.01, **kwargs}
+        return DurableJobQueue(SQLiteJobStore(self.path), {"estimation": LaneConfig(2, 4)}, handler, **options)
+
+    def test_jobs_left_by_previous_process_are_drained_on_start(self):
+        # Accepted but never run (process restarted): only the SQLite file remains.
+        SQLiteJobStore(self.path).enqueue("estimation", "d1", {"delivery_id": "d1"}, max_depth=4)
+        seen = []
+
+        async def handler(job):
+            seen.append(job["delivery_id"])
+
+        queue = self._queue(handler)
+
+        async def run():
+            queue.start()
+            await queue.join()
+            return await queue.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(seen, ["d1"])
+        self.assertEqual(stats["estimation"]["stored"], {"done": 1})
+
+    def test_failed_jobs_are_retried_then_dead_lettered(self):
+        attempts = {}
+
+        async def handler(job):
+            attempts[job["id"]] = attempts.get(job["id"], 0) + 1
+            if job["id"] == "poison" or attempts[job["id"]] == 1:
+                raise RuntimeError("boom")
+
+        queue = self._queue(handler, max_attempts=3)
+
+        async def run():
+            self.assertTrue(await queue.submit("estimation", {"id": "flaky"}, job_id="flaky"))
+            self.assertTrue(await queue.submit("estimation", {"id": "poison"}, job_id="poison"))
+            # Redelivery of an accepted job: accepted, not enqueued twice.
+            self.assertTrue(await queue.submit("estimation", {"id": "flaky"}, job_id="flaky"))
+            await queue.join()
+            return await queue.stats()
+
+        stats = asyncio.run(run())["estimation"]
+        self.assertEqual(attempts, {"flaky": 2, "poison": 3})
+        self.assertEqual(stats["enqueued"], 2)
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["failed"], 4)
+        self.assertEqual(stats["retried"], 3)
+        self.assertEqual(stats["dead_lettered"], 1)
+        self.assertEqual(stats["stored"], {"done": 1, "dead": 1})
+
+    def test_store_errors_after_a_run_do_not_kill_the_worker(self):
+        seen = []
+
+        async def handler(job):
+            seen.append(job["id"])
+
+        queue = self._queue(handler, visibility_timeout=0.05)
+        real_ack = queue._store.ack
+        failures = []
+
+        def flaky_ack(job_id):
+            if not failures:
+                failures.append(job_id)
+                raise sqlite3.OperationalError("database is locked")
+            real_ack(job_id)
+
+        queue._store.ack = flaky_ack
+
+        async def run():
+            await queue.submit("estimation", {"id": "a"}, job_id="a")
+            await queue.join()
+            await queue.submit("estimation", {"id": "b"}, job_id="b")
+            await queue.join()
+            return await queue.stats()
+
+        stats = asyncio.run(run())["estimation"]
+        # The unacked job is redelivered once its lease expires; the worker kept running.
+        self.assertEqual(seen, ["a", "a", "b"])
+        self.assertEqual(failures, ["a"])
+        self.assertEqual(stats["stored"], {"done": 2})
+
+
+class TestRunDelivery(unittest.TestCase):
+    def setUp(self):
+        self._prev = github_webhook.idempotency
+        github_webhook.idempotency = InMemoryIdempotencyStore(ttl_seconds=600, inflight_ttl_seconds=30)
+        self.clock = {"now": 1000.0}
+
+    def tearDown(self):
+        github_webhook.idempotency = self._prev
+
+    def _job(self, delivery_id: str):
+        payload = {"action": "labeled", "repository": {"full_name": "org/repo"}, "installation": {"id": 1}}
+        return {"event": "issues", "delivery_id": delivery_id, "payload": payload}
+
+    def test_reservation_ttl_restarts_when_the_job_runs(self):
+        store = github_webhook.idempotency
+        seen = []
+
+        async def handle(**kwargs):
+            self.clock["now"] += 20
+            seen.append((await store.reserve(kwargs["delivery_id"]))[0])
+            return WebhookResult(WebhookStatus.PROCESSED, "issues", "labeled", WebhookFlow.ESTIMATION)
+
+        async def run():
+            with patch("web.idempotency.time.monotonic", lambda: self.clock["now"]):
+                await store.reserve("slow-queue")
+                self.clock["now"] += 25  # queue wait
+                await github_webhook._run_delivery(self._job("slow-queue"))
+
+        with patch.object(github_webhook.use_case, "handle", handle):
+            asyncio.run(run())
+        # 45s after the reservation, but only 20s into the run: still owned.
+        self.assertEqual(seen, ["in_progress"])
+
+    def test_delivery_done_while_queued_is_skipped(self):
+        store = github_webhook.idempotency
+
+        async def run():
+            await store.reserve("redelivered")
+            await store.mark_done("redelivered", {"status": "processed"})
+            await github_webhook._run_delivery(self._job("redelivered"))
+
+        with patch.object(github_webhook.use_case, "handle") as handle:
+            asyncio.run(run())
+        handle.assert_not_called()
+
+
+class TestWebhookRouteBackpressure(unittest.TestCase):
+    def setUp(self):
+        self._prev = (
+            github_webhook.job_queue,
+            github_webhook.rate_limiter,
+            github_webhook.idempotency,
+        )
+        github_webhook.job_queue = InMemoryJobQueue(
+            {
+                "estimation": LaneConfig(workers=1, max_depth=1),
+                "planning": LaneConfig(workers=1, max_depth=1),
+                "indexing": LaneConfig(workers=1, max_depth=1),
+            },
+            handler=github_webhook._run_delivery,
+        )
+        github_webhook.rate_limiter = InMemoryDailyRateLimiter(limit_default=100)
+        github_webhook.idempotency = InMemoryIdempotencyStore()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        (
+            github_webhook.job_queue,
+            github_webhook.rate_limiter,
+            github_webhook.idempotency,
+        ) = self._prev
+
+    def _post(self, client, delivery: str):
+        body = json.dumps(
+            {
+                "action": "labeled",
+                "repository": {"full_name": "org/repo"},
+                "installation": {"id": 321},
+                "label": {"name": "Estimate"},
+            }
+        ).encode("utf-8")
+        return client.post(
+            "/webhook/github",
+            content=body,
+            headers={"x-github-event": "issues", "x-github-delivery": delivery},
+        )
+
+    def _wait_running(self, lane: str):
+        for _ in range(500):
+            if github_webhook.job_queue._stats[lane].running:
+                return
+            time.sleep(0.002)
+
+    def _run_full_lane(self):
+        release = self.release
+
+        async def blocked_handle(**kwargs):
+            while not release.is_set():
+                await asyncio.sleep(0.005)
+            return WebhookResult(WebhookStatus.PROCESSED, "issues", "labeled", WebhookFlow.ESTIMATION)
+
+        with patch.object(github_webhook.use_case, "handle", blocked_handle), TestClient(app) as client:
+            first = self._post(client, "bp-1")
+            self._wait_running("estimation")
+            second = self._post(client, "bp-2")
+            third = self._post(client, "bp-3")
+            stats = client.get("/webhook/github/queue").json()["lanes"]["estimation"]
+            self.release.set()
+        return first, second, third, stats
+
+    def test_full_lane_returns_429_and_exposes_depth(self):
+        first, second, third, stats = self._run_full_lane()
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()["details"]["lane"], "estimation")
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(third.status_code, 429)
+        self.assertEqual(third.json()["details"]["reason"], "queue_full")
+        self.assertEqual(third.json()["details"]["max_depth"], 1)
+        self.assertIn("Retry-After", third.headers)
+        self.assertEqual(stats["depth"], 1)
+        self.assertEqual(stats["running"], 1)
+        self.assertEqual(stats["rejected"], 0)
+
+    def test_rejected_delivery_is_released_for_redelivery(self):
+        _, _, third, _ = self._run_full_lane()
+
+        self.assertEqual(third.status_code, 429)
+        self.assertEqual(third.json()["status"], "error")
+        # Nothing was stored for it: a GitHub redelivery must be processed, not deduplicated.
+        state, _ = asyncio.run(github_webhook.idempotency.reserve("bp-3"))
+        self.assertEqual(state, "ok")
+
+if __name__ == "__main__":
+    unittest.main()
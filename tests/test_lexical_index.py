@@ -0,0 +1,171 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.lexical_index import BM25Index, LexicalIndexStore
+from ai.core.retriever import Retriever
+from ai.core.token_fingerprint import tokenize_text
+from config.settings import settings
+
+
+def _meta(issue_id, title, description, hours=5):
+    return {
+        "issue_id": issue_id,
+        "issue_title": title,
+        "description": description,
+        "total_effort_hours": hours,
+    }
+
+
+_LONG = " filler text to pass the minimum description length of the retriever" * 3
+
+
+class _VectorOnlyStore:
+    def __init__(self, matches):
+        self.matches = matches
+
+    def list_namespaces(self):
+        return ["a_issues"]
+
+    def semantic_search(self, text, namespaces, top_k=8, where=None):
+        return [dict(m) for m in self.matches]
+
+
+class TestBM25Index(unittest.TestCase):
+    def test_rare_keyword_ranks_first(self):
+        index = BM25Index()
+        index.add("1", _meta(1, "Fix OAuth token refresh", "token refresh fails for oauth clients"))
+        index.add("2", _meta(2, "Update docs", "docs for the token page"))
+        index.add("3", _meta(3, "Refactor page layout", "layout page grid"))
+
+        results = index.search(tokenize_text("oauth refresh"), top_k=2)
+        self.assertEqual(index.doc_ids[results[0][0]], "1")
+        self.assertEqual(len(results), 1)
+
+    def test_replace_and_where_filter(self):
+        index = BM25Index()
+        index.add("1", _meta(1, "Payment bug", "payment crash", hours=80))
+        index.add("2", _meta(2, "Payment flow", "payment retry", hours=4))
+        index.add("1", _meta(1, "Other", "unrelated", hours=80))
+
+        results = index.search(["payment"], top_k=5, where={"total_effort_hours": {"$lte": 40}})
+        self.assertEqual([index.doc_ids[row] for row, _ in results], ["2"])
+        self.assertEqual(len(index), 2)
+
+    def test_store_roundtrip_keeps_postings_and_tokens(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LexicalIndexStore(tmp)
+            store.add_documents("a_issues", [{"id": "1", "metadata": _meta(1, "Cache warmup", "warm cache on boot")}])
+            store.add_documents("a_issues", [{"id": "1", "metadata": _meta(1, "Cache warmup", "warm cache at startup")}])
+
+            reopened = LexicalIndexStore(tmp)
+            matches = reopened.search("startup cache", ["a_issues"], top_k=3)
+            self.assertEqual([m["id"] for m in matches], ["1"])
+            self.assertEqual(matches[0]["metadata"]["issue_title"], "Cache warmup")
+            title_tokens, desc_tokens = reopened.tokens_for("a_issues", "1")
+            self.assertEqual(title_tokens, {"cache", "warmup"})
+            self.assertIn("startup", desc_tokens)
+            self.assertNotIn("boot", desc_tokens)
+
+
+class TestLexicalIndexStorePersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _ids(self, namespace="a_issues"):
+        index = LexicalIndexStore(self.tmp.name).get(namespace)
+        return sorted(doc_id for doc_id in index.doc_ids if doc_id is not None) if index else []
+
+    def test_deferred_batches_are_written_once_by_save(self):
+        store = LexicalIndexStore(self.tmp.name)
+        for batch in range(3):
+            store.add_documents(
+                "a_issues", [{"id": str(batch), "metadata": _meta(batch, "Cache", "warm cache")}], persist=False
+            )
+        self.assertEqual(self._ids(), [])
+        self.assertEqual(len(store.search("cache", ["a_issues"], top_k=5)), 3)
+
+        self.assertEqual(store.save(), 1)
+        self.assertEqual(self._ids(), ["0", "1", "2"])
+        self.assertEqual(store.save(), 0)
+
+    def test_writers_sharing_the_directory_keep_each_others_updates(self):
+        # Two stores stand in for two uvicorn workers, each with its own cached index.
+        first, second = LexicalIndexStore(self.tmp.name), LexicalIndexStore(self.tmp.name)
+        first.add_documents("a_issues", [{"id": "1", "metadata": _meta(1, "Login", "login bug")}])
+        second.add_documents("a_issues", [{"id": "2", "metadata": _meta(2, "Logout", "logout bug")}])
+        first.add_documents("a_issues", [{"id": "3", "metadata": _meta(3, "Signup", "signup bug")}])
+
+        self.assertEqual(self._ids(), ["1", "2", "3"])
+        self.assertEqual([n for n in os.listdir(self.tmp.name) if n.endswith(".tmp")], [])
+
+    def test_save_replays_deferred_docs_on_top_of_another_writer(self):
+        ingest, webhook = LexicalIndexStore(self.tmp.name), LexicalIndexStore(self.tmp.name)
+        ingest.add_documents("a_issues", [{"id": "1", "metadata": _meta(1, "Login", "login bug")}], persist=False)
+        webhook.add_documents("a_issues", [{"id": "2", "metadata": _meta(2, "Logout", "logout bug")}])
+        ingest.save()
+
+        self.assertEqual(self._ids(), ["1", "2"])
+
+
+class TestHybridRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.prev_dir = settings.RAG_LEXICAL_INDEX_DIR
+        self.tmp = tempfile.TemporaryDirectory()
+        settings.RAG_LEXICAL_INDEX_DIR = self.tmp.name
+
+    def tearDown(self):
+        settings.RAG_LEXICAL_INDEX_DIR = self.prev_dir
+        self.tmp.cleanup()
+
+    def test_lexical_only_hit_is_added_with_capped_score(self):
+        LexicalIndexStore(self.tmp.name).add_documents(
+            "a_issues",
+            [{"id": "issue:2", "metadata": _meta(2, "Kerberos keytab rotation", "kerberos keytab" + _LONG)}],
+        )
+        vs = _VectorOnlyStore(
+            [
+                {
+                    "id": "issue:1",
+                    "score": 0.8,
+                    "namespace": "a_issues",
+                    "metadata": _meta(1, "Login page", "login page" + _LONG),
+                }
+            ]
+        )
+
+        retriever = Retriever(vs)
+        result = retriever.get_similar_issues(
+            {"title": "Kerberos keytab rotation", "description": "rotate keytab", "repository": "org/a"}
+        )
+
+        by_issue = {item["issue_id"]: item for item in result}
+        self.assertIn(2, by_issue)
+        self.assertEqual(retriever.last_rag_usage["lexical_hits"], 1)
+        self.assertEqual(retriever.last_rag_usage["lexical_only_hits"], 1)
+
+    def test_fusion_caps_lexical_only_scores(self):
+        retriever = Retriever(_VectorOnlyStore([]))
+        fused = retriever._fuse_rrf(
+            [{"id": "v", "namespace": "a", "score": 0.9, "metadata": {}}],
+            [
+                {"id": "v", "namespace": "a", "score": 4.0, "metadata": {}},
+                {"id": "l", "namespace": "a", "score": 8.0, "metadata": {}},
+            ],
+        )
+
+        by_id = {m["id"]: m for m in fused}
+        self.assertEqual(by_id["v"]["score"], 0.9)
+        self.assertEqual(by_id["l"]["score"], settings.RAG_HYBRID_LEXICAL_SCORE_CEILING)
+        self.assertTrue(by_id["l"]["lexical_only"])
+        self.assertEqual(fused[0]["id"], "v")
+
+
+if __name__ == "__main__":
+    unittest.main()
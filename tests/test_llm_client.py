@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import unittest
+
+from ai.core import llm_client as lc
+from config.settings import settings
+
+
+class _Response:
+    def __init__(self, content: str, total: int):
+        self.content = content
+        self.usage_metadata = {"input_tokens": total - 1, "output_tokens": 1, "total_tokens": total}
+
+
+class _FakeChatModel:
+    def invoke(self, prompt, **_kwargs):
+        return _Response(f"echo:{prompt}", len(prompt))
+
+    async def ainvoke(self, prompt, **_kwargs):
+        return _Response(f"aecho:{prompt}", len(prompt))
+
+
+class _PlainLLM:
+    def send_prompt(self, prompt, **_kwargs):
+        return prompt.upper()
+
+    def get_last_token_usage(self):
+        return {"prompt_tokens": 2, "completion_tokens": 1, "total_tokens": 3}
+
+
+def _client() -> lc.LLMClient:
+    client = lc.LLMClient(api_key="dummy")
+    client.llm = _FakeChatModel()
+    return client
+
+
+class TestLLMClientPool(unittest.TestCase):
+    def setUp(self):
+        self._saved = dict(lc._client_pool)
+        lc._client_pool.clear()
+
+    def tearDown(self):
+        lc._client_pool.clear()
+        lc._client_pool.update(self._saved)
+
+    def test_reuses_one_client_per_configuration(self):
+        first = lc.get_llm_client(temperature=0.0)
+        self.assertIs(first, lc.get_llm_client(temperature=0.0))
+        self.assertIsNot(first, lc.get_llm_client(temperature=0.4))
+        self.assertEqual(len(lc._client_pool), 2)
+
+
+class TestLLMClientUsage(unittest.TestCase):
+    def setUp(self):
+        self._prev_cache_size = settings.LLM_RESPONSE_CACHE_SIZE
+        settings.LLM_RESPONSE_CACHE_SIZE = 0
+
+    def tearDown(self):
+        settings.LLM_RESPONSE_CACHE_SIZE = self._prev_cache_size
+
+    def test_usage_is_returned_per_call(self):
+        client = _client()
+        content, usage = client.send_prompt_with_usage("abcd")
+        self.assertEqual(content, "echo:abcd")
+        self.assertEqual(usage["total_tokens"], 4)
+
+        content, usage = asyncio.run(client.asend_prompt_with_usage("abcdef"))
+        self.assertEqual(content, "aecho:abcdef")
+        self.assertEqual(usage["total_tokens"], 6)
+
+    def test_last_token_usage_is_local_to_each_thread(self):
+        client = _client()
+        seen = {}
+        barrier = threading.Barrier(2)
+
+        def _call(prompt):
+            client.send_prompt(prompt)
+            barrier.wait(5)
+            seen[prompt] = client.get_last_token_usage()["total_tokens"]
+
+        threads = [threading.Thread(target=_call, args=(prompt,)) for prompt in ("ab", "abcdefgh")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(seen, {"ab": 2, "abcdefgh": 8})
+        self.assertEqual(client.get_last_token_usage()["total_tokens"], 0)
+
+    def test_send_with_usage_supports_plain_clients(self):
+        content, usage = lc.send_with_usage(_PlainLLM(), "hi")
+        self.assertEqual(content, "HI")
+        self.assertEqual(usage["total_tokens"], 3)
+
+        content, usage = lc.send_with_usage(_client(), "hi")
+        self.assertEqual(content, "echo:hi")
+        self.assertEqual(usage["total_tokens"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+import threading
+import time
+import unittest
+
+from ai.core.llm_dispatcher import LLMDispatcher
+
+
+_request_id = contextvars.ContextVar("request_id", default="")
+
+
+class TestLLMDispatcher(unittest.TestCase):
+    def _blocker(self, dispatcher: LLMDispatcher):
+        release = threading.Event()
+        started = threading.Event()
+
+        def _block():
+            started.set()
+            release.wait(5)
+
+        future = dispatcher.session().submit(_block)
+        self.assertTrue(started.wait(5))
+        return release, future
+
+    def test_global_cap_bounds_in_flight_calls(self):
+        dispatcher = LLMDispatcher(2)
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def _call():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.01)
+            with lock:
+                state["active"] -= 1
+
+        sessions = [dispatcher.session() for _ in range(3)]
+        futures = [session.submit(_call) for session in sessions for _ in range(4)]
+        for future in futures:
+            future.result(5)
+
+        self.assertEqual(state["peak"], 2)
+        stats = dispatcher.stats()
+        self.assertEqual(stats["submitted"], 12)
+        self.assertEqual(stats["completed"], 12)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_sessions_are_served_round_robin(self):
+        dispatcher = LLMDispatcher(1)
+        release, blocker = self._blocker(dispatcher)
+        order = []
+        first, second = dispatcher.session(), dispatcher.session()
+        futures = []
+        for idx in range(3):
+            futures.append(first.submit(order.append, f"a{idx}"))
+        for idx in range(3):
+            futures.append(second.submit(order.append, f"b{idx}"))
+        self.assertEqual(dispatcher.stats()["queue_depth"], 6)
+
+        time.sleep(0.01)
+        release.set()
+        blocker.result(5)
+        for future in futures:
+            future.result(5)
+        self.assertEqual(order, ["a0", "b0", "a1", "b1", "a2", "b2"])
+        self.assertGreater(first.stats()["queue_wait_ms"], 0)
+
+    def test_lane_share_limits_one_session(self):
+        dispatcher = LLMDispatcher(4)
+        session = dispatcher.session(lanes={"heuristic": 1})
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def _call():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.01)
+            with lock:
+                state["active"] -= 1
+
+        futures = [session.submit(_call, lane="heuristic") for _ in range(4)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(state["peak"], 1)
+
+    def test_propagates_results_exceptions_and_context(self):
+        dispatcher = LLMDispatcher(2)
+        session = dispatcher.session()
+
+        def _boom():
+            raise RuntimeError("boom")
+
+        _request_id.set("issue-42")
+        self.assertEqual(session.submit(_request_id.get).result(5), "issue-42")
+        self.assertEqual(session.submit(lambda x, y=0: x + y, 1, y=2).result(5), 3)
+        with self.assertRaises(RuntimeError):
+            session.submit(_boom).result(5)
+
+    def test_async_slots_share_the_budget_with_threads(self):
+        dispatcher = LLMDispatcher(2)
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def _enter():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+
+        def _leave():
+            with lock:
+                state["active"] -= 1
+
+        def _call():
+            _enter()
+            time.sleep(0.01)
+            _leave()
+
+        async def _acall():
+            async with dispatcher.aslot():
+                _enter()
+                await asyncio.sleep(0.01)
+                _leave()
+
+        async def run():
+            session = dispatcher.session()
+            futures = [session.submit(_call) for _ in range(6)]
+            await asyncio.gather(*(_acall() for _ in range(6)))
+            for future in futures:
+                await asyncio.wrap_future(future)
+
+        asyncio.run(run())
+        self.assertEqual(state["peak"], 2)
+        # A worker frees its slot just after resolving the future.
+        for _ in range(500):
+            if not dispatcher.stats()["in_flight"]:
+                break
+            time.sleep(0.002)
+        stats = dispatcher.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["async_waiters"], 0)
+
+    def test_cancelled_async_waiter_gives_up_its_turn(self):
+        dispatcher = LLMDispatcher(1)
+
+        async def run():
+            async with dispatcher.aslot():
+                waiter = asyncio.ensure_future(dispatcher.aslot().__aenter__())
+                await asyncio.sleep(0.01)
+                self.assertEqual(dispatcher.stats()["async_waiters"], 1)
+                self.assertFalse(dispatcher.try_acquire())
+                waiter.cancel()
+                await asyncio.sleep(0)
+            self.assertTrue(dispatcher.try_acquire())
+            dispatcher.release()
+
+        asyncio.run(run())
+        self.assertEqual(dispatcher.stats()["in_flight"], 0)
+
+    def test_rejects_non_positive_concurrency(self):
+        with self.assertRaises(ValueError):
+            LLMDispatcher(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
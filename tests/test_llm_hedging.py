@@ -0,0 +1,240 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from ai.core import llm_client as lc
+from ai.core import llm_hedging as lh
+from ai.core.llm_dispatcher import LLMDispatcher
+from ai.core.llm_hedging import HedgingPolicy
+from ai.workflows import estimation_graph as eg
+from config.settings import settings
+
+
+def _warm(policy: HedgingPolicy, latency: float, count: int) -> None:
+    for _ in range(count):
+        policy.record(latency)
+        policy.calls += 1
+
+
+class _Response:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 4, "output_tokens": 2, "total_tokens": 6}
+
+
+class _SlowFirstChatModel:
+    """First call hangs (tail latency); the duplicate answers right away."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.release = threading.Event()
+
+    def _attempt(self) -> int:
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    def invoke(self, prompt, **_kwargs):
+        if self._attempt() == 1:
+            self.release.wait(5)
+            return _Response("slow")
+        return _Response(f"fast:{prompt}")
+
+    async def ainvoke(self, prompt, **_kwargs):
+        if self._attempt() == 1:
+            await asyncio.sleep(5)
+            return _Response("slow")
+        return _Response(f"fast:{prompt}")
+
+
+class TestHedgingPolicy(unittest.TestCase):
+    def test_no_hedge_before_min_samples(self):
+        policy = HedgingPolicy(min_samples=3, min_delay_seconds=0.0)
+        self.assertIsNone(policy.hedge_delay())
+
+        result, hedged = policy.call(lambda: "ok")
+        self.assertEqual(result, "ok")
+        self.assertFalse(hedged)
+        self.assertEqual(policy.stats()["hedges"], 0)
+
+    def test_delay_is_latency_percentile_with_floor(self):
+        policy = HedgingPolicy(percentile=0.9, min_samples=10, min_delay_seconds=0.0)
+        for idx in range(10):
+            policy.record(idx / 10)
+        self.assertAlmostEqual(policy.hedge_delay(), 0.9)
+
+        floored = HedgingPolicy(min_samples=1, min_delay_seconds=2.0)
+        floored.record(0.1)
+        self.assertEqual(floored.hedge_delay(), 2.0)
+
+    def test_slow_call_is_hedged_and_duplicate_wins(self):
+        policy = HedgingPolicy(max_extra_ratio=0.5, min_samples=5, min_delay_seconds=0.0)
+        _warm(policy, 0.01, 5)
+        attempts = []
+        release = threading.Event()
+
+        def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                release.wait(5)
+                return "slow"
+            return "fast"
+
+        try:
+            result, hedged = policy.call(call)
+        finally:
+            release.set()
+        self.assertEqual(result, "fast")
+        self.assertTrue(hedged)
+        self.assertEqual(policy.stats()["hedge_wins"], 1)
+
+    def test_async_hedge_cancels_the_loser(self):
+        policy = HedgingPolicy(max_extra_ratio=0.5, min_samples=5, min_delay_seconds=0.0)
+        _warm(policy, 0.01, 5)
+        cancelled = []
+
+        async def run():
+            attempts = []
+
+            async def call():
+                attempts.append(1)
+                if len(attempts) == 1:
+                    try:
+                        await asyncio.sleep(5)
+                    except asyncio.CancelledError:
+                        cancelled.append(True)
+                        raise
+                return "fast"
+
+            out = await policy.acall(call)
+            await asyncio.sleep(0)
+            return out
+
+        result, hedged = asyncio.run(run())
+        self.assertEqual(result, "fast")
+        self.assertTrue(hedged)
+        self.assertEqual(cancelled, [True])
+
+    def test_budget_caps_extra_calls(self):
+        policy = HedgingPolicy(max_extra_ratio=0.05, min_samples=5, min_delay_seconds=0.0)
+        _warm(policy, 0.001, 5)
+
+        started = time.perf_counter()
+        result, hedged = policy.call(lambda: time.sleep(0.05) or "primary")
+        self.assertEqual(result, "primary")
+        self.assertFalse(hedged)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+        _warm(policy, 0.001, 14)
+        _, hedged = policy.call(lambda: time.sleep(0.3) or "primary")
+        self.assertTrue(hedged)
+        stats = policy.stats()
+        self.assertEqual(stats["hedges"], 1)
+        self.assertLessEqual(stats["hedge_rate"], 0.05)
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        policy = HedgingPolicy(max_extra_ratio=1.0, min_samples=1, min_delay_seconds=0.0)
+        _warm(policy, 0.001, 1)
+        attempts = []
+
+        def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                time.sleep(0.05)
+                return "primary"
+            raise RuntimeError("hedge failed")
+
+        result, hedged = policy.call(call)
+        self.assertEqual(result, "primary")
+        self.assertTrue(hedged)
+
+    def test_hedge_needs_an_idle_dispatcher_slot(self):
+        budget = LLMDispatcher(1)
+        policy = HedgingPolicy(max_extra_ratio=1.0, min_samples=1, min_delay_seconds=0.0, budget=budget)
+        _warm(policy, 0.001, 1)
+
+        self.assertTrue(budget.try_acquire())  # the caller's own slot: nothing idle
+        result, hedged = policy.call(lambda: time.sleep(0.05) or "primary")
+        budget.release()
+        self.assertEqual(result, "primary")
+        self.assertFalse(hedged)
+
+        attempts = []
+        release = threading.Event()
+
+        def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                release.wait(5)
+                return "slow"
+            return "fast"
+
+        try:
+            result, hedged = policy.call(call)
+            self.assertEqual(result, "fast")
+            self.assertTrue(hedged)
+            # The loser still runs: the hedge slot is held until it finishes.
+            self.assertEqual(budget.stats()["in_flight"], 1)
+        finally:
+            release.set()
+        deadline = time.monotonic() + 5
+        while budget.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(budget.stats()["in_flight"], 0)
+
+
+class TestLLMClientHedging(unittest.TestCase):
+    def setUp(self):
+        self._prev = (settings.LLM_RESPONSE_CACHE_SIZE, settings.LLM_HEDGING_ENABLED)
+        settings.LLM_RESPONSE_CACHE_SIZE = 0
+        settings.LLM_HEDGING_ENABLED = True
+        lh._default_policy = HedgingPolicy(max_extra_ratio=1.0, min_samples=1, min_delay_seconds=0.0)
+        _warm(lh._default_policy, 0.01, 1)
+        self.client = lc.LLMClient(api_key="dummy")
+        self.model = _SlowFirstChatModel()
+        self.client.llm = self.model
+
+    def tearDown(self):
+        self.model.release.set()
+        settings.LLM_RESPONSE_CACHE_SIZE, settings.LLM_HEDGING_ENABLED = self._prev
+        lh._default_policy = None
+
+    def test_sync_usage_reports_hedged_call(self):
+        content, usage = self.client.send_prompt_with_usage("p")
+        self.assertEqual(content, "fast:p")
+        self.assertEqual(usage["total_tokens"], 6)
+        self.assertEqual(usage["hedged_calls"], 1)
+
+    def test_async_usage_reports_hedged_call(self):
+        content, usage = asyncio.run(self.client.asend_prompt_with_usage("p"))
+        self.assertEqual(content, "fast:p")
+        self.assertEqual(usage["hedged_calls"], 1)
+
+    def test_disabled_hedging_calls_model_once(self):
+        settings.LLM_HEDGING_ENABLED = False
+        self.model.release.set()
+        content, usage = self.client.send_prompt_with_usage("p")
+        self.assertEqual(content, "slow")
+        self.assertNotIn("hedged_calls", usage)
+        self.assertEqual(self.model.calls, 1)
+
+
+class TestTokenUsageSummaryHedgeRate(unittest.TestCase):
+    def test_summary_reports_hedge_rate_over_model_calls(self):
+        state = {
+            "analogical": {"token_usage": {"total_tokens": 10}},
+            "complexity_review": {"token_usage": {"total_tokens": 10, "hedged_calls": 1}},
+            "agile_guard_review": {"token_usage": {"total_tokens": 0, "cached_calls": 1, "cached_tokens": 8}},
+            "critic_review": {"token_usage": {"total_tokens": 10}},
+            "heuristic_candidates": [{"token_usage": {"total_tokens": 10}}],
+        }
+        eg._finalize_flow_state(state, time.perf_counter())
+        summary = state["token_usage_summary"]
+        self.assertEqual(summary["llm_hedged_calls"], 1)
+        self.assertEqual(summary["llm_hedge_rate"], 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from ai.core import llm_client as lc
+from ai.core import llm_response_cache as lrc
+from ai.core.llm_response_cache import LLMResponseCache
+from config.settings import settings
+
+
+class _Response:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+
+class _CountingChatModel:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt, **_kwargs):
+        self.calls += 1
+        return _Response(f"answer:{prompt}")
+
+    async def ainvoke(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    def test_memory_tier_is_lru_bounded(self):
+        cache = LLMResponseCache(max_entries=2)
+        keys = [cache.make_key("m", 0.0, f"p{idx}") for idx in range(3)]
+        for key in keys:
+            cache.put(key, "content", {"total_tokens": 3})
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[2]), ("content", {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 3}))
+
+    def test_key_depends_on_model_kwargs_and_template_version(self):
+        cache = LLMResponseCache(template_version="1")
+        base = cache.make_key("m", 0.0, "prompt", {"max_tokens": 10})
+        self.assertEqual(base, cache.make_key("m", 0.0, "prompt", {"max_tokens": 10}))
+        self.assertNotEqual(base, cache.make_key("other", 0.0, "prompt", {"max_tokens": 10}))
+        self.assertNotEqual(base, cache.make_key("m", 0.0, "prompt", {"max_tokens": 20}))
+        self.assertNotEqual(base, LLMResponseCache(template_version="2").make_key("m", 0.0, "prompt", {"max_tokens": 10}))
+
+    def test_ttl_expires_entries(self):
+        now = [1000.0]
+        cache = LLMResponseCache(ttl_seconds=60, now_fn=lambda: now[0])
+        key = cache.make_key("m", 0.0, "p")
+        cache.put(key, "content", {})
+        now[0] += 59
+        self.assertIsNotNone(cache.get(key))
+        now[0] += 2
+        self.assertIsNone(cache.get(key))
+
+    def test_disk_tier_survives_restart_and_drops_old_template_versions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm.sqlite")
+            first = LLMResponseCache(path=path, template_version="1")
+            key = first.make_key("m", 0.0, "p")
+            first.put(key, "content", {"total_tokens": 7})
+
+            reopened = LLMResponseCache(path=path, template_version="1")
+            self.assertEqual(reopened.get(key)[0], "content")
+            self.assertEqual(reopened.stats()["disk_hits"], 1)
+
+            bumped = LLMResponseCache(path=path, template_version="2")
+            self.assertIsNone(bumped.get(key))
+            self.assertIsNone(LLMResponseCache(path=path, template_version="1").get(key))
+
+    def test_does_not_cache_empty_content(self):
+        cache = LLMResponseCache()
+        key = cache.make_key("m", 0.0, "p")
+        cache.put(key, "  ", {})
+        self.assertIsNone(cache.get(key))
+
+
+class TestLLMClientResponseCache(unittest.TestCase):
+    def setUp(self):
+        self._prev = (settings.LLM_RESPONSE_CACHE_SIZE, settings.LLM_RESPONSE_CACHE_PATH)
+        settings.LLM_RESPONSE_CACHE_SIZE = 8
+        settings.LLM_RESPONSE_CACHE_PATH = None
+        lrc._default_cache = None
+        self.client = lc.LLMClient(api_key="dummy")
+        self.model = _CountingChatModel()
+        self.client.llm = self.model
+
+    def tearDown(self):
+        settings.LLM_RESPONSE_CACHE_SIZE, settings.LLM_RESPONSE_CACHE_PATH = self._prev
+        lrc._default_cache = None
+
+    def test_temperature_zero_calls_are_served_from_cache_with_zero_tokens(self):
+        content, usage = self.client.send_prompt_with_usage("same prompt")
+        self.assertEqual(usage["total_tokens"], 15)
+
+        content_again, cached_usage = self.client.send_prompt_with_usage("same prompt")
+        self.assertEqual(content_again, content)
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(cached_usage["total_tokens"], 0)
+        self.assertEqual(cached_usage["cached_calls"], 1)
+        self.assertEqual(cached_usage["cached_tokens"], 15)
+
+        _, async_usage = asyncio.run(self.client.asend_prompt_with_usage("same prompt"))
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(async_usage["cached_calls"], 1)
+
+    def test_async_calls_touch_the_cache_off_the_event_loop(self):
+        cache = lrc.get_default_llm_response_cache()
+        threads = []
+
+        def _record(method):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return method(*args)
+
+            return wrapper
+
+        async def run():
+            loop_thread = threading.get_ident()
+            with patch.object(cache, "get", _record(cache.get)), patch.object(cache, "put", _record(cache.put)):
+                await self.client.asend_prompt_with_usage("async prompt")
+                await self.client.asend_prompt_with_usage("async prompt")
+            return loop_thread
+
+        loop_thread = asyncio.run(run())
+        self.assertEqual(self.model.calls, 1)
+        # get, put, get: none of them on the event loop's thread.
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_replies_rejected_by_validate_are_not_cached(self):
+        def _json_only(content):
+            raise ValueError(f"not json: {content}")
+
+        lc.send_with_usage(self.client, "truncated", validate=_json_only)
+        _, usage = lc.send_with_usage(self.client, "truncated", validate=_json_only)
+        self.assertEqual(self.model.calls, 2)
+        self.assertEqual(usage["total_tokens"], 15)
+
+        asyncio.run(lc.asend_with_usage(self.client, "valid", validate=len))
+        _, cached_usage = asyncio.run(lc.asend_with_usage(self.client, "valid", validate=len))
+        self.assertEqual(self.model.calls, 3)
+        self.assertEqual(cached_usage["cached_calls"], 1)
+
+    def test_non_zero_temperature_bypasses_cache(self):
+        self.client.send_prompt_with_usage("p", temperature=0.7)
+        self.client.send_prompt_with_usage("p", temperature=0.7)
+        self.assertEqual(self.model.calls, 2)
+
+    def test_disabled_cache_always_calls_model(self):
+        settings.LLM_RESPONSE_CACHE_SIZE = 0
+        self.client.send_prompt_with_usage("p")
+        self.client.send_prompt_with_usage("p")
+        self.assertEqual(self.model.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
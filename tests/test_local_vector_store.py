@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.local_vector_store import LocalVectorStoreClient, matches_where
+from ai.core.retriever import Retriever
+
+
+_VECTORS = {
+    "login bug": [1.0, 0.0, 0.0],
+    "login crash": [0.9, 0.1, 0.0],
+    "payment flow": [0.0, 1.0, 0.0],
+    "report export": [0.0, 0.0, 1.0],
+}
+
+
+def _embed(texts):
+    return [_VECTORS.get(text, [0.5, 0.5, 0.5]) for text in texts]
+
+
+def _doc(doc_id, namespace, text, hours):
+    return {
+        "id": doc_id,
+        "namespace": namespace,
+        "text": text,
+        "metadata": {"issue_id": doc_id, "total_effort_hours": hours, "description": "d" * 120},
+    }
+
+
+class TestLocalVectorStore(unittest.TestCase):
+    def _store(self, **kwargs):
+        store = LocalVectorStoreClient(embed_fn=_embed, **kwargs)
+        store._embedding_cache = None
+        return store
+
+    def test_upsert_and_search_ranks_by_cosine(self):
+        store = self._store()
+        result = store.upsert(
+            [
+                _doc("1", "a_issues", "login crash", 4),
+                _doc("2", "a_issues", "payment flow", 8),
+                _doc("3", "b_issues", "report export", 2),
+            ]
+        )
+
+        self.assertEqual(result["upserted"], 3)
+        self.assertEqual(sorted(store.list_namespaces()), ["a_issues", "b_issues"])
+
+        matches = store.semantic_search("login bug", namespaces=["a_issues", "b_issues"], top_k=1)
+        self.assertEqual([(m["id"], m["namespace"]) for m in matches], [("1", "a_issues"), ("3", "b_issues")])
+        self.assertGreater(matches[0]["score"], 0.99)
+
+    def test_upsert_replaces_existing_id(self):
+        store = self._store()
+        store.upsert([_doc("1", "a_issues", "payment flow", 4)])
+        store.upsert([_doc("1", "a_issues", "login crash", 6)])
+
+        matches = store.semantic_search("login bug", namespaces=["a_issues"], top_k=5)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0]["metadata"]["total_effort_hours"], 6)
+        self.assertGreater(matches[0]["score"], 0.99)
+
+    def test_where_filter_is_applied_before_top_k(self):
+        store = self._store()
+        store.upsert(
+            [
+                _doc("1", "a_issues", "login crash", 80),
+                _doc("2", "a_issues", "payment flow", 8),
+            ]
+        )
+        where = {"$and": [{"total_effort_hours": {"$gte": 1, "$lte": 40}}]}
+
+        matches = store.semantic_search("login bug", namespaces=["a_issues"], top_k=1, where=where)
+        self.assertEqual([m["id"] for m in matches], ["2"])
+
+    def test_matches_where_operators(self):
+        meta = {"hours": 5, "type": "bug", "description": "x"}
+        self.assertTrue(matches_where(meta, {"hours": {"$gt": 4, "$lt": 6}}))
+        self.assertTrue(matches_where(meta, {"type": {"$in": ["bug", "story"]}}))
+        self.assertFalse(matches_where(meta, {"type": {"$nin": ["bug"]}}))
+        self.assertTrue(matches_where(meta, {"$or": [{"type": "story"}, {"hours": 5}]}))
+        self.assertFalse(matches_where(meta, {"missing": {"$exists": True}}))
+        self.assertTrue(matches_where(meta, {"description": {"$exists": True, "$ne": ""}}))
+
+    def test_snapshot_roundtrip_and_append_on_upsert(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snapshot.jsonl")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(json.dumps({"namespace": "a_issues", "id": "1", "values": [1, 0, 0], "metadata": {}}) + "\n")
+
+            store = self._store(snapshot_path=path)
+            self.assertEqual(store.list_namespaces(), ["a_issues"])
+            store.upsert([_doc("2", "b_issues", "payment flow", 3)])
+
+            reopened = self._store(snapshot_path=path)
+            self.assertEqual(sorted(reopened.list_namespaces()), ["a_issues", "b_issues"])
+
+    def test_retriever_runs_against_local_store(self):
+        store = self._store()
+        store.upsert(
+            [
+                _doc("1", "a_issues", "login crash", 4),
+                _doc("2", "a_issues", "payment flow", 8),
+            ]
+        )
+        # Query text built by the retriever is unknown to the fake embedder -> uniform vector.
+        result = Retriever(store).get_similar_issues(
+            {"title": "Issue", "description": "Desc", "repository": "org/a"}
+        )
+        self.assertEqual({str(item["issue_id"]) for item in result}, {"1", "2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.namespace_catalog import (
+    NamespaceCatalog,
+    get_namespace_catalog,
+    invalidate_namespace_catalogs,
+)
+from ai.core.retriever import Retriever
+from config.settings import settings
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeVectorStore:
+    def __init__(self, namespaces):
+        self.namespaces = list(namespaces)
+        self.list_calls = 0
+        self.refreshed = threading.Event()
+
+    def list_namespaces(self):
+        self.list_calls += 1
+        self.refreshed.set()
+        return list(self.namespaces)
+
+    def semantic_search(self, text, namespaces, top_k=8, where=None):
+        return []
+
+
+class TestNamespaceCatalog(unittest.TestCase):
+    def test_serves_cached_list_within_ttl(self):
+        vs = _FakeVectorStore(["a_issues"])
+        clock = _Clock()
+        catalog = NamespaceCatalog(vs, ttl_seconds=60, now_fn=clock)
+
+        self.assertEqual(catalog.get(), ["a_issues"])
+        clock.now = 30
+        self.assertEqual(catalog.get(), ["a_issues"])
+        self.assertEqual(vs.list_calls, 1)
+
+    def test_expired_catalog_serves_stale_and_refreshes_in_background(self):
+        vs = _FakeVectorStore(["a_issues"])
+        clock = _Clock()
+        catalog = NamespaceCatalog(vs, ttl_seconds=60, now_fn=clock)
+        catalog.get()
+
+        vs.namespaces = ["a_issues", "b_issues"]
+        vs.refreshed.clear()
+        clock.now = 61
+        self.assertEqual(catalog.get(), ["a_issues"])
+        self.assertTrue(vs.refreshed.wait(timeout=2))
+
+        for _ in range(100):
+            if not catalog._refreshing:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(catalog.get(), ["a_issues", "b_issues"])
+        self.assertEqual(vs.list_calls, 2)
+
+    def test_empty_discovery_does_not_replace_cached_list(self):
+        vs = _FakeVectorStore(["a_issues"])
+        clock = _Clock()
+        catalog = NamespaceCatalog(vs, ttl_seconds=60, now_fn=clock)
+        catalog.get()
+
+        vs.namespaces = []
+        catalog._refresh()
+        self.assertEqual(catalog.get(), ["a_issues"])
+
+    def test_invalidate_adds_new_namespace_immediately(self):
+        vs = _FakeVectorStore(["a_issues"])
+        clock = _Clock()
+        catalog = NamespaceCatalog(vs, ttl_seconds=60, now_fn=clock)
+        catalog.get()
+
+        catalog.invalidate("New_Issues")
+        self.assertIn("new_issues", catalog._namespaces)
+        self.assertGreaterEqual(clock.now - catalog._loaded_at, 60)
+
+
+class TestRetrieverUsesNamespaceCatalog(unittest.TestCase):
+    def setUp(self):
+        self.prev_ttl = settings.RAG_NAMESPACE_CACHE_TTL_SECONDS
+
+    def tearDown(self):
+        settings.RAG_NAMESPACE_CACHE_TTL_SECONDS = self.prev_ttl
+
+    def test_discovery_runs_once_across_requests(self):
+        settings.RAG_NAMESPACE_CACHE_TTL_SECONDS = 300
+        vs = _FakeVectorStore(["a_issues"])
+
+        for _ in range(3):
+            Retriever(vs).get_similar_issues({"title": "Issue", "description": "Desc"})
+
+        self.assertEqual(vs.list_calls, 1)
+
+    def test_disabled_ttl_lists_every_request(self):
+        settings.RAG_NAMESPACE_CACHE_TTL_SECONDS = 0
+        vs = _FakeVectorStore(["a_issues"])
+
+        for _ in range(2):
+            Retriever(vs).get_similar_issues({"title": "Issue", "description": "Desc"})
+
+        self.assertEqual(vs.list_calls, 2)
+
+    def test_invalidation_reaches_shared_catalog(self):
+        settings.RAG_NAMESPACE_CACHE_TTL_SECONDS = 300
+        vs = _FakeVectorStore(["a_issues"])
+        catalog = get_namespace_catalog(vs)
+        catalog.get()
+
+        invalidate_namespace_catalogs("b_issues")
+
+        self.assertIn("b_issues", catalog._namespaces)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.embedding_cache import EmbeddingCache
+from ai.core.local_vector_store import LocalVectorStoreClient
+from ai.core.namespace_router import NamespaceRouter
+from ai.core.retriever import Retriever
+from config.settings import settings
+
+
+def _router():
+    router = NamespaceRouter()
+    router.observe("auth_issues", [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0]], [{"total_effort_hours": 3}])
+    router.observe("pay_issues", [[0.0, 1.0, 0.0]], [{"total_effort_hours": 30}])
+    router.observe("ui_issues", [[0.0, 0.0, 1.0]], [{"total_effort_hours": 100}])
+    return router
+
+
+class TestNamespaceRouter(unittest.TestCase):
+    def test_routes_to_closest_centroids_plus_keep(self):
+        router = _router()
+        routed = router.route(
+            [1.0, 0.05, 0.0],
+            ["auth_issues", "pay_issues", "ui_issues"],
+            top_n=1,
+            keep=["ui_issues"],
+        )
+        self.assertEqual(routed, ["auth_issues", "ui_issues"])
+
+    def test_margin_and_unknown_namespaces_are_kept(self):
+        router = _router()
+        routed = router.route(
+            [0.7, 0.7, 0.0],
+            ["auth_issues", "pay_issues", "ui_issues", "new_issues"],
+            top_n=1,
+            margin=0.1,
+        )
+        self.assertEqual(routed, ["auth_issues", "pay_issues", "new_issues"])
+
+    def test_effort_histogram_and_persistence(self):
+        router = _router()
+        self.assertEqual(router.effort_histogram("pay_issues")[-2], 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "router.json")
+            router.save(path)
+            loaded = NamespaceRouter.load(path)
+        self.assertEqual(
+            loaded.route([0.0, 1.0, 0.0], ["auth_issues", "pay_issues", "ui_issues"], top_n=1),
+            ["pay_issues"],
+        )
+        self.assertEqual(loaded.effort_histogram("ui_issues"), router.effort_histogram("ui_issues"))
+
+
+class TestRetrieverRouting(unittest.TestCase):
+    def setUp(self):
+        self.prev = (
+            settings.RAG_NAMESPACE_ROUTER_ENABLED,
+            settings.RAG_NAMESPACE_ROUTER_TOP_N,
+            settings.RAG_NAMESPACE_ROUTER_MARGIN,
+        )
+        settings.RAG_NAMESPACE_ROUTER_ENABLED = True
+        settings.RAG_NAMESPACE_ROUTER_TOP_N = 1
+        settings.RAG_NAMESPACE_ROUTER_MARGIN = 0.0
+
+    def tearDown(self):
+        (
+            settings.RAG_NAMESPACE_ROUTER_ENABLED,
+            settings.RAG_NAMESPACE_ROUTER_TOP_N,
+            settings.RAG_NAMESPACE_ROUTER_MARGIN,
+        ) = self.prev
+
+    def _store(self, embedding_cache=None):
+        vectors = {"auth": [1.0, 0.0, 0.0], "pay": [0.0, 1.0, 0.0], "ui": [0.0, 0.0, 1.0]}
+
+        def embed(texts):
+            return [next((v for k, v in vectors.items() if k in text.lower()), [1.0, 0.0, 0.0]) for text in texts]
+
+        store = LocalVectorStoreClient(embed_fn=embed)
+        store._embedding_cache = embedding_cache
+        meta = {"total_effort_hours": 5, "description": "d" * 120}
+        store.upsert(
+            [
+                {"id": f"{ns}-1", "namespace": f"{ns}_issues", "text": ns, "metadata": {**meta, "issue_id": i}}
+                for i, ns in enumerate(vectors)
+            ]
+        )
+        return store
+
+    def _usage(self, store):
+        retriever = Retriever(store)
+        retriever.get_similar_issues({"title": "auth token", "description": "Desc", "repository": "org/ui"})
+        return retriever.last_rag_usage
+
+    def test_local_store_queries_only_routed_namespaces(self):
+        usage = self._usage(self._store())
+        self.assertEqual(usage["total_namespaces"], 3)
+        self.assertEqual(usage["routed_namespaces"], 2)
+        self.assertEqual(set(usage["namespace_latency_ms"]), {"auth_issues", "ui_issues"})
+
+    def test_routing_and_search_embeddings_are_counted_separately(self):
+        # Without the embedding cache the search embeds the query again.
+        self.assertEqual(self._usage(self._store())["embedding_calls"], 2)
+
+        usage = self._usage(self._store(EmbeddingCache()))
+        self.assertEqual(usage["embedding_calls"], 1)
+        self.assertTrue(usage["embedding_cache_hit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
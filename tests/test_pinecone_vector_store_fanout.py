@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.pinecone_vector_store import PineconeVectorStoreClient
+from ai.core.retriever import Retriever
+from config.settings import settings
+
+
+class _EmbItem:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+
+class _EmbResp:
+    def __init__(self, embeddings):
+        self.data = [_EmbItem(e) for e in embeddings]
+
+
+class _SlowIndex:
+    """Simula latências por namespace e registra a concorrência observada."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.request_timeouts = []
+
+    def query(self, vector, top_k, namespace, include_metadata, filter, _request_timeout=None):
+        self.request_timeouts.append(_request_timeout)
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(namespace, 0.0))
+            return {
+                "matches": [
+                    {
+                        "id": f"{namespace}:1",
+                        "score": 0.9,
+                        "metadata": {"issue_id": namespace, "description": "a" * 120},
+                    }
+                ]
+            }
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _client(index) -> PineconeVectorStoreClient:
+    client = PineconeVectorStoreClient.__new__(PineconeVectorStoreClient)
+    client._ready = True
+    client._index = index
+    openai = Mock()
+    openai.embeddings.create = Mock(return_value=_EmbResp([[0.1, 0.2]]))
+    client._openai = openai
+    client._embedding_cache = None
+    client._query_executor = PineconeVectorStoreClient._build_query_executor()
+    return client
+
+
+class TestPineconeVectorStoreFanout(unittest.TestCase):
+    def setUp(self):
+        self.prev_concurrency = settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY
+        self.prev_timeout = settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS
+
+    def tearDown(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = self.prev_concurrency
+        settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS = self.prev_timeout
+
+    def test_parallel_fanout_queries_namespaces_concurrently(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = 4
+        settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS = 2.0
+        namespaces = ["a_issues", "b_issues", "c_issues", "d_issues"]
+        index = _SlowIndex({ns: 0.05 for ns in namespaces})
+        client = _client(index)
+
+        result = client.search_with_stats("query", namespaces=namespaces, top_k=3)
+
+        self.assertEqual([m["namespace"] for m in result.matches], namespaces)
+        self.assertGreater(index.max_in_flight, 1)
+        self.assertEqual(set(result.namespace_latency_ms), set(namespaces))
+        self.assertEqual(result.timed_out_namespaces, [])
+        self.assertEqual(index.request_timeouts, [2.0] * 4)
+
+    def test_slow_namespace_is_dropped_and_partial_results_returned(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = 4
+        settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS = 0.1
+        index = _SlowIndex({"fast_issues": 0.0, "slow_issues": 0.5})
+        client = _client(index)
+
+        result = client.search_with_stats("query", namespaces=["fast_issues", "slow_issues"], top_k=3)
+
+        self.assertEqual([m["namespace"] for m in result.matches], ["fast_issues"])
+        self.assertEqual(result.timed_out_namespaces, ["slow_issues"])
+        self.assertIn("fast_issues", result.namespace_latency_ms)
+        self.assertNotIn("slow_issues", result.namespace_latency_ms)
+
+    def test_budget_starts_when_the_query_starts_on_a_shared_pool(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = 2
+        settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS = 0.15
+        index = _SlowIndex({"slow_issues": 0.4, "a_issues": 0.1, "b_issues": 0.1, "c_issues": 0.1, "d_issues": 0.1})
+        client = _client(index)
+
+        # Two searches share the 2-thread pool, so some queries wait ~0.1s before starting;
+        # only the namespace that is itself slow may time out, and only in its own search.
+        with ThreadPoolExecutor(max_workers=2) as callers:
+            slow = callers.submit(client.search_with_stats, "q", ["slow_issues", "a_issues"], 3)
+            time.sleep(0.01)
+            other = callers.submit(client.search_with_stats, "q", ["b_issues", "c_issues", "d_issues"], 3)
+            slow, other = slow.result(), other.result()
+
+        self.assertEqual(slow.timed_out_namespaces, ["slow_issues"])
+        self.assertEqual(other.timed_out_namespaces, [])
+        self.assertEqual([m["namespace"] for m in other.matches], ["b_issues", "c_issues", "d_issues"])
+
+    def test_failed_namespace_is_reported(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = 4
+        settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS = 2.0
+        index = _SlowIndex({})
+        query = index.query
+
+        def flaky_query(vector, top_k, namespace, include_metadata, filter, **kwargs):
+            if namespace == "broken_issues":
+                raise RuntimeError("boom")
+            return query(vector, top_k, namespace, include_metadata, filter, **kwargs)
+
+        index.query = flaky_query
+        client = _client(index)
+
+        result = client.search_with_stats("query", namespaces=["ok_issues", "broken_issues"], top_k=3)
+
+        self.assertEqual([m["namespace"] for m in result.matches], ["ok_issues"])
+        self.assertEqual(result.failed_namespaces, ["broken_issues"])
+        self.assertEqual(result.timed_out_namespaces, [])
+
+    def test_sequential_mode_when_concurrency_is_one(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = 1
+        index = _SlowIndex({})
+        client = _client(index)
+
+        result = client.search_with_stats("query", namespaces=["a_issues", "b_issues"], top_k=3)
+
+        self.assertEqual(len(result.matches), 2)
+        self.assertEqual(index.max_in_flight, 1)
+        self.assertEqual(set(result.namespace_latency_ms), {"a_issues", "b_issues"})
+
+    def test_retriever_reports_namespace_latency(self):
+        settings.RAG_NAMESPACE_QUERY_MAX_CONCURRENCY = 4
+        settings.RAG_NAMESPACE_QUERY_TIMEOUT_SECONDS = 0.1
+        index = _SlowIndex({"fast_issues": 0.0, "slow_issues": 0.5})
+        client = _client(index)
+        client.list_namespaces = lambda: ["fast_issues", "slow_issues"]
+
+        retriever = Retriever(client)
+        retriever.get_similar_issues({"title": "Issue", "description": "Desc"})
+
+        usage = retriever.last_rag_usage
+        self.assertIn("fast_issues", usage["namespace_latency_ms"])
+        self.assertEqual(usage["timed_out_namespaces"], ["slow_issues"])
+
+
+if __name__ == "__main__":
+    unittest.main()
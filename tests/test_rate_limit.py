@@ -1,12 +1,14 @@
 import asyncio
 import os
 import sys
+import tempfile
 import unittest
 from datetime import datetime, timezone
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
-from web.rate_limit import InMemoryDailyRateLimiter
+from fake_redis import FakeRedis
+from web.rate_limit import InMemoryDailyRateLimiter, RedisDailyRateLimiter, SQLiteDailyRateLimiter
 
 
 def _epoch(dt: datetime) -> float:
@@ -77,6 +79,92 @@ class TestInMemoryDailyRateLimiter(unittest.TestCase):
 
         asyncio.run(run())
 
+    def test_expired_counters_and_markers_are_dropped(self):
+        clock = {"now": _epoch(datetime(2026, 4, 11, 12, 0, 0, tzinfo=timezone.utc))}
+        limiter = InMemoryDailyRateLimiter(limit_default=10, now_fn=lambda: clock["now"], max_retention_seconds=3600)
+
+        async def run():
+            for idx in range(100):
+                await limiter.check_and_increment(f"installation:{idx}")
+                await limiter.should_notify_once(f"notify:{idx}")
+            # Past the markers' expiry, still within the counters' retention.
+            clock["now"] += 3601
+            await limiter.check_and_increment("installation:0")
+            self.assertEqual(len(limiter._counters), 100)
+            self.assertEqual(len(limiter._notify_expiry), 0)
+
+            # Past midnight + retention: only the fresh counter is left.
+            clock["now"] = _epoch(datetime(2026, 4, 12, 1, 0, 1, tzinfo=timezone.utc))
+            await limiter.check_and_increment("installation:new")
+            self.assertEqual(set(limiter._counters), {"installation:new"})
+
+        asyncio.run(run())
+
+
+class _SharedLimiterContract:
+    """Two workers sharing a backend enforce one daily limit between them."""
+
+    def make_limiters(self, now_fn, limit):
+        raise NotImplementedError
+
+    def test_limit_is_shared_across_workers_and_resets_at_midnight(self):
+        clock = {"now": _epoch(datetime(2026, 4, 11, 23, 0, 0, tzinfo=timezone.utc))}
+        worker_a, worker_b = self.make_limiters(lambda: clock["now"], 3)
+
+        async def run():
+            decisions = await asyncio.gather(
+                *[(worker_a if idx % 2 else worker_b).check_and_increment("installation:1") for idx in range(5)]
+            )
+            self.assertEqual([d.allowed for d in decisions].count(True), 3)
+            blocked = await worker_a.check_and_increment("installation:1")
+            self.assertFalse(blocked.allowed)
+            self.assertEqual((blocked.count, blocked.remaining), (3, 0))
+            self.assertEqual(blocked.reset_at_iso_utc, "2026-04-12T00:00:00Z")
+
+            clock["now"] = _epoch(datetime(2026, 4, 12, 0, 1, 0, tzinfo=timezone.utc))
+            fresh = await worker_b.check_and_increment("installation:1")
+            self.assertTrue(fresh.allowed)
+            self.assertEqual((fresh.count, fresh.remaining), (1, 2))
+
+        asyncio.run(run())
+
+    def test_should_notify_once_across_workers(self):
+        now = _epoch(datetime(2026, 4, 11, 12, 0, 0, tzinfo=timezone.utc))
+        worker_a, worker_b = self.make_limiters(lambda: now, 10)
+
+        async def run():
+            self.assertTrue(await worker_a.should_notify_once("notify:1:2026-04-11:ISSUE_NODE"))
+            self.assertFalse(await worker_b.should_notify_once("notify:1:2026-04-11:ISSUE_NODE"))
+
+        asyncio.run(run())
+
+
+class TestSQLiteDailyRateLimiter(_SharedLimiterContract, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_limiters(self, now_fn, limit):
+        path = os.path.join(self.tmp.name, "webhook_state.sqlite3")
+        return tuple(SQLiteDailyRateLimiter(path, limit_default=limit, now_fn=now_fn) for _ in range(2))
+
+    def test_expiry_sweeps_use_an_index(self):
+        limiter, _ = self.make_limiters(lambda: 0.0, 10)
+        for sql in (
+            "DELETE FROM webhook_rate_counters WHERE reset_at < 0",
+            "DELETE FROM webhook_rate_notify WHERE expires_at < 0",
+        ):
+            plan = " ".join(row[-1] for row in limiter._conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            self.assertRegex(plan, r"^SEARCH .* USING (COVERING )?INDEX")
+
+
+class TestRedisDailyRateLimiter(_SharedLimiterContract, unittest.TestCase):
+    def make_limiters(self, now_fn, limit):
+        client = FakeRedis(now_fn=now_fn)
+        return tuple(RedisDailyRateLimiter(client, limit_default=limit, now_fn=now_fn) for _ in range(2))
+
 
 if __name__ == "__main__":
     unittest.main()
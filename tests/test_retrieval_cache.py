@@ -0,0 +1,140 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.local_vector_store import LocalVectorStoreClient
+from ai.core.retrieval_cache import RetrievalCache, bump_namespace_versions, namespace_versions
+from ai.core.retriever import Retriever
+from config.settings import settings
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _embed(texts):
+    return [[1.0, 0.0] if "login" in text.lower() else [0.0, 1.0] for text in texts]
+
+
+def _doc(doc_id, namespace, text):
+    return {
+        "id": doc_id,
+        "namespace": namespace,
+        "text": text,
+        "metadata": {"issue_id": doc_id, "total_effort_hours": 5, "description": text + " " + "d" * 120},
+    }
+
+
+class _CountingStore(LocalVectorStoreClient):
+    def __init__(self):
+        super().__init__(embed_fn=_embed)
+        self._embedding_cache = None
+        self.search_calls = 0
+
+    def search_with_stats(self, *args, **kwargs):
+        self.search_calls += 1
+        return super().search_with_stats(*args, **kwargs)
+
+
+class TestRetrievalCache(unittest.TestCase):
+    def test_entry_is_dropped_when_namespace_version_changes(self):
+        cache = RetrievalCache(max_entries=4)
+        key = cache.make_key("q", ["rc_a_issues", "rc_b_issues"], 10)
+        cache.put(key, namespace_versions(["rc_a_issues", "rc_b_issues"]), [{"id": 1}], {})
+
+        self.assertEqual(cache.get(key)[0], [{"id": 1}])
+        bump_namespace_versions(["rc_b_issues"])
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats()["stale"], 1)
+
+    def test_ttl_and_key_ignores_namespace_order(self):
+        clock = _Clock()
+        cache = RetrievalCache(max_entries=4, ttl_seconds=10, now_fn=clock)
+        key = cache.make_key("q", ["rc_x_issues", "rc_y_issues"], 10)
+        self.assertEqual(key, cache.make_key("q", ["rc_y_issues", "rc_x_issues"], 10))
+        cache.put(key, {}, [], {})
+
+        clock.now = 11
+        self.assertIsNone(cache.get(key))
+
+    def test_returned_results_are_copies(self):
+        cache = RetrievalCache(max_entries=4)
+        cache.put("k", {}, [{"id": 1}], {})
+        cache.get("k")[0][0]["id"] = 2
+        self.assertEqual(cache.get("k")[0], [{"id": 1}])
+
+
+class TestRetrieverUsesRetrievalCache(unittest.TestCase):
+    def setUp(self):
+        self.prev_size = settings.RAG_RETRIEVAL_CACHE_SIZE
+        settings.RAG_RETRIEVAL_CACHE_SIZE = 16
+
+    def tearDown(self):
+        settings.RAG_RETRIEVAL_CACHE_SIZE = self.prev_size
+
+    def test_repeat_estimation_hits_cache_until_upsert(self):
+        store = _CountingStore()
+        store.upsert([_doc("1", "rcache_issues", "login crash")])
+        issue = {"title": "Login bug", "description": "Desc", "repository": "org/rcache"}
+
+        first = Retriever(store)
+        first_result = first.get_similar_issues(issue)
+        second = Retriever(store)
+        second_result = second.get_similar_issues(issue)
+
+        self.assertEqual(store.search_calls, 1)
+        self.assertEqual(second_result, first_result)
+        self.assertTrue(second.last_rag_usage["retrieval_cache_hit"])
+        self.assertEqual(second.last_rag_usage["embedding_calls"], 0)
+
+        store.upsert([_doc("2", "rcache_issues", "login timeout")])
+        third = Retriever(store)
+        third_result = third.get_similar_issues(issue)
+
+        self.assertEqual(store.search_calls, 2)
+        self.assertFalse(third.last_rag_usage["retrieval_cache_hit"])
+        self.assertEqual(len(third_result), 2)
+
+    def test_partial_results_are_not_cached(self):
+        store = _CountingStore()
+        store.upsert([_doc("1", "rcache3_issues", "login crash")])
+        issue = {"title": "Login bug", "description": "Desc", "repository": "org/rcache3"}
+        search = store.search_with_stats
+
+        def timing_out_search(*args, **kwargs):
+            result = search(*args, **kwargs)
+            result.timed_out_namespaces = ["slow_issues"]
+            return result
+
+        store.search_with_stats = timing_out_search
+        first = Retriever(store)
+        first.get_similar_issues(issue)
+        self.assertEqual(first.last_rag_usage["timed_out_namespaces"], ["slow_issues"])
+
+        store.search_with_stats = search
+        second = Retriever(store)
+        second.get_similar_issues(issue)
+
+        self.assertEqual(store.search_calls, 2)
+        self.assertFalse(second.last_rag_usage["retrieval_cache_hit"])
+
+    def test_disabled_cache_searches_every_time(self):
+        settings.RAG_RETRIEVAL_CACHE_SIZE = 0
+        store = _CountingStore()
+        store.upsert([_doc("1", "rcache2_issues", "login crash")])
+        issue = {"title": "Login bug", "description": "Desc", "repository": "org/rcache2"}
+
+        Retriever(store).get_similar_issues(issue)
+        Retriever(store).get_similar_issues(issue)
+
+        self.assertEqual(store.search_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core.rag_normalizer import normalize_match
+from ai.core.rag_ranker import rerank_issue_context
+from ai.core.token_fingerprint import (
+    PINECONE_METADATA_LIMIT_BYTES,
+    build_fingerprint_metadata,
+    decode_fingerprint,
+    encode_fingerprint,
+    metadata_size,
+    text_fingerprint,
+    token_ids,
+    tokenize_text,
+)
+
+
+class TestTokenFingerprint(unittest.TestCase):
+    def test_encode_decode_roundtrip(self):
+        ids = token_ids(["login", "crash", "login"])
+        self.assertEqual(decode_fingerprint(encode_fingerprint(ids)), ids)
+        self.assertEqual(len(encode_fingerprint(ids)), 16)
+
+    def test_fingerprint_matches_ranker_tokenization(self):
+        self.assertEqual(
+            decode_fingerprint(text_fingerprint("Fix: Login-page crash on iOS")),
+            token_ids(tokenize_text("fix login page crash ios")),
+        )
+
+    def test_metadata_uses_normalized_title_and_description(self):
+        meta = {"issue_title": "Login crash", "description": "App crashes at login", "total_effort_hours": 3}
+        fps = build_fingerprint_metadata(meta)
+        self.assertEqual(decode_fingerprint(fps["title_fp"]), token_ids(["login", "crash"]))
+        self.assertIn("desc_fp", fps)
+        self.assertEqual(build_fingerprint_metadata({}), {})
+
+    def test_large_description_drops_fingerprint_under_metadata_limit(self):
+        # ~29KB of text, ~24KB of fingerprint: together over Pinecone's 40KB.
+        body = " ".join(f"token{idx}" for idx in range(3000))
+        meta = {"issue_title": "Login crash", "description": body, "total_effort_hours": 3}
+        fps = build_fingerprint_metadata(meta)
+
+        self.assertNotIn("desc_fp", fps)
+        self.assertIn("title_fp", fps)
+        self.assertLessEqual(metadata_size({**meta, **fps}), PINECONE_METADATA_LIMIT_BYTES)
+        # Without the fingerprint the reranker tokenizes the description instead.
+        item = normalize_match({"id": "1", "score": 0.8, "namespace": "a_issues", "metadata": {**meta, **fps}})
+        ranked = rerank_issue_context([item], {"title": "Login crash", "description": "token1 token2"})[0]
+        self.assertGreater(ranked["desc_overlap"], 0)
+
+    def test_rerank_from_fingerprints_matches_text_path(self):
+        meta = {
+            "issue_id": 1,
+            "issue_title": "Login crash on mobile",
+            "description": "The app crashes when the user logs in from mobile",
+            "issue_type": "Bug",
+        }
+        payload = {"title": "Mobile login crash", "description": "crash during login on mobile app"}
+        plain = normalize_match({"id": "1", "score": 0.8, "namespace": "a_issues", "metadata": meta})
+        fingerprinted = normalize_match(
+            {
+                "id": "1",
+                "score": 0.8,
+                "namespace": "a_issues",
+                "metadata": {**meta, **build_fingerprint_metadata(meta)},
+            }
+        )
+        # The fingerprint path must not look at the text at all.
+        fingerprinted["title"] = "unrelated words"
+        fingerprinted["description"] = "unrelated words"
+
+        from_text = rerank_issue_context([plain], payload)[0]
+        from_fp = rerank_issue_context([fingerprinted], payload)[0]
+
+        self.assertGreater(from_text["title_overlap"], 0)
+        self.assertEqual(from_fp["title_overlap"], from_text["title_overlap"])
+        self.assertEqual(from_fp["desc_overlap"], from_text["desc_overlap"])
+        self.assertEqual(from_fp["rerank_score"], from_text["rerank_score"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from ai.core import vector_snapshot
+from ai.core.local_vector_store import LocalVectorStoreClient
+from ai.core.rag_normalizer import normalize_match
+from ai.core.vector_snapshot import VectorSnapshot, quantize_rows, write_vector_snapshot
+
+
+def _embed(texts):
+    return [[1.0, 0.0, 0.0] if "login" in text else [0.0, 1.0, 0.0] for text in texts]
+
+
+def _records():
+    return [
+        {
+            "namespace": "a_issues",
+            "id": "1",
+            "values": [1.0, 0.05, 0.0],
+            "metadata": {
+                "issue_id": 1,
+                "total_effort_hours": 5,
+                "issue_type": "Bug",
+                "labels": ["auth", "ui"],
+                "description": "login page crashes " * 10,
+            },
+        },
+        {
+            "namespace": "a_issues",
+            "id": "2",
+            "values": [0.0, 1.0, 0.0],
+            "metadata": {"issue_id": 2, "total_effort_hours": 60, "description": "payment"},
+        },
+        {
+            "namespace": "b_issues",
+            "id": "3",
+            "values": [0.7, 0.7, 0.0],
+            "metadata": {"issue_id": 3, "total_effort_hours": 3},
+        },
+    ]
+
+
+class TestVectorSnapshot(unittest.TestCase):
+    def test_quantization_preserves_cosine(self):
+        rng = np.random.default_rng(7)
+        matrix = rng.normal(size=(50, 64)).astype(np.float32)
+        codes, scales = quantize_rows(matrix)
+        approx = codes.astype(np.float32) * scales[:, None]
+        exact = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        query = exact[0]
+        self.assertLess(np.max(np.abs(approx @ query - exact @ query)), 0.02)
+
+    def test_roundtrip_layout_and_metadata(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_vector_snapshot(tmp, _records())
+            snapshot = VectorSnapshot(tmp)
+
+            self.assertEqual(snapshot.dim, 3)
+            self.assertEqual(snapshot.count, 3)
+            self.assertEqual(sorted(snapshot.namespaces()), ["a_issues", "b_issues"])
+            self.assertEqual(snapshot.namespace_range("b_issues"), (2, 3))
+            self.assertIsInstance(snapshot.codes, np.memmap)
+
+            meta = snapshot.metadata_row(2)
+            self.assertEqual(meta, {"issue_id": 3, "total_effort_hours": 3})
+
+            normalized = normalize_match({"id": "1", "namespace": "a_issues", "metadata": snapshot.metadata_row(0)})
+            self.assertEqual(normalized["total_effort_hours"], 5)
+            self.assertEqual(normalized["issue_type"], "Bug")
+            self.assertEqual(normalized["labels"], ["auth", "ui"])
+            self.assertTrue(normalized["description"].startswith("login page"))
+
+    def test_scores_are_computed_in_bounded_chunks(self):
+        rng = np.random.default_rng(3)
+        records = [
+            {"namespace": "a_issues", "id": str(idx), "values": rng.normal(size=8).tolist(), "metadata": {}}
+            for idx in range(10)
+        ]
+        query = rng.normal(size=8).astype(np.float32)
+        query /= np.linalg.norm(query)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_vector_snapshot(tmp, records)
+            snapshot = VectorSnapshot(tmp)
+            expected = (snapshot.codes[1:9].astype(np.float32) @ query) * snapshot.scales[1:9]
+
+            converted = []
+            to_float = np.asarray
+
+            def tracking_asarray(value, *args, **kwargs):
+                if kwargs.get("dtype") is np.float32 and getattr(value, "dtype", None) == np.int8:
+                    converted.append(len(value))
+                return to_float(value, *args, **kwargs)
+
+            with patch.object(vector_snapshot, "SCORE_CHUNK_ROWS", 3), patch.object(
+                vector_snapshot.np, "asarray", tracking_asarray
+            ):
+                scores = snapshot.scores(query, 1, 9)
+
+        np.testing.assert_allclose(scores, expected, rtol=1e-6)
+        self.assertEqual(converted, [3, 3, 2])
+
+    def test_local_store_searches_snapshot_with_filter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_vector_snapshot(tmp, _records())
+            store = LocalVectorStoreClient(snapshot_path=tmp, embed_fn=_embed)
+            store._embedding_cache = None
+
+            self.assertEqual(sorted(store.list_namespaces()), ["a_issues", "b_issues"])
+            where = {"total_effort_hours": {"$gte": 1, "$lte": 40}}
+            matches = store.semantic_search("login", namespaces=["a_issues", "b_issues"], top_k=2, where=where)
+
+            self.assertEqual([m["id"] for m in matches], ["1", "3"])
+            self.assertGreater(matches[0]["score"], 0.99)
+            self.assertEqual(matches[0]["metadata"]["issue_type"], "Bug")
+
+    def test_upsert_overlays_base_row_and_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_vector_snapshot(tmp, _records())
+            store = LocalVectorStoreClient(snapshot_path=tmp, embed_fn=_embed)
+            store._embedding_cache = None
+            store.upsert(
+                [
+                    {
+                        "id": "1",
+                        "namespace": "a_issues",
+                        "text": "payment retry",
+                        "metadata": {"issue_id": 1, "total_effort_hours": 8},
+                    }
+                ]
+            )
+
+            matches = store.semantic_search("login", namespaces=["a_issues"], top_k=5)
+            by_id = {m["id"]: m for m in matches}
+            self.assertEqual(len(matches), 2)
+            self.assertEqual(by_id["1"]["metadata"]["total_effort_hours"], 8)
+
+            reopened = LocalVectorStoreClient(snapshot_path=tmp, embed_fn=_embed)
+            reopened._embedding_cache = None
+            matches = reopened.semantic_search("login", namespaces=["a_issues"], top_k=5)
+            self.assertEqual({m["id"]: m["metadata"]["total_effort_hours"] for m in matches}, {"1": 8, "2": 60})
+
+
+if __name__ == "__main__":
+    unittest.main()
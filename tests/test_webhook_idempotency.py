@@ -1,11 +1,16 @@
 import asyncio
 import os
 import sys
+import tempfile
 import unittest
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
-from web.idempotency import InMemoryIdempotencyStore
+from fastapi.responses import JSONResponse
+
+from fake_redis import FakeRedis
+from web.idempotency import InMemoryIdempotencyStore, RedisIdempotencyStore, SQLiteIdempotencyStore
 
 
 class TestInMemoryIdempotencyStore(unittest.TestCase):
@@ -57,6 +62,195 @@ class TestInMemoryIdempotencyStore(unittest.TestCase):
 
         asyncio.run(run())
 
+    def test_expired_keys_are_dropped_and_stale_heap_items_stay_bounded(self):
+        store = InMemoryIdempotencyStore(ttl_seconds=60, inflight_ttl_seconds=30)
+        clock = {"now": 1000.0}
+
+        async def run():
+            with patch("web.idempotency.time.monotonic", lambda: clock["now"]):
+                for idx in range(50):
+                    await store.reserve(f"done-{idx}")
+                    await store.mark_done(f"done-{idx}", {"status": "processed"})
+                # Release churn leaves stale heap items behind.
+                for _ in range(500):
+                    await store.reserve("flaky")
+                    await store.release("flaky")
+                self.assertLessEqual(len(store._expiry_heap), 2 * len(store._entries) + 64 + 2)
+
+                await store.reserve("stuck")
+                clock["now"] += 31
+                self.assertEqual((await store.reserve("stuck"))[0], "ok")
+                self.assertEqual((await store.reserve("done-0"))[0], "done")
+
+                clock["now"] += 30
+                await store.reserve("late")
+                self.assertEqual(set(store._entries), {"stuck", "late"})
+
+        asyncio.run(run())
+
+
+    def test_refresh_restarts_the_inflight_ttl(self):
+        store = InMemoryIdempotencyStore(ttl_seconds=60, inflight_ttl_seconds=30)
+        clock = {"now": 1000.0}
+
+        async def run():
+            with patch("web.idempotency.time.monotonic", lambda: clock["now"]):
+                await store.reserve("queued")
+                clock["now"] += 20
+                self.assertTrue(await store.refresh("queued"))
+                clock["now"] += 20
+                self.assertEqual((await store.reserve("queued"))[0], "in_progress")
+
+                await store.mark_done("queued", {"status": "processed"})
+                self.assertFalse(await store.refresh("queued"))
+
+        asyncio.run(run())
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _SharedStoreContract:
+    """Same expectations as the in-memory store, across two workers sharing a backend."""
+
+    def make_stores(self, clock):
+        raise NotImplementedError
+
+    def test_reserve_has_one_owner_across_workers(self):
+        worker_a, worker_b = self.make_stores(_Clock())
+
+        async def run():
+            results = await asyncio.gather(
+                *[(worker_a if idx % 2 else worker_b).reserve("k1") for idx in range(10)]
+            )
+            self.assertEqual([state for state, _ in results].count("ok"), 1)
+
+            await worker_a.mark_done("k1", {"status": "processed"})
+            self.assertEqual(await worker_b.reserve("k1"), ("done", {"status": "processed"}))
+
+        asyncio.run(run())
+
+    def test_release_and_ttls(self):
+        clock = _Clock()
+        worker_a, worker_b = self.make_stores(clock)
+
+        async def run():
+            self.assertEqual((await worker_a.reserve("k2"))[0], "ok")
+            await worker_a.release("k2")
+            self.assertEqual((await worker_b.reserve("k2"))[0], "ok")
+
+            # Stuck in-flight reservations expire after inflight_ttl_seconds.
+            clock.now += 31
+            self.assertEqual((await worker_a.reserve("k2"))[0], "ok")
+
+            await worker_a.mark_done("k2", {"status": "processed"})
+            await worker_b.release("k2")
+            self.assertEqual((await worker_b.reserve("k2"))[0], "done")
+            clock.now += 61
+            self.assertEqual((await worker_b.reserve("k2"))[0], "ok")
+
+        asyncio.run(run())
+
+    def test_refresh_extends_reservation_until_done(self):
+        clock = _Clock()
+        worker_a, worker_b = self.make_stores(clock)
+
+        async def run():
+            self.assertEqual((await worker_a.reserve("k4"))[0], "ok")
+            clock.now += 20
+            self.assertTrue(await worker_a.refresh("k4"))
+            clock.now += 20
+            self.assertEqual((await worker_b.reserve("k4"))[0], "in_progress")
+
+            # Expired meanwhile: refresh takes the reservation again.
+            clock.now += 31
+            self.assertTrue(await worker_a.refresh("k4"))
+            self.assertEqual((await worker_b.reserve("k4"))[0], "in_progress")
+
+            await worker_b.mark_done("k4", {"status": "processed"})
+            self.assertFalse(await worker_a.refresh("k4"))
+
+        asyncio.run(run())
+
+    def test_cached_json_response_keeps_status_and_body(self):
+        worker_a, worker_b = self.make_stores(_Clock())
+
+        async def run():
+            await worker_a.reserve("k3")
+            await worker_a.mark_done("k3", JSONResponse(status_code=202, content={"status": "ignored"}))
+            state, cached = await worker_b.reserve("k3")
+            self.assertEqual(state, "done")
+            self.assertEqual(cached.status_code, 202)
+            self.assertEqual(cached.body, b'{"status":"ignored"}')
+
+        asyncio.run(run())
+
+
+class TestSQLiteIdempotencyStore(_SharedStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_stores(self, clock):
+        path = os.path.join(self.tmp.name, "webhook_state.sqlite3")
+        return tuple(
+            SQLiteIdempotencyStore(path, ttl_seconds=60, inflight_ttl_seconds=30, now_fn=clock) for _ in range(2)
+        )
+
+    def test_expiry_sweep_uses_an_index(self):
+        store, _ = self.make_stores(_Clock())
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN DELETE FROM webhook_idempotency WHERE expires_at <= 0"
+        ).fetchall()
+        self.assertIn("webhook_idempotency_expires_at", " ".join(row[-1] for row in plan))
+
+
+class TestRedisIdempotencyStore(_SharedStoreContract, unittest.TestCase):
+    def make_stores(self, clock):
+        client = FakeRedis(now_fn=clock)
+        return tuple(
+            RedisIdempotencyStore(client, ttl_seconds=60, inflight_ttl_seconds=30) for _ in range(2)
+        )
+
+    def test_late_release_keeps_the_next_owners_reservation(self):
+        clock = _Clock()
+        worker_a, worker_b = self.make_stores(clock)
+
+        async def run():
+            await worker_a.reserve("k5")
+            clock.now += 31  # worker_a looks stuck; a redelivery reaches worker_b
+            self.assertEqual((await worker_b.reserve("k5"))[0], "ok")
+
+            self.assertFalse(await worker_a.refresh("k5"))
+            await worker_a.release("k5")
+            self.assertEqual((await worker_a.reserve("k5"))[0], "in_progress")
+            await worker_b.release("k5")
+            self.assertEqual((await worker_a.reserve("k5"))[0], "ok")
+
+        asyncio.run(run())
+
+    def test_refresh_without_a_token_takes_over_the_reservation(self):
+        clock = _Clock()
+        client = FakeRedis(now_fn=clock)
+        before_restart = RedisIdempotencyStore(client, ttl_seconds=60, inflight_ttl_seconds=30)
+        after_restart = RedisIdempotencyStore(client, ttl_seconds=60, inflight_ttl_seconds=30)
+
+        async def run():
+            await before_restart.reserve("k6")
+            # A durable job accepted before the restart runs on the new process.
+            self.assertTrue(await after_restart.refresh("k6"))
+            await after_restart.release("k6")
+            self.assertEqual((await before_restart.reserve("k6"))[0], "ok")
+
+        asyncio.run(run())
+
 
 if __name__ == "__main__":
     unittest.main()